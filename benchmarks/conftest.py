@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+"""Configuration of the benchmark suite.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--sizes",
+        default="small,medium",
+        help="Comma separated sizes of the energy systems to benchmark, "
+        "see `synthetic.SIZES`.",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "size" in metafunc.fixturenames:
+        sizes = metafunc.config.getoption("sizes").split(",")
+        metafunc.parametrize("size", sizes, scope="module")
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark for setting the bounds of the flow variables.
+
+The bulk bound assignment of
+:meth:`oemof.solph.models.Model._add_parent_block_variables` is compared with
+the former implementation, which set the bounds of every single variable
+through the flow attributes. The number of flows and the length of the time
+horizon are varied.
+
+Both methods include the construction of the pyomo variable itself, which is
+measured separately (column "variable") to show the share of the bound
+assignment.
+
+Run it with ``python benchmarks/flow_bounds.py``.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import gc
+import time
+
+import numpy as np
+import pandas as pd
+from pyomo import environ as po
+
+from oemof import solph
+
+
+def create_energy_system(n_flows, n_timesteps, seed=1):
+    """Create an energy system with `n_flows` flows between two buses."""
+    rng = np.random.default_rng(seed)
+    timeindex = pd.date_range("1/1/2020", periods=n_timesteps, freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bus = solph.Bus(label="bus")
+    es.add(bus)
+    for n in range(n_flows):
+        profile = rng.random(n_timesteps)
+        if n % 3 == 0:
+            flow = solph.Flow(nominal_value=10, fix=profile)
+        elif n % 3 == 1:
+            flow = solph.Flow(nominal_value=10, max=profile, min=0.1)
+        else:
+            flow = solph.Flow(variable_costs=1)
+        es.add(solph.Source(label="source_{0}".format(n), outputs={bus: flow}))
+    es.add(solph.Sink(label="sink", inputs={bus: solph.Flow()}))
+    return es
+
+
+def legacy_bounds(om):
+    """Element-wise bound assignment as done before the bulk assignment."""
+    om.flow = po.Var(om.FLOWS, om.TIMESTEPS, within=po.Reals)
+
+    for (o, i) in om.FLOWS:
+        if om.flows[o, i].nominal_value is not None:
+            if om.flows[o, i].fix[om.TIMESTEPS[1]] is not None:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].value = (
+                        om.flows[o, i].fix[t] * om.flows[o, i].nominal_value
+                    )
+                    om.flow[o, i, t].fix()
+            else:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].setub(
+                        om.flows[o, i].max[t] * om.flows[o, i].nominal_value
+                    )
+                if not om.flows[o, i].nonconvex:
+                    for t in om.TIMESTEPS:
+                        om.flow[o, i, t].setlb(
+                            om.flows[o, i].min[t]
+                            * om.flows[o, i].nominal_value
+                        )
+                elif (o, i) in om.UNIDIRECTIONAL_FLOWS:
+                    for t in om.TIMESTEPS:
+                        om.flow[o, i, t].setlb(0)
+        else:
+            if (o, i) in om.UNIDIRECTIONAL_FLOWS:
+                for t in om.TIMESTEPS:
+                    om.flow[o, i, t].setlb(0)
+
+
+def plain_variable(om):
+    """Create the flow variable without any bounds."""
+    om.flow = po.Var(om.FLOWS, om.TIMESTEPS, within=po.Reals)
+
+
+def measure(es, method):
+    """Return the time in seconds to create the flow variable."""
+    om = solph.Model(es, auto_construct=False)
+    om._add_parent_block_sets()
+    gc.collect()
+    start = time.perf_counter()
+    method(om)
+    return time.perf_counter() - start
+
+
+def main():
+    print(
+        "{0:>8} {1:>10} {2:>10} {3:>10} {4:>10} {5:>8}".format(
+            "flows", "timesteps", "variable", "legacy", "bulk", "speedup"
+        )
+    )
+    for n_flows, n_timesteps in [
+        (10, 8760),
+        (100, 168),
+        (100, 8760),
+        (400, 8760),
+    ]:
+        es = create_energy_system(n_flows, n_timesteps)
+        variable = measure(es, plain_variable)
+        legacy = measure(es, legacy_bounds)
+        bulk = measure(es, solph.Model._add_parent_block_variables)
+        print(
+            "{0:>8} {1:>10} {2:>10.3f} {3:>10.3f} {4:>10.3f} {5:>8.2f}".format(
+                n_flows,
+                n_timesteps,
+                variable,
+                legacy,
+                bulk,
+                (legacy - variable) / (bulk - variable),
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark for writing a model via the sparse matrix representation.
+
+A model of a synthetic energy system is built once. Writing an LP file with
+the pyomo writer is compared with the extraction of the
+:class:`~oemof.solph.matrix.LinearProgram` from the model and with the
+assembly of the program directly from the energy system (in one and in
+several processes), each followed by writing the LP file from it.
+
+The column "total" is the time for the whole run from the energy system to
+the LP file. It adds the time to build the model for the pyomo writer and
+the extraction. The assembly from the energy system does not build the
+pyomo constraints of the basic blocks and builds the blocks of the
+components in the given number of processes, its column "program" is the
+whole time from the energy system to the program.
+
+Run it with ``python benchmarks/matrix.py [timesteps]``.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+
+from synthetic import SIZES
+from synthetic import create_energy_system
+
+from oemof import solph
+from oemof.solph.matrix import LinearProgram
+
+
+def measure(function, *args, **kwargs):
+    """Return the result of a function and the time in seconds to call it."""
+    gc.collect()
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main(timesteps=720):
+    parameters = dict(SIZES["medium"], timesteps=timesteps)
+    om, build = measure(solph.Model, create_energy_system(**parameters))
+    processes = sorted({1, 2, 4, os.cpu_count() or 1})
+
+    print("build: {0:.2f} s, {1} cpus".format(build, os.cpu_count()))
+    print(
+        "{0:>24} {1:>10} {2:>10} {3:>10}".format(
+            "method", "program", "write", "total"
+        )
+    )
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, "model.lp")
+        _, write = measure(
+            om.write, filename, io_options={"symbolic_solver_labels": True}
+        )
+        print(
+            "{0:>24} {1:>10} {2:>10.2f} {3:>10.2f}".format(
+                "pyomo", "", write, build + write
+            )
+        )
+        lp, extract = measure(LinearProgram.from_model, om)
+        _, write = measure(lp.write_lp, filename)
+        print(
+            "{0:>24} {1:>10.2f} {2:>10.2f} {3:>10.2f}".format(
+                "model", extract, write, build + extract + write
+            )
+        )
+        for number in processes:
+            es = create_energy_system(**parameters)
+            lp, assemble = measure(
+                LinearProgram.from_energysystem, es, processes=number
+            )
+            _, write = measure(lp.write_lp, filename)
+            print(
+                "{0:>24} {1:>10.2f} {2:>10.2f} {3:>10.2f}".format(
+                    "energy system, {0} proc.".format(number),
+                    assemble,
+                    write,
+                    assemble + write,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark for the creation of the result dictionary.
+
+The array based extraction used by :func:`oemof.solph.processing.results` is
+compared with the element wise extraction via
+:func:`oemof.solph.processing.create_dataframe`. The model is not solved, the
+variables get random values instead.
+
+Run it with ``python benchmarks/results.py``.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import gc
+import time
+
+import numpy as np
+from flow_bounds import create_energy_system
+from pyomo.core.base.var import Var
+
+from oemof import solph
+from oemof.solph import processing
+
+
+def measure(om, function):
+    """Return the time in seconds to create the result dictionary."""
+    gc.collect()
+    start = time.perf_counter()
+    function(om)
+    return time.perf_counter() - start
+
+
+def main():
+    print(
+        "{0:>8} {1:>10} {2:>10} {3:>10} {4:>8}".format(
+            "flows", "timesteps", "legacy", "arrays", "speedup"
+        )
+    )
+    rng = np.random.default_rng(1)
+    for n_flows, n_timesteps in [(10, 8760), (100, 168), (100, 8760)]:
+        om = solph.Model(create_energy_system(n_flows, n_timesteps))
+        for var in om.component_data_objects(Var):
+            var.value = rng.random()
+        legacy = measure(om, processing._results_from_dataframe)
+        arrays = measure(om, processing._results_from_arrays)
+        print(
+            "{0:>8} {1:>10} {2:>10.3f} {3:>10.3f} {4:>8.2f}".format(
+                n_flows, n_timesteps, legacy, arrays, legacy / arrays
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
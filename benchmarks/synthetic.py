@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+"""Synthetic energy systems of parameterised size for the benchmarks.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import numpy as np
+import pandas as pd
+
+from oemof import solph
+
+DSM_APPROACHES = ("DIW", "DLR", "oemof")
+
+DSM_PARAMETERS = {
+    "DIW": {"delay_time": 2},
+    "DLR": {"delay_time": 2, "shift_time": 1},
+    "oemof": {"shift_interval": 4},
+}
+
+SIZES = {
+    "small": {
+        "timesteps": 24,
+        "buses": 2,
+        "transformers": 4,
+        "storages": 2,
+        "dsm": DSM_APPROACHES,
+        "nonconvex": 1,
+        "investment": 1,
+    },
+    "medium": {
+        "timesteps": 168,
+        "buses": 5,
+        "transformers": 20,
+        "storages": 5,
+        "dsm": DSM_APPROACHES,
+        "nonconvex": 5,
+        "investment": 5,
+    },
+    "large": {
+        "timesteps": 8760,
+        "buses": 10,
+        "transformers": 40,
+        "storages": 10,
+        "dsm": DSM_APPROACHES,
+        "nonconvex": 10,
+        "investment": 10,
+    },
+}
+
+
+def create_energy_system(
+    timesteps=24,
+    buses=2,
+    transformers=4,
+    storages=2,
+    dsm=DSM_APPROACHES,
+    nonconvex=1,
+    investment=1,
+    seed=1,
+):
+    """Create an energy system with the given number of components.
+
+    Every electricity bus has a demand, an excess sink and an expensive
+    shortage source and is connected to the next bus by two transformers
+    representing a line. The transformers, storages and demand side
+    management sinks are distributed over the buses in turn. All
+    transformers are fed by one gas bus.
+
+    Parameters
+    ----------
+    timesteps : int
+        Length of the time horizon in hours.
+    buses : int
+        Number of electricity buses.
+    transformers : int
+        Number of gas fired transformers.
+    storages : int
+        Number of storages.
+    dsm : iterable
+        Approach of every :class:`~oemof.solph.custom.SinkDSM`.
+    nonconvex : int
+        Number of transformers with a nonconvex output flow.
+    investment : int
+        Number of transformers and number of storages with an investment.
+    seed : int
+        Seed of the random profiles.
+
+    Examples
+    --------
+    >>> es = create_energy_system(**SIZES["small"])
+    >>> len(es.nodes)
+    21
+    """
+    rng = np.random.default_rng(seed)
+    timeindex = pd.date_range("1/1/2020", periods=timesteps, freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+
+    gas = solph.Bus(label="gas")
+    es.add(gas)
+    es.add(
+        solph.Source(
+            label="gas_source", outputs={gas: solph.Flow(variable_costs=30)}
+        )
+    )
+
+    electricity = []
+    for n in range(buses):
+        bus = solph.Bus(label="bus_{0}".format(n))
+        electricity.append(bus)
+        es.add(
+            bus,
+            solph.Sink(
+                label="demand_{0}".format(n),
+                inputs={
+                    bus: solph.Flow(
+                        nominal_value=50, fix=0.5 + 0.5 * rng.random(timesteps)
+                    )
+                },
+            ),
+            solph.Sink(
+                label="excess_{0}".format(n), inputs={bus: solph.Flow()}
+            ),
+            solph.Source(
+                label="shortage_{0}".format(n),
+                outputs={bus: solph.Flow(variable_costs=1000)},
+            ),
+        )
+    for n in range(buses - 1):
+        for a, b in ((n, n + 1), (n + 1, n)):
+            es.add(
+                solph.Transformer(
+                    label="line_{0}_{1}".format(a, b),
+                    inputs={electricity[a]: solph.Flow()},
+                    outputs={electricity[b]: solph.Flow(nominal_value=20)},
+                    conversion_factors={electricity[b]: 0.98},
+                )
+            )
+
+    for n in range(transformers):
+        bus = electricity[n % buses]
+        if n < nonconvex:
+            output = solph.Flow(
+                nominal_value=30,
+                min=0.4,
+                variable_costs=rng.random(),
+                nonconvex=solph.NonConvex(startup_costs=100),
+            )
+        elif n < nonconvex + investment:
+            output = solph.Flow(
+                variable_costs=rng.random(),
+                investment=solph.Investment(ep_costs=20, maximum=50),
+            )
+        else:
+            output = solph.Flow(nominal_value=30, variable_costs=rng.random())
+        es.add(
+            solph.Transformer(
+                label="transformer_{0}".format(n),
+                inputs={gas: solph.Flow()},
+                outputs={bus: output},
+                conversion_factors={bus: 0.3 + 0.3 * rng.random()},
+            )
+        )
+
+    for n in range(storages):
+        bus = electricity[n % buses]
+        if n < investment:
+            parameters = {
+                "investment": solph.Investment(ep_costs=10, maximum=100),
+                "invest_relation_input_capacity": 1 / 6,
+                "invest_relation_output_capacity": 1 / 6,
+            }
+            inputs = {bus: solph.Flow()}
+            outputs = {bus: solph.Flow()}
+        else:
+            parameters = {"nominal_storage_capacity": 100}
+            inputs = {bus: solph.Flow(nominal_value=20)}
+            outputs = {bus: solph.Flow(nominal_value=20, variable_costs=0.1)}
+        es.add(
+            solph.GenericStorage(
+                label="storage_{0}".format(n),
+                inputs=inputs,
+                outputs=outputs,
+                loss_rate=0.001,
+                inflow_conversion_factor=0.95,
+                outflow_conversion_factor=0.95,
+                **parameters,
+            )
+        )
+
+    for n, approach in enumerate(dsm):
+        bus = electricity[n % buses]
+        es.add(
+            solph.custom.SinkDSM(
+                label="dsm_{0}_{1}".format(approach, n),
+                inputs={bus: solph.Flow()},
+                demand=0.5 + 0.5 * rng.random(timesteps),
+                capacity_up=np.full(timesteps, 0.3),
+                capacity_down=np.full(timesteps, 0.3),
+                approach=approach,
+                max_demand=10,
+                max_capacity_up=10,
+                max_capacity_down=10,
+                cost_dsm_up=1,
+                cost_dsm_down_shift=1,
+                shed_eligibility=False,
+                **DSM_PARAMETERS[approach],
+            )
+        )
+    return es
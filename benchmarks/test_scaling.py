@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of the phases from an energy system to the results.
+
+The grouping of the energy system, the construction of the model, writing
+the LP file, solving with CBC and GLPK (if available) and creating the
+results and views are measured separately for synthetic energy systems of
+different sizes (see `synthetic.SIZES`).
+
+Run it with ``pytest benchmarks`` (requires `pytest-benchmark`). Select the
+sizes with ``--sizes=small,medium,large``. Use ``--benchmark-autosave`` to
+store the timings and ``--benchmark-compare --benchmark-compare-fail=mean:10%``
+to fail on regressions against the last stored run.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import shutil
+
+import pytest
+from pyomo.core.base.constraint import Constraint
+from pyomo.core.base.var import Var
+from synthetic import SIZES
+from synthetic import create_energy_system
+
+from oemof import solph
+from oemof.solph import processing
+from oemof.solph import views
+
+pytest.importorskip("pytest_benchmark")
+
+ROUNDS = 3
+
+SOLVER_EXECUTABLES = {"cbc": "cbc", "glpk": "glpsol"}
+
+
+@pytest.fixture(scope="module")
+def energysystem(size):
+    es = create_energy_system(**SIZES[size])
+    # group the energy system once, so it is not part of other benchmarks
+    es.groups
+    return es
+
+
+@pytest.fixture(scope="module")
+def model(energysystem):
+    return solph.Model(energysystem)
+
+
+@pytest.fixture(scope="module")
+def solved_model(energysystem):
+    if shutil.which("cbc") is None:
+        pytest.skip("cbc not found")
+    om = solph.Model(energysystem)
+    om.solve(solver="cbc")
+    return om
+
+
+@pytest.fixture(scope="module")
+def results(solved_model):
+    return processing.results(solved_model)
+
+
+@pytest.mark.benchmark(group="grouping")
+def test_grouping(benchmark, size):
+    def setup():
+        return (create_energy_system(**SIZES[size]),), {}
+
+    benchmark.pedantic(lambda es: es.groups, setup=setup, rounds=ROUNDS)
+
+
+@pytest.mark.benchmark(group="construction")
+def test_model_construction(benchmark, energysystem):
+    om = benchmark.pedantic(solph.Model, args=(energysystem,), rounds=ROUNDS)
+    benchmark.extra_info["variables"] = len(
+        list(om.component_data_objects(Var))
+    )
+    benchmark.extra_info["constraints"] = len(
+        list(om.component_data_objects(Constraint))
+    )
+
+
+@pytest.mark.benchmark(group="lp")
+def test_write_lp(benchmark, model, tmp_path):
+    benchmark.pedantic(
+        model.write,
+        args=(str(tmp_path / "model.lp"),),
+        kwargs={"io_options": {"symbolic_solver_labels": True}},
+        rounds=ROUNDS,
+    )
+
+
+@pytest.mark.benchmark(group="solve")
+@pytest.mark.parametrize("solver", sorted(SOLVER_EXECUTABLES))
+def test_solve(benchmark, model, solver):
+    if shutil.which(SOLVER_EXECUTABLES[solver]) is None:
+        pytest.skip("{0} not found".format(solver))
+    benchmark.pedantic(model.solve, kwargs={"solver": solver}, rounds=ROUNDS)
+
+
+@pytest.mark.benchmark(group="results")
+def test_results(benchmark, solved_model):
+    benchmark.pedantic(processing.results, args=(solved_model,), rounds=ROUNDS)
+
+
+@pytest.mark.benchmark(group="views")
+def test_views(benchmark, energysystem, results):
+    buses = [n for n in energysystem.nodes if isinstance(n, solph.Bus)]
+
+    def create_views():
+        for bus in buses:
+            views.node(results, bus)
+        views.node_weight_by_type(results, solph.GenericStorage)
+        views.net_storage_flow(results, solph.GenericStorage)
+
+    benchmark.pedantic(create_views, rounds=ROUNDS)
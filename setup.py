@@ -91,6 +91,9 @@ setup(
     extras_require={
         "dev": ["pytest", "sphinx", "sphinx_rtd_theme"],
         "dummy": ["oemof"],
+        "highs": ["highspy"],
+        "parquet": ["pyarrow"],
+        "hdf5": ["tables"],
     },
     entry_points={
         "console_scripts": [
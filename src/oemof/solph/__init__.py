@@ -23,3 +23,4 @@ from .options import NonConvex  # noqa: F401
 from .plumbing import sequence  # noqa: F401
 from .processing import parameter_as_dict  # noqa: F401
 from .processing import results  # noqa: F401
+from .rolling_horizon import RollingHorizon  # noqa: F401
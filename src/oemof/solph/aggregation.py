@@ -0,0 +1,344 @@
+# -*- coding: utf-8 -*-
+
+"""Time series aggregation to typical periods.
+
+The time horizon of an energy system is split into periods of equal length
+(e.g. days or weeks), which are clustered by their time series. A model built
+with :class:`TypicalPeriods` only contains the timesteps of one typical
+period per cluster. The costs of every timestep are weighted by the number of
+periods it represents and the storages are linked across the original
+sequence of periods (see
+:class:`~oemof.solph.components.generic_storage.GenericStorageBlock`).
+:func:`oemof.solph.processing.results` returns the results for the full
+time index.
+
+SPDX-License-Identifier: MIT
+
+"""
+from contextlib import contextmanager
+
+import numpy as np
+
+from oemof.solph.plumbing import _ScalarSequence
+from oemof.solph.plumbing import sequence
+from oemof.solph.rolling_horizon import _is_time_series
+from oemof.solph.rolling_horizon import _time_series_replacements
+from oemof.solph.rolling_horizon import time_series
+
+METHODS = ("kmeans", "kmedoids", "hierarchical")
+
+
+class TypicalPeriods:
+    """
+    Assignment of the periods of a time horizon to typical periods.
+
+    Parameters
+    ----------
+    order : array like
+        Number of the typical period of every original period.
+    period_length : int
+        Number of timesteps per period.
+    medoids : array like (optional)
+        Number of the original period which represents every typical period.
+        If None, a typical period is the mean of all periods assigned to it.
+
+    Examples
+    --------
+    >>> periods = TypicalPeriods([0, 1, 0], period_length=2)
+    >>> periods.weights
+    array([2, 1])
+    >>> periods.aggregate([1, 2, 5, 5, 3, 4])
+    array([2., 3., 5., 5.])
+    >>> periods.disaggregate([2, 3, 5, 5])
+    array([2, 3, 5, 5, 2, 3])
+    """
+
+    def __init__(self, order, period_length, medoids=None):
+        self.order = np.asarray(order, dtype=int)
+        self.period_length = period_length
+        self.medoids = None if medoids is None else np.asarray(medoids)
+        self.n_periods = len(self.order)
+        self.n_typical_periods = self.order.max() + 1
+        self.weights = np.bincount(
+            self.order, minlength=self.n_typical_periods
+        )
+        if (self.weights == 0).any():
+            raise ValueError("Every typical period needs an original period.")
+
+    @property
+    def timestep_weights(self):
+        """Number of original timesteps represented by every timestep of
+        the typical periods."""
+        return np.repeat(self.weights, self.period_length)
+
+    @property
+    def timestep_map(self):
+        """Position of every original timestep in the typical periods."""
+        steps = np.arange(self.period_length)
+        return (self.order[:, None] * self.period_length + steps).ravel()
+
+    def aggregate(self, values):
+        """Return the typical periods of a time series."""
+        length = self.n_periods * self.period_length
+        values = np.asarray(values, dtype=float)[:length]
+        if len(values) < length:
+            raise ValueError(
+                "The time series has {0} values, but {1} are needed.".format(
+                    len(values), length
+                )
+            )
+        periods = values.reshape(self.n_periods, self.period_length)
+        if self.medoids is not None:
+            return periods[self.medoids].ravel()
+        sums = np.zeros((self.n_typical_periods, self.period_length))
+        np.add.at(sums, self.order, periods)
+        return (sums / self.weights[:, None]).ravel()
+
+    def disaggregate(self, values):
+        """Return the time series of the original periods from the values
+        of the typical periods."""
+        return np.asarray(values)[self.timestep_map]
+
+    def aggregate_sequence(self, values):
+        """Aggregate a sequence, scalar sequences are kept."""
+        if isinstance(values, _ScalarSequence):
+            return values
+        return sequence(self.aggregate(values))
+
+    def weighted(self, values):
+        """Aggregate a sequence and multiply it with the timestep weights."""
+        if isinstance(values, _ScalarSequence):
+            return sequence(values.default * self.timestep_weights)
+        return sequence(self.aggregate(values) * self.timestep_weights)
+
+    @contextmanager
+    def applied(self, energysystem):
+        """Temporarily replace the time index, the time increment and all
+        time dependent attributes of an energy system by their typical
+        periods.
+        """
+        horizon = self.n_periods * self.period_length
+        if len(energysystem.timeindex) != horizon:
+            raise ValueError(
+                "The energy system has {0} timesteps, but the typical periods "
+                "cover {1}.".format(len(energysystem.timeindex), horizon)
+            )
+        replacements = _time_series_replacements(
+            energysystem, self.aggregate_sequence
+        )
+        length = self.n_typical_periods * self.period_length
+        replacements.append(
+            (energysystem, "timeindex", energysystem.timeindex[:length])
+        )
+        if _is_time_series(energysystem.timeincrement, horizon):
+            replacements.append(
+                (
+                    energysystem,
+                    "timeincrement",
+                    self.aggregate(energysystem.timeincrement),
+                )
+            )
+
+        replaced = []
+        try:
+            for obj, name, value in replacements:
+                replaced.append((obj, name, getattr(obj, name)))
+                setattr(obj, name, value)
+            yield energysystem
+        finally:
+            for obj, name, value in reversed(replaced):
+                setattr(obj, name, value)
+
+
+def cluster(
+    energysystem,
+    period_length,
+    n_typical_periods,
+    method="kmeans",
+    seed=None,
+    n_init=10,
+):
+    """
+    Cluster the periods of an energy system to typical periods.
+
+    All time dependent attributes of the nodes, flows and nonconvex options
+    are used as features. Every time series is scaled to the range from 0
+    to 1 first.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    period_length : int
+        Number of timesteps per period, e.g. 24 for days of hourly data.
+        The length of the time index has to be a multiple of it.
+    n_typical_periods : int
+        Number of typical periods.
+    method : str
+        "kmeans" (typical periods are the means of their clusters),
+        "kmedoids" (typical periods are original periods) or "hierarchical"
+        (Ward's method, typical periods are the means of their clusters).
+    seed : int (optional)
+        Seed of the initial centers of "kmeans" and "kmedoids".
+    n_init : int
+        Number of runs with different initial centers of "kmeans" and
+        "kmedoids". The best run is kept.
+
+    Returns
+    -------
+    TypicalPeriods
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=8, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+    ...     nominal_value=1, fix=[1, 2, 5, 5, 1, 2, 4, 4])}))
+    >>> periods = cluster(es, period_length=2, n_typical_periods=2)
+    >>> periods.order
+    array([0, 1, 0, 1])
+    >>> om = solph.Model(es, typical_periods=periods)
+    >>> len(om.TIMESTEPS)
+    4
+    """
+    if method not in METHODS:
+        raise ValueError(
+            "Unknown method {0}. Use one of {1}.".format(method, METHODS)
+        )
+    horizon = len(energysystem.timeindex)
+    if horizon % period_length != 0:
+        raise ValueError(
+            "The length of the time index ({0}) is not a multiple of the "
+            "period length ({1}).".format(horizon, period_length)
+        )
+    n_periods = horizon // period_length
+    if not 0 < n_typical_periods <= n_periods:
+        raise ValueError(
+            "The number of typical periods has to be between 1 and the "
+            "number of periods ({0}).".format(n_periods)
+        )
+
+    features = [np.zeros((n_periods, 0))]
+    for _, _, _, values in time_series(energysystem):
+        values = np.asarray(values, dtype=float)[:horizon]
+        spread = values.max() - values.min()
+        if spread > 0:
+            values = (values - values.min()) / spread
+            features.append(values.reshape(n_periods, period_length))
+    features = np.hstack(features)
+
+    rng = np.random.default_rng(seed)
+    medoids = None
+    if method == "hierarchical":
+        labels = _ward(features, n_typical_periods)
+    else:
+        best = None
+        for _ in range(n_init):
+            if method == "kmeans":
+                result = _kmeans(features, n_typical_periods, rng)
+            else:
+                result = _kmedoids(features, n_typical_periods, rng)
+            if best is None or result[0] < best[0]:
+                best = result
+        _, labels, medoids = best
+
+    # number the typical periods by their first occurrence
+    clusters, first, labels = np.unique(
+        labels, return_index=True, return_inverse=True
+    )
+    numbers = np.empty(len(clusters), dtype=int)
+    numbers[np.argsort(first)] = np.arange(len(clusters))
+    if medoids is not None:
+        medoids = medoids[clusters][np.argsort(numbers)]
+    return TypicalPeriods(numbers[labels], period_length, medoids)
+
+
+def _distances(features, centers):
+    """Squared euclidean distances of all features to all centers."""
+    return ((features[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+
+
+def _initial_centers(features, k, rng):
+    """Choose k initial centers with the k-means++ method."""
+    centers = [rng.integers(len(features))]
+    for _ in range(1, k):
+        distances = _distances(features, features[centers]).min(axis=1)
+        if distances.sum() == 0:
+            candidates = np.setdiff1d(np.arange(len(features)), centers)
+            centers.append(rng.choice(candidates))
+        else:
+            centers.append(
+                rng.choice(len(features), p=distances / distances.sum())
+            )
+    return np.array(centers)
+
+
+def _kmeans(features, k, rng, max_iter=300):
+    """Lloyd's algorithm. Returns (inertia, labels, None)."""
+    centers = features[_initial_centers(features, k, rng)]
+    labels = None
+    for _ in range(max_iter):
+        new_labels = _distances(features, centers).argmin(axis=1)
+        if labels is not None and (new_labels == labels).all():
+            break
+        labels = new_labels
+        for c in range(k):
+            members = features[labels == c]
+            if len(members) > 0:
+                centers[c] = members.mean(axis=0)
+    distances = _distances(features, centers)
+    labels = distances.argmin(axis=1)
+    if len(np.unique(labels)) < k:
+        # an empty cluster cannot be a typical period
+        return np.inf, labels, None
+    return distances.min(axis=1).sum(), labels, None
+
+
+def _kmedoids(features, k, rng, max_iter=300):
+    """Alternating k-medoids. Returns (inertia, labels, medoids)."""
+    distances = _distances(features, features)
+    medoids = _initial_centers(features, k, rng)
+    for _ in range(max_iter):
+        labels = distances[:, medoids].argmin(axis=1)
+        new_medoids = medoids.copy()
+        for c in range(k):
+            members = np.flatnonzero(labels == c)
+            if len(members) == 0:
+                continue
+            within = distances[np.ix_(members, members)].sum(axis=1)
+            new_medoids[c] = members[within.argmin()]
+        if (new_medoids == medoids).all():
+            break
+        medoids = new_medoids
+    labels = distances[:, medoids].argmin(axis=1)
+    inertia = distances[np.arange(len(features)), medoids[labels]].sum()
+    return inertia, labels, medoids
+
+
+def _ward(features, k):
+    """Agglomerative clustering with Ward's linkage. Returns the labels."""
+    n = len(features)
+    labels = np.arange(n)
+    sizes = np.ones(n)
+    active = np.ones(n, dtype=bool)
+    # Ward distance of two single points
+    distances = _distances(features, features) / 2
+    np.fill_diagonal(distances, np.inf)
+    for _ in range(n - k):
+        masked = np.where(active[:, None] & active[None, :], distances, np.inf)
+        a, b = np.unravel_index(masked.argmin(), masked.shape)
+        # Lance-Williams update of the distances to the merged cluster
+        total = sizes[a] + sizes[b] + sizes
+        distances[a] = (
+            (sizes[a] + sizes) * distances[a]
+            + (sizes[b] + sizes) * distances[b]
+            - sizes * distances[a, b]
+        ) / total
+        distances[:, a] = distances[a]
+        distances[a, a] = np.inf
+        sizes[a] += sizes[b]
+        active[b] = False
+        labels[labels == b] = a
+    return np.unique(labels, return_inverse=True)[1]
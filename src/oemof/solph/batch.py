@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+"""Batches of scenarios which differ from a base energy system by some
+parameters, e.g. for sensitivity analyses.
+
+Every process of the pool creates the base energy system and builds its model
+once. The scenarios are solved one after another with this model: changed
+sequences of flows (`fix`, `min`, `max` and `variable_costs`) are passed to
+:meth:`~oemof.solph.models.BaseModel.update_and_resolve`, which updates the
+bounds and the objective in place. Changes of `investment.ep_costs` only
+change the objective, which is summed again, and changes of the
+`nominal_storage_capacity` of a storage (without investment) update the
+bounds and balances of the storage in place. Only changes of other
+attributes rebuild the model. The parameters of a scenario are reset before
+the next scenario is solved.
+
+The results and meta results of all scenarios are collected in two tidy
+DataFrames. A scenario which raises an error is recorded with the status
+"error" and the error message in the meta results, the other scenarios are
+solved anyway.
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from oemof.solph import processing
+from oemof.solph.models import Model
+from oemof.solph.options import Investment
+from oemof.solph.plumbing import sequence
+
+SEQUENCES = ("fix", "min", "max", "variable_costs")
+
+RESULT_COLUMNS = (
+    "scenario",
+    "source",
+    "target",
+    "variable",
+    "timestep",
+    "value",
+)
+
+
+def solve_batch(
+    create,
+    overrides,
+    processes=None,
+    solver="cbc",
+    model_kwargs=None,
+    **kwargs,
+):
+    r"""Solve scenarios of an energy system in a pool of processes.
+
+    Every scenario is given by its overrides of the base energy system,
+    keyed by the label of a node or by the labels `(source, target)` of a
+    flow. The attributes of options are addressed with a dot, e.g.
+    `{("plant", "electricity"): {"variable_costs": 40}, "storage":
+    {"nominal_storage_capacity": 100, "investment.ep_costs": 12}}`.
+
+    Energy systems cannot be sent to other processes, so the base energy
+    system is given as a function which creates it. It has to be defined at
+    the top level of a module (or be a `functools.partial` of such a
+    function) to be passed to the processes.
+
+    Parameters
+    ----------
+    create : callable
+        Function without arguments which returns the base energy system.
+    overrides : dict or list
+        Overrides of every scenario keyed by the name of the scenario. A
+        list is keyed by the position of the scenarios.
+    processes : int or None
+        Number of processes. If None, the number of CPUs is used. With one
+        process the scenarios are solved in the current process.
+    solver : string
+        solver to be used e.g. "glpk","gurobi","cplex"
+    model_kwargs : dict (optional)
+        Arguments of :class:`~oemof.solph.models.Model`.
+    \**kwargs : keyword arguments
+        `solve_kwargs` and `cmdline_options` as in
+        :meth:`~oemof.solph.models.BaseModel.solve`.
+
+    Returns
+    -------
+    tuple : (results, meta)
+        `results` has one row per value with the columns
+        :attr:`RESULT_COLUMNS`. The `source` and `target` are the labels of
+        the nodes as strings, `target` is None for the variables of nodes
+        and `timestep` is NaT for scalars. `meta` has one row per scenario
+        with the `status` ("ok" or "error"), the `error` message of a failed
+        scenario, the objective and the flattened problem and solver
+        information of :func:`~oemof.solph.processing.meta_results`. Failed
+        scenarios have no results.
+
+    Examples
+    --------
+    >>> results, meta = solve_batch(
+    ...     create_energy_system,
+    ...     {"cheap": {("gas_source", "gas"): {"variable_costs": 20}},
+    ...      "expensive": {("gas_source", "gas"): {"variable_costs": 40}}},
+    ... )  # doctest: +SKIP
+    >>> meta["objective"]  # doctest: +SKIP
+    """
+    if not isinstance(overrides, dict):
+        overrides = dict(enumerate(overrides))
+    model_kwargs = {} if model_kwargs is None else model_kwargs
+    tasks = [
+        (name, override, solver, kwargs)
+        for name, override in overrides.items()
+    ]
+    if processes == 1:
+        worker = _Worker(create, model_kwargs)
+        solved = [worker.solve(*task) for task in tasks]
+    else:
+        with Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(create, model_kwargs),
+        ) as pool:
+            solved = pool.map(_solve_task, tasks)
+
+    frames = [frame for frame, _ in solved]
+    results = pd.concat(frames, ignore_index=True) if frames else None
+    meta = pd.DataFrame(
+        [row for _, row in solved],
+        index=pd.Index(list(overrides), name="scenario"),
+    )
+    return results, meta
+
+
+# worker of the current process of the pool, see `_init_worker`
+_WORKER = None
+
+
+def _init_worker(create, model_kwargs):
+    global _WORKER
+    _WORKER = _Worker(create, model_kwargs)
+
+
+def _solve_task(task):
+    return _WORKER.solve(*task)
+
+
+class _Worker:
+    """Energy system and model which are reused for all scenarios of a
+    process."""
+
+    def __init__(self, create, model_kwargs):
+        self.es = create()
+        self.model = Model(self.es, **model_kwargs)
+        # flows with changed bounds and costs and storages with a changed
+        # capacity in the previous scenario
+        self.changed = set()
+        self.storages = set()
+        # the model was built with changed parameters, which are not
+        # sequences of flows, in the previous scenario
+        self.rebuilt = False
+
+    def solve(self, name, override, solver, kwargs):
+        """Solve a scenario and return its tidy results and meta results.
+
+        Errors are logged and returned as meta results of the scenario.
+        """
+        try:
+            return self._solve(name, override, solver, kwargs)
+        except Exception as error:
+            logging.warning("Scenario {0} failed: {1!r}".format(name, error))
+            results = pd.DataFrame(columns=list(RESULT_COLUMNS))
+            return results, {"status": "error", "error": repr(error)}
+
+    def _solve(self, name, override, solver, kwargs):
+        originals = []
+        updates = {}
+        storages = set()
+        structural = False
+        rebuild = self.rebuilt
+        # the state of the model is unknown if solving fails
+        self.rebuilt = True
+        try:
+            for target, attributes in override.items():
+                obj = self._lookup(target)
+                for attribute, value in attributes.items():
+                    owner, attribute = _owner(obj, attribute)
+                    originals.append(
+                        (owner, attribute, getattr(owner, attribute))
+                    )
+                    if (
+                        owner is obj
+                        and isinstance(target, tuple)
+                        and attribute in SEQUENCES
+                    ):
+                        updates.setdefault(target, {})[attribute] = value
+                        structural = structural or not self.model._updatable(
+                            obj, attribute
+                        )
+                    elif isinstance(owner, Investment) and (
+                        attribute == "ep_costs"
+                    ):
+                        # only part of the objective, which is summed again
+                        pass
+                    elif self._capacity_updatable(owner, attribute):
+                        storages.add(owner)
+                    else:
+                        structural = True
+                    setattr(
+                        owner,
+                        attribute,
+                        sequence(value) if attribute in SEQUENCES else value,
+                    )
+
+            flows = {self._flow_nodes(target) for target in updates}
+            if rebuild or structural:
+                self.model._rebuild()
+                self.model.solve(solver=solver, **kwargs)
+            else:
+                # the capacities of the previous scenario are reset as well
+                if storages | self.storages:
+                    self.model.GenericStorageBlock._update_capacity(
+                        storages | self.storages
+                    )
+                    # the bounds of the storages are not sent to a
+                    # persistent solver
+                    self.model._persistent_solver = None
+                self.model.update_and_resolve(
+                    {flow: {} for flow in flows | self.changed},
+                    solver=solver,
+                    **kwargs,
+                )
+            self.changed = flows
+            self.storages = storages
+            self.rebuilt = structural
+            return _tidy(name, self.model), _flat_meta(self.model)
+        finally:
+            for owner, attribute, value in reversed(originals):
+                setattr(owner, attribute, value)
+
+    def _capacity_updatable(self, node, attribute):
+        """Whether the `nominal_storage_capacity` of a storage can be
+        updated in place by the
+        :class:`~oemof.solph.components.generic_storage.GenericStorageBlock`.
+        """
+        block = getattr(self.model, "GenericStorageBlock", None)
+        return (
+            attribute == "nominal_storage_capacity"
+            and block is not None
+            and self.model.typical_periods is None
+            and node in block.STORAGES
+        )
+
+    def _lookup(self, target):
+        """The node or the flow of a label or a tuple of labels."""
+        if isinstance(target, tuple):
+            return self.es.flows()[self._flow_nodes(target)]
+        return self.es.groups[target]
+
+    def _flow_nodes(self, target):
+        source, target = target
+        return self.es.groups[source], self.es.groups[target]
+
+
+def _owner(obj, attribute):
+    """The object holding a dotted attribute and the last attribute name,
+    e.g. the investment of a flow for "investment.ep_costs"."""
+    *path, attribute = attribute.split(".")
+    for name in path:
+        obj = getattr(obj, name)
+    return obj, attribute
+
+
+def _tidy(name, model):
+    """The results of a solved model as long DataFrame."""
+    frames = []
+    for (source, target), result in processing.results(model).items():
+        target = None if target is None else str(target)
+        sequences = result["sequences"]
+        if not sequences.empty:
+            frame = sequences.rename_axis("timestep").reset_index()
+            frame = frame.melt(id_vars="timestep", var_name="variable")
+            frame["source"] = str(source)
+            frame["target"] = target
+            frames.append(frame)
+        scalars = result["scalars"]
+        if not scalars.empty:
+            frames.append(
+                pd.DataFrame(
+                    {
+                        "source": str(source),
+                        "target": target,
+                        "variable": scalars.index,
+                        "timestep": pd.NaT,
+                        "value": scalars.values,
+                    }
+                )
+            )
+    frame = pd.concat(frames, ignore_index=True)
+    frame["scenario"] = name
+    return frame[list(RESULT_COLUMNS)]
+
+
+def _flat_meta(model):
+    """The meta results of a solved model as flat dictionary. Values which
+    are not numbers, e.g. the solver status, are converted to strings."""
+    meta = processing.meta_results(model)
+    row = {"status": "ok", "error": None, "objective": meta["objective"]}
+    for section in ("problem", "solver"):
+        for key, value in meta[section].items():
+            if not isinstance(value, (int, float, np.number)):
+                value = str(value)
+            row["{0} {1}".format(section, key).lower()] = value
+    return row
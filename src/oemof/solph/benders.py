@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+
+"""Benders decomposition of investment models.
+
+The investment decisions and their costs form the master problem. The
+operation is optimised in subproblems per time block (e.g. per week), which
+are built from the same blocks as a :class:`~oemof.solph.models.Model` for
+the time slice with the investments fixed to the values of the master
+problem. The duals of the fixing constraints are the marginal operating
+costs of the investments, from which an optimality cut per subproblem is
+added to the master problem. The subproblems are built for every
+evaluation and discarded after solving, so only the model of one time block
+per process is kept in memory. They can be distributed over several
+processes (requires the "fork" start method of :mod:`multiprocessing`, i.e.
+Linux).
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+import multiprocessing
+
+import numpy as np
+from pyomo import environ as po
+from pyomo.core.expr.current import identify_variables
+from pyomo.repn import generate_standard_repn
+
+from oemof.solph.models import Model
+from oemof.solph.rolling_horizon import time_slice
+
+
+class Benders:
+    r"""
+    Benders decomposition of an investment model into a master problem with
+    the investments and operational subproblems per time block.
+
+    The subproblems cover consecutive blocks of `block_length` timesteps.
+    The storages are balanced within every block, so the decomposition is
+    exact for a single block and an approximation with several blocks, as
+    `summed_max` and `summed_min` of flows are applied per block, too.
+
+    A subproblem has to be feasible for every investment. Therefore the
+    investments are fixed by soft constraints, whose deviations are
+    penalised with `penalty` per unit. The penalty has to exceed the
+    marginal operating costs of the investments.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    block_length : int
+        Number of timesteps of every subproblem.
+    processes : int
+        Number of processes which solve the subproblems. Falls back to one
+        process if the "fork" start method is not available.
+    penalty : float
+        Costs per unit deviation of the investments of a subproblem from the
+        investments of the master problem.
+    lower_bound : float
+        Lower bound of the operating costs of every subproblem, e.g. 0 if
+        there are no negative costs.
+    \**kwargs : keyword arguments
+        Passed to :class:`~oemof.solph.models.Model`.
+
+    Attributes
+    ----------
+    master : Model
+        The master problem. It is built for the first timestep, all
+        constraints with operational variables are deactivated. Constraints
+        on the investments can be added to it before solving.
+    investments : dict
+        The investments of the best solution keyed by `(source, target)` for
+        flows and `(storage, None)` for storages.
+    lower_bounds, upper_bounds : list
+        Lower and upper bound of the total costs in every iteration.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=4, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+    ...     nominal_value=1, fix=[2, 4, 3, 1])}))
+    >>> es.add(solph.Source(label="plant", outputs={bel: solph.Flow(
+    ...     variable_costs=1, investment=solph.Investment(ep_costs=2))}))
+    >>> es.add(solph.Source(label="shortage", outputs={bel: solph.Flow(
+    ...     variable_costs=10)}))
+    >>> benders = Benders(es, block_length=2)
+    >>> investments = benders.solve(solver="cbc")
+    >>> investments[es.groups["plant"], bel]
+    4.0
+    >>> benders.upper_bounds[-1]
+    18.0
+    """
+
+    def __init__(
+        self,
+        energysystem,
+        block_length,
+        processes=1,
+        penalty=1e6,
+        lower_bound=0,
+        **kwargs,
+    ):
+        horizon = len(energysystem.timeindex)
+        if block_length < 1:
+            raise ValueError("A block has to have at least one timestep.")
+        self.es = energysystem
+        self.blocks = [
+            (start, min(start + block_length, horizon))
+            for start in range(0, horizon, block_length)
+        ]
+        if "fork" not in multiprocessing.get_all_start_methods():
+            processes = 1
+        self.processes = max(1, min(processes, len(self.blocks)))
+        self.penalty = penalty
+        self.kwargs = kwargs
+        self.lower_bounds = []
+        self.upper_bounds = []
+        self.investments = None
+
+        with time_slice(energysystem, 0, 1):
+            self.master = Model(energysystem, **kwargs)
+        self._build_master(lower_bound)
+
+    def _build_master(self, lower_bound):
+        """Keep the constraints and objective terms of the investments."""
+        m = self.master
+        variables, investment_ids = _investment_variables(m)
+        if not variables:
+            raise ValueError("The energy system has no investments.")
+        self._keys = sorted(variables, key=str)
+        self._variables = [variables[k] for k in self._keys]
+
+        for con in m.component_data_objects(po.Constraint, active=True):
+            if not _only(con, investment_ids):
+                con.deactivate()
+        repn = generate_standard_repn(m.objective.expr, quadratic=False)
+        investment_costs = sum(
+            coef * var
+            for var, coef in zip(repn.linear_vars, repn.linear_coefs)
+            if id(var) in investment_ids
+        )
+        m.objective.deactivate()
+        m.BLOCKS = po.Set(initialize=range(len(self.blocks)), ordered=True)
+        m.operating_costs = po.Var(m.BLOCKS, bounds=(lower_bound, None))
+        m.cuts = po.ConstraintList()
+        m.master_objective = po.Objective(
+            expr=investment_costs + sum(m.operating_costs[b] for b in m.BLOCKS)
+        )
+        m.investment_costs = po.Expression(expr=investment_costs)
+
+    def solve(
+        self, solver="cbc", max_iterations=100, tolerance=1e-6, **kwargs
+    ):
+        r"""Solve the master problem and the subproblems alternately until
+        the gap of the bounds is small enough.
+
+        Parameters
+        ----------
+        solver : string
+            solver to be used e.g. "glpk","gurobi","cplex"
+        max_iterations : int
+            Maximum number of iterations.
+        tolerance : float
+            Relative gap of the lower and upper bound at which the
+            iterations stop.
+        \**kwargs : keyword arguments
+            Passed to :meth:`Model.solve` of the master problem and of every
+            subproblem.
+
+        Returns
+        -------
+        dict : The investments, see :attr:`investments`.
+        """
+        self.lower_bounds = []
+        self.upper_bounds = []
+        best = None
+        subproblems = _Subproblems(self, solver, kwargs)
+        try:
+            for iteration in range(max_iterations):
+                self.master.solve(solver=solver, **kwargs)
+                lower = po.value(self.master.master_objective)
+                investment = np.array(
+                    [po.value(v) for v in self._variables], dtype=float
+                )
+                evaluated = subproblems.evaluate(investment)
+                upper = po.value(self.master.investment_costs) + sum(
+                    costs for costs, _ in evaluated
+                )
+                if best is None or upper < best[0]:
+                    best = (upper, investment)
+                self.lower_bounds.append(lower)
+                self.upper_bounds.append(best[0])
+                logging.info(
+                    "Benders iteration {0}: lower bound {1}, upper bound "
+                    "{2}.".format(iteration + 1, lower, best[0])
+                )
+                if best[0] - lower <= tolerance * max(1, abs(best[0])):
+                    break
+                self._add_cuts(investment, evaluated)
+            else:
+                logging.warning(
+                    "Benders decomposition stopped after {0} iterations "
+                    "with a gap of {1}.".format(
+                        max_iterations, best[0] - self.lower_bounds[-1]
+                    )
+                )
+        finally:
+            subproblems.close()
+
+        self.investments = {
+            self._nodes(key): value for key, value in zip(self._keys, best[1])
+        }
+        return self.investments
+
+    def _add_cuts(self, investment, evaluated):
+        """Add an optimality cut for every subproblem."""
+        m = self.master
+        for block, (costs, duals) in zip(m.BLOCKS, evaluated):
+            m.cuts.add(
+                m.operating_costs[block]
+                >= costs
+                + sum(
+                    dual * (var - value)
+                    for var, dual, value in zip(
+                        self._variables, duals, investment
+                    )
+                    if dual != 0
+                )
+            )
+
+    def _nodes(self, key):
+        source, target = key
+        return (
+            self.es.groups[source],
+            None if target is None else self.es.groups[target],
+        )
+
+
+class _Subproblems:
+    """The subproblems of all blocks, solved in the current process or in
+    worker processes which solve a share of the subproblems."""
+
+    def __init__(self, benders, solver, solve_kwargs):
+        self.connections = []
+        self.workers = []
+        args = (
+            benders.es,
+            benders._keys,
+            benders.penalty,
+            benders.kwargs,
+            solver,
+            solve_kwargs,
+        )
+        if benders.processes == 1:
+            self.local = [
+                _Subproblem(*args, start, end) for start, end in benders.blocks
+            ]
+            return
+        self.local = None
+        context = multiprocessing.get_context("fork")
+        for number in range(benders.processes):
+            blocks = benders.blocks[number :: benders.processes]
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_serve, args=(child, blocks) + args, daemon=True
+            )
+            worker.start()
+            self.connections.append(parent)
+            self.workers.append(worker)
+
+    def evaluate(self, investment):
+        """Operating costs and marginal costs of the investments of all
+        blocks in the order of the blocks."""
+        if self.local is not None:
+            return [sub.evaluate(investment) for sub in self.local]
+        for connection in self.connections:
+            connection.send(investment)
+        shares = []
+        for connection in self.connections:
+            share = connection.recv()
+            if isinstance(share, Exception):
+                raise share
+            shares.append(share)
+        # the blocks were distributed round robin
+        evaluated = []
+        for number in range(max(len(share) for share in shares)):
+            evaluated.extend(
+                share[number] for share in shares if number < len(share)
+            )
+        return evaluated
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+        for worker in self.workers:
+            worker.join()
+
+
+def _serve(connection, blocks, *args):
+    """Evaluate the subproblems of the blocks for every investment received
+    until None is received."""
+    subproblems = [_Subproblem(*args, start, end) for start, end in blocks]
+    while True:
+        investment = connection.recv()
+        if investment is None:
+            break
+        try:
+            connection.send([sub.evaluate(investment) for sub in subproblems])
+        except Exception as e:
+            connection.send(e)
+
+
+class _Subproblem:
+    """Time block whose model is built with the investments fixed by soft
+    constraints for every evaluation and discarded after solving."""
+
+    def __init__(
+        self, energysystem, keys, penalty, kwargs, solver, solve_kwargs, *block
+    ):
+        self.es = energysystem
+        self.keys = keys
+        self.penalty = penalty
+        self.kwargs = kwargs
+        self.solver = solver
+        self.solve_kwargs = solve_kwargs
+        self.block = block
+
+    def _build(self, investment):
+        """The model of the time block with the investments fixed to the
+        given values."""
+        start, end = self.block
+        with time_slice(self.es, start, end):
+            m = Model(self.es, **self.kwargs)
+        variables, investment_ids = _investment_variables(m)
+        for con in m.component_data_objects(po.Constraint, active=True):
+            if _only(con, investment_ids):
+                con.deactivate()
+        repn = generate_standard_repn(m.objective.expr, quadratic=False)
+        operating_costs = repn.constant + sum(
+            coef * var
+            for var, coef in zip(repn.linear_vars, repn.linear_coefs)
+            if id(var) not in investment_ids
+        )
+        m.objective.deactivate()
+
+        keys = self.keys
+        m.INVESTMENTS = po.Set(initialize=range(len(keys)), ordered=True)
+        m.investment_surplus = po.Var(
+            m.INVESTMENTS, within=po.NonNegativeReals
+        )
+        m.investment_deficit = po.Var(
+            m.INVESTMENTS, within=po.NonNegativeReals
+        )
+        m.fixed_investment = po.Constraint(
+            m.INVESTMENTS,
+            rule=lambda m, j: variables[keys[j]]
+            - m.investment_surplus[j]
+            + m.investment_deficit[j]
+            == float(investment[j]),
+        )
+        m.subproblem_objective = po.Objective(
+            expr=operating_costs
+            + self.penalty
+            * sum(
+                m.investment_surplus[j] + m.investment_deficit[j]
+                for j in m.INVESTMENTS
+            )
+        )
+        m.receive_duals()
+        return m
+
+    def evaluate(self, investment):
+        """Return the costs and the marginal costs of the investments."""
+        m = self._build(investment)
+        results = m.solve(solver=self.solver, **self.solve_kwargs)
+        condition = results["Solver"][0]["Termination condition"]
+        if condition != "optimal":
+            raise ValueError(
+                "A subproblem could not be solved ({0}). It has to be "
+                "feasible for every investment.".format(condition)
+            )
+        duals = [m.dual[m.fixed_investment[j]] for j in m.INVESTMENTS]
+        return po.value(m.subproblem_objective), duals
+
+
+def _investment_variables(model):
+    """The investment variables of a model.
+
+    Returns
+    -------
+    tuple : (variables, ids)
+        The `invest` variables keyed by the labels `(source, target)` of
+        flows or `(storage, None)` of storages as strings and the ids of all
+        investment variables (including the status of nonconvex
+        investments).
+    """
+    variables = {}
+    ids = set()
+    for name in ("InvestmentFlow", "GenericInvestmentStorageBlock"):
+        block = model.component(name)
+        if block is None or block.component("invest") is None:
+            continue
+        for index, var in block.invest.items():
+            if isinstance(index, tuple):
+                key = (str(index[0]), str(index[1]))
+            else:
+                key = (str(index), None)
+            variables[key] = var
+            ids.add(id(var))
+        status = block.component("invest_status")
+        if status is not None:
+            ids.update(id(var) for var in status.values())
+    return variables, ids
+
+
+def _only(con, ids):
+    """Check if a constraint has variables, which all have one of the given
+    ids."""
+    variables = list(identify_variables(con.body, include_fixed=False))
+    return bool(variables) and all(id(var) in ids for var in variables)
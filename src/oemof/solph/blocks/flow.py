@@ -38,6 +38,9 @@ class Flow(SimpleBlock):
 
     **The following sets are created:** (-> see basic sets at :class:`.Model` )
 
+    FLOWS
+        A set of all flows of the block, whose costs are part of the
+        objective.
     SUMMED_MAX_FLOWS
         A set of flows with the attribute :attr:`summed_max` being not None.
     SUMMED_MIN_FLOWS
@@ -111,6 +114,8 @@ class Flow(SimpleBlock):
         m = self.parent_block()
 
         # ########################## SETS #################################
+        self.FLOWS = Set(initialize=[(g[0], g[1]) for g in group])
+
         # set for all flows with an global limit on the flow over time
         self.SUMMED_MAX_FLOWS = Set(
             initialize=[
@@ -257,12 +262,14 @@ class Flow(SimpleBlock):
         r"""Objective expression for all standard flows with fixed costs
         and variable costs.
         """
+        if not hasattr(self, "FLOWS"):
+            return 0
         m = self.parent_block()
 
         variable_costs = 0
         gradient_costs = 0
 
-        for i, o in m.FLOWS:
+        for i, o in self.FLOWS:
             if m.flows[i, o].variable_costs[0] is not None:
                 for t in m.TIMESTEPS:
                     variable_costs += (
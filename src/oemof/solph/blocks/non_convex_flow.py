@@ -20,6 +20,7 @@ from pyomo.core import Binary
 from pyomo.core import BuildAction
 from pyomo.core import Constraint
 from pyomo.core import Expression
+from pyomo.core import NonNegativeIntegers
 from pyomo.core import Set
 from pyomo.core import Var
 from pyomo.core.base.block import SimpleBlock
@@ -41,14 +42,14 @@ class NonConvexFlow(SimpleBlock):
     STARTUPFLOWS
         A subset of set NONCONVEX_FLOWS with the attribute
         `maximum_startups` or `startup_costs`
-        being not None.
+        being not None or in set SWITCHINGFLOWS.
     MAXSTARTUPFLOWS
         A subset of set STARTUPFLOWS with the attribute
         `maximum_startups` being not None.
     SHUTDOWNFLOWS
         A subset of set NONCONVEX_FLOWS with the attribute
         `maximum_shutdowns` or `shutdown_costs`
-        being not None.
+        being not None or in set SWITCHINGFLOWS.
     MAXSHUTDOWNFLOWS
         A subset of set SHUTDOWNFLOWS with the attribute
         `maximum_shutdowns` being not None.
@@ -58,6 +59,9 @@ class NonConvexFlow(SimpleBlock):
     MINDOWNTIMEFLOWS
         A subset of set NONCONVEX_FLOWS with the attribute
         `minimum_downtime` being not None.
+    SWITCHINGFLOWS
+        A subset of set MINUPTIMEFLOWS and MINDOWNTIMEFLOWS with the
+        attribute `up_down_formulation` being "startup".
     POSITIVE_GRADIENT_FLOWS
         A subset of set NONCONVEX_FLOWS with the attribute
         `positive_gradient` being not None.
@@ -78,6 +82,13 @@ class NonConvexFlow(SimpleBlock):
         Variable indicating shutdown of flow (component) indexed by
         SHUTDOWNFLOWS
 
+    For flows with more than one unit (`number_of_units` :math:`N(i, o)`),
+    the status, startup and shutdown variables are integers between 0 and
+    :math:`N(i, o)`, the number of units online, started and shut down. In
+    the constraints below, the nominal value is then the one of a single
+    unit, :math:`nominal\_value / N(i, o)`, and the `1` of the minimum
+    downtime constraint of the "startup" formulation is :math:`N(i, o)`.
+
     Positive gradient (continuous) `om.NonConvexFlow.positive_gradient`:
         Variable indicating the positive gradient, i.e. the load increase
         between two consecutive timesteps, indexed by
@@ -165,6 +176,56 @@ class NonConvexFlow(SimpleBlock):
             \{t\_max-minimum\_downtime..t\_max\} , \\
             \forall (i,o) \in \textrm{MINDOWNTIMEFLOWS}.
 
+    If `up_down_formulation` is "startup", the minimum up and downtimes
+    are formulated with the startups and shutdowns (turn-on and turn-off
+    inequalities) instead:
+
+    Switching constraint `om.NonConvexFlow.switching_constr[i,o,t]`
+        .. math::
+            status(i, o, t) - status(i, o, t-1) = \
+            startup(i, o, t) - shutdown(i, o, t) \\
+            \forall t \in \textrm{TIMESTEPS}, \\
+            \forall (i,o) \in \textrm{SWITCHINGFLOWS}.
+
+        It replaces the startup and shutdown constraints of these flows. In
+        the first time step, :math:`status(i, o, t-1)` is the
+        initial_status.
+
+    Minimum uptime constraint `om.NonConvexFlow.uptime_constr[i,o,t]`
+        .. math::
+            \sum_{n=t-minimum\_uptime+1}^{t} startup(i, o, n) \leq \
+            status(i, o, t) \\
+            \forall t \in \textrm{TIMESTEPS}, \\
+            \forall (i,o) \in \textrm{MINUPTIMEFLOWS} \cap \
+            \textrm{SWITCHINGFLOWS}.
+
+    Minimum downtime constraint `om.NonConvexFlow.downtime_constr[i,o,t]`
+        .. math::
+            \sum_{n=t-minimum\_downtime+1}^{t} shutdown(i, o, n) \leq \
+            1 - status(i, o, t) \\
+            \forall t \in \textrm{TIMESTEPS}, \\
+            \forall (i,o) \in \textrm{MINDOWNTIMEFLOWS} \cap \
+            \textrm{SWITCHINGFLOWS}.
+
+        The sums start at the first time step, the status is not fixed in
+        the edge regions.
+
+    If `initial_uptime` (`initial_downtime`) is given, the bounds of the
+    status of the first time steps are set to keep the units online
+    (offline) before the first time step for the rest of their minimum
+    uptime (downtime):
+
+        .. math::
+            status(i, o, t) \geq initial\_status(i, o) \\
+            \forall t < minimum\_uptime(i, o) - initial\_uptime(i, o), \\
+            \forall (i,o) \in \textrm{NONCONVEX\_FLOWS}.
+
+        .. math::
+            status(i, o, t) \leq initial\_status(i, o) \\
+            \forall t < minimum\_downtime(i, o) - initial\_downtime(i, o),
+            \\
+            \forall (i,o) \in \textrm{NONCONVEX\_FLOWS}.
+
     Positive gradient constraint
       `om.NonConvexFlow.positive_gradient_constr[i, o]`:
         .. math:: flow(i, o, t) \cdot status(i, o, t)
@@ -235,12 +296,24 @@ class NonConvexFlow(SimpleBlock):
         self.MIN_FLOWS = Set(
             initialize=[(g[0], g[1]) for g in group if g[2].min[0] is not None]
         )
+        self.SWITCHINGFLOWS = Set(
+            initialize=[
+                (g[0], g[1])
+                for g in group
+                if g[2].nonconvex.up_down_formulation == "startup"
+                and (
+                    g[2].nonconvex.minimum_uptime is not None
+                    or g[2].nonconvex.minimum_downtime is not None
+                )
+            ]
+        )
         self.STARTUPFLOWS = Set(
             initialize=[
                 (g[0], g[1])
                 for g in group
                 if g[2].nonconvex.startup_costs[0] is not None
                 or g[2].nonconvex.maximum_startups is not None
+                or (g[0], g[1]) in self.SWITCHINGFLOWS
             ]
         )
         self.MAXSTARTUPFLOWS = Set(
@@ -256,6 +329,7 @@ class NonConvexFlow(SimpleBlock):
                 for g in group
                 if g[2].nonconvex.shutdown_costs[0] is not None
                 or g[2].nonconvex.maximum_shutdowns is not None
+                or (g[0], g[1]) in self.SWITCHINGFLOWS
             ]
         )
         self.MAXSHUTDOWNFLOWS = Set(
@@ -306,13 +380,48 @@ class NonConvexFlow(SimpleBlock):
         )
 
         # ################### VARIABLES AND CONSTRAINTS #######################
-        self.status = Var(self.NONCONVEX_FLOWS, m.TIMESTEPS, within=Binary)
+        def _units(i, o):
+            return m.flows[i, o].nonconvex.number_of_units
+
+        def _unit_domain(block, i, o, t):
+            """Binary for one unit, the number of units for more units."""
+            return Binary if _units(i, o) == 1 else NonNegativeIntegers
+
+        def _unit_bounds(block, i, o, t):
+            return 0, _units(i, o)
+
+        self.status = Var(
+            self.NONCONVEX_FLOWS,
+            m.TIMESTEPS,
+            within=_unit_domain,
+            bounds=_unit_bounds,
+        )
+
+        # the units online (offline) before the first time step keep their
+        # status for the rest of their minimum uptime (downtime)
+        for i, o in self.NONCONVEX_FLOWS:
+            nonconvex = m.flows[i, o].nonconvex
+            horizon = len(m.TIMESTEPS)
+            for t in range(min(nonconvex.remaining_uptime, horizon)):
+                self.status[i, o, t].setlb(nonconvex.initial_status)
+            for t in range(min(nonconvex.remaining_downtime, horizon)):
+                self.status[i, o, t].setub(nonconvex.initial_status)
 
         if self.STARTUPFLOWS:
-            self.startup = Var(self.STARTUPFLOWS, m.TIMESTEPS, within=Binary)
+            self.startup = Var(
+                self.STARTUPFLOWS,
+                m.TIMESTEPS,
+                within=_unit_domain,
+                bounds=_unit_bounds,
+            )
 
         if self.SHUTDOWNFLOWS:
-            self.shutdown = Var(self.SHUTDOWNFLOWS, m.TIMESTEPS, within=Binary)
+            self.shutdown = Var(
+                self.SHUTDOWNFLOWS,
+                m.TIMESTEPS,
+                within=_unit_domain,
+                bounds=_unit_bounds,
+            )
 
         if self.POSITIVE_GRADIENT_FLOWS:
             self.positive_gradient = Var(
@@ -330,6 +439,7 @@ class NonConvexFlow(SimpleBlock):
                 self.status[i, o, t]
                 * m.flows[i, o].min[t]
                 * m.flows[i, o].nominal_value
+                / _units(i, o)
                 <= m.flow[i, o, t]
             )
             return expr
@@ -344,6 +454,7 @@ class NonConvexFlow(SimpleBlock):
                 self.status[i, o, t]
                 * m.flows[i, o].max[t]
                 * m.flows[i, o].nominal_value
+                / _units(i, o)
                 >= m.flow[i, o, t]
             )
             return expr
@@ -354,6 +465,8 @@ class NonConvexFlow(SimpleBlock):
 
         def _startup_rule(block, i, o, t):
             """Rule definition for startup constraint of nonconvex flows."""
+            if (i, o) in self.SWITCHINGFLOWS:
+                return Constraint.Skip
             if t > m.TIMESTEPS[1]:
                 expr = (
                     self.startup[i, o, t]
@@ -382,6 +495,8 @@ class NonConvexFlow(SimpleBlock):
 
         def _shutdown_rule(block, i, o, t):
             """Rule definition for shutdown constraints of nonconvex flows."""
+            if (i, o) in self.SWITCHINGFLOWS:
+                return Constraint.Skip
             if t > m.TIMESTEPS[1]:
                 expr = (
                     self.shutdown[i, o, t]
@@ -408,10 +523,36 @@ class NonConvexFlow(SimpleBlock):
             self.MAXSHUTDOWNFLOWS, rule=_max_shutdown_rule
         )
 
+        def _switching_rule(block, i, o, t):
+            """Rule definition for the relation of the status to the startups
+            and shutdowns of nonconvex flows."""
+            if t > m.TIMESTEPS[1]:
+                previous_status = self.status[i, o, t - 1]
+            else:
+                previous_status = m.flows[i, o].nonconvex.initial_status
+            return (
+                self.status[i, o, t] - previous_status
+                == self.startup[i, o, t] - self.shutdown[i, o, t]
+            )
+
+        self.switching_constr = Constraint(
+            self.SWITCHINGFLOWS, m.TIMESTEPS, rule=_switching_rule
+        )
+
         def _min_uptime_rule(block, i, o, t):
             """
             Rule definition for min-uptime constraints of nonconvex flows.
             """
+            if (i, o) in self.SWITCHINGFLOWS:
+                # turn-on inequality
+                first = max(
+                    m.TIMESTEPS[1],
+                    t - m.flows[i, o].nonconvex.minimum_uptime + 1,
+                )
+                startups = sum(
+                    self.startup[i, o, n] for n in range(first, t + 1)
+                )
+                return startups <= self.status[i, o, t]
             if (
                 m.flows[i, o].nonconvex.max_up_down
                 <= t
@@ -440,6 +581,16 @@ class NonConvexFlow(SimpleBlock):
             """
             Rule definition for min-downtime constraints of nonconvex flows.
             """
+            if (i, o) in self.SWITCHINGFLOWS:
+                # turn-off inequality
+                first = max(
+                    m.TIMESTEPS[1],
+                    t - m.flows[i, o].nonconvex.minimum_downtime + 1,
+                )
+                shutdowns = sum(
+                    self.shutdown[i, o, n] for n in range(first, t + 1)
+                )
+                return shutdowns <= _units(i, o) - self.status[i, o, t]
             if (
                 m.flows[i, o].nonconvex.max_up_down
                 <= t
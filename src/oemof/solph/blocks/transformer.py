@@ -15,10 +15,13 @@ SPDX-License-Identifier: MIT
 
 """
 
+import numpy as np
 from pyomo.core import BuildAction
 from pyomo.core import Constraint
 from pyomo.core.base.block import SimpleBlock
 
+from oemof.solph.plumbing import sequence_to_array
+
 
 class Transformer(SimpleBlock):
     r"""Block for the linear relation of nodes with type
@@ -41,6 +44,25 @@ class Transformer(SimpleBlock):
             \forall i \in \textrm{INPUTS(n)}, \\
             \forall o \in \textrm{OUTPUTS(n)},
 
+    If the model is built with `compact_transformer_relation=True`, every
+    flow is related to the reference input flow :math:`r` of the transformer
+    instead, which results in one constraint less than flows per transformer
+    and timestep. The reference is the input with the first label of the
+    inputs with a conversion factor which is not zero in the timestep:
+
+    Compact linear relation :attr:`om.Transformer.relation[n,p,t]`
+        .. math::
+            \P_{r,n}(t) \times \eta_{p}(t) = \
+            \P_{p}(t) \times \eta_{r,n}(t), \\
+            \forall t \in \textrm{TIMESTEPS}, \\
+            \forall n \in \textrm{TRANSFORMERS}, \\
+            \forall p \in \textrm{INPUTS(n)} \cup \textrm{OUTPUTS(n)}
+            \setminus \{r\},
+
+    In timesteps in which all inputs or all outputs of a transformer have a
+    conversion factor of zero, its flows are related pairwise as above in
+    :attr:`om.Transformer.relation_pairwise[n,i,o,t]`.
+
     ======================  ============================  =============
     symbol                  attribute                     explanation
     ======================  ============================  =============
@@ -81,6 +103,10 @@ class Transformer(SimpleBlock):
         in_flows = {n: [i for i in n.inputs.keys()] for n in group}
         out_flows = {n: [o for o in n.outputs.keys()] for n in group}
 
+        if m.compact_transformer_relation:
+            self._create_compact_relation(group, in_flows, out_flows)
+            return
+
         self.relation = Constraint(
             [
                 (n, i, o, t)
@@ -116,3 +142,116 @@ class Transformer(SimpleBlock):
                             block.relation.add((n, i, o, t), (lhs == rhs))
 
         self.relation_build = BuildAction(rule=_input_output_relation)
+
+    def _create_compact_relation(self, group, in_flows, out_flows):
+        """Relate every flow of a transformer to its reference input flow."""
+        m = self.parent_block()
+
+        # the order of the inputs is not fixed, so the reference is chosen
+        # by label to get the same constraints every time
+        references = {
+            n: _reference_inputs(
+                n,
+                sorted(in_flows[n], key=str),
+                out_flows[n],
+                len(m.TIMESTEPS),
+            )
+            for n in group
+            if in_flows[n] and out_flows[n]
+        }
+
+        # the inputs and the outputs with the flow index of each port
+        ports = {
+            n: [(i, (i, n)) for i in in_flows[n]]
+            + [(o, (n, o)) for o in out_flows[n]]
+            for n in references
+        }
+
+        self.relation = Constraint(
+            [
+                (n, p, t)
+                for t in m.TIMESTEPS
+                for n in ports
+                if references[n][t] is not None
+                for p, _ in ports[n]
+                if p is not references[n][t]
+            ],
+            noruleinit=True,
+        )
+        self.relation_pairwise = Constraint(
+            [
+                (n, i, o, t)
+                for t in m.TIMESTEPS
+                for n in ports
+                if references[n][t] is None
+                for o in out_flows[n]
+                for i in in_flows[n]
+            ],
+            noruleinit=True,
+        )
+
+        def _reference_relation(block):
+            for t in m.TIMESTEPS:
+                for n in ports:
+                    r = references[n][t]
+                    if r is None:
+                        for o in out_flows[n]:
+                            for i in in_flows[n]:
+                                block.relation_pairwise.add(
+                                    (n, i, o, t),
+                                    _relation(m, n, (i, n), o, (n, o), i, t),
+                                )
+                        continue
+                    for p, flow in ports[n]:
+                        if p is not r:
+                            block.relation.add(
+                                (n, p, t),
+                                _relation(m, n, (r, n), p, flow, r, t),
+                            )
+
+        self.relation_build = BuildAction(rule=_reference_relation)
+
+
+def _relation(m, n, flow_a, factor_a, flow_b, factor_b, t):
+    """The relation `flow_a * factor_a == flow_b * factor_b` of the flows
+    of a transformer, with the conversion factors of the given ports."""
+    try:
+        lhs = (
+            m.flow[flow_a[0], flow_a[1], t] * n.conversion_factors[factor_a][t]
+        )
+        rhs = (
+            m.flow[flow_b[0], flow_b[1], t] * n.conversion_factors[factor_b][t]
+        )
+    except ValueError:
+        raise ValueError(
+            "Error in constraint creation",
+            "source: {0}, target: {1}".format(
+                flow_b[0].label, flow_b[1].label
+            ),
+        )
+    return lhs == rhs
+
+
+def _reference_inputs(n, inputs, outputs, length):
+    """The reference input of a transformer in every timestep: the first of
+    the inputs with a conversion factor which is not zero.
+
+    A flow with a zero conversion factor is only related to the others if
+    the reference has a nonzero factor, and the inputs are only related to
+    each other by the outputs. The reference is None in the timesteps
+    without an input or without an output with a nonzero factor, which are
+    related pairwise.
+    """
+
+    def nonzero(ports):
+        return np.array(
+            [
+                sequence_to_array(n.conversion_factors[p], length) != 0
+                for p in ports
+            ]
+        )
+
+    inputs_nonzero = nonzero(inputs)
+    first = inputs_nonzero.argmax(axis=0)
+    valid = inputs_nonzero.any(axis=0) & nonzero(outputs).any(axis=0)
+    return [inputs[k] if v else None for k, v in zip(first, valid)]
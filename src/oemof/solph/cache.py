@@ -0,0 +1,688 @@
+# -*- coding: utf-8 -*-
+
+"""Disk cache of the linear programs of solph models.
+
+Energy systems which are optimised repeatedly with new input data, e.g.
+every day with new profiles, lead to models with the same structure. Only
+the bounds and the costs of the flow variables differ. A :class:`ModelCache`
+stores the :class:`~oemof.solph.matrix.LinearProgram` of a model on disk
+under the fingerprint of the structure of its energy system. If an energy
+system with a known fingerprint is passed again, the model is not built.
+The stored program is loaded and the bounds and objective coefficients of
+its flow columns are replaced by the values of the energy system.
+
+The structure comprises the model arguments, the time increment, the number
+of timesteps and the types, labels and attributes of all nodes and flows
+(functions, e.g. the `conversion_function` of a piecewise linear
+transformer, by their code, defaults, closure and the data they refer to),
+except the data attributes (:attr:`DATA_ATTRIBUTES`) of flows without
+investment and nonconvex option. These attributes only define the bounds
+and the objective coefficients of the flow variables, so they can be
+changed without changing the structure. Fixed flows are stored as columns
+with equal bounds, so the `fix` of a flow can change, too. All other data is
+part of the fingerprint, e.g. changed conversion factors of transformers or
+changed profiles of storages (e.g. `fixed_losses_relative`) and of SinkDSM
+components (e.g. `demand`) always miss the cache.
+
+:meth:`ModelCache.solve` solves the program with HiGHS (see
+:func:`oemof.solph.highs.solve_linear_program`) and returns the results in
+the format of :func:`oemof.solph.processing.results` and
+:func:`oemof.solph.processing.meta_results`. The columns of the results are
+stored with every entry.
+
+SPDX-License-Identifier: MIT
+
+"""
+import functools
+import glob
+import hashlib
+import json
+import os
+import time
+import types
+import warnings
+
+import numpy as np
+import pandas as pd
+from oemof.network.network import Node
+from pyomo.core.base.label import TextLabeler
+from pyomo.core.base.var import Var
+
+from oemof.solph import highs
+from oemof.solph.matrix import LinearProgram
+from oemof.solph.models import Model
+from oemof.solph.models import _flow_bounds
+from oemof.solph.processing import _grouped_arrays
+from oemof.solph.processing import _index_codes
+from oemof.solph.processing import _is_auxiliary
+from oemof.solph.processing import _meta_results
+from oemof.solph.processing import _result_entry
+from oemof.solph.processing import _UnsupportedStructure
+from oemof.solph.plumbing import _ArraySequence
+from oemof.solph.plumbing import _ScalarSequence
+from oemof.solph.plumbing import _Sequence
+from oemof.solph.plumbing import sequence_to_array
+
+# attributes of flows without investment and nonconvex option, which are not
+# part of the structure
+DATA_ATTRIBUTES = ("fix", "min", "max", "variable_costs")
+
+# version of the stored format, part of every fingerprint
+_VERSION = 2
+
+
+class ModelCache:
+    """
+    Disk cache of the linear programs of energy systems.
+
+    The entries are files in `directory`. If a limit is exceeded after an
+    entry has been stored, the least recently used entries are removed.
+
+    Parameters
+    ----------
+    directory : str
+        Directory of the cache, it is created if it does not exist.
+    max_entries : int (optional)
+        Maximum number of entries.
+    max_size : int (optional)
+        Maximum total size of the entries in bytes.
+
+    Attributes
+    ----------
+    hits : int
+        Number of linear programs taken from the cache.
+    misses : int
+        Number of linear programs built from a model.
+
+    Examples
+    --------
+    >>> import tempfile
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> def energy_system(demand):
+    ...     es = solph.EnergySystem(
+    ...         timeindex=pd.date_range("1/1/2020", periods=3, freq="H"))
+    ...     bel = solph.Bus(label="electricity")
+    ...     es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+    ...         nominal_value=1, fix=demand)}), solph.Source(label="plant",
+    ...         outputs={bel: solph.Flow(variable_costs=2)}))
+    ...     return es
+    >>> cache = ModelCache(tempfile.mkdtemp())
+    >>> lp = cache.linear_program(energy_system([1, 2, 3]))
+    >>> lp = cache.linear_program(energy_system([3, 2, 1]))
+    >>> cache.hits, cache.misses
+    (1, 1)
+    >>> lp.col_upper[lp.col_names.index("flow(electricity_demand_0)")]
+    3.0
+    """
+
+    def __init__(self, directory, max_entries=None, max_size=None):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def linear_program(self, energysystem, **kwargs):
+        """Return the linear program of the model of an energy system.
+
+        Parameters
+        ----------
+        energysystem : EnergySystem object
+        kwargs :
+            Arguments of :class:`~oemof.solph.models.Model`.
+
+        Returns
+        -------
+        LinearProgram
+            The columns and rows are named symbolically. If the program is
+            taken from the cache, it has no pyomo `variables` and
+            `constraints`.
+        """
+        return self._entry(energysystem, kwargs)[0]
+
+    def solve(
+        self, energysystem, solve_kwargs=None, cmdline_options=None, **kwargs
+    ):
+        """Solve the model of an energy system with HiGHS. Its linear
+        program is taken from the cache or built and stored.
+
+        Parameters
+        ----------
+        energysystem : EnergySystem object
+        solve_kwargs : dict (optional)
+            Only `tee` is used, see :meth:`~oemof.solph.models.Model.solve`.
+        cmdline_options : dict (optional)
+            Options of HiGHS, e.g. `{"time_limit": 60}`.
+        kwargs :
+            Arguments of :class:`~oemof.solph.models.Model`.
+
+        Returns
+        -------
+        tuple : (results, meta_results)
+            The results as :func:`oemof.solph.processing.results` (without
+            duals) and :func:`oemof.solph.processing.meta_results` create
+            them for a solved model. The results are empty, if no feasible
+            solution was found.
+
+        Raises
+        ------
+        ValueError
+            If the variables of the model cannot be split into oemof tuples
+            and timesteps column wise (see
+            :func:`oemof.solph.processing.results`).
+        """
+        lp, columns = self._entry(energysystem, kwargs)
+        if columns is None:
+            raise ValueError(
+                "The results of the model cannot be created from the "
+                "solution of its linear program."
+            )
+        solver_results, values = highs.solve_linear_program(
+            lp,
+            name=kwargs.get("name", Model.__name__),
+            solve_kwargs=solve_kwargs or {},
+            cmdline_options=cmdline_options or {},
+        )
+        status = solver_results["Solver"][0]["Status"]
+        termination_condition = solver_results["Solver"][0][
+            "Termination condition"
+        ]
+        if status != "ok" or termination_condition != "optimal":
+            msg = (
+                "Optimization ended with status {0} and termination "
+                "condition {1}"
+            )
+            warnings.warn(
+                msg.format(status, termination_condition), UserWarning
+            )
+        if values is None:
+            return {}, _meta_results(solver_results, None)
+        objective = float(lp.objective @ values + lp.objective_constant)
+        return (
+            _results(energysystem, columns, values),
+            _meta_results(solver_results, objective),
+        )
+
+    def _entry(self, energysystem, kwargs):
+        """The linear program of an energy system and the columns of its
+        results (see :func:`_result_columns`), taken from the cache or
+        built and stored."""
+        if kwargs.get("typical_periods") is not None:
+            raise ValueError("Models with typical periods cannot be cached.")
+        path = self._path(fingerprint(energysystem, **kwargs))
+        if os.path.exists(path):
+            self.hits += 1
+            _touch(path)
+            lp, columns, weighting, results = _load(path)
+            _update(lp, energysystem, columns, weighting)
+            return lp, results
+        self.misses += 1
+        lp, columns, weighting, results = _compile(energysystem, kwargs)
+        _save(path, lp, columns, weighting, results)
+        _touch(path)
+        self._evict(keep=path)
+        return lp, results
+
+    def clear(self):
+        """Remove all entries."""
+        for path in self._entries():
+            os.remove(path)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _entries(self):
+        """Paths of the entries, the most recently used first."""
+        return sorted(
+            glob.glob(os.path.join(self.directory, "*.npz")),
+            key=lambda path: os.stat(path).st_mtime_ns,
+            reverse=True,
+        )
+
+    def _evict(self, keep):
+        """Remove the least recently used entries exceeding the limits."""
+        number = size = 0
+        for path in self._entries():
+            entry_size = os.path.getsize(path)
+            if path != keep and (
+                (self.max_entries is not None and number >= self.max_entries)
+                or (
+                    self.max_size is not None
+                    and size + entry_size > self.max_size
+                )
+            ):
+                os.remove(path)
+                continue
+            number += 1
+            size += entry_size
+
+
+def fingerprint(energysystem, **kwargs):
+    """Fingerprint of the structure of the model of an energy system.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    kwargs :
+        Arguments of :class:`~oemof.solph.models.Model`.
+
+    Returns
+    -------
+    str : Hexadecimal SHA-256 digest.
+    """
+    horizon = len(energysystem.timeindex)
+    digest = hashlib.sha256()
+    _feed(digest, (_VERSION, horizon), horizon)
+    _feed(digest, sorted(kwargs.items()), horizon)
+    _feed(digest, energysystem.timeincrement, horizon)
+    _feed(digest, getattr(energysystem.timeindex, "freqstr", None), horizon)
+    for node in energysystem.nodes:
+        _feed(digest, (type(node), str(node.label), vars(node)), horizon)
+        for target, flow in node.outputs.items():
+            attributes = vars(flow)
+            if _is_data_flow(flow):
+                attributes = {
+                    k: v
+                    for k, v in attributes.items()
+                    if k not in DATA_ATTRIBUTES
+                }
+            _feed(digest, (target, attributes), horizon)
+    return digest.hexdigest()
+
+
+def _is_data_flow(flow):
+    """Check if the data attributes of a flow only define the bounds and
+    the objective coefficients of its flow variables."""
+    return flow.investment is None and not flow.nonconvex
+
+
+def _feed(digest, obj, horizon):
+    """Add a description of an object to a hash."""
+    if isinstance(obj, Node):
+        digest.update(b"node:" + str(obj.label).encode())
+    elif obj is None or isinstance(obj, (bool, int, float, str, np.number)):
+        digest.update(repr(obj).encode())
+    elif isinstance(obj, (_ArraySequence, _ScalarSequence, _Sequence)):
+        _feed_array(digest, sequence_to_array(obj, horizon))
+    elif isinstance(obj, type):
+        digest.update(
+            "type:{0}.{1}".format(obj.__module__, obj.__qualname__).encode()
+        )
+    elif isinstance(obj, types.FunctionType):
+        _feed_function(digest, obj, horizon)
+    elif isinstance(obj, types.CodeType):
+        _feed_code(digest, obj, horizon)
+    elif isinstance(obj, types.MethodType):
+        _feed(digest, (obj.__func__, obj.__self__), horizon)
+    elif isinstance(obj, functools.partial):
+        _feed(digest, (obj.func, obj.args, obj.keywords), horizon)
+    elif isinstance(obj, (set, frozenset)):
+        digest.update(repr(sorted(repr(v) for v in obj)).encode())
+    elif isinstance(obj, dict):
+        # the order of the attributes of nodes and flows depends on the
+        # order of sets, which changes between interpreter runs
+        digest.update(b"{")
+        for key, value in sorted(
+            obj.items(), key=lambda item: _sort_key(item[0])
+        ):
+            _feed(digest, key, horizon)
+            _feed(digest, value, horizon)
+        digest.update(b"}")
+    elif isinstance(obj, (np.ndarray, pd.Series, pd.Index)):
+        _feed_array(digest, np.asarray(obj))
+    elif isinstance(obj, (list, tuple)):
+        if all(isinstance(v, (int, float, np.number)) for v in obj):
+            _feed_array(digest, np.asarray(obj))
+        else:
+            digest.update(b"[")
+            for value in obj:
+                _feed(digest, value, horizon)
+            digest.update(b"]")
+    elif hasattr(obj, "__dict__"):
+        _feed(digest, (type(obj), vars(obj)), horizon)
+    else:
+        digest.update(repr(obj).encode())
+
+
+def _sort_key(key):
+    """Key to sort the keys of a dictionary independent of their type."""
+    if isinstance(key, Node):
+        return "node:" + str(key.label)
+    return "{0}:{1!r}".format(type(key).__name__, key)
+
+
+def _feed_function(digest, function, horizon, seen=()):
+    """Add a function to a hash: its code, defaults and the values of its
+    closure and of the global names it refers to. Functions referred to are
+    added in the same way, unless they are already being added (`seen`)."""
+    seen = seen + (function,)
+    digest.update(b"function:")
+    _feed_code(digest, function.__code__, horizon)
+    _feed(digest, function.__defaults__, horizon)
+    _feed(digest, function.__kwdefaults__, horizon)
+    for cell in function.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            # empty cell
+            value = None
+        _feed_reference(digest, value, horizon, seen)
+    for name in sorted(_global_names(function.__code__)):
+        if name in function.__globals__:
+            digest.update(name.encode())
+            _feed_reference(digest, function.__globals__[name], horizon, seen)
+
+
+def _feed_code(digest, code, horizon):
+    """Add the byte code, the constants and the names of code to a hash."""
+    digest.update(b"code:" + code.co_code)
+    _feed(digest, code.co_consts, horizon)
+    _feed(digest, code.co_names, horizon)
+
+
+def _feed_reference(digest, value, horizon, seen):
+    """Add a value referred to by a function to a hash. Modules, classes
+    and callables which are no Python functions (e.g. numpy functions) are
+    added by their name."""
+    if isinstance(value, types.FunctionType):
+        if any(value is function for function in seen):
+            digest.update(b"recursion")
+        else:
+            _feed_function(digest, value, horizon, seen)
+    elif isinstance(value, types.ModuleType):
+        digest.update("module:{0}".format(value.__name__).encode())
+    elif isinstance(value, type) or callable(value):
+        digest.update(
+            "callable:{0}.{1}".format(
+                getattr(value, "__module__", None),
+                getattr(value, "__qualname__", repr(value)),
+            ).encode()
+        )
+    else:
+        _feed(digest, value, horizon)
+
+
+def _global_names(code):
+    """The names used by code and by the code of nested functions."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _feed_array(digest, values):
+    """Add the values of an array to a hash."""
+    if values.dtype.kind in "biuf":
+        values = np.ascontiguousarray(values, dtype=float)
+        digest.update(b"array:" + repr(values.shape).encode())
+        digest.update(values.tobytes())
+    else:
+        digest.update(repr(values.tolist()).encode())
+
+
+def _compile(energysystem, kwargs):
+    """Build the model of an energy system and create its linear program.
+
+    Returns
+    -------
+    tuple : (LinearProgram, columns, weighting, results)
+        `columns` holds the column of every flow (rows in the order of
+        `energysystem.flows()`) and timestep, `weighting` the objective
+        weighting of the timesteps and `results` the columns of the results
+        (see :func:`_result_columns`).
+    """
+    model = Model(energysystem, **kwargs)
+    for var in model.flow.values():
+        if var.fixed:
+            var.setlb(var.value)
+            var.setub(var.value)
+            var.unfix()
+    lp = LinearProgram.from_model(model)
+
+    index = {id(var): col for col, var in enumerate(lp.variables)}
+    missing = [var for var in model.flow.values() if id(var) not in index]
+    if missing:
+        _add_columns(lp, missing)
+        first = lp.num_cols - len(missing)
+        for number, var in enumerate(missing):
+            index[id(var)] = first + number
+    columns = np.array(
+        [
+            [index[id(model.flow[o, i, t])] for t in model.TIMESTEPS]
+            for (o, i) in model.flows
+        ],
+        dtype=np.int64,
+    ).reshape(len(model.flows), len(model.TIMESTEPS))
+    weighting = sequence_to_array(
+        model.objective_weighting, len(model.TIMESTEPS)
+    ).astype(float)
+    return lp, columns, weighting, _result_columns(model, index)
+
+
+def _result_columns(model, index):
+    """The oemof tuple, variable name and timestep of every column of the
+    linear program of a model, which is part of the results. The index is
+    split as :func:`oemof.solph.processing.results` does it.
+
+    Parameters
+    ----------
+    model : Model
+    index : dict
+        Column of the variables of the model by their id.
+
+    Returns
+    -------
+    tuple or None : (keys, names, columns)
+        The oemof tuples, the variable names and an array of the column,
+        oemof tuple, variable name and timestep of every result. An oemof
+        tuple is stored as list of the node labels with a leading True or
+        as block and variable name with a leading False. None, if a variable
+        cannot be split column wise.
+    """
+    keys = {}
+    names = {}
+    results = []
+    for bv in model.component_objects(Var, descend_into=True):
+        data = [(i, var) for i, var in bv._data.items() if id(var) in index]
+        if _is_auxiliary(bv) or not data:
+            continue
+        block_name = str(bv).split(".")[0]
+        variable_name = str(bv).split(".")[-1]
+        try:
+            codes, tuples, timesteps = _index_codes(
+                [i for i, _ in data], block_name, variable_name
+            )
+        except _UnsupportedStructure:
+            return None
+        key_codes = np.array(
+            [
+                keys.setdefault(
+                    json.dumps(
+                        [True] + [str(n.label) for n in key]
+                        if isinstance(key[0], Node)
+                        else [False] + list(key)
+                    ),
+                    len(keys),
+                )
+                for key in tuples
+            ],
+            dtype=np.int64,
+        )
+        results.append(
+            np.array(
+                [
+                    [index[id(var)] for _, var in data],
+                    key_codes[codes],
+                    np.full(
+                        len(data), names.setdefault(variable_name, len(names))
+                    ),
+                    timesteps,
+                ],
+                dtype=np.int64,
+            )
+        )
+    columns = (
+        np.concatenate(results, axis=1)
+        if results
+        else np.zeros((4, 0), dtype=np.int64)
+    )
+    return list(keys), list(names), columns
+
+
+def _results(energysystem, results, values):
+    """The results of the solution of a linear program, see
+    :meth:`ModelCache.solve`.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    results : tuple
+        The columns of the results, see :func:`_result_columns`.
+    values : numpy.ndarray
+        Primal values of the columns.
+    """
+    keys, names, (columns, key_codes, name_codes, timesteps) = results
+    nodes = {str(n.label): n for n in energysystem.nodes}
+    pairs, codes = np.unique(
+        key_codes * len(names) + name_codes, return_inverse=True
+    )
+    variables = {}
+    for (key, name), t, v in _grouped_arrays(
+        codes,
+        [divmod(int(p), len(names)) for p in pairs],
+        timesteps,
+        values[columns],
+    ):
+        variables.setdefault(key, {})[names[name]] = (t, v)
+
+    result = {}
+    for code, arrays in variables.items():
+        key = json.loads(keys[code])
+        if key[0]:
+            key = tuple(nodes[label] for label in key[1:])
+            key = key if len(key) > 1 else (key[0], None)
+        else:
+            key = tuple(key[1:])
+        try:
+            result[key] = _result_entry(arrays, energysystem.timeindex)
+        except _UnsupportedStructure:
+            raise ValueError(
+                "The results of {0} cannot be created from the solution of "
+                "the linear program.".format(key)
+            )
+    return result
+
+
+def _add_columns(lp, variables):
+    """Add columns without coefficients for variables of a linear program,
+    e.g. flows which are not part of any constraint."""
+    labeler = TextLabeler()
+    lp.col_lower = np.append(
+        lp.col_lower, [v.lb if v.has_lb() else -np.inf for v in variables]
+    )
+    lp.col_upper = np.append(
+        lp.col_upper, [v.ub if v.has_ub() else np.inf for v in variables]
+    )
+    lp.objective = np.append(lp.objective, np.zeros(len(variables)))
+    lp.integer = np.append(
+        lp.integer, [v.is_integer() or v.is_binary() for v in variables]
+    )
+    lp.col_names = lp.col_names + [labeler(v) for v in variables]
+    lp.variables = lp.variables + variables
+
+
+def _update(lp, energysystem, columns, weighting):
+    """Replace the bounds and objective coefficients of the flow columns by
+    the data of the flows of an energy system."""
+    horizon = len(weighting)
+    for cols, flow in zip(columns, energysystem.flows().values()):
+        if not _is_data_flow(flow):
+            continue
+        lower, upper, fix = _flow_bounds(
+            flow, horizon, not hasattr(flow, "bidirectional")
+        )
+        if fix is not None:
+            lower = upper = fix
+        lp.col_lower[cols] = -np.inf if lower is None else lower
+        lp.col_upper[cols] = np.inf if upper is None else upper
+        if flow.variable_costs[0] is None:
+            lp.objective[cols] = 0
+        else:
+            lp.objective[cols] = (
+                sequence_to_array(flow.variable_costs, horizon) * weighting
+            )
+
+
+def _touch(path):
+    """Mark an entry as used now. The modification time is set explicitly,
+    because the timestamps of some file systems are too coarse to order
+    entries used in quick succession."""
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+def _save(path, lp, columns, weighting, results):
+    """Write an entry, the file is replaced atomically."""
+    if results is None:
+        results = ([], [], np.zeros((4, 0), dtype=np.int64))
+        stored = False
+    else:
+        stored = True
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        np.savez(
+            f,
+            row=lp.row,
+            col=lp.col,
+            data=lp.data,
+            row_lower=lp.row_lower,
+            row_upper=lp.row_upper,
+            col_lower=lp.col_lower,
+            col_upper=lp.col_upper,
+            objective=lp.objective,
+            objective_constant=lp.objective_constant,
+            sense=lp.sense,
+            integer=lp.integer,
+            row_names=np.array(lp.row_names, dtype=str),
+            col_names=np.array(lp.col_names, dtype=str),
+            row_blocks=np.array(lp.row_blocks, dtype=str),
+            columns=columns,
+            weighting=weighting,
+            result_stored=stored,
+            result_keys=np.array(results[0], dtype=str),
+            result_names=np.array(results[1], dtype=str),
+            result_columns=results[2],
+        )
+    os.replace(temporary, path)
+
+
+def _load(path):
+    """Read an entry, see :func:`_compile` for the returned tuple."""
+    with np.load(path) as f:
+        lp = LinearProgram(
+            row=f["row"],
+            col=f["col"],
+            data=f["data"],
+            row_lower=f["row_lower"],
+            row_upper=f["row_upper"],
+            col_lower=f["col_lower"],
+            col_upper=f["col_upper"],
+            objective=f["objective"],
+            objective_constant=f["objective_constant"].item(),
+            sense=f["sense"].item(),
+            integer=f["integer"],
+            row_names=f["row_names"].tolist(),
+            col_names=f["col_names"].tolist(),
+            row_blocks=f["row_blocks"].tolist(),
+        )
+        results = None
+        if f["result_stored"].item():
+            results = (
+                f["result_keys"].tolist(),
+                f["result_names"].tolist(),
+                f["result_columns"],
+            )
+        return lp, f["columns"], f["weighting"], results
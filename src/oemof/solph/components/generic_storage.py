@@ -17,18 +17,22 @@ SPDX-License-Identifier: MIT
 
 """
 
+import numpy as np
 from oemof.network import network
 from pyomo.core.base.block import SimpleBlock
+from pyomo.core.expr.numeric_expr import LinearExpression
 from pyomo.environ import Binary
 from pyomo.environ import Constraint
 from pyomo.environ import Expression
 from pyomo.environ import NonNegativeReals
+from pyomo.environ import NonPositiveReals
 from pyomo.environ import Set
 from pyomo.environ import Var
 
 from oemof.solph import network as solph_network
 from oemof.solph.options import Investment
 from oemof.solph.plumbing import sequence as solph_sequence
+from oemof.solph.plumbing import sequence_to_array
 
 
 class GenericStorage(network.Node):
@@ -393,100 +397,28 @@ class GenericStorageBlock(SimpleBlock):
 
         #  ************* VARIABLES *****************************
 
-        def _storage_content_bound_rule(block, n, t):
-            """
-            Rule definition for bounds of storage_content variable of
-            storage n in timestep t.
-            """
-            bounds = (
-                n.nominal_storage_capacity * n.min_storage_level[t],
-                n.nominal_storage_capacity * n.max_storage_level[t],
-            )
-            return bounds
-
-        self.storage_content = Var(
-            self.STORAGES, m.TIMESTEPS, bounds=_storage_content_bound_rule
-        )
+        self.storage_content = Var(self.STORAGES, m.TIMESTEPS)
 
-        def _storage_init_content_bound_rule(block, n):
-            return 0, n.nominal_storage_capacity
-
-        self.init_content = Var(
-            self.STORAGES,
-            within=NonNegativeReals,
-            bounds=_storage_init_content_bound_rule,
-        )
+        self.init_content = Var(self.STORAGES, within=NonNegativeReals)
 
-        # set the initial storage content
-        for n in group:
-            if n.initial_storage_level is not None:
-                self.init_content[n] = (
-                    n.initial_storage_level * n.nominal_storage_capacity
-                )
-                self.init_content[n].fix()
+        self._set_capacity_bounds(group)
 
         #  ************* Constraints ***************************
 
         reduced_timesteps = [x for x in m.TIMESTEPS if x > 0]
 
-        # storage balance constraint (first time step)
-        def _storage_balance_first_rule(block, n):
-            """
-            Rule definition for the storage balance of every storage n for
-            the first timestep.
-            """
-            expr = 0
-            expr += block.storage_content[n, 0]
-            expr += (
-                -block.init_content[n]
-                * (1 - n.loss_rate[0]) ** m.timeincrement[0]
-            )
-            expr += (
-                n.fixed_losses_relative[0]
-                * n.nominal_storage_capacity
-                * m.timeincrement[0]
-            )
-            expr += n.fixed_losses_absolute[0] * m.timeincrement[0]
-            expr += (
-                -m.flow[i[n], n, 0] * n.inflow_conversion_factor[0]
-            ) * m.timeincrement[0]
-            expr += (
-                m.flow[n, o[n], 0] / n.outflow_conversion_factor[0]
-            ) * m.timeincrement[0]
-            return expr == 0
-
+        # storage balance constraints of the first and of every other time
+        # step, the expressions are built in bulk
+        balances = _storage_balances(
+            self, group, i, o, lambda n: (n.nominal_storage_capacity, None)
+        )
         self.balance_first = Constraint(
-            self.STORAGES, rule=_storage_balance_first_rule
+            self.STORAGES, rule=lambda block, n: balances[n, 0]
         )
-
-        # storage balance constraint (every time step but the first)
-        def _storage_balance_rule(block, n, t):
-            """
-            Rule definition for the storage balance of every storage n and
-            every timestep but the first (t > 0).
-            """
-            expr = 0
-            expr += block.storage_content[n, t]
-            expr += (
-                -block.storage_content[n, t - 1]
-                * (1 - n.loss_rate[t]) ** m.timeincrement[t]
-            )
-            expr += (
-                n.fixed_losses_relative[t]
-                * n.nominal_storage_capacity
-                * m.timeincrement[t]
-            )
-            expr += n.fixed_losses_absolute[t] * m.timeincrement[t]
-            expr += (
-                -m.flow[i[n], n, t] * n.inflow_conversion_factor[t]
-            ) * m.timeincrement[t]
-            expr += (
-                m.flow[n, o[n], t] / n.outflow_conversion_factor[t]
-            ) * m.timeincrement[t]
-            return expr == 0
-
         self.balance = Constraint(
-            self.STORAGES, reduced_timesteps, rule=_storage_balance_rule
+            self.STORAGES,
+            reduced_timesteps,
+            rule=lambda block, n, t: balances[n, t],
         )
 
         def _balanced_storage_rule(block, n):
@@ -499,9 +431,14 @@ class GenericStorageBlock(SimpleBlock):
                 == block.init_content[n]
             )
 
-        self.balanced_cstr = Constraint(
-            self.STORAGES_BALANCED, rule=_balanced_storage_rule
-        )
+        if m.typical_periods is None:
+            self.balanced_cstr = Constraint(
+                self.STORAGES_BALANCED, rule=_balanced_storage_rule
+            )
+        else:
+            _link_typical_periods(
+                self, group, lambda n: n.nominal_storage_capacity
+            )
 
         def _power_coupled(block, n):
             """
@@ -521,6 +458,73 @@ class GenericStorageBlock(SimpleBlock):
             self.STORAGES_WITH_INVEST_FLOW_REL, rule=_power_coupled
         )
 
+    def _set_capacity_bounds(self, storages):
+        """Set the bounds of the storage content and of the initial content
+        and the fixed initial content of the given storages from their
+        `nominal_storage_capacity`.
+        """
+        m = self.parent_block()
+
+        # the bounds of the storage content are set per storage in bulk, in
+        # aggregated models the content is relative to the start of the
+        # typical period and has no bounds
+        if m.typical_periods is None:
+            horizon = len(m.TIMESTEPS)
+            variables = self.storage_content._data
+            for n in storages:
+                lower = n.nominal_storage_capacity * sequence_to_array(
+                    n.min_storage_level, horizon
+                )
+                upper = n.nominal_storage_capacity * sequence_to_array(
+                    n.max_storage_level, horizon
+                )
+                for t, (lb, ub) in enumerate(
+                    zip(lower.tolist(), upper.tolist())
+                ):
+                    variables[n, t].setlb(lb)
+                    variables[n, t].setub(ub)
+
+        for n in storages:
+            self.init_content[n].setlb(0)
+            self.init_content[n].setub(n.nominal_storage_capacity)
+            # set the initial storage content
+            if n.initial_storage_level is not None:
+                self.init_content[n] = (
+                    n.initial_storage_level * n.nominal_storage_capacity
+                )
+                self.init_content[n].fix()
+
+    def _update_capacity(self, storages):
+        """Update the model in place after the `nominal_storage_capacity` of
+        the given storages has changed.
+
+        The bounds of the storage contents are set again and the balances of
+        the storages are replaced, as their constant part depends on the
+        capacity if there are relative losses. Models of aggregated time
+        series link the typical periods by the capacity and have to be
+        rebuilt instead.
+        """
+        m = self.parent_block()
+        if m.typical_periods is not None:
+            raise ValueError(
+                "The storage capacity of a model with typical periods cannot"
+                " be updated in place."
+            )
+        storages = list(storages)
+        self._set_capacity_bounds(storages)
+        balances = _storage_balances(
+            self,
+            storages,
+            {n: [i for i in n.inputs][0] for n in storages},
+            {n: [o for o in n.outputs][0] for n in storages},
+            lambda n: (n.nominal_storage_capacity, None),
+        )
+        for (n, t), balance in balances.items():
+            if t == 0:
+                self.balance_first[n].set_value(balance)
+            else:
+                self.balance[n, t].set_value(balance)
+
     def _objective_expression(self):
         r"""
         Objective expression for storages with no investment.
@@ -532,6 +536,10 @@ class GenericStorageBlock(SimpleBlock):
 
         return 0
 
+    def _disaggregated_arrays(self, arrays, typical_periods):
+        """See :func:`_disaggregate_storage_content`."""
+        return _disaggregate_storage_content(self, arrays, typical_periods)
+
 
 class GenericInvestmentStorageBlock(SimpleBlock):
     r"""
@@ -818,14 +826,21 @@ class GenericInvestmentStorageBlock(SimpleBlock):
             initialize=[
                 n
                 for n in group
-                if sum([n.min_storage_level[t] for t in m.TIMESTEPS]) > 0
+                if sequence_to_array(
+                    n.min_storage_level, len(m.TIMESTEPS)
+                ).sum()
+                > 0
             ]
         )
 
         # ######################### Variables  ################################
-        self.storage_content = Var(
-            self.INVESTSTORAGES, m.TIMESTEPS, within=NonNegativeReals
-        )
+        if m.typical_periods is None:
+            self.storage_content = Var(
+                self.INVESTSTORAGES, m.TIMESTEPS, within=NonNegativeReals
+            )
+        else:
+            # content relative to the start of the typical period
+            self.storage_content = Var(self.INVESTSTORAGES, m.TIMESTEPS)
 
         def _storage_investvar_bound_rule(block, n):
             """
@@ -876,62 +891,22 @@ class GenericInvestmentStorageBlock(SimpleBlock):
             rule=_inv_storage_init_content_fix_rule,
         )
 
-        def _storage_balance_first_rule(block, n):
-            """
-            Rule definition for the storage balance of every storage n for the
-            first time step.
-            """
-            expr = 0
-            expr += block.storage_content[n, 0]
-            expr += (
-                -block.init_content[n]
-                * (1 - n.loss_rate[0]) ** m.timeincrement[0]
-            )
-            expr += (
-                n.fixed_losses_relative[0]
-                * (n.investment.existing + self.invest[n])
-                * m.timeincrement[0]
-            )
-            expr += n.fixed_losses_absolute[0] * m.timeincrement[0]
-            expr += (
-                -m.flow[i[n], n, 0] * n.inflow_conversion_factor[0]
-            ) * m.timeincrement[0]
-            expr += (
-                m.flow[n, o[n], 0] / n.outflow_conversion_factor[0]
-            ) * m.timeincrement[0]
-            return expr == 0
-
+        # storage balance constraints of the first and of every other time
+        # step, the expressions are built in bulk
+        balances = _storage_balances(
+            self,
+            group,
+            i,
+            o,
+            lambda n: (n.investment.existing, self.invest[n]),
+        )
         self.balance_first = Constraint(
-            self.INVESTSTORAGES, rule=_storage_balance_first_rule
+            self.INVESTSTORAGES, rule=lambda block, n: balances[n, 0]
         )
-
-        def _storage_balance_rule(block, n, t):
-            """
-            Rule definition for the storage balance of every storage n for the
-            every time step but the first.
-            """
-            expr = 0
-            expr += block.storage_content[n, t]
-            expr += (
-                -block.storage_content[n, t - 1]
-                * (1 - n.loss_rate[t]) ** m.timeincrement[t]
-            )
-            expr += (
-                n.fixed_losses_relative[t]
-                * (n.investment.existing + self.invest[n])
-                * m.timeincrement[t]
-            )
-            expr += n.fixed_losses_absolute[t] * m.timeincrement[t]
-            expr += (
-                -m.flow[i[n], n, t] * n.inflow_conversion_factor[t]
-            ) * m.timeincrement[t]
-            expr += (
-                m.flow[n, o[n], t] / n.outflow_conversion_factor[t]
-            ) * m.timeincrement[t]
-            return expr == 0
-
         self.balance = Constraint(
-            self.INVESTSTORAGES, reduced_timesteps, rule=_storage_balance_rule
+            self.INVESTSTORAGES,
+            reduced_timesteps,
+            rule=lambda block, n, t: balances[n, t],
         )
 
         def _balanced_storage_rule(block, n):
@@ -940,9 +915,14 @@ class GenericInvestmentStorageBlock(SimpleBlock):
                 == block.init_content[n]
             )
 
-        self.balanced_cstr = Constraint(
-            self.INVESTSTORAGES_BALANCED, rule=_balanced_storage_rule
-        )
+        if m.typical_periods is None:
+            self.balanced_cstr = Constraint(
+                self.INVESTSTORAGES_BALANCED, rule=_balanced_storage_rule
+            )
+        else:
+            _link_typical_periods(
+                self, group, lambda n: n.investment.existing + self.invest[n]
+            )
 
         def _power_coupled(block, n):
             """
@@ -998,42 +978,20 @@ class GenericInvestmentStorageBlock(SimpleBlock):
             self.INVEST_REL_CAP_OUT, rule=_storage_capacity_outflow_invest_rule
         )
 
-        def _max_storage_content_invest_rule(block, n, t):
-            """
-            Rule definition for upper bound constraint for the
-            storage content.
-            """
-            expr = (
-                self.storage_content[n, t]
-                <= (n.investment.existing + self.invest[n])
-                * n.max_storage_level[t]
+        # upper and lower bound of the storage content, the lower bound
+        # only if the minimum storage level is not zero for all time steps
+        if m.typical_periods is None:
+            upper, lower = _storage_content_limits(self)
+            self.max_storage_content = Constraint(
+                self.INVESTSTORAGES,
+                m.TIMESTEPS,
+                rule=lambda block, n, t: upper[n, t],
             )
-            return expr
-
-        self.max_storage_content = Constraint(
-            self.INVESTSTORAGES,
-            m.TIMESTEPS,
-            rule=_max_storage_content_invest_rule,
-        )
-
-        def _min_storage_content_invest_rule(block, n, t):
-            """
-            Rule definition of lower bound constraint for the
-            storage content.
-            """
-            expr = (
-                self.storage_content[n, t]
-                >= (n.investment.existing + self.invest[n])
-                * n.min_storage_level[t]
+            self.min_storage_content = Constraint(
+                self.MIN_INVESTSTORAGES,
+                m.TIMESTEPS,
+                rule=lambda block, n, t: lower[n, t],
             )
-            return expr
-
-        # Set the lower bound of the storage content if the attribute exists
-        self.min_storage_content = Constraint(
-            self.MIN_INVESTSTORAGES,
-            m.TIMESTEPS,
-            rule=_min_storage_content_invest_rule,
-        )
 
         def maximum_invest_limit(block, n):
             """
@@ -1080,3 +1038,308 @@ class GenericInvestmentStorageBlock(SimpleBlock):
         self.investment_costs = Expression(expr=investment_costs)
 
         return investment_costs
+
+    def _disaggregated_arrays(self, arrays, typical_periods):
+        """See :func:`_disaggregate_storage_content`."""
+        return _disaggregate_storage_content(self, arrays, typical_periods)
+
+
+def _balance_coefficients(m, n):
+    """Coefficients of the storage balance of storage n as arrays over the
+    time steps of model m.
+
+    Returns
+    -------
+    tuple : (content, inflow, outflow, relative, absolute)
+        The factor of the previous storage content, the factors of the
+        input and the output flow, the relative fixed losses per unit of
+        capacity and the absolute fixed losses. All but the factor of the
+        content are multiplied by the time increment.
+    """
+    horizon = len(m.TIMESTEPS)
+
+    def array(values):
+        return sequence_to_array(values, horizon)
+
+    increment = array(m.timeincrement)
+    # same operations as in the single expressions, so the coefficients of
+    # the rows do not differ in the last digit
+    return (
+        (1 - array(n.loss_rate)) ** increment,
+        array(n.inflow_conversion_factor) * increment,
+        1 / array(n.outflow_conversion_factor) * increment,
+        array(n.fixed_losses_relative) * increment,
+        array(n.fixed_losses_absolute) * increment,
+    )
+
+
+def _storage_balances(block, storages, inputs, outputs, capacity):
+    r"""The storage balances of all storages of a block and time steps.
+
+    The coefficients are calculated once per storage with numpy (see
+    :func:`_balance_coefficients`) and the balances are built as linear
+    expressions, which results in the same rows as building and expanding
+    the expression of every storage and time step.
+
+    Parameters
+    ----------
+    block : GenericStorageBlock or GenericInvestmentStorageBlock
+    storages : list
+    inputs, outputs : dict
+        The input and output node of every storage.
+    capacity : callable
+        Returns the constant part of the capacity of a storage and the
+        variable part (an investment variable) or None.
+
+    Returns
+    -------
+    dict : The balance constraint expressions keyed by `(storage, t)`.
+    """
+    m = block.parent_block()
+    content = block.storage_content._data
+    flows = m.flow._data
+    balances = {}
+    for n in storages:
+        factor, inflow, outflow, relative, absolute = (
+            values.tolist() for values in _balance_coefficients(m, n)
+        )
+        constant, variable = capacity(n)
+        for t in m.TIMESTEPS:
+            coefs = [1]
+            variables = [content[n, t]]
+            if t == 0:
+                if m.typical_periods is None:
+                    coefs.append(-factor[t])
+                    variables.append(block.init_content[n])
+            elif not _period_start(m, t):
+                coefs.append(-factor[t])
+                variables.append(content[n, t - 1])
+            if variable is not None and relative[t] != 0:
+                coefs.append(relative[t])
+                variables.append(variable)
+            coefs.extend([-inflow[t], outflow[t]])
+            variables.extend([flows[inputs[n], n, t], flows[n, outputs[n], t]])
+            expr = LinearExpression(
+                constant=relative[t] * constant + absolute[t],
+                linear_coefs=coefs,
+                linear_vars=variables,
+            )
+            balances[n, t] = expr == 0
+    return balances
+
+
+def _storage_content_limits(block):
+    """The upper and lower limits of the storage content by the maximum and
+    minimum storage level and the invested capacity.
+
+    Returns
+    -------
+    tuple : (upper, lower)
+        The constraint expressions keyed by `(storage, t)`. The lower limits
+        are built for the storages of `MIN_INVESTSTORAGES` only.
+    """
+    m = block.parent_block()
+    horizon = len(m.TIMESTEPS)
+    content = block.storage_content._data
+    minimum = set(block.MIN_INVESTSTORAGES)
+    upper, lower = {}, {}
+    for n in block.INVESTSTORAGES:
+        existing = n.investment.existing
+        invest = block.invest[n]
+        levels = sequence_to_array(n.max_storage_level, horizon).tolist()
+        for t, level in enumerate(levels):
+            # a level of zero is a bound of the content as in the expression
+            # `content <= (existing + invest) * 0`
+            if level == 0:
+                upper[n, t] = content[n, t] <= 0
+                continue
+            upper[n, t] = (
+                LinearExpression(
+                    constant=-(existing * level),
+                    linear_coefs=[1, -level],
+                    linear_vars=[content[n, t], invest],
+                )
+                <= 0
+            )
+        if n not in minimum:
+            continue
+        levels = sequence_to_array(n.min_storage_level, horizon).tolist()
+        for t, level in enumerate(levels):
+            if level == 0:
+                lower[n, t] = content[n, t] >= 0
+                continue
+            lower[n, t] = (
+                LinearExpression(
+                    constant=existing * level,
+                    linear_coefs=[level, -1],
+                    linear_vars=[invest, content[n, t]],
+                )
+                <= 0
+            )
+    return upper, lower
+
+
+def _period_start(m, t):
+    """True if t is the first timestep of a typical period of model m."""
+    return m.typical_periods is not None and (
+        t % m.typical_periods.period_length == 0
+    )
+
+
+def _link_typical_periods(block, storages, capacity):
+    r"""
+    Link the storage content of the typical periods of an aggregated model
+    across the original sequence of periods.
+
+    The `storage_content` of a typical period is relative to the content at
+    its start. The content at the start of every original period p is
+    `storage_content_inter[n, p]`, which is passed on to the next period
+    with the losses and the content at the end of the typical period k(p):
+
+    .. math::
+        E_{inter}(p + 1) = E_{inter}(p) \cdot d_{k(p)} + E(k(p), t_{end})
+
+    with the remaining share :math:`d_k` of the content after the losses of
+    the typical period k. The content of every timestep is kept within its
+    bounds conservatively by the maximum and minimum relative content of the
+    typical period (`storage_content_intra_max` and
+    `storage_content_intra_min`) and the strictest bounds of the period.
+    `capacity(n)` returns the capacity of storage n as number or expression.
+    """
+    m = block.parent_block()
+    periods = m.typical_periods
+    length = periods.period_length
+    last_period = periods.n_periods
+
+    # remaining share of the content at the start of a typical period
+    block._period_decay = {}
+    for n in storages:
+        decay = np.array(
+            [(1 - n.loss_rate[t]) ** m.timeincrement[t] for t in m.TIMESTEPS]
+        ).reshape(-1, length)
+        block._period_decay[n] = decay.cumprod(axis=1).ravel()
+
+    def _steps(k):
+        return range(k * length, (k + 1) * length)
+
+    def _decay(n, k):
+        return block._period_decay[n][(k + 1) * length - 1]
+
+    block.PERIODS = Set(initialize=range(last_period + 1))
+    block.TYPICAL_PERIODS = Set(initialize=range(periods.n_typical_periods))
+
+    block.storage_content_inter = Var(
+        storages, block.PERIODS, within=NonNegativeReals
+    )
+    block.storage_content_intra_max = Var(
+        storages, block.TYPICAL_PERIODS, within=NonNegativeReals
+    )
+    block.storage_content_intra_min = Var(
+        storages, block.TYPICAL_PERIODS, within=NonPositiveReals
+    )
+
+    def _inter_balance_rule(block, n, p):
+        k = periods.order[p]
+        return (
+            block.storage_content_inter[n, p + 1]
+            == block.storage_content_inter[n, p] * _decay(n, k)
+            + block.storage_content[n, (k + 1) * length - 1]
+        )
+
+    block.inter_balance = Constraint(
+        storages, range(last_period), rule=_inter_balance_rule
+    )
+
+    def _intra_max_rule(block, n, t):
+        return (
+            block.storage_content[n, t]
+            <= block.storage_content_intra_max[n, t // length]
+        )
+
+    block.intra_max = Constraint(storages, m.TIMESTEPS, rule=_intra_max_rule)
+
+    def _intra_min_rule(block, n, t):
+        return (
+            block.storage_content[n, t]
+            >= block.storage_content_intra_min[n, t // length]
+        )
+
+    block.intra_min = Constraint(storages, m.TIMESTEPS, rule=_intra_min_rule)
+
+    def _max_storage_content_rule(block, n, p):
+        k = periods.order[p]
+        level = min(n.max_storage_level[t] for t in _steps(k))
+        return (
+            block.storage_content_inter[n, p]
+            + block.storage_content_intra_max[n, k]
+            <= capacity(n) * level
+        )
+
+    block.max_storage_content_inter = Constraint(
+        storages, range(last_period), rule=_max_storage_content_rule
+    )
+
+    def _min_storage_content_rule(block, n, p):
+        k = periods.order[p]
+        level = max(n.min_storage_level[t] for t in _steps(k))
+        return (
+            block.storage_content_inter[n, p] * _decay(n, k)
+            + block.storage_content_intra_min[n, k]
+            >= capacity(n) * level
+        )
+
+    block.min_storage_content_inter = Constraint(
+        storages, range(last_period), rule=_min_storage_content_rule
+    )
+
+    def _init_content_rule(block, n):
+        return block.storage_content_inter[n, 0] == block.init_content[n]
+
+    block.init_content_inter = Constraint(storages, rule=_init_content_rule)
+
+    def _balanced_rule(block, n):
+        return (
+            block.storage_content_inter[n, last_period]
+            == block.init_content[n]
+        )
+
+    block.balanced_inter = Constraint(
+        [n for n in storages if n.balanced], rule=_balanced_rule
+    )
+
+
+def _disaggregate_storage_content(block, arrays, typical_periods):
+    """
+    Replace the storage content of the typical periods by the storage
+    content of the original time index in the arrays of
+    :func:`oemof.solph.processing._variable_arrays`.
+
+    The auxiliary variables of :func:`_link_typical_periods` are removed.
+
+    Returns
+    -------
+    dict : `{oemof_tuple: {"storage_content": (timesteps, values)}}`
+    """
+    if not hasattr(block, "_period_decay"):
+        return {}
+    length = typical_periods.period_length
+    steps = typical_periods.timestep_map
+    periods = np.repeat(np.arange(typical_periods.n_periods), length)
+    disaggregated = {}
+    for n, decay in block._period_decay.items():
+        variables = arrays[(n,)]
+        for name in ("storage_content_intra_max", "storage_content_intra_min"):
+            variables.pop(name, None)
+        timesteps, values = variables.pop("storage_content_inter")
+        inter = np.empty(typical_periods.n_periods + 1)
+        inter[timesteps] = values
+        timesteps, values = variables.pop("storage_content")
+        intra = np.empty(len(decay))
+        intra[timesteps] = values
+        disaggregated[(n,)] = {
+            "storage_content": (
+                np.arange(len(steps)),
+                inter[periods] * decay[steps] + intra[steps],
+            )
+        }
+    return disaggregated
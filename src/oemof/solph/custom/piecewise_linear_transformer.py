@@ -16,8 +16,11 @@ SPDX-License-Identifier: MIT
 
 """
 
+import numpy as np
 from oemof.network import network as on
 from pyomo.core.base.block import SimpleBlock
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.environ import Binary
 from pyomo.environ import BuildAction
 from pyomo.environ import Constraint
 from pyomo.environ import Piecewise
@@ -41,7 +44,26 @@ class PiecewiseLinearTransformer(on.Transformer):
 
     pw_repn : string
         Choice of piecewise representation that is passed to
-        pyomo.environ.Piecewise
+        pyomo.environ.Piecewise, or "native" for the incremental formulation
+        of oemof.solph, which is built for all timesteps at once (see
+        :class:`PiecewiseLinearTransformerBlock`).
+
+    force_binary : bool, default: True
+        Keep the binary variables of the native formulation. If False and
+        the conversion function is concave (or linear) between the
+        breakpoints, the native formulation is a linear program without
+        binary variables, which is a relaxation (see Notes).
+
+    Notes
+    -----
+    Without the binary variables the native formulation of a concave
+    conversion function is a relaxation: the relation between the flows
+    is `outflow <= f(inflow)` instead of `outflow = f(inflow)`. Both are the
+    same if a lower outflow has no benefit, e.g. because the input has
+    costs and the output is needed. If a lower outflow can be cheaper, e.g.
+    because the output has costs or cannot be used, the outflow may be
+    lower than the conversion function. Only set `force_binary=False` if
+    a lower outflow has no benefit.
 
     Examples
     --------
@@ -71,6 +93,15 @@ PiecewiseLinearTransformer'>
         self.in_breakpoints = list(kwargs.get("in_breakpoints"))
         self.conversion_function = kwargs.get("conversion_function")
         self.pw_repn = kwargs.get("pw_repn")
+        self.force_binary = kwargs.get("force_binary", True)
+
+        if self.pw_repn == "native" and np.any(
+            np.diff(self.in_breakpoints) <= 0
+        ):
+            raise ValueError(
+                "The in_breakpoints of the native piecewise representation "
+                + "have to be strictly increasing."
+            )
 
         if len(self.inputs) > 1 or len(self.outputs) > 1:
             raise ValueError(
@@ -95,9 +126,48 @@ class PiecewiseLinearTransformerBlock(SimpleBlock):
 
     **The following constraints are created:**
 
+    For the piecewise representations of pyomo, the constraints of
+    `pyomo.environ.Piecewise` are created per transformer and timestep.
+
+    For the native representation, the flows are the sum of the parts
+    :math:`\delta_{n,k}(t) \in [0, 1]` of every segment :math:`k` between
+    the breakpoints :math:`x_{k}` and :math:`x_{k+1}` with
+    :math:`y_{k} = f(x_{k})`:
+
+    Incremental input `om.PiecewiseLinearTransformerBlock.incremental_in[n,t]`
+        .. math::
+            inflow(n, t) = x_{0} + \sum_{k} (x_{k+1} - x_{k}) \
+            \cdot \delta_{n,k}(t)
+
+    Incremental output
+    `om.PiecewiseLinearTransformerBlock.incremental_out[n,t]`
+        .. math::
+            outflow(n, t) = y_{0} + \sum_{k} (y_{k+1} - y_{k}) \
+            \cdot \delta_{n,k}(t)
+
+    If the conversion function is not concave, the segments are filled in
+    order with the binary variables :math:`z_{n,k}(t)` (`segment_full`):
+
+    Full segments `om.PiecewiseLinearTransformerBlock.segment_filled[n,k,t]`
+        .. math::
+            z_{n,k}(t) \leq \delta_{n,k}(t)
+
+    Order of the segments
+    `om.PiecewiseLinearTransformerBlock.segment_order[n,k,t]`
+        .. math::
+            \delta_{n,k+1}(t) \leq z_{n,k}(t)
+
+    For concave (or linear) functions with `force_binary=False`, the order
+    is not needed: the outflow is at most the piecewise linear function of
+    the inflow and equal to it if a lower outflow has no benefit, e.g.
+    because the input has costs. The parts of the segments are auxiliary
+    variables and not part of the results.
     """
     CONSTRAINT_GROUP = True
 
+    # auxiliary variables of the native formulation, not part of the results
+    AUXILIARY_VARIABLES = ("segment", "segment_full")
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -119,14 +189,19 @@ class PiecewiseLinearTransformerBlock(SimpleBlock):
 
         self.PWLINEARTRANSFORMERS = Set(initialize=[n for n in group])
 
-        pw_repns = [n.pw_repn for n in group]
-        if all(x == pw_repns[0] for x in pw_repns):
-            self.pw_repn = pw_repns[0]
-        else:
-            print(
-                "Cannot different piecewise representations ",
-                [n.pw_repn for n in group],
+        # transformers with a piecewise representation of pyomo
+        self.PYOMO_PWLINEARTRANSFORMERS = Set(
+            initialize=[n for n in group if n.pw_repn != "native"]
+        )
+
+        pw_repns = [n.pw_repn for n in self.PYOMO_PWLINEARTRANSFORMERS]
+        if any(x != pw_repns[0] for x in pw_repns):
+            raise ValueError(
+                "All PiecewiseLinearTransformers with a piecewise "
+                "representation of pyomo need the same pw_repn, not "
+                "{0}.".format(sorted(set(pw_repns), key=str))
             )
+        self.pw_repn = pw_repns[0] if pw_repns else None
 
         self.breakpoints = {}
 
@@ -190,7 +265,7 @@ class PiecewiseLinearTransformerBlock(SimpleBlock):
         )
 
         self.piecewise = Piecewise(
-            self.PWLINEARTRANSFORMERS,
+            self.PYOMO_PWLINEARTRANSFORMERS,
             m.TIMESTEPS,
             self.outflow,
             self.inflow,
@@ -199,3 +274,129 @@ class PiecewiseLinearTransformerBlock(SimpleBlock):
             pw_pts=self.breakpoints,
             f_rule=_conversion_function,
         )
+
+        native = [n for n in group if n.pw_repn == "native"]
+        if native:
+            self._create_native(native)
+
+    def _create_native(self, group):
+        """Creates the incremental formulation of the transformers with the
+        native piecewise representation. The breakpoints are evaluated once
+        per transformer and the rows of all timesteps are built from them.
+        """
+        m = self.parent_block()
+
+        tables = {n: _breakpoint_table(n) for n in group}
+        incremental = [
+            n for n in group if n.force_binary or not _is_concave(*tables[n])
+        ]
+
+        self.NATIVE_PWLINEARTRANSFORMERS = Set(initialize=group)
+        self.INCREMENTAL_PWLINEARTRANSFORMERS = Set(initialize=incremental)
+        self.SEGMENTS = Set(
+            dimen=2,
+            initialize=[
+                (n, k) for n in group for k in range(len(tables[n][0]) - 1)
+            ],
+        )
+        self.ORDERED_SEGMENTS = Set(
+            dimen=2,
+            initialize=[
+                (n, k)
+                for n in incremental
+                for k in range(len(tables[n][0]) - 2)
+            ],
+        )
+
+        self.segment = Var(self.SEGMENTS, m.TIMESTEPS, bounds=(0, 1))
+        self.segment_full = Var(
+            self.ORDERED_SEGMENTS, m.TIMESTEPS, within=Binary
+        )
+
+        inflow = self.inflow._data
+        outflow = self.outflow._data
+        segment = self.segment._data
+        segment_full = self.segment_full._data
+        rows_in = {}
+        rows_out = {}
+        rows_filled = {}
+        rows_order = {}
+        for n in group:
+            x, y = tables[n]
+            coefs_in = [1] + (-np.diff(x)).tolist()
+            coefs_out = [1] + (-np.diff(y)).tolist()
+            segments = range(len(x) - 1)
+            ordered = n in self.INCREMENTAL_PWLINEARTRANSFORMERS
+            for t in m.TIMESTEPS:
+                parts = [segment[n, k, t] for k in segments]
+                rows_in[n, t] = (
+                    LinearExpression(
+                        constant=-x[0],
+                        linear_coefs=coefs_in,
+                        linear_vars=[inflow[n, t]] + parts,
+                    )
+                    == 0
+                )
+                rows_out[n, t] = (
+                    LinearExpression(
+                        constant=-y[0],
+                        linear_coefs=coefs_out,
+                        linear_vars=[outflow[n, t]] + parts,
+                    )
+                    == 0
+                )
+                if not ordered:
+                    continue
+                for k in segments[:-1]:
+                    # a segment is only full if its part is one, the next
+                    # segment is only used if it is full
+                    rows_filled[n, k, t] = (
+                        LinearExpression(
+                            linear_coefs=[1, -1],
+                            linear_vars=[segment_full[n, k, t], parts[k]],
+                        )
+                        <= 0
+                    )
+                    rows_order[n, k, t] = (
+                        LinearExpression(
+                            linear_coefs=[1, -1],
+                            linear_vars=[parts[k + 1], segment_full[n, k, t]],
+                        )
+                        <= 0
+                    )
+
+        self.incremental_in = Constraint(
+            self.NATIVE_PWLINEARTRANSFORMERS,
+            m.TIMESTEPS,
+            rule=lambda block, n, t: rows_in[n, t],
+        )
+        self.incremental_out = Constraint(
+            self.NATIVE_PWLINEARTRANSFORMERS,
+            m.TIMESTEPS,
+            rule=lambda block, n, t: rows_out[n, t],
+        )
+        self.segment_filled = Constraint(
+            self.ORDERED_SEGMENTS,
+            m.TIMESTEPS,
+            rule=lambda block, n, k, t: rows_filled[n, k, t],
+        )
+        self.segment_order = Constraint(
+            self.ORDERED_SEGMENTS,
+            m.TIMESTEPS,
+            rule=lambda block, n, k, t: rows_order[n, k, t],
+        )
+
+
+def _breakpoint_table(n):
+    """The breakpoints of the inflow and the outflow of a transformer."""
+    x = np.array(n.in_breakpoints, dtype=float)
+    y = np.array([n.conversion_function(v) for v in n.in_breakpoints])
+    return x, y.astype(float)
+
+
+def _is_concave(x, y):
+    """Whether the slopes of the segments between the breakpoints do not
+    increase."""
+    slopes = np.diff(y) / np.diff(x)
+    tolerance = 1e-9 * max(1, np.abs(slopes).max(initial=0))
+    return bool(np.all(np.diff(slopes) <= tolerance))
@@ -18,8 +18,10 @@ SPDX-License-Identifier: MIT
 """
 import itertools
 
+import numpy as np
 from numpy import mean
 from pyomo.core.base.block import SimpleBlock
+from pyomo.core.expr.numeric_expr import LinearExpression
 from pyomo.environ import BuildAction
 from pyomo.environ import Constraint
 from pyomo.environ import Expression
@@ -30,6 +32,7 @@ from pyomo.environ import Var
 from oemof.solph.network import Sink
 from oemof.solph.options import Investment
 from oemof.solph.plumbing import sequence
+from oemof.solph.plumbing import sequence_to_array
 
 
 class SinkDSM(Sink):
@@ -199,6 +202,12 @@ class SinkDSM(Sink):
     shift_eligibility : boolean
         Boolean parameter indicating whether unit is eligible for
         load shifting
+    compact : boolean
+        Only used when :attr:`~approach` is set to 'DIW'.
+        Use the formulation with cumulated load shifts of
+        :class:`~SinkDSMDIWCompactBlock`, which needs O(T) instead of
+        O(T x delay_time) variables and nonzeros. The possible load shifts
+        are the same.
 
     Note
     ----
@@ -206,7 +215,7 @@ class SinkDSM(Sink):
     * :attr:`method` has been renamed to :attr:`approach`.
     * As many constraints and dependencies are created in approach 'DIW',
       computational cost might be high with a large 'delay_time' and with model
-      of high temporal resolution
+      of high temporal resolution, unless :attr:`compact` is set to True
     * The approach 'DLR' preforms better in terms of calculation time,
       compared to the approach 'DIW'
     * Using :attr:`~approach` 'DIW' or 'DLR' might result in demand shifts that
@@ -254,6 +263,7 @@ class SinkDSM(Sink):
         fixes=True,
         shed_eligibility=True,
         shift_eligibility=True,
+        compact=False,
         **kwargs,
     ):
         super().__init__(**kwargs)
@@ -342,6 +352,7 @@ class SinkDSM(Sink):
         self.fixes = fixes
         self.shed_eligibility = shed_eligibility
         self.shift_eligibility = shift_eligibility
+        self.compact = compact
 
         # Check whether investment mode is active or not
         self.investment = kwargs.get("investment")
@@ -406,6 +417,11 @@ class SinkDSM(Sink):
                     )
 
         if self.approach == possible_approaches[0]:
+            if self.compact:
+                if self._invest_group is True:
+                    return SinkDSMDIWCompactInvestmentBlock
+                else:
+                    return SinkDSMDIWCompactBlock
             if self._invest_group is True:
                 return SinkDSMDIWInvestmentBlock
             else:
@@ -566,156 +582,42 @@ class SinkDSMOemofBlock(SimpleBlock):
 
         #  ************* CONSTRAINTS *****************************
 
-        def _shift_shed_vars_rule(block):
-            """Force shifting resp. shedding variables to zero dependent
-            on how boolean parameters for shift resp. shed eligibility
-            are set.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    if not g.shift_eligibility:
-                        lhs = self.dsm_up[g, t]
-                        rhs = 0
-
-                        block.shift_shed_vars.add((g, t), (lhs == rhs))
-
-                    if not g.shed_eligibility:
-                        lhs = self.dsm_do_shed[g, t]
-                        rhs = 0
-
-                        block.shift_shed_vars.add((g, t), (lhs == rhs))
-
-        self.shift_shed_vars = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.shift_shed_vars_build = BuildAction(rule=_shift_shed_vars_rule)
-
-        # Demand Production Relation
-        def _input_output_relation_rule(block):
-            """Relation between input data and pyomo variables.
-            The actual demand after DSM.
-            Generator Production == Demand_el +- DSM
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # Inflow from bus
-                    lhs = m.flow[g.inflow, g, t]
-
-                    # Demand + DSM_up - DSM_down
-                    rhs = (
-                        g.demand[t] * g.max_demand
-                        + self.dsm_up[g, t]
-                        - self.dsm_do_shift[g, t]
-                        - self.dsm_do_shed[g, t]
-                    )
+        rows = _oemof_rows(self, group)
 
-                    # add constraint
-                    block.input_output_relation.add((g, t), (lhs == rhs))
+        # Force shifting resp. shedding variables to zero dependent on how
+        # boolean parameters for shift resp. shed eligibility are set
+        self.shift_shed_vars = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["shift_shed_vars"])
+        )
 
+        # Demand Production Relation: Sink inflow == Demand +- DSM
         self.input_output_relation = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.input_output_relation_build = BuildAction(
-            rule=_input_output_relation_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["input_output_relation"]),
         )
 
-        # Upper bounds relation
-        def dsm_up_constraint_rule(block):
-            """Realised upward load shift at time t has to be smaller than
-            upward DSM capacity at time t.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # DSM up
-                    lhs = self.dsm_up[g, t]
-                    # Capacity dsm_up
-                    rhs = g.capacity_up[t] * g.max_capacity_up
-
-                    # add constraint
-                    block.dsm_up_constraint.add((g, t), (lhs <= rhs))
-
+        # Upper bounds relation of the upward and the downward load shifts
         self.dsm_up_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_up_constraint"])
         )
-        self.dsm_up_constraint_build = BuildAction(rule=dsm_up_constraint_rule)
-
-        # Upper bounds relation
-        def dsm_down_constraint_rule(block):
-            """Realised downward load shift at time t has to be smaller than
-            downward DSM capacity at time t.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # DSM down
-                    lhs = self.dsm_do_shift[g, t] + self.dsm_do_shed[g, t]
-                    # Capacity dsm_down
-                    rhs = g.capacity_down[t] * g.max_capacity_down
-
-                    # add constraint
-                    block.dsm_down_constraint.add((g, t), (lhs <= rhs))
 
         self.dsm_down_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dsm_down_constraint_build = BuildAction(
-            rule=dsm_down_constraint_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dsm_down_constraint"]),
         )
 
-        def dsm_sum_constraint_rule(block):
-            """Relation to compensate the total amount of positive
-            and negative DSM in between the shift_interval.
-            This constraint is building balance in full intervals starting
-            with index 0. The last interval might not be full.
-            """
-            for g in group:
-                intervals = range(
-                    m.TIMESTEPS[1], m.TIMESTEPS[-1], g.shift_interval
-                )
-
-                for interval in intervals:
-                    if (interval + g.shift_interval - 1) > m.TIMESTEPS[-1]:
-                        timesteps = range(interval, m.TIMESTEPS[-1] + 1)
-                    else:
-                        timesteps = range(
-                            interval, interval + g.shift_interval
-                        )
-
-                    # DSM up/down
-                    lhs = (
-                        sum(self.dsm_up[g, tt] for tt in timesteps)
-                        * g.efficiency
-                    )
-                    # value
-                    rhs = sum(self.dsm_do_shift[g, tt] for tt in timesteps)
-
-                    # add constraint
-                    block.dsm_sum_constraint.add((g, interval), (lhs == rhs))
-
+        # Compensate the total amount of positive and negative DSM in
+        # between the shift_interval
         self.dsm_sum_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dsm_sum_constraint_build = BuildAction(
-            rule=dsm_sum_constraint_rule
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_sum_constraint"])
         )
 
     def _objective_expression(self):
         r"""Objective expression with variable costs for DSM activity"""
 
-        m = self.parent_block()
-
-        dsm_cost = 0
-
-        for t in m.TIMESTEPS:
-            for g in self.dsm:
-                dsm_cost += (
-                    self.dsm_up[g, t]
-                    * g.cost_dsm_up[t]
-                    * m.objective_weighting[t]
-                )
-                dsm_cost += (
-                    self.dsm_do_shift[g, t] * g.cost_dsm_down_shift[t]
-                    + self.dsm_do_shed[g, t] * g.cost_dsm_down_shed[t]
-                ) * m.objective_weighting[t]
-
-        self.cost = Expression(expr=dsm_cost)
+        self.cost = Expression(expr=_dsm_costs(self, self.dsm))
 
         return self.cost
 
@@ -856,169 +758,52 @@ class SinkDSMOemofInvestmentBlock(SimpleBlock):
 
         #  ************* CONSTRAINTS *****************************
 
-        def _shift_shed_vars_rule(block):
-            """Force shifting resp. shedding variables to zero dependent
-            on how boolean parameters for shift resp. shed eligibility
-            are set.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    if not g.shift_eligibility:
-                        lhs = self.dsm_up[g, t]
-                        rhs = 0
-
-                        block.shift_shed_vars.add((g, t), (lhs == rhs))
-
-                    if not g.shed_eligibility:
-                        lhs = self.dsm_do_shed[g, t]
-                        rhs = 0
-
-                        block.shift_shed_vars.add((g, t), (lhs == rhs))
-
-        self.shift_shed_vars = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.shift_shed_vars_build = BuildAction(rule=_shift_shed_vars_rule)
-
-        # Demand Production Relation
-        def _input_output_relation_rule(block):
-            """Relation between input data and pyomo variables.
-            The actual demand after DSM.
-            Generator Production == Demand_el +- DSM
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # Inflow from bus
-                    lhs = m.flow[g.inflow, g, t]
+        rows = _oemof_rows(self, group, self.invest)
 
-                    # Demand + DSM_up - DSM_down
-                    rhs = (
-                        g.demand[t] * (self.invest[g] + g.investment.existing)
-                        + self.dsm_up[g, t]
-                        - self.dsm_do_shift[g, t]
-                        - self.dsm_do_shed[g, t]
-                    )
-
-                    # add constraint
-                    block.input_output_relation.add((g, t), (lhs == rhs))
+        # Force shifting resp. shedding variables to zero dependent on how
+        # boolean parameters for shift resp. shed eligibility are set
+        self.shift_shed_vars = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["shift_shed_vars"])
+        )
 
+        # Demand Production Relation: Sink inflow == Demand +- DSM
         self.input_output_relation = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.input_output_relation_build = BuildAction(
-            rule=_input_output_relation_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["input_output_relation"]),
         )
 
-        # Upper bounds relation
-        def dsm_up_constraint_rule(block):
-            """Realised upward load shift at time t has to be smaller than
-            upward DSM capacity at time t.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # DSM up
-                    lhs = self.dsm_up[g, t]
-                    # Capacity dsm_up
-                    rhs = (
-                        g.capacity_up[t]
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_up
-                    )
-
-                    # add constraint
-                    block.dsm_up_constraint.add((g, t), (lhs <= rhs))
-
+        # Upper bounds relation of the upward and the downward load shifts
         self.dsm_up_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_up_constraint"])
         )
-        self.dsm_up_constraint_build = BuildAction(rule=dsm_up_constraint_rule)
-
-        # Upper bounds relation
-        def dsm_down_constraint_rule(block):
-            """Realised downward load shift at time t has to be smaller than
-            downward DSM capacity at time t.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # DSM down
-                    lhs = self.dsm_do_shift[g, t] + self.dsm_do_shed[g, t]
-                    # Capacity dsm_down
-                    rhs = (
-                        g.capacity_down[t]
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_down
-                    )
-
-                    # add constraint
-                    block.dsm_down_constraint.add((g, t), (lhs <= rhs))
 
         self.dsm_down_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dsm_down_constraint_build = BuildAction(
-            rule=dsm_down_constraint_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dsm_down_constraint"]),
         )
 
-        def dsm_sum_constraint_rule(block):
-            """Relation to compensate the total amount of positive
-            and negative DSM in between the shift_interval.
-            This constraint is building balance in full intervals starting
-            with index 0. The last interval might not be full.
-            """
-            for g in group:
-                intervals = range(
-                    m.TIMESTEPS[1], m.TIMESTEPS[-1], g.shift_interval
-                )
-
-                for interval in intervals:
-                    if (interval + g.shift_interval - 1) > m.TIMESTEPS[-1]:
-                        timesteps = range(interval, m.TIMESTEPS[-1] + 1)
-                    else:
-                        timesteps = range(
-                            interval, interval + g.shift_interval
-                        )
-
-                    # DSM up/down
-                    lhs = (
-                        sum(self.dsm_up[g, tt] for tt in timesteps)
-                        * g.efficiency
-                    )
-                    # value
-                    rhs = sum(self.dsm_do_shift[g, tt] for tt in timesteps)
-
-                    # add constraint
-                    block.dsm_sum_constraint.add((g, interval), (lhs == rhs))
-
+        # Compensate the total amount of positive and negative DSM in
+        # between the shift_interval
         self.dsm_sum_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dsm_sum_constraint_build = BuildAction(
-            rule=dsm_sum_constraint_rule
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_sum_constraint"])
         )
 
     def _objective_expression(self):
         r"""Objective expression with variable and investment costs for DSM"""
 
-        m = self.parent_block()
-
         investment_costs = 0
-        variable_costs = 0
 
         for g in self.investdsm:
             if g.investment.ep_costs is not None:
                 investment_costs += self.invest[g] * g.investment.ep_costs
             else:
                 raise ValueError("Missing value for investment costs!")
-            for t in m.TIMESTEPS:
-                variable_costs += (
-                    self.dsm_up[g, t]
-                    * g.cost_dsm_up[t]
-                    * m.objective_weighting[t]
-                )
-                variable_costs += (
-                    self.dsm_do_shift[g, t] * g.cost_dsm_down_shift[t]
-                    + self.dsm_do_shed[g, t] * g.cost_dsm_down_shed[t]
-                ) * m.objective_weighting[t]
 
-        self.cost = Expression(expr=investment_costs + variable_costs)
+        self.cost = Expression(
+            expr=investment_costs + _dsm_costs(self, self.investdsm)
+        )
 
         return self.cost
 
@@ -2350,85 +2135,349 @@ class SinkDSMDIWInvestmentBlock(SimpleBlock):
         return self.cost
 
 
-class SinkDSMDLRBlock(SimpleBlock):
-    r"""Constraints for SinkDSM with "DLR" approach
+class SinkDSMDIWCompactBlock(SimpleBlock):
+    r"""Constraints for SinkDSM with "DIW" approach and :attr:`compact`
 
-    **The following constraints are created for approach = 'DLR':**
+    The load shifts of approach 'DIW' have to be compensated within the delay
+    time :math:`L`. :class:`SinkDSMDIWBlock` assigns every downwards shift to
+    an upwards shift by a variable per pair of time steps within the delay
+    time, which gives :math:`T \cdot (2L + 1)` variables per unit. This block
+    has one variable for the downwards shift per time step instead and
+    balances the cumulated shifts :math:`DSM_{t}^{up, cum}` and
+    :math:`DSM_{t}^{do, cum}`:
+    Downwards shifts compensating the (efficiency-weighted) upwards shifts
+    within the delay time exist if and only if the upwards shifts until t
+    are compensated by the downwards shifts until t + L and vice versa
+    (Hall's theorem for time windows). So the possible load shifts, shedding
+    and costs are the same as with :class:`SinkDSMDIWBlock`, while the number
+    of variables and nonzeros grows linearly with the number of time steps.
 
-    .. _SinkDSMDLR equations:
+    **The following constraints are created for approach = 'DIW' with
+    compact = True:**
 
     .. math::
         &
-        (1) \quad DSM_{h, t}^{up} = 0 \quad \forall h \in H_{DR}
-        \forall t \in \mathbb{T}
+        (1) \quad DSM_{t}^{up} = 0 \quad \forall t
         \quad if \space eligibility_{shift} = False \\
         &
-        (2) \quad DSM_{t}^{do, shed} = 0 \quad \forall t \in \mathbb{T}
+        (2) \quad DSM_{t}^{do, shed} = 0 \quad \forall t
         \quad if \space eligibility_{shed} = False \\
         &
-        (3) \quad \dot{E}_{t} = demand_{t} \cdot demand_{max} +
-        \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{up}
-        + DSM_{h, t}^{balanceDo} - DSM_{h, t}^{do, shift}
-        - DSM_{h, t}^{balanceUp}) - DSM_{t}^{do, shed}
-        \quad \forall t \in \mathbb{T} \\
+        (3) \quad \dot{E}_{t} = demand_{t} \cdot demand_{max} + DSM_{t}^{up}
+        - DSM_{t}^{do, shift} - DSM_{t}^{do, shed} \quad
+        \forall t \in \mathbb{T} \\
         &
-        (4) \quad DSM_{h, t}^{balanceDo} =
-        \frac{DSM_{h, t - h}^{do, shift}}{\eta}
-        \quad \forall h \in H_{DR} \forall t \in [h..T] \\
+        (4) \quad DSM_{t}^{up, cum} = DSM_{t-1}^{up, cum} + DSM_{t}^{up},
+        \quad DSM_{t}^{do, cum} = DSM_{t-1}^{do, cum} + DSM_{t}^{do, shift}
+        \quad \forall t \in \mathbb{T} \\
         &
-        (5) \quad DSM_{h, t}^{balanceUp} =
-        DSM_{h, t-h}^{up} \cdot \eta
-        \quad \forall h \in H_{DR} \forall t \in [h..T] \\
+        (5) \quad DSM_{t}^{up, cum} \cdot \eta \leq DSM_{t+L}^{do, cum}
+        \quad \forall t < |\mathbb{T}| - L - 1 \\
         &
-        (6) \quad DSM_{h, t}^{do, shift} = 0
-        \quad \forall h \in H_{DR}
-        \forall t \in [T - h..T] \\
+        (6) \quad DSM_{t}^{do, cum} \leq DSM_{t+L}^{up, cum} \cdot \eta
+        \quad \forall t < |\mathbb{T}| - L - 1 \\
         &
-        (7) \quad DSM_{h, t}^{up} = 0
-        \quad \forall h \in H_{DR}
-        \forall t \in [T - h..T] \\
+        (7) \quad DSM_{|\mathbb{T}|-1}^{up, cum} \cdot \eta
+        = DSM_{|\mathbb{T}|-1}^{do, cum} \\
         &
-        (8) \quad \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{do, shift}
-        + DSM_{h, t}^{balanceUp}) + DSM_{t}^{do, shed}
-        \leq E_{t}^{do} \cdot E_{max, do}
+        (8) \quad DSM_{t}^{up} \leq  E_{t}^{up} \cdot E_{up, max}
         \quad \forall t \in \mathbb{T} \\
         &
-        (9) \quad \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{up}
-        + DSM_{h, t}^{balanceDo})
-        \leq E_{t}^{up} \cdot E_{max, up}
+        (9) \quad DSM_{t}^{do, shift} + DSM_{t}^{do, shed}
+        \leq E_{t}^{do} \cdot E_{do, max}
         \quad \forall t \in \mathbb{T} \\
         &
-        (10) \quad \Delta t \cdot \displaystyle\sum_{h=1}^{H_{DR}}
-        (DSM_{h, t}^{do, shift} - DSM_{h, t}^{balanceDo} \cdot \eta)
-        = W_{t}^{levelDo} - W_{t-1}^{levelDo}
-        \quad \forall t \in [1..T] \\
-        &
-        (11) \quad \Delta t \cdot \displaystyle\sum_{h=1}^{H_{DR}}
-        (DSM_{h, t}^{up} \cdot \eta - DSM_{h, t}^{balanceUp})
-        = W_{t}^{levelUp} - W_{t-1}^{levelUp}
-        \quad \forall t \in [1..T] \\
+        (10) \quad DSM_{t}^{up} + DSM_{t}^{do, shift} + DSM_{t}^{do, shed}
+        \leq max \{ E_{t}^{up} \cdot E_{up, max}, E_{t}^{do} \cdot E_{do, max}
+        \} \quad \forall t \in \mathbb{T} \\
         &
-        (12) \quad W_{t}^{levelDo} \leq \overline{E}_{t}^{do}
-        \cdot E_{max, do} \cdot t_{shift}
+        (11) \quad DSM_{t+R-1}^{up, cum} - DSM_{t-1}^{up, cum}
+        \leq E_{t}^{up} \cdot E_{up, max} \cdot L \cdot \Delta t
         \quad \forall t \in \mathbb{T} \\
         &
-        (13) \quad W_{t}^{levelUp} \leq \overline{E}_{t}^{up}
-        \cdot E_{max, up} \cdot t_{shift}
+        (12) \quad \sum_{tt=t}^{t+R-1} DSM_{tt}^{do, shed}
+        \leq E_{t}^{do} \cdot E_{do, max} \cdot t_{shed} \cdot \Delta t
         \quad \forall t \in \mathbb{T} \\
         &
-        (14) \quad \displaystyle\sum_{t=0}^{T} DSM_{t}^{do, shed}
-        \leq E_{max, do} \cdot \overline{E}_{t}^{do} \cdot t_{shed}
-        \cdot n^{yearLimitShed} \\
-        &
-        (15) \quad \displaystyle\sum_{t=0}^{T} \sum_{h=1}^{H_{DR}}
-        DSM_{h, t}^{do, shift}
-        \leq E_{max, do} \cdot \overline{E}_{t}^{do} \cdot t_{shift}
-        \cdot n^{yearLimitShift} \\
-        (optional \space constraint) \\
-        &
-        (16) \quad \displaystyle\sum_{t=0}^{T} \sum_{h=1}^{H_{DR}}
-        DSM_{h, t}^{up}
-        \leq E_{max, up} \cdot \overline{E}_{t}^{up} \cdot t_{shift}
+
+    with :math:`DSM_{-1}^{up, cum} = DSM_{-1}^{do, cum} = 0`. Indices beyond
+    the last time step are limited to the last time step.
+
+    **The following parts of the objective function are created:**
+
+    .. math::
+        DSM_{t}^{up} \cdot cost_{t}^{dsm, up}
+        + DSM_{t}^{do, shift} \cdot cost_{t}^{dsm, do, shift}
+        + DSM_{t}^{do, shed} \cdot cost_{t}^{dsm, do, shed}
+        \quad \forall t \in \mathbb{T} \\
+
+    **Table: Symbols and attribute names of variables and parameters**
+
+    Please refer to :class:`oemof.solph.custom.SinkDSMDIWBlock`. The
+    following variables differ:
+
+        .. csv-table:: Variables (V)
+            :header: "symbol", "attribute", "type", "explanation"
+            :widths: 1, 1, 1, 1
+
+            ":math:`DSM_{t}^{do, shift}` ",
+            ":attr:`~SinkDSM.dsm_do_shift[g,t]`",
+            "V", "DSM down shift (less load) in hour t"
+            ":math:`DSM_{t}^{up, cum}` ",
+            ":attr:`~SinkDSM.dsm_up_cumulated[g,t]`",
+            "V", "DSM up shifts of the hours 0 to t"
+            ":math:`DSM_{t}^{do, cum}` ",
+            ":attr:`~SinkDSM.dsm_do_cumulated[g,t]`",
+            "V", "DSM down shifts of the hours 0 to t"
+    """
+    CONSTRAINT_GROUP = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _create(self, group=None, invest=None):
+        if group is None:
+            return None
+
+        m = self.parent_block()
+
+        # for all DSM components get inflow from a bus
+        for n in group:
+            n.inflow = list(n.inputs)[0]
+
+        #  ************* SETS *********************************
+
+        # Set of DSM Components
+        self.dsm = Set(initialize=[g for g in group])
+
+        #  ************* VARIABLES *****************************
+
+        # Variable load shift down
+        self.dsm_do_shift = Var(
+            self.dsm, m.TIMESTEPS, initialize=0, within=NonNegativeReals
+        )
+
+        # Variable load shedding
+        self.dsm_do_shed = Var(
+            self.dsm, m.TIMESTEPS, initialize=0, within=NonNegativeReals
+        )
+
+        # Variable load shift up
+        self.dsm_up = Var(
+            self.dsm, m.TIMESTEPS, initialize=0, within=NonNegativeReals
+        )
+
+        # Cumulated load shifts up and down
+        self.dsm_up_cumulated = Var(
+            self.dsm, m.TIMESTEPS, initialize=0, within=NonNegativeReals
+        )
+        self.dsm_do_cumulated = Var(
+            self.dsm, m.TIMESTEPS, initialize=0, within=NonNegativeReals
+        )
+
+        #  ************* CONSTRAINTS *****************************
+
+        rows = _diw_compact_rows(self, group, invest)
+
+        self.shift_shed_vars = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["shift_shed_vars"])
+        )
+        self.input_output_relation = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["input_output_relation"]),
+        )
+        self.dsm_up_cumulation = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_up_cumulation"])
+        )
+        self.dsm_do_cumulation = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_do_cumulation"])
+        )
+        self.dsm_up_compensation = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dsm_up_compensation"]),
+        )
+        self.dsm_do_compensation = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dsm_do_compensation"]),
+        )
+        self.dsm_updo_constraint = Constraint(
+            group, rule=_prebuilt_rule(rows["dsm_updo_constraint"])
+        )
+        self.dsm_up_constraint = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_up_constraint"])
+        )
+        self.dsm_do_constraint = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dsm_do_constraint"])
+        )
+        self.C2_constraint = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["C2_constraint"])
+        )
+        self.recovery_constraint = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["recovery_constraint"]),
+        )
+        self.shed_limit_constraint = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["shed_limit_constraint"]),
+        )
+
+    def _objective_expression(self):
+        r"""Objective expression with variable costs for DSM activity"""
+        self.cost = Expression(expr=_dsm_costs(self, self.dsm))
+
+        return self.cost
+
+
+class SinkDSMDIWCompactInvestmentBlock(SinkDSMDIWCompactBlock):
+    r"""Constraints for SinkDSM with "DIW" approach, :attr:`compact` and
+    :attr:`investment`
+
+    The constraints of :class:`SinkDSMDIWCompactBlock` with the size
+    :math:`invest + E_{exist}` of the unit instead of :math:`demand_{max}`
+    and the flexible shares of it instead of :math:`E_{up, max}` and
+    :math:`E_{do, max}`, like in :class:`SinkDSMDIWInvestmentBlock`.
+
+    .. math::
+        invest_{min} \leq invest \leq invest_{max}
+
+    **The following parts of the objective function are created:**
+
+    * Investment annuity:
+
+    .. math::
+        invest \cdot costs_{invest} \\
+
+    * Variable costs as in :class:`SinkDSMDIWCompactBlock`.
+    """
+    CONSTRAINT_GROUP = True
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _create(self, group=None):
+        if group is None:
+            return None
+
+        # Set of DSM Components
+        self.investdsm = Set(initialize=[g for g in group])
+
+        # Define bounds for investments in demand response
+        def _dsm_investvar_bound_rule(block, g):
+            """Rule definition to bound the
+            demand response capacity invested in (`invest`).
+            """
+            return g.investment.minimum, g.investment.maximum
+
+        # Investment in DR capacity
+        self.invest = Var(
+            self.investdsm,
+            within=NonNegativeReals,
+            bounds=_dsm_investvar_bound_rule,
+        )
+
+        super()._create(group, self.invest)
+
+    def _objective_expression(self):
+        r"""Objective expression with variable and investment costs for DSM"""
+        investment_costs = 0
+
+        for g in self.investdsm:
+            if g.investment.ep_costs is not None:
+                investment_costs += self.invest[g] * g.investment.ep_costs
+            else:
+                raise ValueError("Missing value for investment costs!")
+
+        self.cost = Expression(
+            expr=investment_costs + _dsm_costs(self, self.investdsm)
+        )
+
+        return self.cost
+
+
+class SinkDSMDLRBlock(SimpleBlock):
+    r"""Constraints for SinkDSM with "DLR" approach
+
+    **The following constraints are created for approach = 'DLR':**
+
+    .. _SinkDSMDLR equations:
+
+    .. math::
+        &
+        (1) \quad DSM_{h, t}^{up} = 0 \quad \forall h \in H_{DR}
+        \forall t \in \mathbb{T}
+        \quad if \space eligibility_{shift} = False \\
+        &
+        (2) \quad DSM_{t}^{do, shed} = 0 \quad \forall t \in \mathbb{T}
+        \quad if \space eligibility_{shed} = False \\
+        &
+        (3) \quad \dot{E}_{t} = demand_{t} \cdot demand_{max} +
+        \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{up}
+        + DSM_{h, t}^{balanceDo} - DSM_{h, t}^{do, shift}
+        - DSM_{h, t}^{balanceUp}) - DSM_{t}^{do, shed}
+        \quad \forall t \in \mathbb{T} \\
+        &
+        (4) \quad DSM_{h, t}^{balanceDo} =
+        \frac{DSM_{h, t - h}^{do, shift}}{\eta}
+        \quad \forall h \in H_{DR} \forall t \in [h..T] \\
+        &
+        (5) \quad DSM_{h, t}^{balanceUp} =
+        DSM_{h, t-h}^{up} \cdot \eta
+        \quad \forall h \in H_{DR} \forall t \in [h..T] \\
+        &
+        (6) \quad DSM_{h, t}^{do, shift} = 0
+        \quad \forall h \in H_{DR}
+        \forall t \in [T - h..T] \\
+        &
+        (7) \quad DSM_{h, t}^{up} = 0
+        \quad \forall h \in H_{DR}
+        \forall t \in [T - h..T] \\
+        &
+        (8) \quad \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{do, shift}
+        + DSM_{h, t}^{balanceUp}) + DSM_{t}^{do, shed}
+        \leq E_{t}^{do} \cdot E_{max, do}
+        \quad \forall t \in \mathbb{T} \\
+        &
+        (9) \quad \displaystyle\sum_{h=1}^{H_{DR}} (DSM_{h, t}^{up}
+        + DSM_{h, t}^{balanceDo})
+        \leq E_{t}^{up} \cdot E_{max, up}
+        \quad \forall t \in \mathbb{T} \\
+        &
+        (10) \quad \Delta t \cdot \displaystyle\sum_{h=1}^{H_{DR}}
+        (DSM_{h, t}^{do, shift} - DSM_{h, t}^{balanceDo} \cdot \eta)
+        = W_{t}^{levelDo} - W_{t-1}^{levelDo}
+        \quad \forall t \in [1..T] \\
+        &
+        (11) \quad \Delta t \cdot \displaystyle\sum_{h=1}^{H_{DR}}
+        (DSM_{h, t}^{up} \cdot \eta - DSM_{h, t}^{balanceUp})
+        = W_{t}^{levelUp} - W_{t-1}^{levelUp}
+        \quad \forall t \in [1..T] \\
+        &
+        (12) \quad W_{t}^{levelDo} \leq \overline{E}_{t}^{do}
+        \cdot E_{max, do} \cdot t_{shift}
+        \quad \forall t \in \mathbb{T} \\
+        &
+        (13) \quad W_{t}^{levelUp} \leq \overline{E}_{t}^{up}
+        \cdot E_{max, up} \cdot t_{shift}
+        \quad \forall t \in \mathbb{T} \\
+        &
+        (14) \quad \displaystyle\sum_{t=0}^{T} DSM_{t}^{do, shed}
+        \leq E_{max, do} \cdot \overline{E}_{t}^{do} \cdot t_{shed}
+        \cdot n^{yearLimitShed} \\
+        &
+        (15) \quad \displaystyle\sum_{t=0}^{T} \sum_{h=1}^{H_{DR}}
+        DSM_{h, t}^{do, shift}
+        \leq E_{max, do} \cdot \overline{E}_{t}^{do} \cdot t_{shift}
+        \cdot n^{yearLimitShift} \\
+        (optional \space constraint) \\
+        &
+        (16) \quad \displaystyle\sum_{t=0}^{T} \sum_{h=1}^{H_{DR}}
+        DSM_{h, t}^{up}
+        \leq E_{max, up} \cdot \overline{E}_{t}^{up} \cdot t_{shift}
         \cdot n^{yearLimitShift} \\
         (optional \space constraint) \\
         &
@@ -2636,649 +2685,123 @@ class SinkDSMDLRBlock(SimpleBlock):
 
         #  ************* CONSTRAINTS *****************************
 
-        def _shift_shed_vars_rule(block):
-            """Force shifting resp. shedding variables to zero dependent
-            on how boolean parameters for shift resp. shed eligibility
-            are set.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if not g.shift_eligibility:
-                            lhs = self.dsm_up[g, h, t]
-                            rhs = 0
-
-                            block.shift_shed_vars.add((g, h, t), (lhs == rhs))
-
-                        if not g.shed_eligibility:
-                            lhs = self.dsm_do_shed[g, t]
-                            rhs = 0
-
-                            block.shift_shed_vars.add((g, h, t), (lhs == rhs))
+        rows = _dlr_rows(self, group)
 
+        # Force shifting resp. shedding variables to zero dependent on how
+        # boolean parameters for shift resp. shed eligibility are set
         self.shift_shed_vars = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["shift_shed_vars"]),
         )
-        self.shift_shed_vars_build = BuildAction(rule=_shift_shed_vars_rule)
 
         # Relation between inflow and effective Sink consumption
-        def _input_output_relation_rule(block):
-            """Relation between input data and pyomo variables.
-            The actual demand after DR.
-            Bus outflow == Demand +- DR (i.e. effective Sink consumption)
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # outflow from bus
-                    lhs = m.flow[g.inflow, g, t]
-
-                    # Demand +- DR
-                    rhs = (
-                        g.demand[t] * g.max_demand
-                        + sum(
-                            self.dsm_up[g, h, t]
-                            + self.balance_dsm_do[g, h, t]
-                            - self.dsm_do_shift[g, h, t]
-                            - self.balance_dsm_up[g, h, t]
-                            for h in g.delay_time
-                        )
-                        - self.dsm_do_shed[g, t]
-                    )
-
-                    # add constraint
-                    block.input_output_relation.add((g, t), (lhs == rhs))
-
         self.input_output_relation = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.input_output_relation_build = BuildAction(
-            rule=_input_output_relation_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["input_output_relation"]),
         )
 
-        # Equation 4.8
-        def capacity_balance_red_rule(block):
-            """Load reduction must be balanced by load increase
-            within delay_time
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if g.shift_eligibility:
-
-                            # main use case
-                            if t >= h:
-                                # balance load reduction
-                                lhs = self.balance_dsm_do[g, h, t]
-
-                                # load reduction (efficiency considered)
-                                rhs = (
-                                    self.dsm_do_shift[g, h, t - h]
-                                    / g.efficiency
-                                )
-
-                                # add constraint
-                                block.capacity_balance_red.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            # no balancing for the first timestep
-                            elif t == m.TIMESTEPS[1]:
-                                lhs = self.balance_dsm_do[g, h, t]
-                                rhs = 0
-
-                                block.capacity_balance_red.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            else:
-                                pass  # return(Constraint.Skip)
-
-                        # if only shedding is possible, balancing variable is 0
-                        else:
-                            lhs = self.balance_dsm_do[g, h, t]
-                            rhs = 0
-
-                            block.capacity_balance_red.add(
-                                (g, h, t), (lhs == rhs)
-                            )
-
+        # Equation 4.8: Load reduction must be balanced by load increase
+        # within delay_time
         self.capacity_balance_red = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
-        )
-        self.capacity_balance_red_build = BuildAction(
-            rule=capacity_balance_red_rule
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["capacity_balance_red"]),
         )
 
-        # Equation 4.9
-        def capacity_balance_inc_rule(block):
-            """Load increased must be balanced by load reduction
-            within delay_time
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if g.shift_eligibility:
-
-                            # main use case
-                            if t >= h:
-                                # balance load increase
-                                lhs = self.balance_dsm_up[g, h, t]
-
-                                # load increase (efficiency considered)
-                                rhs = self.dsm_up[g, h, t - h] * g.efficiency
-
-                                # add constraint
-                                block.capacity_balance_inc.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            # no balancing for the first timestep
-                            elif t == m.TIMESTEPS[1]:
-                                lhs = self.balance_dsm_up[g, h, t]
-                                rhs = 0
-
-                                block.capacity_balance_inc.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            else:
-                                pass  # return(Constraint.Skip)
-
-                        # if only shedding is possible, balancing variable is 0
-                        else:
-                            lhs = self.balance_dsm_up[g, h, t]
-                            rhs = 0
-
-                            block.capacity_balance_inc.add(
-                                (g, h, t), (lhs == rhs)
-                            )
-
+        # Equation 4.9: Load increase must be balanced by load reduction
+        # within delay_time
         self.capacity_balance_inc = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
-        )
-        self.capacity_balance_inc_build = BuildAction(
-            rule=capacity_balance_inc_rule
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["capacity_balance_inc"]),
         )
 
         # Fix: prevent shifts which cannot be compensated
-        def no_comp_red_rule(block):
-            """Prevent downwards shifts that cannot be balanced anymore
-            within the optimization timeframe
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.fixes:
-                        for h in g.delay_time:
-
-                            if t > m.TIMESTEPS[-1] - h:
-                                # no load reduction anymore (dsm_do_shift = 0)
-                                lhs = self.dsm_do_shift[g, h, t]
-                                rhs = 0
-                                block.no_comp_red.add((g, h, t), (lhs == rhs))
-
-                    else:
-                        pass  # return(Constraint.Skip)
-
         self.no_comp_red = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["no_comp_red"]),
         )
-        self.no_comp_red_build = BuildAction(rule=no_comp_red_rule)
-
-        # Fix: prevent shifts which cannot be compensated
-        def no_comp_inc_rule(block):
-            """Prevent upwards shifts that cannot be balanced anymore
-            within the optimization timeframe
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.fixes:
-                        for h in g.delay_time:
-
-                            if t > m.TIMESTEPS[-1] - h:
-                                # no load increase anymore (dsm_up = 0)
-                                lhs = self.dsm_up[g, h, t]
-                                rhs = 0
-                                block.no_comp_inc.add((g, h, t), (lhs == rhs))
-
-                    else:
-                        pass  # return(Constraint.Skip)
 
         self.no_comp_inc = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["no_comp_inc"]),
         )
-        self.no_comp_inc_build = BuildAction(rule=no_comp_inc_rule)
-
-        # Equation 4.11
-        def availability_red_rule(block):
-            """Load reduction must be smaller than or equal to the
-            (time-dependent) capacity limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # load reduction
-                    lhs = (
-                        sum(
-                            self.dsm_do_shift[g, h, t]
-                            + self.balance_dsm_up[g, h, t]
-                            for h in g.delay_time
-                        )
-                        + self.dsm_do_shed[g, t]
-                    )
-
-                    # upper bound
-                    rhs = g.capacity_down[t] * g.max_capacity_down
-
-                    # add constraint
-                    block.availability_red.add((g, t), (lhs <= rhs))
-
-        self.availability_red = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.availability_red_build = BuildAction(rule=availability_red_rule)
-
-        # Equation 4.12
-        def availability_inc_rule(block):
-            """Load increase must be smaller than or equal to the
-            (time-dependent) capacity limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # load increase
-                    lhs = sum(
-                        self.dsm_up[g, h, t] + self.balance_dsm_do[g, h, t]
-                        for h in g.delay_time
-                    )
-
-                    # upper bound
-                    rhs = g.capacity_up[t] * g.max_capacity_up
-
-                    # add constraint
-                    block.availability_inc.add((g, t), (lhs <= rhs))
-
-        self.availability_inc = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.availability_inc_build = BuildAction(rule=availability_inc_rule)
-
-        # Equation 4.13
-        def dr_storage_red_rule(block):
-            """Fictious demand response storage level for load reductions
-            transition equation
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    # avoid timesteps prior to t = 0
-                    if t > 0:
-                        # reduction minus balancing of reductions
-                        lhs = m.timeincrement[t] * sum(
-                            (
-                                self.dsm_do_shift[g, h, t]
-                                - self.balance_dsm_do[g, h, t] * g.efficiency
-                            )
-                            for h in g.delay_time
-                        )
-
-                        # load reduction storage level transition
-                        rhs = (
-                            self.dsm_do_level[g, t]
-                            - self.dsm_do_level[g, t - 1]
-                        )
-
-                        # add constraint
-                        block.dr_storage_red.add((g, t), (lhs == rhs))
-
-                    else:
-                        lhs = self.dsm_do_level[g, t]
-                        rhs = m.timeincrement[t] * sum(
-                            self.dsm_do_shift[g, h, t] for h in g.delay_time
-                        )
-                        block.dr_storage_red.add((g, t), (lhs == rhs))
-
-        self.dr_storage_red = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.dr_storage_red_build = BuildAction(rule=dr_storage_red_rule)
 
-        # Equation 4.14
-        def dr_storage_inc_rule(block):
-            """Fictious demand response storage level for load increase
-            transition equation
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    # avoid timesteps prior to t = 0
-                    if t > 0:
-                        # increases minus balancing of reductions
-                        lhs = m.timeincrement[t] * sum(
-                            (
-                                self.dsm_up[g, h, t] * g.efficiency
-                                - self.balance_dsm_up[g, h, t]
-                            )
-                            for h in g.delay_time
-                        )
-
-                        # load increase storage level transition
-                        rhs = (
-                            self.dsm_up_level[g, t]
-                            - self.dsm_up_level[g, t - 1]
-                        )
-
-                        # add constraint
-                        block.dr_storage_inc.add((g, t), (lhs == rhs))
-
-                    else:
-                        # pass  # return(Constraint.Skip)
-                        lhs = self.dsm_up_level[g, t]
-                        rhs = m.timeincrement[t] * sum(
-                            self.dsm_up[g, h, t] for h in g.delay_time
-                        )
-                        block.dr_storage_inc.add((g, t), (lhs == rhs))
-
-        self.dr_storage_inc = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.dr_storage_inc_build = BuildAction(rule=dr_storage_inc_rule)
-
-        # Equation 4.15
-        def dr_storage_limit_red_rule(block):
-            """
-            Fictious demand response storage level for load reduction limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.shift_eligibility:
-                        # fictious demand response load reduction storage level
-                        lhs = self.dsm_do_level[g, t]
-
-                        # maximum (time-dependent) available shifting capacity
-                        rhs = (
-                            g.capacity_down_mean
-                            * g.max_capacity_down
-                            * g.shift_time
-                        )
+        # Equations 4.11 and 4.12: Load reduction resp. increase must be
+        # smaller than or equal to the (time-dependent) capacity limit
+        self.availability_red = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["availability_red"])
+        )
 
-                        # add constraint
-                        block.dr_storage_limit_red.add((g, t), (lhs <= rhs))
+        self.availability_inc = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["availability_inc"])
+        )
 
-                    else:
-                        lhs = self.dsm_do_level[g, t]
-                        # Force storage level and thus dsm_do_shift to 0
-                        rhs = 0
+        # Equations 4.13 and 4.14: Fictious demand response storage level
+        # transition equations
+        self.dr_storage_red = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_storage_red"])
+        )
 
-                        # add constraint
-                        block.dr_storage_limit_red.add((g, t), (lhs <= rhs))
+        self.dr_storage_inc = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_storage_inc"])
+        )
 
+        # Equations 4.15 and 4.16: Fictious demand response storage level
+        # limits
         self.dr_storage_limit_red = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_storage_level_red_build = BuildAction(
-            rule=dr_storage_limit_red_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_storage_limit_red"]),
         )
 
-        # Equation 4.16
-        def dr_storage_limit_inc_rule(block):
-            """
-            Fictious demand response storage level for load increase limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # fictious demand response load reduction storage level
-                    lhs = self.dsm_up_level[g, t]
-
-                    # maximum (time-dependent) available shifting capacity
-                    rhs = g.capacity_up_mean * g.max_capacity_up * g.shift_time
-
-                    # add constraint
-                    block.dr_storage_limit_inc.add((g, t), (lhs <= rhs))
-
         self.dr_storage_limit_inc = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_storage_level_inc_build = BuildAction(
-            rule=dr_storage_limit_inc_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_storage_limit_inc"]),
         )
 
         # Equation 4.17' -> load shedding
-        def dr_yearly_limit_shed_rule(block):
-            """Introduce overall annual (energy) limit for load shedding resp.
-            overall limit for optimization timeframe considered
-            A year limit in contrast to Gils (2015) is defined a mandatory
-            parameter here in order to achieve an approach comparable
-            to the others.
-            """
-            for g in group:
-
-                if g.shed_eligibility:
-                    # sum of all load reductions
-                    lhs = sum(self.dsm_do_shed[g, t] for t in m.TIMESTEPS)
-
-                    # year limit
-                    rhs = (
-                        g.capacity_down_mean
-                        * g.max_capacity_down
-                        * g.shed_time
-                        * g.n_yearLimit_shed
-                    )
-
-                    # add constraint
-                    block.dr_yearly_limit_shed.add(g, (lhs <= rhs))
-
-                else:
-                    pass  # return(Constraint.Skip)
-
-        self.dr_yearly_limit_shed = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_shed_build = BuildAction(
-            rule=dr_yearly_limit_shed_rule
+        self.dr_yearly_limit_shed = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_shed"])
         )
 
         # ************* Optional Constraints *****************************
 
-        # Equation 4.17
-        def dr_yearly_limit_red_rule(block):
-            """Introduce overall annual (energy) limit for load reductions
-            resp. overall limit for optimization timeframe considered
-            """
-            for g in group:
-
-                if g.ActivateYearLimit:
-                    # sum of all load reductions
-                    lhs = sum(
-                        sum(self.dsm_do_shift[g, h, t] for h in g.delay_time)
-                        for t in m.TIMESTEPS
-                    )
-
-                    # year limit
-                    rhs = (
-                        g.capacity_down_mean
-                        * g.max_capacity_down
-                        * g.shift_time
-                        * g.n_yearLimit_shift
-                    )
-
-                    # add constraint
-                    block.dr_yearly_limit_red.add(g, (lhs <= rhs))
-
-                else:
-                    pass  # return(Constraint.Skip)
-
-        self.dr_yearly_limit_red = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_red_build = BuildAction(
-            rule=dr_yearly_limit_red_rule
+        # Equations 4.17 and 4.18: Overall annual (energy) limit for load
+        # reductions resp. increases
+        self.dr_yearly_limit_red = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_red"])
         )
 
-        # Equation 4.18
-        def dr_yearly_limit_inc_rule(block):
-            """Introduce overall annual (energy) limit for load increases
-            resp. overall limit for optimization timeframe considered
-            """
-            for g in group:
-
-                if g.ActivateYearLimit:
-                    # sum of all load increases
-                    lhs = sum(
-                        sum(self.dsm_up[g, h, t] for h in g.delay_time)
-                        for t in m.TIMESTEPS
-                    )
-
-                    # year limit
-                    rhs = (
-                        g.capacity_up_mean
-                        * g.max_capacity_up
-                        * g.shift_time
-                        * g.n_yearLimit_shift
-                    )
-
-                    # add constraint
-                    block.dr_yearly_limit_inc.add(g, (lhs <= rhs))
-
-                else:
-                    pass  # return(Constraint.Skip)
-
-        self.dr_yearly_limit_inc = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_inc_build = BuildAction(
-            rule=dr_yearly_limit_inc_rule
+        self.dr_yearly_limit_inc = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_inc"])
         )
 
-        # Equation 4.19
-        def dr_daily_limit_red_rule(block):
-            """ "Introduce rolling (energy) limit for load reductions
-            This effectively limits DR utilization dependent on
-            activations within previous hours.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.ActivateDayLimit:
-                        # main use case
-                        if t >= g.t_dayLimit:
-
-                            # load reduction
-                            lhs = sum(
-                                self.dsm_do_shift[g, h, t]
-                                for h in g.delay_time
-                            )
-
-                            # daily limit
-                            rhs = (
-                                g.capacity_down_mean
-                                * g.max_capacity_down
-                                * g.shift_time
-                                - sum(
-                                    sum(
-                                        self.dsm_do_shift[g, h, t - t_dash]
-                                        for h in g.delay_time
-                                    )
-                                    for t_dash in range(
-                                        1, int(g.t_dayLimit) + 1
-                                    )
-                                )
-                            )
-
-                            # add constraint
-                            block.dr_daily_limit_red.add((g, t), (lhs <= rhs))
-
-                        else:
-                            pass  # return(Constraint.Skip)
-
-                    else:
-                        pass  # return(Constraint.Skip)
-
+        # Equations 4.19 and 4.20: Rolling (energy) limit for load
+        # reductions resp. increases
         self.dr_daily_limit_red = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_daily_limit_red"])
         )
-        self.dr_daily_limit_red_build = BuildAction(
-            rule=dr_daily_limit_red_rule
-        )
-
-        # Equation 4.20
-        def dr_daily_limit_inc_rule(block):
-            """Introduce rolling (energy) limit for load increases
-            This effectively limits DR utilization dependent on
-            activations within previous hours.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.ActivateDayLimit:
-                        # main use case
-                        if t >= g.t_dayLimit:
-
-                            # load increase
-                            lhs = sum(
-                                self.dsm_up[g, h, t] for h in g.delay_time
-                            )
-
-                            # daily limit
-                            rhs = (
-                                g.capacity_up_mean
-                                * g.max_capacity_up
-                                * g.shift_time
-                                - sum(
-                                    sum(
-                                        self.dsm_up[g, h, t - t_dash]
-                                        for h in g.delay_time
-                                    )
-                                    for t_dash in range(
-                                        1, int(g.t_dayLimit) + 1
-                                    )
-                                )
-                            )
-
-                            # add constraint
-                            block.dr_daily_limit_inc.add((g, t), (lhs <= rhs))
-
-                        else:
-                            pass  # return(Constraint.Skip)
-
-                    else:
-                        pass  # return(Constraint.Skip)
 
         self.dr_daily_limit_inc = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_daily_limit_inc_build = BuildAction(
-            rule=dr_daily_limit_inc_rule
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_daily_limit_inc"])
         )
 
         # Addition: avoid simultaneous activations
-        def dr_logical_constraint_rule(block):
-            """Similar to equation 10 from Zerrahn and Schill (2015):
-            The sum of upwards and downwards shifts may not be greater
-            than the (bigger) capacity limit.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.addition:
-                        # sum of load increases and reductions
-                        lhs = (
-                            sum(
-                                self.dsm_up[g, h, t]
-                                + self.balance_dsm_do[g, h, t]
-                                + self.dsm_do_shift[g, h, t]
-                                + self.balance_dsm_up[g, h, t]
-                                for h in g.delay_time
-                            )
-                            + self.dsm_do_shed[g, t]
-                        )
-
-                        # maximum capacity eligibly for load shifting
-                        rhs = max(
-                            g.capacity_down[t] * g.max_capacity_down,
-                            g.capacity_up[t] * g.max_capacity_up,
-                        )
-
-                        # add constraint
-                        block.dr_logical_constraint.add((g, t), (lhs <= rhs))
-
-                    else:
-                        pass  # return(Constraint.Skip)
-
         self.dr_logical_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_logical_constraint_build = BuildAction(
-            rule=dr_logical_constraint_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_logical_constraint"]),
         )
 
     # Equation 4.23
@@ -3286,31 +2809,7 @@ class SinkDSMDLRBlock(SimpleBlock):
         r"""Objective expression with variable costs for DSM activity;
         Equation 4.23 from Gils (2015)
         """
-        m = self.parent_block()
-
-        dr_cost = 0
-
-        for t in m.TIMESTEPS:
-            for g in self.DR:
-                dr_cost += (
-                    sum(
-                        self.dsm_up[g, h, t] + self.balance_dsm_do[g, h, t]
-                        for h in g.delay_time
-                    )
-                    * g.cost_dsm_up[t]
-                    * m.objective_weighting[t]
-                )
-                dr_cost += (
-                    sum(
-                        self.dsm_do_shift[g, h, t]
-                        + self.balance_dsm_up[g, h, t]
-                        for h in g.delay_time
-                    )
-                    * g.cost_dsm_down_shift[t]
-                    + self.dsm_do_shed[g, t] * g.cost_dsm_down_shed[t]
-                ) * m.objective_weighting[t]
-
-        self.cost = Expression(expr=dr_cost)
+        self.cost = Expression(expr=_dlr_costs(self, self.DR))
 
         return self.cost
 
@@ -3583,695 +3082,851 @@ class SinkDSMDLRInvestmentBlock(SinkDSMDLRBlock):
 
         #  ************* CONSTRAINTS *****************************
 
-        def _shift_shed_vars_rule(block):
-            """Force shifting resp. shedding variables to zero dependent
-            on how boolean parameters for shift resp. shed eligibility
-            are set.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if not g.shift_eligibility:
-                            lhs = self.dsm_up[g, h, t]
-                            rhs = 0
-
-                            block.shift_shed_vars.add((g, h, t), (lhs == rhs))
-
-                        if not g.shed_eligibility:
-                            lhs = self.dsm_do_shed[g, t]
-                            rhs = 0
-
-                            block.shift_shed_vars.add((g, h, t), (lhs == rhs))
+        rows = _dlr_rows(self, group, self.invest)
 
+        # Force shifting resp. shedding variables to zero dependent on how
+        # boolean parameters for shift resp. shed eligibility are set
         self.shift_shed_vars = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["shift_shed_vars"]),
         )
-        self.shift_shed_vars_build = BuildAction(rule=_shift_shed_vars_rule)
 
         # Relation between inflow and effective Sink consumption
-        def _input_output_relation_rule(block):
-            """Relation between input data and pyomo variables.
-            The actual demand after DR.
-            Bus outflow == Demand +- DR (i.e. effective Sink consumption)
-            """
-            for t in m.TIMESTEPS:
-
-                for g in group:
-                    # outflow from bus
-                    lhs = m.flow[g.inflow, g, t]
-
-                    # Demand +- DR
-                    rhs = (
-                        g.demand[t] * (self.invest[g] + g.investment.existing)
-                        + sum(
-                            self.dsm_up[g, h, t]
-                            + self.balance_dsm_do[g, h, t]
-                            - self.dsm_do_shift[g, h, t]
-                            - self.balance_dsm_up[g, h, t]
-                            for h in g.delay_time
-                        )
-                        - self.dsm_do_shed[g, t]
-                    )
-
-                    # add constraint
-                    block.input_output_relation.add((g, t), (lhs == rhs))
-
         self.input_output_relation = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.input_output_relation_build = BuildAction(
-            rule=_input_output_relation_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["input_output_relation"]),
         )
 
-        # Equation 4.8
-        def capacity_balance_red_rule(block):
-            """Load reduction must be balanced by load increase
-            within delay_time
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if g.shift_eligibility:
-
-                            # main use case
-                            if t >= h:
-                                # balance load reduction
-                                lhs = self.balance_dsm_do[g, h, t]
-
-                                # load reduction (efficiency considered)
-                                rhs = (
-                                    self.dsm_do_shift[g, h, t - h]
-                                    / g.efficiency
-                                )
-
-                                # add constraint
-                                block.capacity_balance_red.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            # no balancing for the first timestep
-                            elif t == m.TIMESTEPS[1]:
-                                lhs = self.balance_dsm_do[g, h, t]
-                                rhs = 0
-
-                                block.capacity_balance_red.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            else:
-                                pass  # return(Constraint.Skip)
-
-                        # if only shedding is possible, balancing variable is 0
-                        else:
-                            lhs = self.balance_dsm_do[g, h, t]
-                            rhs = 0
-
-                            block.capacity_balance_red.add(
-                                (g, h, t), (lhs == rhs)
-                            )
-
+        # Equation 4.8: Load reduction must be balanced by load increase
+        # within delay_time
         self.capacity_balance_red = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
-        )
-        self.capacity_balance_red_build = BuildAction(
-            rule=capacity_balance_red_rule
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["capacity_balance_red"]),
         )
 
-        # Equation 4.9
-        def capacity_balance_inc_rule(block):
-            """Load increased must be balanced by load reduction
-            within delay_time
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    for h in g.delay_time:
-
-                        if g.shift_eligibility:
-
-                            # main use case
-                            if t >= h:
-                                # balance load increase
-                                lhs = self.balance_dsm_up[g, h, t]
-
-                                # load increase (efficiency considered)
-                                rhs = self.dsm_up[g, h, t - h] * g.efficiency
-
-                                # add constraint
-                                block.capacity_balance_inc.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            # no balancing for the first timestep
-                            elif t == m.TIMESTEPS[1]:
-                                lhs = self.balance_dsm_up[g, h, t]
-                                rhs = 0
-
-                                block.capacity_balance_inc.add(
-                                    (g, h, t), (lhs == rhs)
-                                )
-
-                            else:
-                                pass  # return(Constraint.Skip)
-
-                        # if only shedding is possible, balancing variable is 0
-                        else:
-                            lhs = self.balance_dsm_up[g, h, t]
-                            rhs = 0
-
-                            block.capacity_balance_inc.add(
-                                (g, h, t), (lhs == rhs)
-                            )
-
+        # Equation 4.9: Load increase must be balanced by load reduction
+        # within delay_time
         self.capacity_balance_inc = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
-        )
-        self.capacity_balance_inc_build = BuildAction(
-            rule=capacity_balance_inc_rule
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["capacity_balance_inc"]),
         )
 
-        # Own addition: prevent shifts which cannot be compensated
-        def no_comp_red_rule(block):
-            """Prevent downwards shifts that cannot be balanced anymore
-            within the optimization timeframe
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.fixes:
-                        for h in g.delay_time:
-
-                            if t > m.TIMESTEPS[-1] - h:
-                                # no load reduction anymore (dsm_do_shift = 0)
-                                lhs = self.dsm_do_shift[g, h, t]
-                                rhs = 0
-                                block.no_comp_red.add((g, h, t), (lhs == rhs))
-
-                    else:
-                        pass  # return(Constraint.Skip)
-
+        # Fix: prevent shifts which cannot be compensated
         self.no_comp_red = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["no_comp_red"]),
         )
-        self.no_comp_red_build = BuildAction(rule=no_comp_red_rule)
-
-        # Own addition: prevent shifts which cannot be compensated
-        def no_comp_inc_rule(block):
-            """Prevent upwards shifts that cannot be balanced anymore
-            within the optimization timeframe
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.fixes:
-                        for h in g.delay_time:
-
-                            if t > m.TIMESTEPS[-1] - h:
-                                # no load increase anymore (dsm_up = 0)
-                                lhs = self.dsm_up[g, h, t]
-                                rhs = 0
-                                block.no_comp_inc.add((g, h, t), (lhs == rhs))
-
-                    else:
-                        pass  # return(Constraint.Skip)
 
         self.no_comp_inc = Constraint(
-            group, self.H, m.TIMESTEPS, noruleinit=True
+            group,
+            self.H,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["no_comp_inc"]),
         )
-        self.no_comp_inc_build = BuildAction(rule=no_comp_inc_rule)
 
-        # Equation 4.11
-        def availability_red_rule(block):
-            """Load reduction must be smaller than or equal to the
-            (time-dependent) capacity limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # load reduction
-                    lhs = (
-                        sum(
-                            self.dsm_do_shift[g, h, t]
-                            + self.balance_dsm_up[g, h, t]
-                            for h in g.delay_time
-                        )
-                        + self.dsm_do_shed[g, t]
-                    )
-
-                    # upper bound
-                    rhs = (
-                        g.capacity_down[t]
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_down
-                    )
-
-                    # add constraint
-                    block.availability_red.add((g, t), (lhs <= rhs))
-
-        self.availability_red = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.availability_red_build = BuildAction(rule=availability_red_rule)
-
-        # Equation 4.12
-        def availability_inc_rule(block):
-            """Load increase must be smaller than or equal to the
-            (time-dependent) capacity limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # load increase
-                    lhs = sum(
-                        self.dsm_up[g, h, t] + self.balance_dsm_do[g, h, t]
-                        for h in g.delay_time
-                    )
-
-                    # upper bound
-                    rhs = (
-                        g.capacity_up[t]
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_up
-                    )
-
-                    # add constraint
-                    block.availability_inc.add((g, t), (lhs <= rhs))
-
-        self.availability_inc = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.availability_inc_build = BuildAction(rule=availability_inc_rule)
-
-        # Equation 4.13
-        def dr_storage_red_rule(block):
-            """Fictious demand response storage level for load reductions
-            transition equation
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    # avoid timesteps prior to t = 0
-                    if t > 0:
-                        # reduction minus balancing of reductions
-                        lhs = m.timeincrement[t] * sum(
-                            (
-                                self.dsm_do_shift[g, h, t]
-                                - self.balance_dsm_do[g, h, t] * g.efficiency
-                            )
-                            for h in g.delay_time
-                        )
-
-                        # load reduction storage level transition
-                        rhs = (
-                            self.dsm_do_level[g, t]
-                            - self.dsm_do_level[g, t - 1]
-                        )
-
-                        # add constraint
-                        block.dr_storage_red.add((g, t), (lhs == rhs))
-
-                    else:
-                        # pass  # return(Constraint.Skip)
-                        lhs = self.dsm_do_level[g, t]
-                        rhs = m.timeincrement[t] * sum(
-                            self.dsm_do_shift[g, h, t] for h in g.delay_time
-                        )
-                        block.dr_storage_red.add((g, t), (lhs == rhs))
-
-        self.dr_storage_red = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.dr_storage_red_build = BuildAction(rule=dr_storage_red_rule)
-
-        # Equation 4.14
-        def dr_storage_inc_rule(block):
-            """Fictious demand response storage level for load increase
-            transition equation
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    # avoid timesteps prior to t = 0
-                    if t > 0:
-                        # increases minus balancing of reductions
-                        lhs = m.timeincrement[t] * sum(
-                            (
-                                self.dsm_up[g, h, t] * g.efficiency
-                                - self.balance_dsm_up[g, h, t]
-                            )
-                            for h in g.delay_time
-                        )
-
-                        # load increase storage level transition
-                        rhs = (
-                            self.dsm_up_level[g, t]
-                            - self.dsm_up_level[g, t - 1]
-                        )
-
-                        # add constraint
-                        block.dr_storage_inc.add((g, t), (lhs == rhs))
-
-                    else:
-                        # pass  # return(Constraint.Skip)
-                        lhs = self.dsm_up_level[g, t]
-                        rhs = m.timeincrement[t] * sum(
-                            self.dsm_up[g, h, t] for h in g.delay_time
-                        )
-                        block.dr_storage_inc.add((g, t), (lhs == rhs))
-
-        self.dr_storage_inc = Constraint(group, m.TIMESTEPS, noruleinit=True)
-        self.dr_storage_inc_build = BuildAction(rule=dr_storage_inc_rule)
-
-        # Equation 4.15
-        def dr_storage_limit_red_rule(block):
-            """
-            Fictious demand response storage level for load reduction limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.shift_eligibility:
-                        # fictious demand response load reduction storage level
-                        lhs = self.dsm_do_level[g, t]
-
-                        # maximum (time-dependent) available shifting capacity
-                        rhs = (
-                            g.capacity_down_mean
-                            * (self.invest[g] + g.investment.existing)
-                            * g.flex_share_down
-                            * g.shift_time
-                        )
+        # Equations 4.11 and 4.12: Load reduction resp. increase must be
+        # smaller than or equal to the (time-dependent) capacity limit
+        self.availability_red = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["availability_red"])
+        )
 
-                        # add constraint
-                        block.dr_storage_limit_red.add((g, t), (lhs <= rhs))
+        self.availability_inc = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["availability_inc"])
+        )
 
-                    else:
-                        lhs = self.dsm_do_level[g, t]
-                        # Force storage level and thus dsm_do_shift to 0
-                        rhs = 0
+        # Equations 4.13 and 4.14: Fictious demand response storage level
+        # transition equations
+        self.dr_storage_red = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_storage_red"])
+        )
 
-                        # add constraint
-                        block.dr_storage_limit_red.add((g, t), (lhs <= rhs))
+        self.dr_storage_inc = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_storage_inc"])
+        )
 
+        # Equations 4.15 and 4.16: Fictious demand response storage level
+        # limits
         self.dr_storage_limit_red = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_storage_level_red_build = BuildAction(
-            rule=dr_storage_limit_red_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_storage_limit_red"]),
         )
 
-        # Equation 4.16
-        def dr_storage_limit_inc_rule(block):
-            """
-            Fictious demand response storage level for load increase limit
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-                    # fictious demand response load reduction storage level
-                    lhs = self.dsm_up_level[g, t]
-
-                    # maximum (time-dependent) available shifting capacity
-                    rhs = (
-                        g.capacity_up_mean
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_up
-                        * g.shift_time
-                    )
-
-                    # add constraint
-                    block.dr_storage_limit_inc.add((g, t), (lhs <= rhs))
-
         self.dr_storage_limit_inc = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_storage_level_inc_build = BuildAction(
-            rule=dr_storage_limit_inc_rule
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_storage_limit_inc"]),
         )
 
         # Equation 4.17' -> load shedding
-        def dr_yearly_limit_shed_rule(block):
-            """Introduce overall annual (energy) limit for load shedding
-            resp. overall limit for optimization timeframe considered
-            A year limit in contrast to Gils (2015) is defined a mandatory
-            parameter here in order to achieve an approach comparable
-            to the others.
-            """
-            for g in group:
-                if g.shed_eligibility:
-                    # sum of all load reductions
-                    lhs = sum(self.dsm_do_shed[g, t] for t in m.TIMESTEPS)
-
-                    # year limit
-                    rhs = (
-                        g.capacity_down_mean
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_down
-                        * g.shed_time
-                        * g.n_yearLimit_shed
-                    )
-
-                    # add constraint
-                    block.dr_yearly_limit_shed.add(g, (lhs <= rhs))
-
-        self.dr_yearly_limit_shed = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_shed_build = BuildAction(
-            rule=dr_yearly_limit_shed_rule
+        self.dr_yearly_limit_shed = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_shed"])
         )
 
         # ************* Optional Constraints *****************************
 
-        # Equation 4.17
-        def dr_yearly_limit_red_rule(block):
-            """Introduce overall annual (energy) limit for load reductions
-            resp. overall limit for optimization timeframe considered
-            """
-            for g in group:
-
-                if g.ActivateYearLimit:
-                    # sum of all load reductions
-                    lhs = sum(
-                        sum(self.dsm_do_shift[g, h, t] for h in g.delay_time)
-                        for t in m.TIMESTEPS
-                    )
-
-                    # year limit
-                    rhs = (
-                        g.capacity_down_mean
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_down
-                        * g.shift_time
-                        * g.n_yearLimit_shift
-                    )
-
-                    # add constraint
-                    block.dr_yearly_limit_red.add(g, (lhs <= rhs))
-
-                else:
-                    pass  # return(Constraint.Skip)
-
-        self.dr_yearly_limit_red = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_red_build = BuildAction(
-            rule=dr_yearly_limit_red_rule
+        # Equations 4.17 and 4.18: Overall annual (energy) limit for load
+        # reductions resp. increases
+        self.dr_yearly_limit_red = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_red"])
         )
 
-        # Equation 4.18
-        def dr_yearly_limit_inc_rule(block):
-            """Introduce overall annual (energy) limit for load increases
-            resp. overall limit for optimization timeframe considered
-            """
-            for g in group:
-
-                if g.ActivateYearLimit:
-                    # sum of all load increases
-                    lhs = sum(
-                        sum(self.dsm_up[g, h, t] for h in g.delay_time)
-                        for t in m.TIMESTEPS
-                    )
-
-                    # year limit
-                    rhs = (
-                        g.capacity_up_mean
-                        * (self.invest[g] + g.investment.existing)
-                        * g.flex_share_up
-                        * g.shift_time
-                        * g.n_yearLimit_shift
-                    )
+        self.dr_yearly_limit_inc = Constraint(
+            group, rule=_prebuilt_rule(rows["dr_yearly_limit_inc"])
+        )
 
-                    # add constraint
-                    block.dr_yearly_limit_inc.add(g, (lhs <= rhs))
+        # Equations 4.19 and 4.20: Rolling (energy) limit for load
+        # reductions resp. increases
+        self.dr_daily_limit_red = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_daily_limit_red"])
+        )
 
-                else:
-                    pass  # return(Constraint.Skip)
+        self.dr_daily_limit_inc = Constraint(
+            group, m.TIMESTEPS, rule=_prebuilt_rule(rows["dr_daily_limit_inc"])
+        )
 
-        self.dr_yearly_limit_inc = Constraint(group, noruleinit=True)
-        self.dr_yearly_limit_inc_build = BuildAction(
-            rule=dr_yearly_limit_inc_rule
+        # Addition: avoid simultaneous activations
+        self.dr_logical_constraint = Constraint(
+            group,
+            m.TIMESTEPS,
+            rule=_prebuilt_rule(rows["dr_logical_constraint"]),
         )
 
-        # Equation 4.19
-        def dr_daily_limit_red_rule(block):
-            """Introduce rolling (energy) limit for load reductions
-            This effectively limits DR utilization dependent on
-            activations within previous hours.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
+    def _objective_expression(self):
+        r"""Objective expression with variable and investment costs for DSM;
+        Equation 4.23 from Gils (2015)
+        """
+        investment_costs = 0
 
-                    if g.ActivateDayLimit:
+        for g in self.INVESTDR:
+            if g.investment.ep_costs is not None:
+                investment_costs += self.invest[g] * g.investment.ep_costs
+            else:
+                raise ValueError("Missing value for investment costs!")
 
-                        # main use case
-                        if t >= g.t_dayLimit:
+        self.cost = Expression(
+            expr=investment_costs + _dlr_costs(self, self.INVESTDR)
+        )
 
-                            # load reduction
-                            lhs = sum(
-                                self.dsm_do_shift[g, h, t]
-                                for h in g.delay_time
-                            )
+        return self.cost
 
-                            # daily limit
-                            rhs = g.capacity_down_mean * (
-                                self.invest[g] + g.investment.existing
-                            ) * g.flex_share_down * g.shift_time - sum(
-                                sum(
-                                    self.dsm_do_shift[g, h, t - t_dash]
-                                    for h in g.delay_time
-                                )
-                                for t_dash in range(1, int(g.t_dayLimit) + 1)
-                            )
 
-                            # add constraint
-                            block.dr_daily_limit_red.add((g, t), (lhs <= rhs))
+def _prebuilt_rule(rows):
+    """A constraint rule returning the prebuilt rows by their index, the
+    other indices are skipped."""
 
-                        else:
-                            pass  # return(Constraint.Skip)
+    def _rule(block, *index):
+        return rows.get(index, Constraint.Skip)
 
-                    else:
-                        pass  # return(Constraint.Skip)
+    return _rule
 
-        self.dr_daily_limit_red = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_daily_limit_red_build = BuildAction(
-            rule=dr_daily_limit_red_rule
-        )
 
-        # Equation 4.20
-        def dr_daily_limit_inc_rule(block):
-            """Introduce rolling (energy) limit for load increases
-            This effectively limits DR utilization dependent on
-            activations within previous hours.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
+def _dsm_row(coefs, variables, rhs=0, invest=None, invest_coef=0, eq=False):
+    """The constraint `sum(coefs * variables) <= rhs + invest_coef * invest`
+    (`==` if `eq` is True) as linear expression."""
+    if invest is not None and invest_coef != 0:
+        coefs = coefs + [-invest_coef]
+        variables = variables + [invest]
+    expr = LinearExpression(
+        constant=0.0 - rhs, linear_coefs=coefs, linear_vars=variables
+    )
+    if eq:
+        return expr == 0
+    return expr <= 0
 
-                    if g.ActivateDayLimit:
 
-                        # main use case
-                        if t >= g.t_dayLimit:
+def _dsm_capacity(g, prefix, kind, *factors, invest=False):
+    r"""The right-hand side `prefix * size * factors` of a SinkDSM constraint.
 
-                            # load increase
-                            lhs = sum(
-                                self.dsm_up[g, h, t] for h in g.delay_time
-                            )
+    The size is the maximum demand or capacity of `kind` ("demand", "up" or
+    "down", None for size 1) of a dispatch model and `(invest + existing)`
+    times the flexible share of `kind` of an investment model. The values are
+    multiplied in the order of the former constraint expressions, so the rows
+    have the same coefficients.
 
-                            # daily limit
-                            rhs = g.capacity_up_mean * (
-                                self.invest[g] + g.investment.existing
-                            ) * g.flex_share_up * g.shift_time - sum(
-                                sum(
-                                    self.dsm_up[g, h, t - t_dash]
-                                    for h in g.delay_time
-                                )
-                                for t_dash in range(1, int(g.t_dayLimit) + 1)
-                            )
+    Returns
+    -------
+    tuple : (constant, coefficient of the investment variable)
+    """
+    if not invest:
+        value = prefix
+        if kind is not None:
+            value = (
+                value
+                * {
+                    "demand": g.max_demand,
+                    "up": g.max_capacity_up,
+                    "down": g.max_capacity_down,
+                }[kind]
+            )
+        for factor in factors:
+            value = value * factor
+        return value, 0
+    if kind in ("up", "down"):
+        share = g.flex_share_up if kind == "up" else g.flex_share_down
+        factors = (share,) + factors
+    if not g.investment.existing:
+        # `invest + 0` is the variable itself, multiplied from the left
+        coef = prefix
+        for factor in factors:
+            coef = coef * factor
+        return 0 * coef, coef
+    # pyomo multiplies the factors from the outside in before it multiplies
+    # them with the terms of `(invest + existing)`
+    coef = 1
+    for factor in reversed(factors):
+        coef = factor * coef
+    coef = prefix * coef
+    return coef * g.investment.existing, coef
+
+
+def _dsm_variable_costs(block, units, pairs):
+    """The variable costs of SinkDSM units as linear expression.
+
+    `pairs(g)` returns the cost attributes of unit g with the variables they
+    apply to as `(t, variable)`.
+    """
+    m = block.parent_block()
+    horizon = len(m.TIMESTEPS)
+    weighting = sequence_to_array(m.objective_weighting, horizon)
+    coefs = []
+    variables = []
+    for g in units:
+        for costs, var in pairs(g):
+            costs = (sequence_to_array(costs, horizon) * weighting).tolist()
+            for t, v in var:
+                coefs.append(costs[t])
+                variables.append(v)
+    return LinearExpression(
+        constant=0, linear_coefs=coefs, linear_vars=variables
+    )
+
+
+def _oemof_rows(block, group, invest=None):
+    """The constraints of :class:`SinkDSMOemofBlock` and
+    :class:`SinkDSMOemofInvestmentBlock` as linear expressions keyed by the
+    name of the constraint and the index of the row.
+
+    The coefficients are calculated once per unit with numpy.
+    """
+    m = block.parent_block()
+    horizon = len(m.TIMESTEPS)
+    last = horizon - 1
+    flows = m.flow._data
+    up = block.dsm_up._data
+    do = block.dsm_do_shift._data
+    shed = block.dsm_do_shed._data
+    rows = {
+        name: {}
+        for name in (
+            "shift_shed_vars",
+            "input_output_relation",
+            "dsm_up_constraint",
+            "dsm_down_constraint",
+            "dsm_sum_constraint",
+        )
+    }
+    for g in group:
+        is_invest = invest is not None
+        var = invest[g] if is_invest else None
+        demand = _dsm_capacity(
+            g,
+            sequence_to_array(g.demand, horizon),
+            "demand",
+            invest=is_invest,
+        )
+        capacity_up = _dsm_capacity(
+            g,
+            sequence_to_array(g.capacity_up, horizon),
+            "up",
+            invest=is_invest,
+        )
+        capacity_down = _dsm_capacity(
+            g,
+            sequence_to_array(g.capacity_down, horizon),
+            "down",
+            invest=is_invest,
+        )
+        demand, capacity_up, capacity_down = (
+            [np.broadcast_to(values, horizon).tolist() for values in pair]
+            for pair in (demand, capacity_up, capacity_down)
+        )
+        for t in m.TIMESTEPS:
+            if not g.shift_eligibility:
+                rows["shift_shed_vars"][g, t] = up[g, t] == 0
+            if not g.shed_eligibility:
+                rows["shift_shed_vars"][g, t] = shed[g, t] == 0
+
+            rows["input_output_relation"][g, t] = _dsm_row(
+                [1, -1, 1, 1],
+                [flows[g.inflow, g, t], up[g, t], do[g, t], shed[g, t]],
+                demand[0][t],
+                var,
+                demand[1][t],
+                eq=True,
+            )
+            rows["dsm_up_constraint"][g, t] = _dsm_row(
+                [1], [up[g, t]], capacity_up[0][t], var, capacity_up[1][t]
+            )
+            rows["dsm_down_constraint"][g, t] = _dsm_row(
+                [1, 1],
+                [do[g, t], shed[g, t]],
+                capacity_down[0][t],
+                var,
+                capacity_down[1][t],
+            )
 
-                            # add constraint
-                            block.dr_daily_limit_inc.add((g, t), (lhs <= rhs))
+        # balance in full intervals starting with index 0, the last interval
+        # might not be full
+        for start in range(0, last, g.shift_interval):
+            steps = range(start, min(start + g.shift_interval, horizon))
+            rows["dsm_sum_constraint"][g, start] = _dsm_row(
+                [g.efficiency] * len(steps) + [-1] * len(steps),
+                [up[g, t] for t in steps] + [do[g, t] for t in steps],
+                eq=True,
+            )
+    return rows
 
-                        else:
-                            pass  # return(Constraint.Skip)
 
-                    else:
-                        pass  # return(Constraint.Skip)
+def _dlr_rows(block, group, invest=None):
+    """The constraints of :class:`SinkDSMDLRBlock` and
+    :class:`SinkDSMDLRInvestmentBlock` as linear expressions keyed by the
+    name of the constraint and the index of the row.
 
-        self.dr_daily_limit_inc = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_daily_limit_inc_build = BuildAction(
-            rule=dr_daily_limit_inc_rule
+    The coefficients and the windows of the delay times and of the daily
+    limits are calculated once per unit.
+    """
+    m = block.parent_block()
+    horizon = len(m.TIMESTEPS)
+    last = horizon - 1
+    increment = sequence_to_array(m.timeincrement, horizon).tolist()
+    flows = m.flow._data
+    up = block.dsm_up._data
+    do = block.dsm_do_shift._data
+    shed = block.dsm_do_shed._data
+    balance_do = block.balance_dsm_do._data
+    balance_up = block.balance_dsm_up._data
+    do_level = block.dsm_do_level._data
+    up_level = block.dsm_up_level._data
+    rows = {
+        name: {}
+        for name in (
+            "shift_shed_vars",
+            "input_output_relation",
+            "capacity_balance_red",
+            "capacity_balance_inc",
+            "no_comp_red",
+            "no_comp_inc",
+            "availability_red",
+            "availability_inc",
+            "dr_storage_red",
+            "dr_storage_inc",
+            "dr_storage_limit_red",
+            "dr_storage_limit_inc",
+            "dr_yearly_limit_shed",
+            "dr_yearly_limit_red",
+            "dr_yearly_limit_inc",
+            "dr_daily_limit_red",
+            "dr_daily_limit_inc",
+            "dr_logical_constraint",
+        )
+    }
+    for g in group:
+        is_invest = invest is not None
+        var = invest[g] if is_invest else None
+        delays = g.delay_time
+        eta = g.efficiency
+        cap_up = sequence_to_array(g.capacity_up, horizon)
+        cap_down = sequence_to_array(g.capacity_down, horizon)
+        demand = _dsm_capacity(
+            g,
+            sequence_to_array(g.demand, horizon),
+            "demand",
+            invest=is_invest,
+        )
+        available_up = _dsm_capacity(g, cap_up, "up", invest=is_invest)
+        available_down = _dsm_capacity(g, cap_down, "down", invest=is_invest)
+        if is_invest:
+            maximum = _dsm_capacity(
+                g,
+                np.maximum(
+                    cap_down * g.flex_share_down, cap_up * g.flex_share_up
+                ),
+                None,
+                invest=True,
+            )
+        else:
+            maximum = _dsm_capacity(
+                g,
+                np.maximum(
+                    cap_down * g.max_capacity_down, cap_up * g.max_capacity_up
+                ),
+                None,
+            )
+        demand, available_up, available_down, maximum = (
+            [np.broadcast_to(values, horizon).tolist() for values in pair]
+            for pair in (demand, available_up, available_down, maximum)
         )
 
-        # Addition: avoid simultaneous activations
-        def dr_logical_constraint_rule(block):
-            """Similar to equation 10 from Zerrahn and Schill (2015):
-            The sum of upwards and downwards shifts may not be greater
-            than the (bigger) capacity limit.
-            """
-            for t in m.TIMESTEPS:
-                for g in group:
-
-                    if g.addition:
+        for t in m.TIMESTEPS:
+            for h in delays:
+                if not g.shift_eligibility:
+                    rows["shift_shed_vars"][g, h, t] = up[g, h, t] == 0
+                if not g.shed_eligibility:
+                    rows["shift_shed_vars"][g, h, t] = shed[g, t] == 0
+
+                # Equations 4.8 and 4.9, no balancing for the first timestep
+                if not g.shift_eligibility:
+                    rows["capacity_balance_red"][g, h, t] = (
+                        balance_do[g, h, t] == 0
+                    )
+                    rows["capacity_balance_inc"][g, h, t] = (
+                        balance_up[g, h, t] == 0
+                    )
+                elif t >= h:
+                    rows["capacity_balance_red"][g, h, t] = _dsm_row(
+                        [1, -(1 / eta)],
+                        [balance_do[g, h, t], do[g, h, t - h]],
+                        eq=True,
+                    )
+                    rows["capacity_balance_inc"][g, h, t] = _dsm_row(
+                        [1, -eta],
+                        [balance_up[g, h, t], up[g, h, t - h]],
+                        eq=True,
+                    )
+                elif t == 0:
+                    rows["capacity_balance_red"][g, h, t] = (
+                        balance_do[g, h, t] == 0
+                    )
+                    rows["capacity_balance_inc"][g, h, t] = (
+                        balance_up[g, h, t] == 0
+                    )
 
-                        # sum of load increases and reductions
-                        lhs = (
-                            sum(
-                                self.dsm_up[g, h, t]
-                                + self.balance_dsm_do[g, h, t]
-                                + self.dsm_do_shift[g, h, t]
-                                + self.balance_dsm_up[g, h, t]
-                                for h in g.delay_time
-                            )
-                            + self.dsm_do_shed[g, t]
-                        )
+                # prevent shifts which cannot be compensated
+                if g.fixes and t > last - h:
+                    rows["no_comp_red"][g, h, t] = do[g, h, t] == 0
+                    rows["no_comp_inc"][g, h, t] = up[g, h, t] == 0
+
+            shifts_do = [do[g, h, t] for h in delays]
+            shifts_up = [up[g, h, t] for h in delays]
+            balances_do = [balance_do[g, h, t] for h in delays]
+            balances_up = [balance_up[g, h, t] for h in delays]
+            n = len(delays)
+
+            coefs = [1]
+            variables = [flows[g.inflow, g, t]]
+            for h in range(n):
+                coefs.extend([-1, -1, 1, 1])
+                variables.extend(
+                    [
+                        shifts_up[h],
+                        balances_do[h],
+                        shifts_do[h],
+                        balances_up[h],
+                    ]
+                )
+            rows["input_output_relation"][g, t] = _dsm_row(
+                coefs + [1],
+                variables + [shed[g, t]],
+                demand[0][t],
+                var,
+                demand[1][t],
+                eq=True,
+            )
 
-                        # maximum capacity eligibly for load shifting
-                        rhs = (
-                            max(
-                                g.capacity_down[t] * g.flex_share_down,
-                                g.capacity_up[t] * g.flex_share_up,
-                            )
-                            * (self.invest[g] + g.investment.existing)
-                        )
+            # Equations 4.11 and 4.12
+            rows["availability_red"][g, t] = _dsm_row(
+                [1] * (2 * n + 1),
+                shifts_do + balances_up + [shed[g, t]],
+                available_down[0][t],
+                var,
+                available_down[1][t],
+            )
+            rows["availability_inc"][g, t] = _dsm_row(
+                [1] * (2 * n),
+                shifts_up + balances_do,
+                available_up[0][t],
+                var,
+                available_up[1][t],
+            )
 
-                        # add constraint
-                        block.dr_logical_constraint.add((g, t), (lhs <= rhs))
+            # Equations 4.13 and 4.14
+            increment_t = increment[t]
+            if t > 0:
+                rows["dr_storage_red"][g, t] = _dsm_row(
+                    [increment_t] * n + [-(increment_t * eta)] * n + [-1, 1],
+                    shifts_do
+                    + balances_do
+                    + [do_level[g, t], do_level[g, t - 1]],
+                    eq=True,
+                )
+                rows["dr_storage_inc"][g, t] = _dsm_row(
+                    [increment_t * eta] * n + [-increment_t] * n + [-1, 1],
+                    shifts_up
+                    + balances_up
+                    + [up_level[g, t], up_level[g, t - 1]],
+                    eq=True,
+                )
+            else:
+                rows["dr_storage_red"][g, t] = _dsm_row(
+                    [1] + [-increment_t] * n,
+                    [do_level[g, t]] + shifts_do,
+                    eq=True,
+                )
+                rows["dr_storage_inc"][g, t] = _dsm_row(
+                    [1] + [-increment_t] * n,
+                    [up_level[g, t]] + shifts_up,
+                    eq=True,
+                )
 
-                    else:
-                        pass  # return(Constraint.Skip)
+            # Addition: avoid simultaneous activations
+            if g.addition:
+                rows["dr_logical_constraint"][g, t] = _dsm_row(
+                    [1] * (4 * n + 1),
+                    shifts_up
+                    + balances_do
+                    + shifts_do
+                    + balances_up
+                    + [shed[g, t]],
+                    maximum[0][t],
+                    var,
+                    maximum[1][t],
+                )
 
-        self.dr_logical_constraint = Constraint(
-            group, m.TIMESTEPS, noruleinit=True
-        )
-        self.dr_logical_constraint_build = BuildAction(
-            rule=dr_logical_constraint_rule
+        # Equations 4.15 and 4.16
+        if g.shift_eligibility:
+            limit_do = _dsm_capacity(
+                g,
+                g.capacity_down_mean,
+                "down",
+                g.shift_time,
+                invest=is_invest,
+            )
+        else:
+            # Force storage level and thus dsm_do_shift to 0
+            limit_do = (0, 0)
+        limit_up = _dsm_capacity(
+            g, g.capacity_up_mean, "up", g.shift_time, invest=is_invest
         )
+        for t in m.TIMESTEPS:
+            rows["dr_storage_limit_red"][g, t] = _dsm_row(
+                [1], [do_level[g, t]], limit_do[0], var, limit_do[1]
+            )
+            rows["dr_storage_limit_inc"][g, t] = _dsm_row(
+                [1], [up_level[g, t]], limit_up[0], var, limit_up[1]
+            )
 
-    def _objective_expression(self):
-        r"""Objective expression with variable and investment costs for DSM;
-        Equation 4.23 from Gils (2015)
-        """
-        m = self.parent_block()
+        # Equation 4.17' -> load shedding
+        if g.shed_eligibility:
+            limit = _dsm_capacity(
+                g,
+                g.capacity_down_mean,
+                "down",
+                g.shed_time,
+                g.n_yearLimit_shed,
+                invest=is_invest,
+            )
+            rows["dr_yearly_limit_shed"][(g,)] = _dsm_row(
+                [1] * horizon,
+                [shed[g, t] for t in m.TIMESTEPS],
+                limit[0],
+                var,
+                limit[1],
+            )
 
-        investment_costs = 0
-        variable_costs = 0
+        # Equations 4.17 and 4.18
+        if g.ActivateYearLimit:
+            for name, variable, average, kind in (
+                ("dr_yearly_limit_red", do, g.capacity_down_mean, "down"),
+                ("dr_yearly_limit_inc", up, g.capacity_up_mean, "up"),
+            ):
+                limit = _dsm_capacity(
+                    g,
+                    average,
+                    kind,
+                    g.shift_time,
+                    g.n_yearLimit_shift,
+                    invest=is_invest,
+                )
+                rows[name][(g,)] = _dsm_row(
+                    [1] * (horizon * len(delays)),
+                    [variable[g, h, t] for t in m.TIMESTEPS for h in delays],
+                    limit[0],
+                    var,
+                    limit[1],
+                )
 
-        for g in self.INVESTDR:
-            if g.investment.ep_costs is not None:
-                investment_costs += self.invest[g] * g.investment.ep_costs
-            else:
-                raise ValueError("Missing value for investment costs!")
-            for t in m.TIMESTEPS:
-                variable_costs += (
-                    sum(
-                        self.dsm_up[g, h, t] + self.balance_dsm_do[g, h, t]
-                        for h in g.delay_time
+        # Equations 4.19 and 4.20: the shifts of a timestep and of the
+        # `t_dayLimit` timesteps before
+        if g.ActivateDayLimit:
+            window = np.arange(int(g.t_dayLimit) + 1)
+            for name, variable, average, kind in (
+                ("dr_daily_limit_red", do, g.capacity_down_mean, "down"),
+                ("dr_daily_limit_inc", up, g.capacity_up_mean, "up"),
+            ):
+                limit = _dsm_capacity(
+                    g, average, kind, g.shift_time, invest=is_invest
+                )
+                for t in range(int(np.ceil(g.t_dayLimit)), horizon):
+                    steps = (t - window).tolist()
+                    rows[name][g, t] = _dsm_row(
+                        [1] * (len(steps) * len(delays)),
+                        [variable[g, h, tt] for tt in steps for h in delays],
+                        limit[0],
+                        var,
+                        limit[1],
                     )
-                    * g.cost_dsm_up[t]
-                    * m.objective_weighting[t]
+    return rows
+
+
+def _dsm_costs(block, units):
+    """The variable costs of the load shifts and the shedding of SinkDSM
+    units with one variable per unit and timestep."""
+    m = block.parent_block()
+
+    def _pairs(g):
+        return (
+            (g.cost_dsm_up, [(t, block.dsm_up[g, t]) for t in m.TIMESTEPS]),
+            (
+                g.cost_dsm_down_shift,
+                [(t, block.dsm_do_shift[g, t]) for t in m.TIMESTEPS],
+            ),
+            (
+                g.cost_dsm_down_shed,
+                [(t, block.dsm_do_shed[g, t]) for t in m.TIMESTEPS],
+            ),
+        )
+
+    return _dsm_variable_costs(block, units, _pairs)
+
+
+def _dlr_costs(block, units):
+    """The variable costs of the load shifts, their balancing and the
+    shedding of SinkDSM units with approach "DLR"."""
+    m = block.parent_block()
+
+    def _pairs(g):
+        return (
+            (
+                g.cost_dsm_up,
+                [
+                    (t, var[g, h, t])
+                    for t in m.TIMESTEPS
+                    for h in g.delay_time
+                    for var in (block.dsm_up, block.balance_dsm_do)
+                ],
+            ),
+            (
+                g.cost_dsm_down_shift,
+                [
+                    (t, var[g, h, t])
+                    for t in m.TIMESTEPS
+                    for h in g.delay_time
+                    for var in (block.dsm_do_shift, block.balance_dsm_up)
+                ],
+            ),
+            (
+                g.cost_dsm_down_shed,
+                [(t, block.dsm_do_shed[g, t]) for t in m.TIMESTEPS],
+            ),
+        )
+
+    return _dsm_variable_costs(block, units, _pairs)
+
+
+def _diw_compact_rows(block, group, invest=None):
+    """The constraints of :class:`SinkDSMDIWCompactBlock` and
+    :class:`SinkDSMDIWCompactInvestmentBlock` as linear expressions keyed by
+    the name of the constraint and `(g, t)` or `(g,)`.
+
+    The coefficients are calculated once per unit with numpy.
+    """
+    m = block.parent_block()
+    horizon = len(m.TIMESTEPS)
+    last = horizon - 1
+    increment = sequence_to_array(m.timeincrement, horizon)
+    flows = m.flow._data
+    up = block.dsm_up._data
+    do = block.dsm_do_shift._data
+    shed = block.dsm_do_shed._data
+    up_cum = block.dsm_up_cumulated._data
+    do_cum = block.dsm_do_cumulated._data
+    rows = {
+        name: {}
+        for name in (
+            "shift_shed_vars",
+            "input_output_relation",
+            "dsm_up_cumulation",
+            "dsm_do_cumulation",
+            "dsm_up_compensation",
+            "dsm_do_compensation",
+            "dsm_updo_constraint",
+            "dsm_up_constraint",
+            "dsm_do_constraint",
+            "C2_constraint",
+            "recovery_constraint",
+            "shed_limit_constraint",
+        )
+    }
+    for g in group:
+        is_invest = invest is not None
+        var = invest[g] if is_invest else None
+        eta = g.efficiency
+        delay = g.delay_time
+        cap_up = sequence_to_array(g.capacity_up, horizon)
+        cap_down = sequence_to_array(g.capacity_down, horizon)
+        demand = _dsm_capacity(
+            g,
+            sequence_to_array(g.demand, horizon),
+            "demand",
+            invest=is_invest,
+        )
+        capacity_up = _dsm_capacity(g, cap_up, "up", invest=is_invest)
+        capacity_down = _dsm_capacity(g, cap_down, "down", invest=is_invest)
+        if is_invest:
+            capacity_max = _dsm_capacity(
+                g,
+                np.maximum(
+                    cap_up * g.flex_share_up, cap_down * g.flex_share_down
+                ),
+                None,
+                invest=True,
+            )
+        else:
+            capacity_max = _dsm_capacity(
+                g,
+                np.maximum(
+                    cap_up * g.max_capacity_up, cap_down * g.max_capacity_down
+                ),
+                None,
+            )
+        demand, capacity_up, capacity_down, capacity_max = (
+            [np.broadcast_to(values, horizon).tolist() for values in pair]
+            for pair in (demand, capacity_up, capacity_down, capacity_max)
+        )
+        if g.recovery_time_shift not in [None, 0]:
+            recovery = [
+                np.broadcast_to(values, horizon).tolist()
+                for values in _dsm_capacity(
+                    g, cap_up, "up", delay, increment, invest=is_invest
                 )
-                variable_costs += (
-                    sum(
-                        self.dsm_do_shift[g, h, t]
-                        + self.balance_dsm_up[g, h, t]
-                        for h in g.delay_time
+            ]
+        if g.shed_eligibility:
+            shed_limit = [
+                np.broadcast_to(values, horizon).tolist()
+                for values in _dsm_capacity(
+                    g,
+                    cap_down,
+                    "down",
+                    g.shed_time,
+                    increment,
+                    invest=is_invest,
+                )
+            ]
+        for t in m.TIMESTEPS:
+            if not g.shift_eligibility:
+                rows["shift_shed_vars"][g, t] = up[g, t] == 0
+            if not g.shed_eligibility:
+                rows["shift_shed_vars"][g, t] = shed[g, t] == 0
+
+            rows["input_output_relation"][g, t] = _dsm_row(
+                [1, -1, 1, 1],
+                [flows[g.inflow, g, t], up[g, t], do[g, t], shed[g, t]],
+                demand[0][t],
+                var,
+                demand[1][t],
+                eq=True,
+            )
+            for name, cum, shift in (
+                ("dsm_up_cumulation", up_cum, up),
+                ("dsm_do_cumulation", do_cum, do),
+            ):
+                coefs = [1, -1]
+                variables = [cum[g, t], shift[g, t]]
+                if t > 0:
+                    coefs.append(-1)
+                    variables.append(cum[g, t - 1])
+                rows[name][g, t] = (
+                    LinearExpression(
+                        constant=0, linear_coefs=coefs, linear_vars=variables
                     )
-                    * g.cost_dsm_down_shift[t]
-                    + self.dsm_do_shed[g, t] * g.cost_dsm_down_shed[t]
-                ) * m.objective_weighting[t]
+                    == 0
+                )
 
-        self.cost = Expression(expr=investment_costs + variable_costs)
+            # the compensation until the last time step is implied by the
+            # balance of the cumulated shifts
+            if t + delay < last:
+                rows["dsm_up_compensation"][g, t] = (
+                    LinearExpression(
+                        constant=0,
+                        linear_coefs=[eta, -1],
+                        linear_vars=[up_cum[g, t], do_cum[g, t + delay]],
+                    )
+                    <= 0
+                )
+                rows["dsm_do_compensation"][g, t] = (
+                    LinearExpression(
+                        constant=0,
+                        linear_coefs=[1, -eta],
+                        linear_vars=[do_cum[g, t], up_cum[g, t + delay]],
+                    )
+                    <= 0
+                )
 
-        return self.cost
+            rows["dsm_up_constraint"][g, t] = _dsm_row(
+                [1], [up[g, t]], capacity_up[0][t], var, capacity_up[1][t]
+            )
+            rows["dsm_do_constraint"][g, t] = _dsm_row(
+                [1, 1],
+                [do[g, t], shed[g, t]],
+                capacity_down[0][t],
+                var,
+                capacity_down[1][t],
+            )
+            rows["C2_constraint"][g, t] = _dsm_row(
+                [1, 1, 1],
+                [up[g, t], do[g, t], shed[g, t]],
+                capacity_max[0][t],
+                var,
+                capacity_max[1][t],
+            )
+
+            if g.recovery_time_shift not in [None, 0]:
+                end = min(t + g.recovery_time_shift - 1, last)
+                coefs = [1]
+                variables = [up_cum[g, end]]
+                if t > 0:
+                    coefs.append(-1)
+                    variables.append(up_cum[g, t - 1])
+                rows["recovery_constraint"][g, t] = _dsm_row(
+                    coefs, variables, recovery[0][t], var, recovery[1][t]
+                )
+
+            if g.shed_eligibility:
+                end = min(t + g.recovery_time_shed, horizon)
+                rows["shed_limit_constraint"][g, t] = _dsm_row(
+                    [1] * (end - t),
+                    [shed[g, tt] for tt in range(t, end)],
+                    shed_limit[0][t],
+                    var,
+                    shed_limit[1][t],
+                )
+
+        rows["dsm_updo_constraint"][(g,)] = (
+            LinearExpression(
+                constant=0,
+                linear_coefs=[eta, -1],
+                linear_vars=[up_cum[g, last], do_cum[g, last]],
+            )
+            == 0
+        )
+    return rows
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""In-process solving with HiGHS.
+
+The model is converted to a :class:`~oemof.solph.matrix.LinearProgram` and
+passed to HiGHS through its Python API `highspy` as sparse arrays, so no
+problem and solution files are written and no solver process is started.
+The primal values are stored in the variables of the model, the duals and
+reduced costs in its `dual` and `rc` suffixes (see
+:meth:`~oemof.solph.models.BaseModel.receive_duals`).
+
+Use it with `model.solve(solver="highs")`. Linear programs without a model,
+e.g. from a :class:`~oemof.solph.cache.ModelCache`, are solved with
+:func:`solve_linear_program`. It requires the package `highspy`
+(`pip install oemof.solph[highs]`).
+
+SPDX-License-Identifier: MIT
+
+"""
+from contextlib import nullcontext
+
+import numpy as np
+from pyomo.opt import ProblemSense
+from pyomo.opt import SolverResults
+from pyomo.opt import SolverStatus
+from pyomo.opt import TerminationCondition
+
+from oemof.solph.matrix import LinearProgram
+
+# solver name for `BaseModel.solve`
+NAME = "highs"
+
+# status of a feasible primal solution in the info of HiGHS
+FEASIBLE = 2
+
+# names of the HiGHS model status and the corresponding pyomo status
+TERMINATION_CONDITIONS = {
+    "kOptimal": (SolverStatus.ok, TerminationCondition.optimal),
+    "kInfeasible": (SolverStatus.warning, TerminationCondition.infeasible),
+    "kUnbounded": (SolverStatus.warning, TerminationCondition.unbounded),
+    "kUnboundedOrInfeasible": (
+        SolverStatus.warning,
+        TerminationCondition.infeasibleOrUnbounded,
+    ),
+    "kTimeLimit": (SolverStatus.aborted, TerminationCondition.maxTimeLimit),
+    "kIterationLimit": (
+        SolverStatus.aborted,
+        TerminationCondition.maxIterations,
+    ),
+    "kSolutionLimit": (
+        SolverStatus.aborted,
+        TerminationCondition.maxEvaluations,
+    ),
+    "kInterrupt": (SolverStatus.aborted, TerminationCondition.userInterrupt),
+}
+
+
+def solve(model, profile=None, **kwargs):
+    r"""Solve a model with HiGHS in the current process.
+
+    Parameters
+    ----------
+    model : BaseModel
+        A built model.
+    profile : Profile or None
+        If given, writing the arrays, solving and loading the solution are
+        measured as the phases "write", "solve" and "postsolve".
+    \**kwargs : keyword arguments
+        Possible keys are `solve_kwargs` (only `tee` is used) and
+        `cmdline_options`, which are set as options of HiGHS, e.g.
+        `{"time_limit": 60, "mip_rel_gap": 0.01}`.
+
+    Returns
+    -------
+    pyomo.opt.SolverResults : The status of the solver and the problem.
+    """
+    measure = nullcontext if profile is None else profile.measure
+
+    with measure("write"):
+        lp = LinearProgram.from_model(model, symbolic_solver_labels=False)
+        highspy, h = _highs(lp, kwargs)
+
+    with measure("solve"):
+        h.run()
+
+    with measure("postsolve"):
+        results = _solver_results(model.name, lp, h)
+        solution = h.getSolution()
+        if solution.value_valid:
+            for var, value in zip(
+                lp.variables, np.asarray(solution.col_value)
+            ):
+                var.set_value(value, valid=True)
+        if solution.value_valid and (
+            model.dual is not None or model.rc is not None
+        ):
+            solution = _dual_solution(highspy, h, lp, solution)
+        if solution.dual_valid:
+            _load_suffix(model.dual, lp.constraints, solution.row_dual)
+            _load_suffix(model.rc, lp.variables, solution.col_dual)
+    return results
+
+
+def solve_linear_program(lp, name=None, **kwargs):
+    r"""Solve a linear program with HiGHS in the current process, e.g. a
+    program taken from a :class:`~oemof.solph.cache.ModelCache`, which has
+    no model.
+
+    Parameters
+    ----------
+    lp : LinearProgram
+    name : str (optional)
+        Name of the problem in the solver results.
+    \**kwargs : keyword arguments
+        `solve_kwargs` and `cmdline_options` as in :func:`solve`.
+
+    Returns
+    -------
+    tuple : (pyomo.opt.SolverResults, numpy.ndarray or None)
+        The status of the solver and the problem and the primal values of
+        the columns, None if no feasible solution was found.
+    """
+    _, h = _highs(lp, kwargs)
+    h.run()
+    solution = h.getSolution()
+    values = np.asarray(solution.col_value) if solution.value_valid else None
+    return _solver_results(name, lp, h), values
+
+
+def _highs(lp, kwargs):
+    """The module `highspy` and a HiGHS instance holding the linear program
+    with the options of the keyword arguments of :func:`solve`."""
+    try:
+        import highspy
+    except ImportError:
+        raise ImportError(
+            "Solving with HiGHS requires the package highspy."
+        ) from None
+    h = highspy.Highs()
+    h.setOptionValue(
+        "output_flag", bool(kwargs.get("solve_kwargs", {}).get("tee"))
+    )
+    for key, value in kwargs.get("cmdline_options", {}).items():
+        h.setOptionValue(key, value)
+    h.passModel(_highs_lp(highspy, lp))
+    return highspy, h
+
+
+def _highs_lp(highspy, lp):
+    """The linear program as HiGHS model."""
+    indptr, indices, data = lp.csc()
+    h_lp = highspy.HighsLp()
+    h_lp.num_col_ = lp.num_cols
+    h_lp.num_row_ = lp.num_rows
+    h_lp.sense_ = (
+        highspy.ObjSense.kMinimize
+        if lp.sense == 1
+        else highspy.ObjSense.kMaximize
+    )
+    h_lp.offset_ = lp.objective_constant
+    h_lp.col_cost_ = lp.objective
+    h_lp.col_lower_ = lp.col_lower
+    h_lp.col_upper_ = lp.col_upper
+    h_lp.row_lower_ = lp.row_lower
+    h_lp.row_upper_ = lp.row_upper
+    h_lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+    h_lp.a_matrix_.num_col_ = lp.num_cols
+    h_lp.a_matrix_.num_row_ = lp.num_rows
+    h_lp.a_matrix_.start_ = indptr
+    h_lp.a_matrix_.index_ = indices
+    h_lp.a_matrix_.value_ = data
+    if lp.integer.any():
+        h_lp.integrality_ = [
+            highspy.HighsVarType.kInteger
+            if integer
+            else highspy.HighsVarType.kContinuous
+            for integer in lp.integer
+        ]
+    return h_lp
+
+
+def _dual_solution(highspy, h, lp, solution):
+    """The solution with duals. Mixed integer programs have no duals, so
+    the linear program with the integer columns fixed to their values is
+    solved (like CBC does)."""
+    columns = np.flatnonzero(lp.integer)
+    if not len(columns):
+        return solution
+    values = np.round(np.asarray(solution.col_value)[columns])
+    h.changeColsIntegrality(
+        len(columns),
+        columns,
+        np.full(len(columns), highspy.HighsVarType.kContinuous),
+    )
+    h.changeColsBounds(len(columns), columns, values, values)
+    h.run()
+    return h.getSolution()
+
+
+def _solver_results(name, lp, h):
+    """The results of HiGHS in the format of pyomo."""
+    results = SolverResults()
+    status = h.getModelStatus()
+    info = h.getInfo()
+    problem = results.problem
+    problem.name = name
+    problem.number_of_constraints = lp.num_rows
+    problem.number_of_variables = lp.num_cols
+    problem.number_of_nonzeros = lp.num_nonzeros
+    problem.number_of_objectives = 1
+    problem.number_of_integer_variables = int(lp.integer.sum())
+    problem.sense = (
+        ProblemSense.minimize if lp.sense == 1 else ProblemSense.maximize
+    )
+    if info.primal_solution_status == FEASIBLE:
+        problem.upper_bound = info.objective_function_value
+        problem.lower_bound = info.objective_function_value
+        if lp.integer.any():
+            problem.lower_bound = info.mip_dual_bound
+
+    solver = results.solver
+    solver.name = "HiGHS {0}".format(h.version())
+    solver.status, solver.termination_condition = TERMINATION_CONDITIONS.get(
+        status.name, (SolverStatus.error, TerminationCondition.error)
+    )
+    solver.termination_message = h.modelStatusToString(status)
+    solver.wallclock_time = h.getRunTime()
+    return results
+
+
+def _load_suffix(suffix, components, values):
+    """Store the values of the components in a suffix, if it exists."""
+    if suffix is None:
+        return
+    for component, value in zip(components, np.asarray(values)):
+        suffix[component] = value
@@ -0,0 +1,494 @@
+# -*- coding: utf-8 -*-
+
+"""Lagrangian relaxation of unit commitment models.
+
+The balances of the buses are the only constraints which couple the units of
+an energy system. They are moved into the objective with a price per bus and
+timestep (the Lagrange multipliers), so that the remaining problem falls
+apart into independent subproblems: one small mixed integer program per unit
+with nonconvex flows (its status, startups and shutdowns and all flows and
+constraints connected to them) and one linear program with all other
+variables. Every solution of the subproblems gives a lower bound of the
+costs. The prices are improved by subgradient steps and a primal repair
+heuristic fixes the integer variables to the values of the subproblems and
+solves the linear program of the full model, which gives feasible schedules
+and an upper bound. The subproblems can be distributed over several
+processes (requires the "fork" start method of :mod:`multiprocessing`, i.e.
+Linux).
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+import multiprocessing
+import warnings
+
+import numpy as np
+from pyomo import environ as po
+from pyomo.opt import SolverFactory
+
+from oemof.solph.matrix import LinearProgram
+from oemof.solph.models import Model
+
+
+class LagrangianRelaxation:
+    r"""
+    Lagrangian relaxation of the bus balances of a model with nonconvex
+    flows.
+
+    The prices of the balances start from the duals of the linear
+    relaxation of the model. The step length of the subgradient method is
+    the gap to the best upper bound (Polyak step) times a factor, which is
+    halved whenever the lower bound did not improve for `patience`
+    iterations.
+
+    The subproblems have to be bounded for every price, so infinite bounds
+    of the variables are replaced by `max_flow` in the subproblems. The
+    lower bounds are only valid if the optimal solution does not exceed
+    these bounds.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    processes : int
+        Number of processes which solve the subproblems. Falls back to one
+        process if the "fork" start method is not available.
+    max_flow : float or None
+        Bound of the variables without finite bounds in the subproblems. If
+        None, ten times the largest absolute value of the finite bounds, the
+        right hand sides of the balances and the solution of the linear
+        relaxation is used.
+    \**kwargs : keyword arguments
+        Passed to :class:`~oemof.solph.models.Model`.
+
+    Attributes
+    ----------
+    model : Model
+        The model of the energy system. It holds the best feasible schedule
+        after :meth:`solve`.
+    prices : numpy.ndarray
+        The Lagrange multipliers of the balance rows of :attr:`program`.
+    lower_bounds, upper_bounds : list
+        Best lower and upper bound of the costs in every iteration. The
+        upper bound is infinite as long as no feasible schedule was found.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=3, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+    ...     nominal_value=1, fix=[2, 6, 3])}))
+    >>> es.add(solph.Source(label="plant", outputs={bel: solph.Flow(
+    ...     nominal_value=5, min=0.5, variable_costs=1,
+    ...     nonconvex=solph.NonConvex(startup_costs=4))}))
+    >>> es.add(solph.Source(label="shortage", outputs={bel: solph.Flow(
+    ...     variable_costs=10)}))
+    >>> relaxation = LagrangianRelaxation(es)
+    >>> results = relaxation.solve(solver="cbc")
+    >>> relaxation.upper_bounds[-1]
+    42.0
+    """
+
+    def __init__(self, energysystem, processes=1, max_flow=None, **kwargs):
+        self.es = energysystem
+        self.model = Model(energysystem, **kwargs)
+        self.program = LinearProgram.from_model(self.model)
+        lp = self.program
+        balance = np.array([block == "Bus" for block in lp.row_blocks])
+        if not balance.any():
+            raise ValueError("The energy system has no balanced buses.")
+        self._balance = np.flatnonzero(balance)
+        self._rhs = lp.row_lower[self._balance]
+        entries = balance[lp.row]
+        position = np.cumsum(balance) - 1
+        self._entries = (
+            position[lp.row[entries]],
+            lp.col[entries],
+            lp.data[entries],
+        )
+        self._subproblems = _decompose(lp, ~balance)
+        if "fork" not in multiprocessing.get_all_start_methods():
+            processes = 1
+        self.processes = max(1, min(processes, len(self._subproblems)))
+        self.max_flow = max_flow
+        self.prices = None
+        self.lower_bounds = []
+        self.upper_bounds = []
+
+    @property
+    def gap(self):
+        """Relative gap of the last lower and upper bound."""
+        upper, lower = self.upper_bounds[-1], self.lower_bounds[-1]
+        return (upper - lower) / max(1, abs(upper))
+
+    def solve(
+        self,
+        solver="cbc",
+        max_iterations=50,
+        tolerance=1e-4,
+        step=2.0,
+        patience=3,
+        repair_interval=1,
+        **kwargs,
+    ):
+        r"""Improve the prices of the balances and repair the schedules of
+        the subproblems until the gap of the bounds is small enough.
+
+        Parameters
+        ----------
+        solver : string
+            solver to be used e.g. "glpk","gurobi","cplex"
+        max_iterations : int
+            Maximum number of iterations.
+        tolerance : float
+            Relative gap of the lower and upper bound at which the
+            iterations stop.
+        step : float
+            Initial factor of the step length, between 0 and 2.
+        patience : int
+            Number of iterations without improvement of the lower bound
+            after which the factor of the step length is halved.
+        repair_interval : int
+            The schedule of every `repair_interval`-th iteration (starting
+            with the first) and of the last iteration is repaired.
+        \**kwargs : keyword arguments
+            `solve_kwargs` and `cmdline_options` as in
+            :meth:`~oemof.solph.models.BaseModel.solve`.
+
+        Returns
+        -------
+        dict : The results of the best schedule as in
+            :func:`~oemof.solph.processing.results`.
+        """
+        lp = self.program
+        self.lower_bounds = []
+        self.upper_bounds = []
+        relaxation = self._relax(solver, kwargs)
+        if self.max_flow is None:
+            finite = np.concatenate(
+                [lp.col_lower, lp.col_upper, self._rhs, relaxation]
+            )
+            finite = np.abs(finite[np.isfinite(finite)])
+            self.max_flow = 10 * max(1, finite.max(initial=0))
+
+        lower = -np.inf
+        best = (np.inf, None)
+        stall = 0
+        subproblems = _Subproblems(self, solver, kwargs)
+        try:
+            for iteration in range(max_iterations):
+                costs = lp.objective.copy()
+                rows, cols, data = self._entries
+                np.subtract.at(costs, cols, data * self.prices[rows])
+                x = subproblems.evaluate(costs)
+                value = (
+                    costs @ x + self.prices @ self._rhs + lp.objective_constant
+                )
+                subgradient = self._rhs - np.bincount(
+                    rows, weights=data * x[cols], minlength=len(self._rhs)
+                )
+                if value > lower:
+                    lower = value
+                    stall = 0
+                else:
+                    stall += 1
+                    if stall >= patience:
+                        step /= 2
+                        stall = 0
+
+                norm = subgradient @ subgradient
+                last = iteration == max_iterations - 1 or norm == 0
+                if iteration % repair_interval == 0 or last:
+                    upper = self._repair(x[lp.integer], solver, kwargs)
+                    if upper is not None and upper < best[0]:
+                        best = (upper, x[lp.integer])
+                self.lower_bounds.append(lower)
+                self.upper_bounds.append(best[0])
+                logging.info(
+                    "Lagrangian iteration {0}: lower bound {1}, upper bound "
+                    "{2}.".format(iteration + 1, lower, best[0])
+                )
+                if last or self.gap <= tolerance:
+                    break
+                if np.isfinite(best[0]):
+                    target = best[0]
+                else:
+                    target = value + 0.1 * max(1, abs(value))
+                self.prices += step * (target - value) / norm * subgradient
+        finally:
+            subproblems.close()
+
+        if best[1] is None:
+            raise ValueError(
+                "No feasible schedule was found, the schedules of the "
+                "subproblems could not be repaired."
+            )
+        if self.gap > tolerance:
+            logging.warning(
+                "Lagrangian relaxation stopped after {0} iterations with a "
+                "relative gap of {1}.".format(len(self.lower_bounds), self.gap)
+            )
+        self._repair(best[1], solver, kwargs)
+        return self.model.results()
+
+    def _relax(self, solver, kwargs):
+        """Solve the linear relaxation of the model, take its duals of the
+        balances as initial prices and return the values of the columns."""
+        m = self.model
+        lp = self.program
+        variables = [v for v, i in zip(lp.variables, lp.integer) if i]
+        domains = [(v.domain, v.lb, v.ub) for v in variables]
+        if m.dual is None:
+            m.receive_duals()
+        try:
+            for var, (_, lb, ub) in zip(variables, domains):
+                var.domain = po.Reals
+                var.setlb(lb)
+                var.setub(ub)
+            m.solve(solver=solver, **kwargs)
+        finally:
+            for var, (domain, lb, ub) in zip(variables, domains):
+                var.domain = domain
+                var.setlb(lb)
+                var.setub(ub)
+        if m.solver_results["Solver"][0]["Termination condition"] != (
+            "optimal"
+        ):
+            raise ValueError("The linear relaxation could not be solved.")
+        self.prices = np.array(
+            [m.dual[lp.constraints[r]] for r in self._balance], dtype=float
+        )
+        return np.array([v.value or 0 for v in lp.variables], dtype=float)
+
+    def _repair(self, values, solver, kwargs):
+        """Fix the integer variables, solve the model and return its
+        objective or None if it is infeasible."""
+        m = self.model
+        lp = self.program
+        variables = [v for v, i in zip(lp.variables, lp.integer) if i]
+        solve_kwargs = dict(kwargs.get("solve_kwargs", {}))
+        solve_kwargs["load_solutions"] = False
+        for var, value in zip(variables, values):
+            var.fix(round(value))
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                results = m.solve(
+                    solver=solver, **dict(kwargs, solve_kwargs=solve_kwargs)
+                )
+            if results["Solver"][0]["Termination condition"] != "optimal":
+                return None
+            m.solutions.load_from(results)
+            return m.objective()
+        finally:
+            for var in variables:
+                var.unfix()
+
+
+def _decompose(lp, rows):
+    """Split the columns and the given rows into the subproblems.
+
+    Columns are connected if they share one of the rows. Every connected
+    set of columns with an integer column is a subproblem. The other
+    columns form two more subproblems: one with the rows and one with the
+    columns which have no rows.
+
+    Returns
+    -------
+    list : The column and row indices of every subproblem.
+    """
+    parent = list(range(lp.num_cols))
+
+    def find(column):
+        root = column
+        while parent[root] != root:
+            root = parent[root]
+        while parent[column] != root:
+            parent[column], column = root, parent[column]
+        return root
+
+    indptr, indices, _ = lp.csr()
+    rows = [r for r in np.flatnonzero(rows) if indptr[r] < indptr[r + 1]]
+    for r in rows:
+        columns = indices[indptr[r] : indptr[r + 1]]
+        root = find(columns[0])
+        for column in columns[1:]:
+            other = find(column)
+            if other != root:
+                parent[other] = root
+
+    roots = np.array([find(column) for column in range(lp.num_cols)])
+    units = set(roots[lp.integer])
+    keys = np.array([root if root in units else -1 for root in roots])
+    free = np.ones(lp.num_cols, dtype=bool)
+    for r in rows:
+        free[indices[indptr[r] : indptr[r + 1]]] = False
+    keys[free & (keys == -1)] = -2
+    row_keys = keys[[indices[indptr[r]] for r in rows]]
+    rows = np.array(rows, dtype=np.int64)
+    subproblems = []
+    for key in sorted(units) + [-1, -2]:
+        columns = np.flatnonzero(keys == key)
+        if len(columns):
+            subproblems.append((columns, rows[row_keys == key]))
+    return subproblems
+
+
+class _Subproblems:
+    """The subproblems, solved in the current process or in worker
+    processes which build and keep a share of the subproblems."""
+
+    def __init__(self, relaxation, solver, solve_kwargs):
+        self.connections = []
+        self.workers = []
+        self.size = relaxation.program.num_cols
+        self.columns = [c for c, _ in relaxation._subproblems]
+        args = (relaxation.program, relaxation.max_flow, solver, solve_kwargs)
+        if relaxation.processes == 1:
+            self.local = [
+                _Subproblem(*args, columns, rows)
+                for columns, rows in relaxation._subproblems
+            ]
+            return
+        self.local = None
+        context = multiprocessing.get_context("fork")
+        for number in range(relaxation.processes):
+            share = relaxation._subproblems[number :: relaxation.processes]
+            parent, child = context.Pipe()
+            worker = context.Process(
+                target=_serve, args=(child, share) + args, daemon=True
+            )
+            worker.start()
+            self.connections.append(parent)
+            self.workers.append(worker)
+
+    def evaluate(self, costs):
+        """Solve all subproblems for the costs of the columns and return the
+        values of all columns."""
+        if self.local is not None:
+            values = [sub.evaluate(costs) for sub in self.local]
+        else:
+            for connection in self.connections:
+                connection.send(costs)
+            shares = []
+            for connection in self.connections:
+                share = connection.recv()
+                if isinstance(share, Exception):
+                    raise share
+                shares.append(share)
+            # the subproblems were distributed round robin
+            values = [
+                shares[number % len(shares)][number // len(shares)]
+                for number in range(len(self.columns))
+            ]
+        x = np.zeros(self.size)
+        for columns, value in zip(self.columns, values):
+            x[columns] = value
+        return x
+
+    def close(self):
+        for connection in self.connections:
+            connection.send(None)
+        for worker in self.workers:
+            worker.join()
+
+
+def _serve(connection, share, *args):
+    """Build the subproblems of the share and solve them for all costs
+    received until None is received."""
+    try:
+        subproblems = [_Subproblem(*args, c, r) for c, r in share]
+    except Exception as e:
+        subproblems = e
+    while True:
+        costs = connection.recv()
+        if costs is None:
+            break
+        if isinstance(subproblems, Exception):
+            connection.send(subproblems)
+            continue
+        try:
+            connection.send([sub.evaluate(costs) for sub in subproblems])
+        except Exception as e:
+            connection.send(e)
+
+
+class _Subproblem:
+    """Pyomo model of some columns and rows of a linear program with
+    mutable objective coefficients."""
+
+    def __init__(self, lp, max_flow, solver, solve_kwargs, columns, rows):
+        self.columns = columns
+        self.solver = solver
+        self.solve_kwargs = solve_kwargs
+        lower = np.maximum(lp.col_lower[columns], -max_flow)
+        upper = np.minimum(lp.col_upper[columns], max_flow)
+        self.bounds = (lower, upper)
+        self.model = None
+        if not len(rows):
+            return
+
+        local = {column: j for j, column in enumerate(columns)}
+        m = po.ConcreteModel()
+        m.COLUMNS = po.Set(initialize=range(len(columns)), ordered=True)
+        m.x = po.Var(
+            m.COLUMNS, bounds=lambda m, j: (float(lower[j]), float(upper[j]))
+        )
+        for j, column in enumerate(columns):
+            if lp.integer[column]:
+                m.x[j].domain = po.Integers
+        m.costs = po.Param(m.COLUMNS, mutable=True, initialize=0)
+
+        indptr, indices, data = lp.csr()
+        m.rows = po.ConstraintList()
+        for r in rows:
+            start, end = indptr[r], indptr[r + 1]
+            expr = sum(
+                coef * m.x[local[column]]
+                for column, coef in zip(indices[start:end], data[start:end])
+            )
+            row_lower, row_upper = lp.row_lower[r], lp.row_upper[r]
+            if row_lower == row_upper:
+                m.rows.add(expr == float(row_lower))
+            else:
+                m.rows.add(
+                    (
+                        float(row_lower) if np.isfinite(row_lower) else None,
+                        expr,
+                        float(row_upper) if np.isfinite(row_upper) else None,
+                    )
+                )
+        m.objective = po.Objective(
+            expr=sum(m.costs[j] * m.x[j] for j in m.COLUMNS)
+        )
+        self.model = m
+
+    def evaluate(self, costs):
+        """Return the values of the columns which minimise the costs."""
+        m = self.model
+        lower, upper = self.bounds
+        if m is None:
+            # each column is minimised within its bounds
+            costs = costs[self.columns]
+            return np.where(
+                costs > 0,
+                lower,
+                np.where(costs < 0, upper, np.clip(0, lower, upper)),
+            )
+        for j, column in enumerate(self.columns):
+            m.costs[j] = costs[column]
+        opt = SolverFactory(self.solver, solver_io="lp")
+        for key, value in self.solve_kwargs.get("cmdline_options", {}).items():
+            opt.options[key] = value
+        results = opt.solve(m, **self.solve_kwargs.get("solve_kwargs", {}))
+        condition = results["Solver"][0]["Termination condition"]
+        if condition != "optimal":
+            raise ValueError(
+                "A subproblem could not be solved ({0}).".format(condition)
+            )
+        # columns without costs and rows are not passed to the solver
+        values = [m.x[j].value or 0 for j in m.COLUMNS]
+        return np.clip(np.array(values, dtype=float), lower, upper)
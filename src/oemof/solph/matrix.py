@@ -0,0 +1,1047 @@
+# -*- coding: utf-8 -*-
+
+"""Sparse matrix representation of solph models.
+
+A model is converted block by block into coefficient arrays in coordinate
+(COO) format, which can be written to LP or MPS files without the pyomo
+problem writers or handed to a solver directly.
+
+:meth:`LinearProgram.from_model` extracts the arrays from the constraints of
+a built pyomo model. :meth:`LinearProgram.from_energysystem` assembles the
+rows of the :class:`~oemof.solph.blocks.Bus`,
+:class:`~oemof.solph.blocks.Transformer` and :class:`~oemof.solph.blocks.Flow`
+blocks and the variable costs directly from the data of the energy system, so
+their pyomo constraints and expressions are never constructed. Only the
+variables and the other blocks are built with pyomo.
+
+The blocks of the components, e.g. storages or demand side management, can
+be built in several processes by :meth:`LinearProgram.from_energysystem`.
+Every process builds one block in a copy of the model and returns its rows,
+which are merged in the parent process (requires the "fork" start method of
+:mod:`multiprocessing`, i.e. Linux). The benchmark `benchmarks/matrix.py`
+compares the time for the whole run from the energy system to the LP file.
+
+SPDX-License-Identifier: MIT
+
+"""
+
+import multiprocessing
+
+import numpy as np
+from pyomo.core import Block
+from pyomo.core import Constraint
+from pyomo.core import Objective
+from pyomo.core import maximize
+from pyomo.core import Var
+from pyomo.core import value
+from pyomo.core.base.label import NumericLabeler
+from pyomo.core.base.label import TextLabeler
+from pyomo.core.base.label import cpxlp_label_from_name
+from pyomo.repn import generate_standard_repn
+
+from oemof.solph import blocks
+from oemof.solph.plumbing import sequence_to_array
+
+
+class LinearProgram:
+    r"""A linear (mixed integer) program stored as sparse arrays.
+
+    The problem has the form
+
+    .. math::
+        \min / \max \ c^T x + c_0 \\
+        row\_lower \leq A x \leq row\_upper \\
+        col\_lower \leq x \leq col\_upper
+
+    where the matrix :math:`A` is stored in coordinate format, i.e. the
+    non-zero entry `k` is `A[row[k], col[k]] = data[k]`. Missing bounds are
+    stored as `-inf` or `+inf`.
+
+    Use :meth:`from_model` to create an instance from a built model.
+
+    Attributes
+    ----------
+    row, col, data : numpy.ndarray
+        Row indices, column indices and values of the non-zero coefficients.
+    row_lower, row_upper : numpy.ndarray
+        Lower and upper bounds of the rows.
+    col_lower, col_upper : numpy.ndarray
+        Lower and upper bounds of the columns.
+    objective : numpy.ndarray
+        Objective coefficients of the columns.
+    objective_constant : float
+        Constant term of the objective function.
+    sense : int
+        1 for minimisation, -1 for maximisation.
+    integer : numpy.ndarray
+        Boolean array which is True for integer columns.
+    row_names, col_names : list
+        Names of the rows and columns.
+    row_blocks : list
+        Names of the blocks holding the rows, e.g. 'Bus' or
+        'GenericStorageBlock'. Rows of the model itself belong to ''.
+    variables : list
+        The pyomo variables of the columns, None for variables which do not
+        exist in the current process (see :meth:`from_energysystem`).
+    constraints : list
+        The pyomo constraints of the rows, None for rows without a pyomo
+        constraint (see :meth:`from_energysystem`).
+    """
+
+    def __init__(
+        self,
+        row,
+        col,
+        data,
+        row_lower,
+        row_upper,
+        col_lower,
+        col_upper,
+        objective,
+        objective_constant=0,
+        sense=1,
+        integer=None,
+        row_names=None,
+        col_names=None,
+        row_blocks=None,
+        variables=None,
+        constraints=None,
+    ):
+        self.row = np.asarray(row, dtype=np.int64)
+        self.col = np.asarray(col, dtype=np.int64)
+        self.data = np.asarray(data, dtype=float)
+        self.row_lower = np.asarray(row_lower, dtype=float)
+        self.row_upper = np.asarray(row_upper, dtype=float)
+        self.col_lower = np.asarray(col_lower, dtype=float)
+        self.col_upper = np.asarray(col_upper, dtype=float)
+        self.objective = np.asarray(objective, dtype=float)
+        self.objective_constant = objective_constant
+        self.sense = sense
+        if integer is None:
+            integer = np.zeros(self.num_cols, dtype=bool)
+        self.integer = np.asarray(integer, dtype=bool)
+        if row_names is None:
+            row_names = ["c{0}".format(r) for r in range(self.num_rows)]
+        if col_names is None:
+            col_names = ["x{0}".format(c) for c in range(self.num_cols)]
+        self.row_names = row_names
+        self.col_names = col_names
+        self.row_blocks = row_blocks
+        self.variables = variables
+        self.constraints = constraints
+
+    @property
+    def num_rows(self):
+        """Number of rows (constraints)."""
+        return len(self.row_lower)
+
+    @property
+    def num_cols(self):
+        """Number of columns (variables)."""
+        return len(self.col_lower)
+
+    @property
+    def num_nonzeros(self):
+        """Number of non-zero coefficients."""
+        return len(self.data)
+
+    @classmethod
+    def from_model(cls, model, symbolic_solver_labels=True):
+        """Create the sparse representation of a built model.
+
+        Every active constraint of every block is converted into a row, fixed
+        variables are treated as constants. Constraints without any variable
+        are skipped. The rows are read from the standard representation of
+        the constructed pyomo constraints, the same way the pyomo problem
+        writers do it.
+
+        Parameters
+        ----------
+        model : oemof.solph.models.BaseModel
+            A built model with a single active objective.
+        symbolic_solver_labels : bool
+            Use the names of the pyomo components for rows and columns (as
+            the pyomo LP writer does with the same io option). Otherwise
+            short numeric names are generated.
+
+        Returns
+        -------
+        LinearProgram
+        """
+        builder = _Builder(symbolic_solver_labels)
+        for block in model.block_data_objects(active=True):
+            builder.add_block(
+                block, "" if block is model else block.local_name
+            )
+        builder.set_objective(model)
+        return builder.linear_program()
+
+    @classmethod
+    def from_energysystem(
+        cls, energysystem, symbolic_solver_labels=True, processes=1, **kwargs
+    ):
+        r"""Create the sparse representation of the model of an energy system
+        without building the pyomo constraints of the basic blocks.
+
+        The rows of the :class:`~oemof.solph.blocks.Bus`,
+        :class:`~oemof.solph.blocks.Transformer` and
+        :class:`~oemof.solph.blocks.Flow` blocks and the variable costs of
+        the flows are assembled as arrays from the data of the nodes. The
+        variables of the model and all other blocks are built with pyomo and
+        extracted as in :meth:`from_model`. Flows with gradients or integer
+        flows and the compact transformer relation are built with pyomo as
+        well.
+
+        The problem is the same as the one of the model built from the
+        energy system, but the order of the rows and columns may differ. The
+        rows assembled from arrays have no pyomo constraint, their entry in
+        `constraints` is None.
+
+        With several processes, the blocks of the constraint groups of the
+        components are built in a pool of forked processes, one block per
+        task. The blocks of the model class itself (e.g.
+        :class:`~oemof.solph.blocks.InvestmentFlow`), whose variables the
+        component blocks refer to, are built before in the parent process.
+        The program is the same as with one process, but the rows and
+        variables of the blocks built in other processes have no pyomo
+        constraint and variable, their entries in `constraints` and
+        `variables` are None.
+
+        Parameters
+        ----------
+        energysystem : oemof.solph.network.EnergySystem
+        symbolic_solver_labels : bool
+            See :meth:`from_model`.
+        processes : int
+            Number of processes which build the blocks of the components.
+            Falls back to one process if the "fork" start method is not
+            available.
+        \**kwargs : keyword arguments
+            Arguments of :class:`~oemof.solph.models.Model`.
+
+        Returns
+        -------
+        LinearProgram
+        """
+        # the models module imports this module
+        from oemof.solph.models import Model
+
+        model = Model(energysystem, auto_construct=False, **kwargs)
+        builder = _Builder(symbolic_solver_labels)
+        with model._applied_typical_periods():
+            model._add_parent_block_sets()
+            model._add_parent_block_variables()
+            array_rows = _ArrayRows(model)
+            groups = [
+                (group, members)
+                for group in model._constraint_groups
+                for members in [array_rows.pyomo_members(group)]
+                if members is not None
+            ]
+            forked = []
+            if (
+                processes > 1
+                and "fork" in multiprocessing.get_all_start_methods()
+            ):
+                # the component blocks refer to the variables of the blocks
+                # of the model class, which are built in this process
+                shared = type(model).CONSTRAINT_GROUPS
+                forked = [g for g in groups if g[0] not in shared]
+                groups = [g for g in groups if g[0] in shared]
+            for group, members in groups:
+                _add_group_block(model, group, members)
+            for block in model.block_data_objects(active=True):
+                builder.add_block(
+                    block, "" if block is model else block.local_name
+                )
+            objectives = builder.add_blocks_in_parallel(
+                model, forked, processes
+            )
+            array_rows.add_to(builder)
+            for block in model.component_data_objects(
+                Block, descend_into=False
+            ):
+                repn = _block_objective(block)
+                builder.add_objective_terms(
+                    [builder.column(v) for v in repn.linear_vars],
+                    repn.linear_coefs,
+                    value(repn.constant),
+                )
+            for keys, coefs, constant in objectives:
+                builder.add_objective_terms(
+                    builder.key_columns(keys), coefs, constant
+                )
+            array_rows.add_costs_to(builder)
+        return builder.linear_program()
+
+    def csr(self):
+        """Return the matrix in compressed sparse row format.
+
+        Returns
+        -------
+        tuple : (indptr, indices, data)
+            Duplicate entries are not merged.
+        """
+        return _compress(self.row, self.col, self.data, self.num_rows)
+
+    def csc(self):
+        """Return the matrix in compressed sparse column format.
+
+        Returns
+        -------
+        tuple : (indptr, indices, data)
+            Duplicate entries are not merged.
+        """
+        return _compress(self.col, self.row, self.data, self.num_cols)
+
+    def write_lp(self, filename):
+        """Write the problem to a file in CPLEX LP format.
+
+        The constant of the objective function is written as coefficient of
+        the variable `ONE_VAR_CONSTANT` which is fixed to one, the same way
+        pyomo does it.
+        """
+        indptr, indices, data = self.csr()
+        names = self.col_names
+        lines = ["\\* Source oemof.solph LinearProgram *\\", ""]
+        lines.append("max" if self.sense == -1 else "min")
+        lines.append("objective:")
+        lines.extend(
+            "{0:+.17g} {1}".format(self.objective[c], names[c])
+            for c in np.flatnonzero(self.objective)
+        )
+        lines.append(
+            "{0:+.17g} ONE_VAR_CONSTANT".format(self.objective_constant)
+        )
+        lines.extend(["", "s.t.", ""])
+
+        for r in range(self.num_rows):
+            lower = self.row_lower[r]
+            upper = self.row_upper[r]
+            terms = [
+                "{0:+.17g} {1}".format(data[k], names[indices[k]])
+                for k in range(indptr[r], indptr[r + 1])
+            ]
+            if lower == upper:
+                rows = [("c_e_", "=", lower)]
+            elif np.isfinite(lower) and np.isfinite(upper):
+                rows = [("r_l_", ">=", lower), ("r_u_", "<=", upper)]
+            elif np.isfinite(lower):
+                rows = [("c_l_", ">=", lower)]
+            else:
+                rows = [("c_u_", "<=", upper)]
+            for prefix, sign, bound in rows:
+                lines.append("{0}{1}_:".format(prefix, self.row_names[r]))
+                lines.extend(terms)
+                lines.append("{0} {1:.17g}".format(sign, _no_neg_zero(bound)))
+                lines.append("")
+
+        lines.extend(
+            ["c_e_ONE_VAR_CONSTANT:", "ONE_VAR_CONSTANT = 1.0", "", "bounds"]
+        )
+        for c in range(self.num_cols):
+            lines.append(
+                "   {0} <= {1} <= {2}".format(
+                    _lp_bound(self.col_lower[c]),
+                    names[c],
+                    _lp_bound(self.col_upper[c]),
+                )
+            )
+        binary = self._binary()
+        for section, mask in [
+            ("binary", binary),
+            ("general", self.integer & ~binary),
+        ]:
+            if mask.any():
+                lines.append(section)
+                lines.extend(
+                    "  {0}".format(names[c]) for c in np.flatnonzero(mask)
+                )
+        lines.extend(["end", ""])
+
+        with open(filename, "w") as f:
+            f.write("\n".join(lines))
+
+    def write_mps(self, filename):
+        """Write the problem to a file in free MPS format."""
+        indptr, indices, data = self.csc()
+        names = self.row_names
+        lines = ["NAME oemof_solph"]
+        if self.sense == -1:
+            lines.extend(["OBJSENSE", "    MAX"])
+        lines.extend(["ROWS", " N  objective"])
+        for r in range(self.num_rows):
+            lower = self.row_lower[r]
+            upper = self.row_upper[r]
+            if lower == upper:
+                kind = "E"
+            elif np.isfinite(lower):
+                kind = "G"
+            else:
+                kind = "L"
+            lines.append(" {0}  {1}".format(kind, names[r]))
+
+        lines.append("COLUMNS")
+        integer_section = False
+        for c in range(self.num_cols):
+            if self.integer[c] != integer_section:
+                integer_section = self.integer[c]
+                lines.append(
+                    "    MARKER 'MARKER' '{0}'".format(
+                        "INTORG" if integer_section else "INTEND"
+                    )
+                )
+            column = self.col_names[c]
+            if self.objective[c] != 0:
+                lines.append(
+                    "    {0} objective {1:.17g}".format(
+                        column, self.objective[c]
+                    )
+                )
+            for k in range(indptr[c], indptr[c + 1]):
+                lines.append(
+                    "    {0} {1} {2:.17g}".format(
+                        column, names[indices[k]], data[k]
+                    )
+                )
+        if integer_section:
+            lines.append("    MARKER 'MARKER' 'INTEND'")
+
+        lines.append("RHS")
+        if self.objective_constant != 0:
+            # the constant enters with the opposite sign into the rhs
+            lines.append(
+                "    rhs objective {0:.17g}".format(-self.objective_constant)
+            )
+        ranges = []
+        for r in range(self.num_rows):
+            lower = self.row_lower[r]
+            upper = self.row_upper[r]
+            rhs = lower if np.isfinite(lower) else upper
+            if rhs != 0:
+                lines.append("    rhs {0} {1:.17g}".format(names[r], rhs))
+            if lower != upper and np.isfinite(lower) and np.isfinite(upper):
+                ranges.append(
+                    "    rng {0} {1:.17g}".format(names[r], upper - lower)
+                )
+        if ranges:
+            lines.append("RANGES")
+            lines.extend(ranges)
+
+        lines.append("BOUNDS")
+        binary = self._binary()
+        for c in range(self.num_cols):
+            column = self.col_names[c]
+            lower = self.col_lower[c]
+            upper = self.col_upper[c]
+            if binary[c]:
+                lines.append(" BV bnd {0}".format(column))
+            elif lower == upper:
+                lines.append(" FX bnd {0} {1:.17g}".format(column, lower))
+            elif lower == -np.inf and upper == np.inf:
+                lines.append(" FR bnd {0}".format(column))
+            else:
+                if lower == -np.inf:
+                    lines.append(" MI bnd {0}".format(column))
+                elif lower != 0 or self.integer[c]:
+                    lines.append(" LO bnd {0} {1:.17g}".format(column, lower))
+                if upper != np.inf:
+                    lines.append(" UP bnd {0} {1:.17g}".format(column, upper))
+                elif self.integer[c]:
+                    # some readers default integer columns to [0, 1]
+                    lines.append(" PL bnd {0}".format(column))
+        lines.extend(["ENDATA", ""])
+
+        with open(filename, "w") as f:
+            f.write("\n".join(lines))
+
+    def _binary(self):
+        """Boolean array which is True for integer columns in [0, 1]."""
+        return self.integer & (self.col_lower == 0) & (self.col_upper == 1)
+
+
+class _Builder:
+    """Collects the rows of the blocks of a model as coefficient lists."""
+
+    def __init__(self, symbolic_solver_labels):
+        if symbolic_solver_labels:
+            self.labeler = TextLabeler()
+        else:
+            self.labeler = None
+            self.row_labeler = NumericLabeler("c")
+            self.col_labeler = NumericLabeler("x")
+        self.columns = {}
+        self.variables = []
+        self.col_names = []
+        self.col_bounds = []
+        self.shared_variables = {}
+        self.row = []
+        self.col = []
+        self.data = []
+        self.row_lower = []
+        self.row_upper = []
+        self.row_names = []
+        self.row_blocks = []
+        self.constraints = []
+        self.objective = {}
+        self.objective_constant = 0
+        self.sense = 1
+
+    def column(self, var):
+        """Return the column index of a variable, add it if necessary."""
+        idx = self.columns.get(id(var))
+        if idx is None:
+            idx = len(self.variables)
+            self.columns[id(var)] = idx
+            self.variables.append(var)
+            if self.labeler is None:
+                self.col_names.append(self.col_labeler(var))
+            else:
+                self.col_names.append(self.labeler(var))
+            self.col_bounds.append(_column_bounds(var))
+        return idx
+
+    def named_column(self, name, bounds):
+        """Return the column index of a variable of a block built in another
+        process, add it if necessary.
+
+        Parameters
+        ----------
+        name : str
+            The label of the variable, which identifies it.
+        bounds : tuple
+            Lower bound, upper bound and integrality of the variable.
+        """
+        idx = self.columns.get(name)
+        if idx is None:
+            idx = len(self.variables)
+            self.columns[name] = idx
+            self.variables.append(None)
+            if self.labeler is None:
+                self.col_names.append(self.col_labeler())
+            else:
+                self.col_names.append(name)
+            self.col_bounds.append(bounds)
+        return idx
+
+    def add_block(self, block, block_name):
+        """Add all active constraints of a block (without sub-blocks)."""
+        for con in _constraints(block):
+            row = _linear_row(con)
+            if row is not None:
+                variables, coefs, lower, upper = row
+                self.add_row(con, block_name, variables, coefs, lower, upper)
+
+    def add_row(self, con, block_name, variables, coefs, lower, upper):
+        """Add the row of a constraint."""
+        name = None if self.labeler is None else self.labeler(con)
+        columns = [self.column(var) for var in variables]
+        self._append_row(name, con, block_name, columns, coefs, lower, upper)
+
+    def _append_row(self, name, con, block_name, columns, coefs, lower, upper):
+        """Append a row, a numeric name is generated if `name` is None."""
+        idx = len(self.row_lower)
+        self.row.extend([idx] * len(columns))
+        self.col.extend(columns)
+        self.data.extend(coefs)
+        self.row_lower.append(lower)
+        self.row_upper.append(upper)
+        if self.labeler is None:
+            self.row_names.append(self.row_labeler())
+        else:
+            self.row_names.append(name)
+        self.row_blocks.append(block_name)
+        self.constraints.append(con)
+
+    def add_rows(self, block_name, names, row, variables, data, bounds):
+        """Add rows given in coordinate format.
+
+        Fixed variables are treated as constants and coefficients of zero are
+        dropped. Rows without variables are skipped.
+
+        Parameters
+        ----------
+        block_name : str
+            Name of the block of the rows.
+        names : list
+            Names of the rows in the form of pyomo component names.
+        row : numpy.ndarray
+            Number of the row of every coefficient in `names`.
+        variables : numpy.ndarray
+            The pyomo variables of the coefficients (object array).
+        data : numpy.ndarray
+            The coefficients.
+        bounds : tuple
+            Arrays with the lower and upper bounds of the rows.
+        """
+        fixed = np.array([v.fixed for v in variables], dtype=bool)
+        constant = np.bincount(
+            row[fixed],
+            weights=data[fixed] * [value(v) for v in variables[fixed]],
+            minlength=len(names),
+        )
+        lower, upper = (bound - constant for bound in bounds)
+        keep = ~fixed & (data != 0)
+        row, variables, data = row[keep], variables[keep], data[keep]
+        used = np.zeros(len(names), dtype=bool)
+        used[row] = True
+        number = np.cumsum(used) - 1 + len(self.row_lower)
+        order = np.argsort(row, kind="stable")
+
+        self.row.extend(number[row[order]].tolist())
+        self.col.extend(self.column(v) for v in variables[order])
+        self.data.extend(data[order].tolist())
+        self.row_lower.extend(lower[used].tolist())
+        self.row_upper.extend(upper[used].tolist())
+        for name in np.asarray(names, dtype=object)[used]:
+            if self.labeler is None:
+                self.row_names.append(self.row_labeler())
+            else:
+                self.row_names.append(cpxlp_label_from_name(name))
+            self.row_blocks.append(block_name)
+            self.constraints.append(None)
+
+    def add_costs(self, variables, data):
+        """Add coefficients of variables to the objective, fixed variables
+        are added to the constant."""
+        for var, coef in zip(variables, data):
+            if var.fixed:
+                self.objective_constant += coef * value(var)
+            elif coef != 0:
+                col = self.column(var)
+                self.objective[col] = self.objective.get(col, 0) + coef
+
+    def add_blocks_in_parallel(self, model, groups, processes):
+        """Build the blocks of constraint groups in a pool of forked
+        processes and add their rows.
+
+        Every process builds the block of one group in its copy of the model
+        and returns the rows and objective terms with the ids of the
+        variables of the parent process and the labels and bounds of the
+        new variables of the block (see :func:`_group_rows`). The rows are
+        added in the order of the groups. The objective terms are returned,
+        so they can be added after all other rows like the ones of blocks
+        built in this process.
+
+        Parameters
+        ----------
+        model : oemof.solph.models.Model
+            The model with all blocks except the ones of the groups.
+        groups : list
+            Tuples of a constraint group and its members.
+        processes : int
+
+        Returns
+        -------
+        list : The objective terms of the blocks as tuples (variables,
+        coefficients, constant), the variables as returned by the
+        processes, see :meth:`key_columns`.
+        """
+        global _PARALLEL_MODEL, _PARALLEL_GROUPS, _PARALLEL_VARIABLES
+        if not groups:
+            return []
+        self.shared_variables = {
+            id(v): v for v in model.component_data_objects(Var)
+        }
+        objectives = []
+        _PARALLEL_MODEL = model
+        _PARALLEL_GROUPS = groups
+        _PARALLEL_VARIABLES = set(self.shared_variables)
+        try:
+            context = multiprocessing.get_context("fork")
+            with context.Pool(processes) as pool:
+                for rows, objective in pool.imap(
+                    _group_rows, range(len(groups))
+                ):
+                    for block_name, name, keys, coefs, lower, upper in rows:
+                        self._append_row(
+                            name,
+                            None,
+                            block_name,
+                            self.key_columns(keys),
+                            coefs,
+                            lower,
+                            upper,
+                        )
+                    objectives.append(objective)
+        finally:
+            _PARALLEL_MODEL = _PARALLEL_GROUPS = _PARALLEL_VARIABLES = None
+        return objectives
+
+    def key_columns(self, keys):
+        """Return the column indices of the variables returned by the
+        processes of :meth:`add_blocks_in_parallel`: the id of a variable
+        of this process or a tuple of the label and the bounds of a new
+        variable."""
+        return [
+            self.named_column(k[0], k[1:])
+            if isinstance(k, tuple)
+            else self.column(self.shared_variables[k])
+            for k in keys
+        ]
+
+    def add_objective_terms(self, columns, coefs, constant):
+        """Add coefficients of columns and a constant to the objective."""
+        for col, coef in zip(columns, coefs):
+            self.objective[col] = self.objective.get(col, 0) + coef
+        self.objective_constant += constant
+
+    def set_objective(self, model):
+        """Add the coefficients of the single active objective."""
+        objectives = list(model.component_data_objects(Objective, active=True))
+        if len(objectives) != 1:
+            raise ValueError(
+                "The model needs exactly one active objective, found "
+                "{0}.".format(len(objectives))
+            )
+        objective = objectives[0]
+        repn = generate_standard_repn(objective.expr, quadratic=False)
+        if not repn.is_linear():
+            raise ValueError("The objective function is not linear.")
+        for var, coef in zip(repn.linear_vars, repn.linear_coefs):
+            col = self.column(var)
+            self.objective[col] = self.objective.get(col, 0) + coef
+        self.objective_constant = value(repn.constant)
+        self.sense = -1 if objective.sense == maximize else 1
+
+    def linear_program(self):
+        """Create the LinearProgram from the collected data."""
+        objective = np.zeros(len(self.variables))
+        for col, coef in self.objective.items():
+            objective[col] = coef
+        col_lower, col_upper, integer = (
+            np.array(b, dtype=t)
+            for b, t in zip(
+                zip(*self.col_bounds) if self.col_bounds else ([], [], []),
+                (float, float, bool),
+            )
+        )
+        return LinearProgram(
+            row=self.row,
+            col=self.col,
+            data=self.data,
+            row_lower=self.row_lower,
+            row_upper=self.row_upper,
+            col_lower=col_lower,
+            col_upper=col_upper,
+            objective=objective,
+            objective_constant=self.objective_constant,
+            sense=self.sense,
+            integer=integer,
+            row_names=self.row_names,
+            col_names=self.col_names,
+            row_blocks=self.row_blocks,
+            variables=self.variables,
+            constraints=self.constraints,
+        )
+
+
+class _ArrayRows:
+    """The rows and the costs of the Bus, Transformer and Flow blocks of a
+    model, assembled from the data of the energy system.
+
+    The model has to be built up to the variables of the parent block.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.length = len(model.TIMESTEPS)
+        self.assemblers = {blocks.Bus: self._bus, blocks.Flow: self._flow}
+        if not model.compact_transformer_relation:
+            self.assemblers[blocks.Transformer] = self._transformer
+        self.members = {}
+
+    def pyomo_members(self, group):
+        """The members of a constraint group which have to be built with
+        pyomo, None if there are none."""
+        members = list(self.model.es.groups.get(group) or [])
+        if group not in self.assemblers:
+            return members or None
+        if group is blocks.Flow:
+            self.members[group] = [
+                m for m in members if not _needs_flow_block(m[2])
+            ]
+            members = [m for m in members if _needs_flow_block(m[2])]
+        else:
+            self.members[group] = members
+            members = []
+        return members or None
+
+    def add_to(self, builder):
+        """Add the rows of all groups to a builder."""
+        for group, members in self.members.items():
+            if members:
+                for block_name, rows in self.assemblers[group](members):
+                    builder.add_rows(block_name, *rows)
+
+    def add_costs_to(self, builder):
+        """Add the variable costs of the flows to a builder."""
+        m = self.model
+        weighting = sequence_to_array(m.objective_weighting, self.length)
+        for i, o, flow in self.members.get(blocks.Flow, []):
+            if flow.variable_costs[0] is not None:
+                builder.add_costs(
+                    self._variables(i, o),
+                    weighting
+                    * sequence_to_array(flow.variable_costs, self.length),
+                )
+
+    def _variables(self, i, o):
+        """Object array of the flow variables of a flow."""
+        variables = np.empty(self.length, dtype=object)
+        variables[:] = [self.model.flow[i, o, t] for t in self.model.TIMESTEPS]
+        return variables
+
+    def _bus(self, group):
+        """The balance of the buses, in the order of the pyomo block."""
+        rows = _Rows(len(group))
+        for k, n in enumerate(group):
+            for i in n.inputs:
+                rows.add(k, self._variables(i, n), 1)
+            for o in n.outputs:
+                rows.add(k, self._variables(n, o), -1)
+        names = [
+            "Bus.balance[{0},{1}]".format(n, t)
+            for t in self.model.TIMESTEPS
+            for n in group
+        ]
+        yield "Bus", rows.coordinates(names, 0, 0)
+
+    def _transformer(self, group):
+        """The linear relation of the transformers."""
+        pairs = [(n, i, o) for n in group for o in n.outputs for i in n.inputs]
+        rows = _Rows(len(pairs))
+        for k, (n, i, o) in enumerate(pairs):
+            factors = n.conversion_factors
+            rows.add(
+                k,
+                self._variables(i, n),
+                sequence_to_array(factors[o], self.length),
+            )
+            rows.add(
+                k,
+                self._variables(n, o),
+                -sequence_to_array(factors[i], self.length),
+            )
+        names = [
+            "Transformer.relation[{0},{1},{2},{3}]".format(n, i, o, t)
+            for t in self.model.TIMESTEPS
+            for n, i, o in pairs
+        ]
+        yield "Transformer", rows.coordinates(names, 0, 0)
+
+    def _flow(self, group):
+        """The summed limits of the flows."""
+        increment = sequence_to_array(self.model.timeincrement, self.length)
+        for attribute in ("summed_max", "summed_min"):
+            limited = [
+                (i, o, f)
+                for i, o, f in group
+                if getattr(f, attribute) is not None
+                and f.nominal_value is not None
+            ]
+            if not limited:
+                continue
+            rows = _Rows(len(limited), summed=True)
+            for k, (i, o, _) in enumerate(limited):
+                rows.add(k, self._variables(i, o), increment)
+            names = [
+                "Flow.{0}[{1},{2}]".format(attribute, i, o)
+                for i, o, _ in limited
+            ]
+            limit = np.array(
+                [
+                    getattr(f, attribute) * f.nominal_value
+                    for _, _, f in limited
+                ]
+            )
+            unlimited = np.full(len(limited), np.inf)
+            if attribute == "summed_max":
+                yield "Flow", rows.coordinates(names, -unlimited, limit)
+            else:
+                yield "Flow", rows.coordinates(names, limit, unlimited)
+
+
+class _Rows:
+    """Coefficients of rows which are numbered by timestep and member, the
+    row of member `k` in timestep `t` is `t * members + k`. If `summed` is
+    True, the coefficients of all timesteps of a member are added to the
+    row `k` of the member.
+    """
+
+    def __init__(self, members, summed=False):
+        self.members = members
+        self.summed = summed
+        self.row = []
+        self.variables = []
+        self.data = []
+
+    def add(self, k, variables, coefficients):
+        """Add the variables of all timesteps to the rows of member `k`."""
+        steps = 0 if self.summed else np.arange(len(variables))
+        self.row.append(
+            np.broadcast_to(steps * self.members + k, len(variables))
+        )
+        self.variables.append(variables)
+        self.data.append(np.broadcast_to(coefficients, len(variables)))
+
+    def coordinates(self, names, lower, upper):
+        """The arguments of :meth:`_Builder.add_rows`."""
+        size = len(names)
+        return (
+            names,
+            np.concatenate(self.row or [np.zeros(0, dtype=np.int64)]),
+            np.concatenate(self.variables or [np.zeros(0, dtype=object)]),
+            np.concatenate(self.data or [np.zeros(0)]).astype(float),
+            (
+                np.broadcast_to(np.asarray(lower, dtype=float), size),
+                np.broadcast_to(np.asarray(upper, dtype=float), size),
+            ),
+        )
+
+
+def _needs_flow_block(flow):
+    """Check if a flow needs the pyomo Flow block, i.e. has gradients or is
+    an integer flow."""
+    return (
+        flow.integer
+        or flow.positive_gradient["ub"][0] is not None
+        or flow.negative_gradient["ub"][0] is not None
+    )
+
+
+# the model, the constraint groups with their members and the ids of the
+# variables of the parent process, read by the forked processes of
+# `_Builder.add_blocks_in_parallel`
+_PARALLEL_MODEL = None
+_PARALLEL_GROUPS = None
+_PARALLEL_VARIABLES = None
+
+
+def _add_group_block(model, group, members):
+    """Add the block of a constraint group for the given members."""
+    block = group()
+    model.add_component(str(block), block)
+    block._create(group=members)
+    return block
+
+
+def _column_bounds(var):
+    """Lower bound, upper bound and integrality of a variable."""
+    return (
+        value(var.lb) if var.has_lb() else -np.inf,
+        value(var.ub) if var.has_ub() else np.inf,
+        var.is_integer() or var.is_binary(),
+    )
+
+
+def _constraints(block):
+    """The active constraints of a block (without sub-blocks)."""
+    return block.component_data_objects(
+        Constraint, active=True, descend_into=False
+    )
+
+
+def _linear_row(con):
+    """
+    Return the linear representation of a constraint.
+
+    Returns
+    -------
+    tuple or None : (variables, coefficients, lower, upper)
+        None if the constraint has no variables.
+    """
+    repn = generate_standard_repn(con.body, quadratic=False)
+    if not repn.is_linear():
+        raise ValueError("Constraint {0} is not linear.".format(con.name))
+    if not repn.linear_vars:
+        return None
+    constant = repn.constant
+    lower = value(con.lower) - constant if con.has_lb() else -np.inf
+    upper = value(con.upper) - constant if con.has_ub() else np.inf
+    return repn.linear_vars, repn.linear_coefs, lower, upper
+
+
+def _group_rows(number):
+    """Build the block of a constraint group of `_PARALLEL_GROUPS` and return
+    its rows and objective terms, run in a forked process.
+
+    Variables of the parent process are returned by their id, new variables
+    of the block by a tuple of their label and bounds.
+
+    Returns
+    -------
+    tuple : (rows, objective)
+        The rows as tuples (block name, label, variables, coefficients,
+        lower, upper) and the objective as tuple (variables, coefficients,
+        constant).
+    """
+    labeler = TextLabeler()
+
+    def key(var):
+        if id(var) in _PARALLEL_VARIABLES:
+            return id(var)
+        return (labeler(var),) + _column_bounds(var)
+
+    block = _add_group_block(_PARALLEL_MODEL, *_PARALLEL_GROUPS[number])
+    rows = []
+    for data in block.block_data_objects(active=True):
+        for con in _constraints(data):
+            row = _linear_row(con)
+            if row is not None:
+                variables, coefs, lower, upper = row
+                rows.append(
+                    (
+                        data.local_name,
+                        labeler(con),
+                        [key(v) for v in variables],
+                        [float(c) for c in coefs],
+                        lower,
+                        upper,
+                    )
+                )
+    repn = _block_objective(block)
+    objective = (
+        [key(v) for v in repn.linear_vars],
+        [float(c) for c in repn.linear_coefs],
+        value(repn.constant),
+    )
+    return rows, objective
+
+
+def _block_objective(block):
+    """Linear representation of the objective terms of a block and its
+    sub-blocks."""
+    # the models module imports this module
+    from oemof.solph.models import _objective_expression
+
+    expr = 0
+    for data in block.block_data_objects(active=True):
+        if hasattr(data, "_objective_expression"):
+            expr += _objective_expression(data)
+    repn = generate_standard_repn(expr, quadratic=False)
+    if not repn.is_linear():
+        raise ValueError("The objective function is not linear.")
+    return repn
+
+
+def _compress(major, minor, data, size):
+    """Compress coordinate arrays along the `major` axis."""
+    order = np.argsort(major, kind="stable")
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(major, minlength=size), out=indptr[1:])
+    return indptr, minor[order], data[order]
+
+
+def _no_neg_zero(number):
+    """Avoid writing '-0'."""
+    return 0 if number == 0 else number
+
+
+def _lp_bound(number):
+    """Format a bound for the bounds section of an LP file."""
+    if number == np.inf:
+        return "+inf"
+    if number == -np.inf:
+        return "-inf"
+    return "{0:.17g}".format(_no_neg_zero(number))
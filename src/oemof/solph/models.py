@@ -14,17 +14,26 @@ SPDX-License-Identifier: MIT
 import logging
 import warnings
 from collections import defaultdict
+from contextlib import contextmanager
+from contextlib import nullcontext
 
 import numpy as np
 from pandas import DataFrame
 
 from pyomo import environ as po
+from pyomo.core.base.set import SetOperator
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.core.expr.visitor import replace_expressions
 from pyomo.core.plugins.transform.relax_integrality import RelaxIntegrality
 from pyomo.opt import SolverFactory
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
 
 from oemof.solph import blocks
+from oemof.solph import highs
 from oemof.solph import processing
 from oemof.solph.plumbing import sequence
+from oemof.solph.plumbing import sequence_to_array
+from oemof.solph.profiling import Profile
 
 
 class BaseModel(po.ConcreteModel):
@@ -48,6 +57,31 @@ class BaseModel(po.ConcreteModel):
         building process set this value to False
         and use methods `_add_parent_block_sets`,
         `_add_parent_block_variables`, `_add_blocks`, `_add_objective`
+    profile : boolean or Profile (optional)
+        Record the time and memory used to build every block and component
+        of the model, to solve it and to create the results. If True, a new
+        :class:`~oemof.solph.profiling.Profile` is used. Defaults to False.
+    typical_periods : TypicalPeriods (optional)
+        Build the model for the typical periods of
+        :func:`oemof.solph.aggregation.cluster` instead of the full time
+        index. The time dependent attributes are aggregated while the model
+        is built and the objective weighting is multiplied by the number of
+        periods represented by each typical period. Costs which are not
+        weighted by the objective weighting (e.g. start-up costs) and
+        `summed_max`/`summed_min` refer to the typical periods only.
+    compact_transformer_relation : boolean
+        Relate every flow of a transformer to one reference input instead of
+        relating every input to every output (see
+        :class:`~oemof.solph.blocks.transformer.Transformer`). This results in
+        (inputs + outputs - 1) instead of (inputs * outputs) constraints per
+        transformer and timestep. Defaults to False.
+    presolve : boolean
+        Fix the flow variables which are determined before the model is
+        solved: flows with equal lower and upper bounds (e.g. a nominal value
+        of zero) and flows which are the only free flow of a balanced bus in
+        a timestep (e.g. a source feeding a fixed demand). Fixed variables
+        are written as constants, so they are no columns of the problem, but
+        they are part of the results. Defaults to False.
 
     Attributes:
     -----------
@@ -63,6 +97,10 @@ class BaseModel(po.ConcreteModel):
         Solver results.
     dual : ... or None
     rc : ... or None
+    profile : Profile or None
+        Time and memory used, if the model is profiled.
+    typical_periods : TypicalPeriods or None
+        Typical periods of an aggregated model.
 
     """
 
@@ -96,16 +134,25 @@ class BaseModel(po.ConcreteModel):
             "objective_weighting", self.timeincrement
         )
 
+        self.typical_periods = kwargs.get("typical_periods")
+        if self.typical_periods is not None:
+            self.objective_weighting = self.typical_periods.weighted(
+                sequence(self.objective_weighting)
+            )
+            self.timeincrement = self.typical_periods.aggregate_sequence(
+                self.timeincrement
+            )
+
+        self.compact_transformer_relation = kwargs.get(
+            "compact_transformer_relation", False
+        )
+
+        self.presolve = kwargs.get("presolve", False)
+
         self._constraint_groups = type(self).CONSTRAINT_GROUPS + kwargs.get(
             "constraint_groups", []
         )
-
-        self._constraint_groups += [
-            i
-            for i in self.es.groups
-            if hasattr(i, "CONSTRAINT_GROUP")
-            and i not in self._constraint_groups
-        ]
+        self._add_constraint_groups()
 
         self.flows = self.es.flows()
 
@@ -113,15 +160,76 @@ class BaseModel(po.ConcreteModel):
         self.dual = None
         self.rc = None
 
+        self._structure = None
+        self._persistent_solver = None
+
+        profile = kwargs.get("profile", False)
+        self.profile = Profile() if profile is True else profile or None
+
         if kwargs.get("auto_construct", True):
             self._construct()
 
+    def _add_constraint_groups(self):
+        """Add the constraint groups of the components in the energy system
+        which are not yet part of the constraint groups of the model.
+        """
+        self._constraint_groups += [
+            i
+            for i in self.es.groups
+            if hasattr(i, "CONSTRAINT_GROUP")
+            and i not in self._constraint_groups
+        ]
+
     def _construct(self):
         """ """
-        self._add_parent_block_sets()
-        self._add_parent_block_variables()
-        self._add_child_blocks()
-        self._add_objective()
+        with self._applied_typical_periods():
+            with self._profiled(self):
+                self._add_parent_block_sets()
+                self._add_parent_block_variables()
+            self._add_child_blocks()
+            with self._profiled(self):
+                self._add_objective()
+        self._structure = self._structure_signature()
+
+    def _structure_signature(self):
+        """Summary of everything in the energy system which defines the
+        structure of the model, i.e. its sets and constraints.
+
+        If the signature differs from the one of the built model, the model
+        has to be rebuilt. Only the sequences of the flows (`fix`, `min`,
+        `max` and `variable_costs`) are not part of the signature.
+        """
+        scalars = (
+            "nominal_value",
+            "summed_max",
+            "summed_min",
+            "integer",
+            "bidirectional",
+        )
+        objects = ("investment", "nonconvex", "multiobjective")
+        return (
+            tuple(self.es.nodes),
+            tuple(
+                (o, i, id(flow))
+                + tuple(getattr(flow, a, None) for a in scalars)
+                + tuple(id(getattr(flow, a, None)) for a in objects)
+                for (o, i), flow in self.es.flows().items()
+            ),
+        )
+
+    def _rebuild(self):
+        """Remove all sets, variables, constraints and the objective of the
+        model and build it again from the current state of the energy system.
+        Suffixes, e.g. to receive the duals, are kept.
+        """
+        for component in list(self.component_objects(descend_into=False)):
+            if not isinstance(component, po.Suffix):
+                self.del_component(component)
+        self.es.regroup()
+        self._add_constraint_groups()
+        self.flows = self.es.flows()
+        self._persistent_solver = None
+        self._construct()
 
     def _add_parent_block_sets(self):
         """ " Method to create all sets located at the parent block, i.e. the
@@ -142,14 +250,108 @@ class BaseModel(po.ConcreteModel):
         """
 
         for group in self._constraint_groups:
-            # create instance for block
-            block = group()
-            # Add block to model
-            self.add_component(str(block), block)
-            # create constraints etc. related with block for all nodes
-            # in the group
+            self._add_child_block(group)
+
+    def _add_child_block(self, group):
+        """Add the child block of a constraint group to the model."""
+        # create instance for block
+        block = group()
+        # Add block to model
+        self.add_component(str(block), block)
+        # create constraints etc. related with block for all nodes
+        # in the group
+        with self._profiled(block):
             block._create(group=self.es.groups.get(group))
 
+    def _profiled(self, block):
+        """Context in which the components added to `block` are measured,
+        if the model is profiled. For child blocks the whole block is
+        measured as well.
+        """
+        if self.profile is None:
+            return nullcontext()
+        if block is self:
+            return self.profile.components(block)
+        return self.profile.block(block)
+
+    def _applied_typical_periods(self):
+        """Context in which the energy system is reduced to the typical
+        periods, if the model is aggregated.
+        """
+        if self.typical_periods is None:
+            return nullcontext()
+        return self.typical_periods.applied(self.es)
+
+    def _profiled_solver(self, opt):
+        """Context in which the steps of the solver `opt` are measured, if
+        the model is profiled.
+        """
+        if self.profile is None:
+            return nullcontext()
+        return self.profile.solver(opt)
+
+    def _update_parent_block_variables(self, flows):
+        """Method to update the variables located at the parent block after
+        the attributes of the given flows have been changed.
+
+        Parameters
+        ----------
+        flows : iterable
+            Keys `(source, target)` of the changed flows.
+
+        Returns
+        -------
+        list : The changed variables.
+        """
+        return []
+
+    def _fixed_variables(self, flows):
+        """The fixed variables located at the parent block of the given
+        flows.
+
+        Parameters
+        ----------
+        flows : iterable
+            Keys `(source, target)` of flows.
+
+        Returns
+        -------
+        list : The fixed variables.
+        """
+        return []
+
+    def _rows_of(self, variables, rows):
+        """The active constraints which contain one of the given variables.
+
+        Parameters
+        ----------
+        variables : list
+        rows : dict
+            Cache of the constraints per variable id, filled on first use.
+
+        Returns
+        -------
+        list : The constraints in the order of the model.
+        """
+        if not variables:
+            return []
+        if not rows:
+            for con in self.component_data_objects(po.Constraint, active=True):
+                for var in identify_variables(con.body, include_fixed=True):
+                    rows.setdefault(id(var), []).append(con)
+        found = {}
+        for var in variables:
+            for con in rows.get(id(var), []):
+                found[id(con)] = con
+        return list(found.values())
+
+    def _updatable(self, flow, attribute):
+        """Check if an attribute of a flow can be changed without rebuilding
+        the model, i.e. if it only affects the variable bounds or the
+        objective.
+        """
+        return False
+
     def _add_objective(self, sense=po.minimize, update=False):
         """Method to sum up all objective expressions from the child blocks
         that have been created. This method looks for `_objective_expression`
@@ -163,7 +365,7 @@ class BaseModel(po.ConcreteModel):
 
         for block in self.component_data_objects():
             if hasattr(block, "_objective_expression"):
-                expr += block._objective_expression()
+                expr += _objective_expression(block)
 
         self.objective = po.Objective(sense=sense, expr=expr)
 
@@ -188,7 +390,9 @@ class BaseModel(po.ConcreteModel):
         Parameters
         ----------
         solver : string
-            solver to be used e.g. "glpk","gurobi","cplex"
+            solver to be used e.g. "glpk","gurobi","cplex". "highs" solves
+            the model in the current process without writing files, see
+            :mod:`oemof.solph.highs`.
         solver_io : string
             pyomo solver interface file format: "lp","python","nl", etc.
         \**kwargs : keyword arguments
@@ -207,6 +411,10 @@ class BaseModel(po.ConcreteModel):
             {"method": 2}
 
         """
+        if solver == highs.NAME:
+            return self._store_solver_results(
+                highs.solve(self, profile=self.profile, **kwargs)
+            )
         solve_kwargs = kwargs.get("solve_kwargs", {})
         solver_cmdline_options = kwargs.get("cmdline_options", {})
 
@@ -216,8 +424,125 @@ class BaseModel(po.ConcreteModel):
         for k in solver_cmdline_options:
             options[k] = solver_cmdline_options[k]
 
-        solver_results = opt.solve(self, **solve_kwargs)
+        with self._profiled_solver(opt):
+            solver_results = opt.solve(self, **solve_kwargs)
+
+        return self._store_solver_results(solver_results)
+
+    def update_and_resolve(
+        self, updates=None, solver="cbc", solver_io="lp", **kwargs
+    ):
+        r"""Change attributes of flows and solve the model again.
+
+        Changes of the sequences `fix`, `min`, `max` and `variable_costs` are
+        passed to the existing model: the bounds of the affected flow
+        variables are updated and the objective is rebuilt. With a persistent
+        solver interface (e.g. "gurobi_persistent", "cplex_persistent") only
+        the changed variables, the rows of variables which are fixed before
+        or after the change (their values are constants of the rows of the
+        solver) and the objective are sent to the solver, which keeps its
+        model and reuses the last basis. Other solvers solve the
+        updated model as in :meth:`solve`.
+
+        If the structure of the energy system has changed (e.g. nodes or
+        flows were added, a `nominal_value` was changed or a changed
+        attribute is part of a constraint) the model is rebuilt in place.
+        Components added to the model after it was built, e.g. additional
+        constraints, are not rebuilt.
+
+        Parameters
+        ----------
+        updates : dict
+            Attributes to change per flow as
+            `{(source, target): {attribute: value}}`.
+        solver : string
+            solver to be used e.g. "gurobi_persistent", "cbc"
+        solver_io : string
+            pyomo solver interface file format: "lp","python","nl", etc.
+        \**kwargs : keyword arguments
+            `solve_kwargs` and `cmdline_options` as in :meth:`solve`.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from oemof import solph
+        >>> es = solph.EnergySystem(
+        ...     timeindex=pd.date_range("1/1/2020", periods=2, freq="H"))
+        >>> bel = solph.Bus(label="electricity")
+        >>> source = solph.Source(label="source", outputs={
+        ...     bel: solph.Flow(nominal_value=10, variable_costs=2)})
+        >>> sink = solph.Sink(label="sink", inputs={
+        ...     bel: solph.Flow(nominal_value=5, fix=[1, 0.5])})
+        >>> es.add(bel, source, sink)
+        >>> om = solph.Model(es)
+        >>> results = om.update_and_resolve(
+        ...     {(bel, sink): {"fix": [0.4, 1]},
+        ...      (source, bel): {"variable_costs": 3}})
+        >>> om.objective()
+        21.0
+        """
+        updates = {} if updates is None else updates
+        solve_kwargs = kwargs.get("solve_kwargs", {})
+        solver_cmdline_options = kwargs.get("cmdline_options", {})
+        sequences = ("fix", "min", "max", "variable_costs")
+
+        rebuild = False
+        for (o, i), attributes in updates.items():
+            flow = self.flows[o, i]
+            for attribute, value in attributes.items():
+                rebuild = rebuild or not self._updatable(flow, attribute)
+                setattr(
+                    flow,
+                    attribute,
+                    sequence(value) if attribute in sequences else value,
+                )
+
+        if rebuild or self._structure != self._structure_signature():
+            logging.info("Structure of the energy system changed: rebuild.")
+            self._rebuild()
+            changed = None
+        else:
+            # variables which are fixed before or after the update
+            fixed = self._fixed_variables(updates.keys())
+            changed = self._update_parent_block_variables(updates.keys())
+            fixed += self._fixed_variables(updates.keys())
+            self._add_objective(update=True)
+
+        opt = self._persistent_solver
+        if solver == highs.NAME:
+            self._persistent_solver = None
+            return self.solve(solver=solver, **kwargs)
+        if opt is None or opt[0] != solver:
+            opt = SolverFactory(solver, solver_io=solver_io)
+            if not isinstance(opt, PersistentSolver):
+                self._persistent_solver = None
+                return self.solve(solver=solver, solver_io=solver_io, **kwargs)
+            opt.set_instance(self)
+            self._persistent_solver = (solver, opt, {})
+        else:
+            opt, rows = opt[1:]
+            for var in changed:
+                opt.update_var(var)
+            # persistent solvers build the values of fixed variables into
+            # the constants of the rows, so these rows are added again
+            for con in self._rows_of(fixed, rows):
+                opt.remove_constraint(con)
+                opt.add_constraint(con)
+            opt.set_objective(self.objective)
+
+        options = opt.options
+        for k in solver_cmdline_options:
+            options[k] = solver_cmdline_options[k]
+
+        with self._profiled_solver(opt):
+            solver_results = opt.solve(self, **solve_kwargs)
+
+        return self._store_solver_results(solver_results)
 
+    def _store_solver_results(self, solver_results):
+        """Check the status of the solver results and store them at the
+        model and the energy system.
+        """
         status = solver_results["Solver"][0]["Status"]
         termination_condition = solver_results["Solver"][0][
             "Termination condition"
@@ -338,34 +663,602 @@ class Model(BaseModel):
         self.flow = po.Var(self.FLOWS, self.TIMESTEPS, within=po.Reals)
 
         for (o, i) in self.FLOWS:
-            if self.flows[o, i].nominal_value is not None:
-                if self.flows[o, i].fix[self.TIMESTEPS[1]] is not None:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].value = (
-                            self.flows[o, i].fix[t]
-                            * self.flows[o, i].nominal_value
-                        )
-                        self.flow[o, i, t].fix()
-                else:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].setub(
-                            self.flows[o, i].max[t]
-                            * self.flows[o, i].nominal_value
-                        )
-
-                    if not self.flows[o, i].nonconvex:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setlb(
-                                self.flows[o, i].min[t]
-                                * self.flows[o, i].nominal_value
-                            )
-                    elif (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                        for t in self.TIMESTEPS:
-                            self.flow[o, i, t].setlb(0)
+            self._set_flow_bounds(o, i)
+
+        if self.presolve:
+            self._presolve()
+
+    def add_nodes(self, *nodes):
+        """Add nodes to the energy system and to the built model.
+
+        The nodes have to be connected to nodes of the energy system by
+        their inputs and outputs. Only the rows and variables of the new
+        nodes, their flows and their neighbours are built, see
+        :meth:`_update_structure`.
+
+        Examples
+        --------
+        >>> import pandas as pd
+        >>> from oemof import solph
+        >>> es = solph.EnergySystem(
+        ...     timeindex=pd.date_range("1/1/2020", periods=3, freq="H"))
+        >>> bel = solph.Bus(label="electricity")
+        >>> es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+        ...     nominal_value=1, fix=[1, 2, 3])}))
+        >>> om = solph.Model(es)
+        >>> om.add_nodes(solph.Source(
+        ...     label="plant", outputs={bel: solph.Flow(variable_costs=2)}))
+        >>> _ = om.solve(solver="cbc")
+        >>> om.objective()
+        12.0
+        """
+        with self._changing_structure() as changed:
+            self.es.add(*nodes)
+            for n in nodes:
+                changed.update(_neighbourhood(n))
+
+    def remove_nodes(self, *nodes):
+        """Remove nodes from the energy system and from the built model.
+
+        All flows from and to the nodes are removed from the energy system
+        graph, i.e. the nodes are disconnected from their neighbours.
+        """
+        with self._changing_structure() as changed:
+            for n in nodes:
+                changed.update(_neighbourhood(n))
+                for o in list(n.outputs):
+                    del n.outputs[o]
+                for i in list(n.inputs):
+                    del n.inputs[i]
+            removed = {id(n) for n in nodes}
+            self.es.nodes = [n for n in self.es.nodes if id(n) not in removed]
+
+    def replace_node(self, old, new):
+        """Replace a node of the built model by a new node.
+
+        The new node has to be connected to the neighbours by its own inputs
+        and outputs. The flows of the old node are removed.
+        """
+        with self._changing_structure():
+            self.remove_nodes(old)
+            self.add_nodes(new)
+
+    def add_flow(self, source, target, flow):
+        """Add a flow between two nodes of the built model. An existing flow
+        between the nodes is replaced.
+        """
+        with self._changing_structure() as changed:
+            source.outputs[target] = flow
+            changed.update((source, target))
+
+    def remove_flow(self, source, target):
+        """Remove the flow between two nodes of the built model."""
+        with self._changing_structure() as changed:
+            del source.outputs[target]
+            changed.update((source, target))
+
+    @contextmanager
+    def _changing_structure(self):
+        """Context in which the energy system graph is changed. Yields a set
+        to which the changed nodes are added. The model is updated when the
+        outermost context is left.
+        """
+        if getattr(self, "_changed_nodes", None) is not None:
+            yield self._changed_nodes
+            return
+        groups = {
+            group: list(self.es.groups.get(group) or [])
+            for group in self._constraint_groups
+        }
+        flows = dict(self.flows)
+        self._changed_nodes = set()
+        try:
+            yield self._changed_nodes
+            changed = self._changed_nodes
+        finally:
+            self._changed_nodes = None
+        self._update_structure(groups, flows, changed)
+
+    def _update_structure(self, groups, flows, changed):
+        """Update the built model after the energy system graph has changed.
+
+        Only the affected group members are updated: flow members whose
+        flow was added or removed and node members which are one of the
+        `changed` nodes. The indexed rows, variables and set elements of
+        these members are removed from the blocks and the members of the
+        current energy system are built in a temporary block of the same
+        constraint group, which is merged into the existing block (see
+        :meth:`_update_block`). Their objective terms are added to the
+        objective. So the work depends on the size of the change, not on the
+        size of the model.
+
+        The objective is summed up again if variables were removed, so it
+        does not refer to them. The model is rebuilt completely if it uses
+        presolve or typical periods or if a block can not be updated in
+        place.
+
+        Constraints added by the user, which refer to removed nodes or
+        rebuilt rows, are not updated.
+
+        Parameters
+        ----------
+        groups : dict
+            Members of every constraint group before the change.
+        flows : dict
+            Flows of the energy system before the change.
+        changed : set
+            Nodes which were added, removed or got new flows.
+        """
+        if self.presolve or self.typical_periods is not None:
+            self._rebuild()
+            return
+        self.es.regroup()
+        self._add_constraint_groups()
+        self.flows = self.es.flows()
+
+        nodes = set(self.es.nodes)
+        for n in [n for n in self.NODES if n not in nodes]:
+            self.NODES.remove(n)
+        for n in self.es.nodes:
+            if n not in self.NODES:
+                self.NODES.add(n)
+
+        removed = [k for k, f in flows.items() if self.flows.get(k) is not f]
+        added = [k for k, f in self.flows.items() if flows.get(k) is not f]
+        for k in removed:
+            for subset in (
+                self.UNIDIRECTIONAL_FLOWS,
+                self.BIDIRECTIONAL_FLOWS,
+            ):
+                if k in subset:
+                    subset.remove(k)
+            self.FLOWS.remove(k)
+            for t in self.TIMESTEPS:
+                del self.flow[k + (t,)]
+        for k in added:
+            self.FLOWS.add(k)
+            if hasattr(self.flows[k], "bidirectional"):
+                self.BIDIRECTIONAL_FLOWS.add(k)
             else:
-                if (o, i) in self.UNIDIRECTIONAL_FLOWS:
-                    for t in self.TIMESTEPS:
-                        self.flow[o, i, t].setlb(0)
+                self.UNIDIRECTIONAL_FLOWS.add(k)
+            for t in self.TIMESTEPS:
+                self.flow[k + (t,)]
+            self._set_flow_bounds(*k)
+
+        objective = []
+        rebuild_objective = bool(removed)
+        for group in self._constraint_groups:
+            old = groups.get(group, [])
+            new = list(self.es.groups.get(group) or [])
+            removed = _changed_members(old, new, changed)
+            added = _changed_members(new, old, changed)
+            if not (removed or added):
+                continue
+            block = self.component(str(group()))
+            if block is None or not old:
+                # the block is empty, so it is built for the new members
+                self.del_component(block)
+                self._add_child_block(group)
+                block = self.component(str(group()))
+                if hasattr(block, "_objective_expression"):
+                    objective.append(_objective_expression(block))
+                continue
+            rebuild_objective |= _remove_members(block, removed)
+            expr = self._update_block(block, added)
+            if expr is None:
+                logging.info(
+                    "Block {0} can not be updated: rebuild.".format(block)
+                )
+                self._rebuild()
+                return
+            objective.append(expr)
+
+        if rebuild_objective:
+            # the objective must not refer to the removed variables
+            with self._profiled(self):
+                self._add_objective(update=True)
+        else:
+            self._extend_objective(objective)
+        self._structure = self._structure_signature()
+        self._persistent_solver = None
+
+    def _update_block(self, block, added):
+        """Add the `added` members to a block.
+
+        The added members are built in a temporary block of the same class.
+        Its set elements are added to the sets of `block`, its variables are
+        created in the variables of `block` with the same name and its rows
+        and expressions are added to the ones of `block` with these
+        variables. Scalar expressions (e.g. costs) are added to the existing
+        ones, other scalar components are moved.
+
+        Returns
+        -------
+        Objective expression of the added members or None, if the temporary
+        block can not be merged, e.g. if it has an indexed component which
+        `block` does not have (yet) or an index which `block` already has.
+        """
+        if not added:
+            return 0
+
+        temp = type(block)()
+        self.add_component("_update_{0}".format(block.local_name), temp)
+        try:
+            with self._profiled(temp):
+                temp._create(group=added)
+                expr = 0
+                if hasattr(temp, "_objective_expression"):
+                    expr = _objective_expression(temp)
+            components = []
+            for component in list(temp.component_objects(descend_into=False)):
+                if isinstance(component, SetOperator) or (
+                    component.ctype is po.BuildAction
+                ):
+                    continue
+                name = component.local_name
+                existing = block.component(name)
+                if existing is None and not component.is_indexed():
+                    temp.del_component(component)
+                    block.add_component(name, component)
+                    if name in getattr(temp, "_objective_components", ()):
+                        block._objective_components.add(name)
+                elif (
+                    existing is None
+                    or existing.ctype is not component.ctype
+                    or existing.is_indexed() is not component.is_indexed()
+                    or component.ctype not in _MERGED
+                    or not (
+                        component.is_indexed()
+                        or component.ctype in (po.Set, po.Expression)
+                    )
+                ):
+                    return None
+                else:
+                    components.append((component, existing))
+
+            # the variables of the temporary block are replaced by the ones
+            # of `block` in the expressions and rows
+            substitute = {}
+            for ctype in _MERGED:
+                for component, existing in components:
+                    if component.ctype is ctype and not _merge_component(
+                        component, existing, substitute
+                    ):
+                        return None
+        finally:
+            self.del_component(temp)
+        return _substituted(expr, substitute)
+
+    def _extend_objective(self, expressions):
+        """Add the objective expressions of added group members to the
+        objective.
+        """
+        self.objective.expr = self.objective.expr + sum(expressions)
+
+    def _update_parent_block_variables(self, flows):
+        """Set the bounds of the flow variables of the given flows again from
+        their (changed) `fix`, `min`, `max` and `nominal_value`.
+        """
+        changed = []
+        for (o, i) in flows:
+            for var in self._set_flow_bounds(o, i, reset=True):
+                changed.append(var)
+        return changed
+
+    def _fixed_variables(self, flows):
+        """The fixed flow variables of the given flows."""
+        variables = self.flow._data
+        return [
+            var
+            for (o, i) in flows
+            for var in (variables[o, i, t] for t in self.TIMESTEPS)
+            if var.fixed
+        ]
+
+    def _updatable(self, flow, attribute):
+        """Variable costs only enter the objective and can be updated. The
+        bounds `fix`, `min` and `max` can be updated for flows without
+        investment and nonconvex blocks, whose constraints use them. Models
+        of typical periods are rebuilt for every change, presolved models
+        for every change of the bounds.
+        """
+        if self.typical_periods is not None:
+            return False
+        if attribute == "variable_costs":
+            return True
+        if self.presolve:
+            # changed bounds can change which flows are determined
+            return False
+        return (
+            attribute in ("fix", "min", "max")
+            and flow.investment is None
+            and not flow.nonconvex
+        )
+
+    def _presolve(self, tolerance=1e-9):
+        """Fix the flow variables which are determined by their bounds or by
+        the balance of a bus.
+
+        A flow is fixed by a bus balance if it is the only free flow of the
+        bus in a timestep and the value resulting from the balance lies
+        within its bounds. Fixing a flow can determine a flow of a
+        neighbouring bus, so the buses are checked until nothing changes.
+
+        Returns
+        -------
+        int : Number of fixed flow variables.
+        """
+        variables = self.flow._data
+        count = 0
+        for var in variables.values():
+            if not var.fixed and var.lb is not None and var.lb == var.ub:
+                var.fix(var.lb)
+                count += 1
+
+        ports = {
+            bus: [((i, bus), 1) for i in bus.inputs]
+            + [((bus, o), -1) for o in bus.outputs]
+            for bus in self.es.groups.get(blocks.Bus, [])
+        }
+        pending = set(ports)
+        while pending:
+            changed = set()
+            for bus in pending:
+                for t in self.TIMESTEPS:
+                    free = []
+                    balance = 0
+                    for (o, i), sign in ports[bus]:
+                        var = variables[o, i, t]
+                        if var.fixed:
+                            balance += sign * var.value
+                        else:
+                            free.append((var, sign, o if i is bus else i))
+                    if len(free) != 1:
+                        continue
+                    var, sign, neighbour = free[0]
+                    value = -balance * sign
+                    if (var.lb is not None and value < var.lb - tolerance) or (
+                        var.ub is not None and value > var.ub + tolerance
+                    ):
+                        continue
+                    var.fix(value)
+                    count += 1
+                    if neighbour in ports:
+                        changed.add(neighbour)
+            pending = changed
+
+        logging.info(
+            "Presolve fixed {0} of {1} flow variables.".format(
+                count, len(variables)
+            )
+        )
+        return count
+
+    def _set_flow_bounds(self, o, i, reset=False):
+        """Set the bounds of the flow variable of a flow for all timesteps.
+
+        The bounds are calculated as one array per flow and assigned in a
+        tight loop over the variable objects of that flow.
+
+        Parameters
+        ----------
+        o : oemof.network.Node
+            Source of the flow.
+        i : oemof.network.Node
+            Target of the flow.
+        reset : boolean
+            Unfix the variables and remove existing bounds first.
+
+        Returns
+        -------
+        list : The variables of the flow.
+        """
+        variables = self.flow._data
+        flow_variables = [
+            variables[o, i, t] for t in range(len(self.TIMESTEPS))
+        ]
+        if reset:
+            for var in flow_variables:
+                var.unfix()
+                var.setlb(None)
+                var.setub(None)
+
+        lower, upper, fix = self._flow_bounds(o, i)
+        if fix is not None:
+            for var, value in zip(flow_variables, fix.tolist()):
+                var.fix(value)
+            return flow_variables
+        if upper is not None:
+            for var, value in zip(flow_variables, upper.tolist()):
+                var.setub(value)
+        if lower is not None:
+            for var, value in zip(flow_variables, lower.tolist()):
+                var.setlb(value)
+        return flow_variables
+
+    def _flow_bounds(self, o, i):
+        """Calculate the bounds of the flow variable of a flow in bulk.
+
+        Parameters
+        ----------
+        o : oemof.network.Node
+            Source of the flow.
+        i : oemof.network.Node
+            Target of the flow.
+
+        Returns
+        -------
+        tuple : (lower, upper, fix)
+            Arrays of the absolute lower bounds, upper bounds and fixed values
+            for all timesteps. An entry is None if the respective bound does
+            not apply.
+        """
+        return _flow_bounds(
+            self.flows[o, i],
+            len(self.TIMESTEPS),
+            (o, i) in self.UNIDIRECTIONAL_FLOWS,
+        )
+
+
+def _flow_bounds(flow, horizon, unidirectional):
+    """Bounds of the flow variable of a flow, see `Model._flow_bounds`.
+
+    The bounds only depend on the flow, so they can be calculated without a
+    built model, e.g. to update a cached linear program.
+    """
+    lower = upper = fix = None
+    if flow.nominal_value is not None:
+        if flow.fix[0] is not None:
+            fix = sequence_to_array(flow.fix, horizon) * flow.nominal_value
+        else:
+            upper = sequence_to_array(flow.max, horizon) * flow.nominal_value
+            if not flow.nonconvex:
+                lower = (
+                    sequence_to_array(flow.min, horizon) * flow.nominal_value
+                )
+            elif unidirectional:
+                lower = np.zeros(horizon, dtype=int)
+    elif unidirectional:
+        lower = np.zeros(horizon, dtype=int)
+    return lower, upper, fix
+
+
+# types of the components which are merged into the block of a group when
+# members are added, in the order they are merged
+_MERGED = (po.Set, po.Var, po.Expression, po.Constraint)
+
+
+def _neighbourhood(node):
+    """The node and all nodes connected to it."""
+    return [node] + list(node.inputs) + list(node.outputs)
+
+
+def _member_key(member):
+    """Identity of a member of a constraint group. Flow groups contain
+    (source, target, flow) tuples, which are created again on regrouping.
+    """
+    if isinstance(member, tuple):
+        return tuple(id(m) for m in member)
+    return id(member)
+
+
+def _objective_expression(block):
+    """Objective expression of a block. The components which the block
+    created for its objective in an earlier call (e.g. named cost
+    expressions) are deleted first, so they are not replaced implicitly.
+    """
+    for name in getattr(block, "_objective_components", ()):
+        block.del_component(name)
+    components = set(block.component_map())
+    expr = block._objective_expression()
+    block._objective_components = set(block.component_map()) - components
+    return expr
+
+
+def _changed_members(members, others, nodes):
+    """Members of a constraint group which are not part of `others` or are
+    one of the `nodes`. Flow members only change with their flow.
+    """
+    keys = {_member_key(m) for m in others}
+    return [
+        m
+        for m in members
+        if _member_key(m) not in keys
+        or (not isinstance(m, tuple) and m in nodes)
+    ]
+
+
+def _remove_members(block, members):
+    """Remove the set elements, variables and rows of a block, whose index
+    refers to one of the members. An index refers to a node member if it
+    contains the node and to a flow member if it contains its source and
+    target in a row.
+
+    Returns
+    -------
+    bool : True, if variables were removed.
+    """
+    nodes = {id(m) for m in members if not isinstance(m, tuple)}
+    pairs = {(id(m[0]), id(m[1])) for m in members if isinstance(m, tuple)}
+    if not (nodes or pairs):
+        return False
+
+    def refers(index):
+        if not isinstance(index, tuple):
+            index = (index,)
+        ids = [id(i) for i in index]
+        return any(i in nodes for i in ids) or any(
+            p in pairs for p in zip(ids, ids[1:])
+        )
+
+    removed = False
+    for component in block.component_objects(descend_into=False):
+        if isinstance(component, SetOperator):
+            continue
+        if component.ctype is po.Set:
+            elements = [e for e in component if not refers(e)]
+            if len(elements) < len(component):
+                # removing single elements of an ordered set is expensive
+                component.clear()
+                component.update(elements)
+        elif component.is_indexed():
+            for index in [i for i in component.keys() if refers(i)]:
+                removed |= component.ctype is po.Var
+                del component[index]
+    return removed
+
+
+def _merge_component(source, target, substitute):
+    """Add the set elements, variables, expressions or rows of an indexed
+    component (or a scalar set or expression) to the component `target` of
+    the same type. The data objects of `target` which replace the ones of
+    `source` are added to `substitute` by the id of the replaced object.
+
+    Returns
+    -------
+    bool : False, if an index of `source` is no valid new index of `target`.
+    """
+    if source.ctype is po.Set:
+        for element in source:
+            if element not in target:
+                target.add(element)
+        return True
+    index_set = target.index_set() if target.is_indexed() else None
+    if index_set is not None and any(
+        index in target or index not in index_set for index in source.keys()
+    ):
+        return False
+    if source.ctype is po.Var:
+        for index, var in source.items():
+            new = target[index]
+            new.domain = var.domain
+            new.setlb(var.lb)
+            new.setub(var.ub)
+            new.value = var.value
+            if var.fixed:
+                new.fix()
+            substitute[id(var)] = new
+    elif not source.is_indexed():
+        # a scalar expression is part of the objective already
+        target.expr = target.expr + _substituted(source.expr, substitute)
+        substitute[id(source)] = 0
+    else:
+        for index, data in source.items():
+            target.add(index, _substituted(data.expr, substitute))
+            substitute[id(data)] = target[index]
+    return True
+
+
+def _substituted(expr, substitute):
+    """The expression with the objects of `substitute` replaced."""
+    if not substitute or expr is None:
+        return expr
+    return replace_expressions(
+        expr,
+        substitute,
+        descend_into_named_expressions=False,
+        remove_named_expressions=False,
+    )
 
 
 class MultiObjectiveModel(Model):
@@ -435,7 +1328,7 @@ class MultiObjectiveModel(Model):
 
         for block in self.component_data_objects():
             if hasattr(block, '_objective_expression'):
-                expr = block._objective_expression()
+                expr = _objective_expression(block)
                 if isinstance(expr, defaultdict):
                     for obj_key, obj_val in expr.items():
                         self.objective_functions[obj_key] += (
@@ -444,6 +1337,10 @@ class MultiObjectiveModel(Model):
                     self.objective_functions['_standard'] += (
                         sign * expr)
 
+    def _extend_objective(self, expressions):
+        """The objective functions are summed up again from all blocks."""
+        self._add_objective(update=True)
+
     def solve(self, solver='cbc', solver_io='lp', **kwargs):
         r""" Takes care of communication with solver to solve the model.
         Differentiates between single objective optimization or multi
@@ -512,7 +1409,8 @@ class MultiObjectiveModel(Model):
                 sense=po.minimize,
                 expr=self.objective_functions.get(objective, 0.0))
 
-            solver_results = opt.solve(self, **solve_kwargs)
+            with self._profiled_solver(opt):
+                solver_results = opt.solve(self, **solve_kwargs)
 
             status = solver_results["Solver"][0]["Status"]
             termination_condition = (
@@ -570,7 +1468,8 @@ class MultiObjectiveModel(Model):
             self.objective = po.Objective(sense=po.minimize, expr=expr)
 
             # solve
-            solver_results = opt.solve(self, **solve_kwargs)
+            with self._profiled_solver(opt):
+                solver_results = opt.solve(self, **solve_kwargs)
 
             status = solver_results["Solver"][0]["Status"]
             termination_condition = (
@@ -41,3 +41,13 @@ class EnergySystem(es.EnergySystem):
         kwargs["groupings"] = GROUPINGS + kwargs.get("groupings", [])
 
         super().__init__(**kwargs)
+
+    def regroup(self):
+        """Discard the groups and group all nodes again on the next access
+        of :attr:`groups`.
+
+        This is necessary if nodes have been removed or the flows of nodes
+        have been changed after the groups have been computed.
+        """
+        self._groups = {}
+        self._first_ungrouped_node_index_ = 0
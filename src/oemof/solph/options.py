@@ -127,13 +127,47 @@ class NonConvex:
         Maximum number of shutdowns.
     initial_status : numeric (0 or 1)
         Integer value indicating the status of the flow in the first time step
-        (0 = off, 1 = on). For minimum up and downtimes, the initial status
+        (0 = off, 1 = on), the number of units online for more than one
+        unit. For minimum up and downtimes, the initial status
         is set for the respective values in the edge regions e.g. if a
         minimum uptime of four timesteps is defined, the initial status is
         fixed for the four first and last timesteps of the optimization period.
         If both, up and downtimes are defined, the initial status is set for
         the maximum of both e.g. for six timesteps if a minimum downtime of
         six timesteps is defined in addition to a four timestep minimum uptime.
+        With `up_down_formulation="startup"`, the status is not fixed. The
+        flow is assumed to be in its initial status for at least the minimum
+        up or downtime before the first time step, unless `initial_uptime`
+        or `initial_downtime` are given.
+    initial_uptime : int (0 or positive integer) or None
+        Number of time steps the flow has been online before the first time
+        step, for more than one unit since the last startup of a unit. If it
+        is shorter than the minimum uptime, the status is not lower than the
+        initial status for the remaining time steps of the minimum uptime.
+        None (default) if the flow has been online for long enough.
+    initial_downtime : int (0 or positive integer) or None
+        Number of time steps the flow has been offline before the first time
+        step, for more than one unit since the last shutdown of a unit. If
+        it is shorter than the minimum downtime, the status is not higher
+        than the initial status for the remaining time steps of the minimum
+        downtime. None (default) if the flow has been offline for long
+        enough.
+    up_down_formulation : str, default: None
+        Formulation of the minimum up and downtimes, "status" for one unit
+        and "startup" for more units by default. "status" restricts the
+        sum of the status within the minimum up or downtime after every
+        change of the status. "startup" restricts the number of startups
+        (shutdowns) within the minimum uptime (downtime) before every time
+        step to the status (number of units minus the status). The startups
+        and shutdowns are linked to the status by an equation. This gives a
+        tighter linear relaxation.
+    number_of_units : int, default: 1
+        Number of identical units represented by the flow. The
+        `nominal_value` of the flow is the capacity of all units together.
+        For more than one unit, the status, startups and shutdowns are the
+        number of units online, started and shut down (integer variables
+        instead of binary ones). The minimum and maximum flow, the minimum
+        up and downtimes and the costs are applied per unit.
     positive_gradient : :obj:`dict`, default: `{'ub': None, 'costs': 0}`
         A dictionary containing the following two keys:
 
@@ -158,13 +192,18 @@ class NonConvex:
             "minimum_uptime",
             "minimum_downtime",
             "initial_status",
+            "initial_uptime",
+            "initial_downtime",
             "maximum_startups",
             "maximum_shutdowns",
+            "up_down_formulation",
+            "number_of_units",
         ]
         sequences = ["startup_costs", "shutdown_costs", "activity_costs"]
         dictionaries = ["positive_gradient", "negative_gradient"]
         defaults = {
             "initial_status": 0,
+            "number_of_units": 1,
             "positive_gradient": {"ub": None, "costs": 0},
             "negative_gradient": {"ub": None, "costs": 0},
         }
@@ -186,8 +225,61 @@ class NonConvex:
                     sequence(value) if attribute in sequences else value,
                 )
 
+        if self.up_down_formulation is None:
+            self.up_down_formulation = (
+                "status" if self.number_of_units == 1 else "startup"
+            )
+        if self.up_down_formulation not in ("status", "startup"):
+            raise ValueError(
+                "The up_down_formulation has to be 'status' or 'startup', "
+                "not '{0}'.".format(self.up_down_formulation)
+            )
+        if self.number_of_units != int(self.number_of_units) or (
+            self.number_of_units < 1
+        ):
+            raise ValueError(
+                "The number_of_units has to be a positive integer, not "
+                "{0}.".format(self.number_of_units)
+            )
+        if (
+            self.number_of_units > 1
+            and self.up_down_formulation == "status"
+            and (
+                self.minimum_uptime is not None
+                or self.minimum_downtime is not None
+            )
+        ):
+            raise ValueError(
+                "Minimum up and downtimes of more than one unit need the "
+                "up_down_formulation 'startup'."
+            )
+
+        for name in ("initial_uptime", "initial_downtime"):
+            value = getattr(self, name)
+            if value is not None and (value != int(value) or value < 0):
+                raise ValueError(
+                    "The {0} has to be a non-negative integer, not "
+                    "{1}.".format(name, value)
+                )
+
         self._max_up_down = None
 
+    @property
+    def remaining_uptime(self):
+        """Number of the first time steps in which the units online before
+        the first time step have to stay online."""
+        if self.minimum_uptime is None or self.initial_uptime is None:
+            return 0
+        return max(0, self.minimum_uptime - int(self.initial_uptime))
+
+    @property
+    def remaining_downtime(self):
+        """Number of the first time steps in which the units offline before
+        the first time step have to stay offline."""
+        if self.minimum_downtime is None or self.initial_downtime is None:
+            return 0
+        return max(0, self.minimum_downtime - int(self.initial_downtime))
+
     def _calculate_max_up_down(self):
         """
         Calculate maximum of up and downtime for direct usage in constraints.
@@ -15,11 +15,18 @@ from collections import UserList
 from collections import abc
 from itertools import repeat
 
+import numpy as np
+
 
 def sequence(iterable_or_scalar):
     """Tests if an object is iterable (except string) or scalar and returns
-    a the original sequence if object is an iterable and a 'emulated' sequence
-    object of class _Sequence if object is a scalar or string.
+    an immutable, array-backed sequence of class _ArraySequence if the object
+    is a one-dimensional iterable and a 'emulated' sequence object of class
+    _ScalarSequence if object is a scalar or string.
+
+    NumPy arrays and pandas Series are not copied, the sequence is a
+    read-only view of their values. Other iterables, e.g. dictionaries or
+    generators, are returned unchanged.
 
     Parameters
     ----------
@@ -37,20 +44,196 @@ def sequence(iterable_or_scalar):
     >>> x[10]
     10
     >>> print(x)
-    [10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10]
+    [10, 10, 10, ...]
 
     """
-    if isinstance(iterable_or_scalar, abc.Iterable) and not isinstance(
+    if isinstance(iterable_or_scalar, (_ArraySequence, _ScalarSequence)):
+        return iterable_or_scalar
+    elif isinstance(iterable_or_scalar, _Sequence):
+        return _ScalarSequence(iterable_or_scalar.default)
+    elif isinstance(iterable_or_scalar, abc.Iterable) and not isinstance(
         iterable_or_scalar, str
     ):
-        return iterable_or_scalar
+        if not isinstance(iterable_or_scalar, abc.Sized) or isinstance(
+            iterable_or_scalar, abc.Mapping
+        ):
+            return iterable_or_scalar
+        values = np.asarray(iterable_or_scalar)
+        if values.ndim != 1:
+            return iterable_or_scalar
+        return _ArraySequence(values)
     else:
-        return _Sequence(default=iterable_or_scalar)
+        return _ScalarSequence(iterable_or_scalar)
+
+
+def sequence_to_array(iterable_or_scalar, length):
+    """Returns the first `length` values of a sequence as a numpy array.
+
+    Scalar sequences (see :func:`sequence`) are broadcast in one step instead
+    of being indexed element by element.
+
+    Parameters
+    ----------
+    iterable_or_scalar : iterable or None or int or float
+        A sequence as returned by :func:`sequence` or any other iterable.
+    length : int
+        Number of values to return.
+
+    Examples
+    --------
+    >>> sequence_to_array(sequence(3), 4)
+    array([3, 3, 3, 3])
+
+    >>> sequence_to_array([0.5, 1, 2, 3], 2)
+    array([0.5, 1. ])
+
+    """
+    if isinstance(iterable_or_scalar, (_ArraySequence, _ScalarSequence)):
+        return iterable_or_scalar.to_array(length)
+    if isinstance(iterable_or_scalar, _Sequence):
+        return np.full(length, iterable_or_scalar.default)
+    values = np.asarray(iterable_or_scalar)
+    if len(values) < length:
+        raise IndexError(
+            "Sequence of length {0} is shorter than the required length "
+            "of {1}.".format(len(values), length)
+        )
+    return values[:length]
+
+
+class _ArraySequence(abc.Sequence):
+    """Immutable sequence backed by a one-dimensional numpy array.
+
+    Single values are returned as Python objects, slices are views of the
+    same array.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values of the sequence. The array is not copied but a read-only
+        view of it is used.
+
+    Examples
+    --------
+    >>> s = _ArraySequence(np.array([1.5, 2.5, 3.5]))
+    >>> s[1]
+    2.5
+    >>> s[1:]
+    [2.5, 3.5]
+    >>> len(s)
+    3
+    >>> s[1] = 3
+    Traceback (most recent call last):
+    ...
+    TypeError: '_ArraySequence' object does not support item assignment
+    """
+
+    def __init__(self, values):
+        values = values.view()
+        values.flags.writeable = False
+        self._values = values
+
+    @property
+    def values(self):
+        """Read-only numpy array of the values."""
+        return self._values
+
+    def __getitem__(self, key):
+        try:
+            return self._values.item(key)
+        except TypeError:
+            return _ArraySequence(self._values[key])
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values.tolist())
+
+    def __array__(self, dtype=None):
+        return np.asarray(self._values, dtype=dtype)
+
+    def __eq__(self, other):
+        if isinstance(other, _ScalarSequence):
+            return False
+        try:
+            return len(self) == len(other) and all(
+                a == b for a, b in zip(self, other)
+            )
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return str(self._values.tolist())
+
+    def to_array(self, length):
+        """Return the first `length` values as a read-only numpy array."""
+        if len(self._values) < length:
+            raise IndexError(
+                "Sequence of length {0} is shorter than the required length "
+                "of {1}.".format(len(self._values), length)
+            )
+        return self._values[:length]
+
+
+class _ScalarSequence:
+    """Emulates an immutable sequence with the same value at every index.
+
+    The sequence has no length, every index returns the value.
+
+    Parameters
+    ----------
+    default :
+        The value of the sequence.
+
+    Examples
+    --------
+    >>> s = _ScalarSequence(42)
+    >>> s[1]
+    42
+    >>> s[8760]
+    42
+    >>> len(s)
+    0
+    >>> s
+    [42, 42, 42, ...]
+    """
+
+    def __init__(self, default):
+        self.default = default
+
+    def __getitem__(self, key):
+        return self.default
+
+    def __len__(self):
+        return 0
+
+    def __iter__(self):
+        return iter(())
+
+    def __eq__(self, other):
+        if isinstance(other, (_ScalarSequence, _Sequence)):
+            return self.default == other.default
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "[{0}, {0}, {0}, ...]".format(repr(self.default))
+
+    def to_array(self, length):
+        """Return the value repeated `length` times as a numpy array."""
+        return np.full(length, self.default)
 
 
 class _Sequence(UserList):
     """Emulates a list whose length is not known in advance.
 
+    Replaced by :class:`_ScalarSequence`, kept to restore energy systems
+    dumped with older versions.
+
     Parameters
     ----------
     source:
@@ -15,14 +15,20 @@ SPDX-License-Identifier: MIT
 """
 
 import sys
+from contextlib import nullcontext
 from itertools import groupby
+from itertools import islice
+from operator import attrgetter
 
+import numpy as np
 import pandas as pd
 from oemof.network.network import Node
 from pyomo.core.base.piecewise import IndexedPiecewise
 from pyomo.core.base.var import Var
 
 from oemof.solph.helpers import flatten
+from oemof.solph.plumbing import _ScalarSequence
+from oemof.solph.plumbing import _Sequence
 
 
 def get_tuple(x):
@@ -83,9 +89,7 @@ def create_dataframe(om):
     )
     var_dict = {}
     for bv in block_vars:
-        # Drop the auxiliary variables introduced by pyomo's Piecewise
-        parent_component = bv.parent_block().parent_component()
-        if not isinstance(parent_component, IndexedPiecewise):
+        if not _is_auxiliary(bv):
             for i in getattr(bv, "_index"):
                 key = (str(bv).split(".")[0], str(bv).split(".")[-1], i)
                 value = bv[i].value
@@ -112,15 +116,331 @@ def create_dataframe(om):
     return df
 
 
-def results(om):
+def _is_auxiliary(bv):
+    """Whether a variable component is an auxiliary variable, which is not
+    part of the results: a variable introduced by pyomo's Piecewise or
+    listed in the `AUXILIARY_VARIABLES` of its block."""
+    block = bv.parent_block()
+    if isinstance(block.parent_component(), IndexedPiecewise):
+        return True
+    return bv.local_name in getattr(block, "AUXILIARY_VARIABLES", ())
+
+
+class _UnsupportedStructure(Exception):
+    """Raised if the variables of a model cannot be extracted as arrays."""
+
+
+def _component_arrays(bv, chunk_size=None):
     """
-    Create a result dictionary from the result DataFrame.
+    Read the values of a variable component into arrays per oemof tuple.
 
-    Results from Pyomo are written into a dictionary of pandas objects where
-    a Series holds all scalar values and a dataframe all sequences for nodes
-    and flows.
-    The dictionary is keyed by the nodes e.g. `results[idx]['scalars']`
-    and flows e.g. `results[n, n]['sequences']`.
+    The index of the component is split into the oemof tuple and the
+    timestep in the same way as :func:`create_dataframe` does it for every
+    single index, but column wise for the whole component.
+
+    Parameters
+    ----------
+    bv : pyomo.core.base.var.IndexedVar
+        The variable component.
+    chunk_size : int or None
+        If given, the index is read in chunks of this length, so only the
+        arrays of one chunk and of one oemof tuple are held at the same time.
+        The entries of an oemof tuple have to be consecutive in the index, as
+        for index sets like `FLOWS * TIMESTEPS`.
+
+    Yields
+    ------
+    tuple : (oemof_tuple, variable_name, timesteps, values)
+
+    Raises
+    ------
+    _UnsupportedStructure
+        If the index of a variable cannot be split column wise, e.g. because
+        its entries have different types, or if the entries of an oemof tuple
+        are not consecutive when reading chunks.
+    """
+    if _is_auxiliary(bv):
+        return
+    data = bv._data
+    block_name = str(bv).split(".")[0]
+    variable_name = str(bv).split(".")[-1]
+    size = chunk_size or len(data)
+    indices = iter(data)
+    variables = iter(data.values())
+    pending = None
+    done = set()
+    while True:
+        index = list(islice(indices, size))
+        if not index:
+            break
+        values = np.array(
+            list(map(attrgetter("value"), islice(variables, size))),
+            dtype=float,
+        )
+        codes, keys, timesteps = _index_codes(index, block_name, variable_name)
+        # the last oemof tuple of the chunk can continue in the next one
+        last = keys[codes[-1]]
+        groups = {
+            key: (t, v)
+            for key, t, v in _grouped_arrays(codes, keys, timesteps, values)
+        }
+        if pending is not None:
+            key, t, v = pending
+            if key in groups:
+                t = np.concatenate((t, groups[key][0]))
+                v = np.concatenate((v, groups[key][1]))
+            groups[key] = (t, v)
+            pending = None
+        for key, (t, v) in groups.items():
+            if key in done:
+                raise _UnsupportedStructure(variable_name)
+            if key == last:
+                pending = (key, t, v)
+            else:
+                done.add(key)
+                yield key, variable_name, t, v
+    if pending is not None:
+        key, t, v = pending
+        yield key, variable_name, t, v
+
+
+def _index_codes(index, block_name, variable_name):
+    """
+    Split the index of a variable component into oemof tuples and timesteps.
+
+    Returns
+    -------
+    tuple : (codes, keys, timesteps)
+        The number of the oemof tuple of every entry, the oemof tuples and
+        the timestep of every entry.
+    """
+    if isinstance(index[0], tuple):
+        if len(set(map(len, index))) != 1:
+            raise _UnsupportedStructure(variable_name)
+        columns = list(zip(*index))
+        is_node = [_all_nodes(c) for c in columns]
+        if all(is_node):
+            codes, keys = _factorize(columns)
+            timesteps = np.zeros(len(index), dtype=int)
+        elif all(is_node[:-1]):
+            codes, keys = _factorize(columns[:-1])
+            timesteps = _timesteps(columns[-1])
+        else:
+            raise _UnsupportedStructure(variable_name)
+    elif _all_nodes(index):
+        codes, keys = _factorize([index])
+        timesteps = np.zeros(len(index), dtype=int)
+    else:
+        codes = np.zeros(len(index), dtype=int)
+        keys = [(block_name, variable_name)]
+        timesteps = _timesteps(index)
+
+    if timesteps is None:
+        raise _UnsupportedStructure(variable_name)
+    return codes, keys, timesteps
+
+
+def _grouped_arrays(codes, keys, timesteps, values):
+    """Split the timesteps and values by oemof tuple. Empty decision
+    variables are dropped.
+
+    Yields
+    ------
+    tuple : (oemof_tuple, timesteps, values)
+    """
+    valid = ~np.isnan(values)
+    codes, timesteps, values = codes[valid], timesteps[valid], values[valid]
+
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(keys) + 1))
+    for number, key in enumerate(keys):
+        positions = order[bounds[number] : bounds[number + 1]]
+        if len(positions) > 0:
+            yield key, timesteps[positions], values[positions]
+
+
+def _variable_arrays(om):
+    """
+    Read the values of all variables into arrays per oemof tuple.
+
+    Returns
+    -------
+    dict : `{oemof_tuple: {variable_name: (timesteps, values)}}`
+
+    Raises
+    ------
+    _UnsupportedStructure
+        See :func:`_component_arrays`. Also raised if two variable
+        components with the same name share an oemof tuple.
+    """
+    arrays = {}
+    for bv in om.component_objects(Var, descend_into=True):
+        for key, name, timesteps, values in _component_arrays(bv):
+            variables = arrays.setdefault(key, {})
+            if name in variables:
+                raise _UnsupportedStructure(name)
+            variables[name] = (timesteps, values)
+    return arrays
+
+
+def _all_nodes(column):
+    return all(issubclass(t, Node) for t in set(map(type, column)))
+
+
+def _timesteps(column):
+    """Timesteps of an index column as array or None if they are not
+    integers."""
+    if not set(map(type, column)) <= {int}:
+        return None
+    return np.fromiter(column, dtype=np.int64, count=len(column))
+
+
+def _factorize(columns):
+    """
+    Group the rows of index columns by the identity of their entries.
+
+    Returns
+    -------
+    tuple : (codes, keys)
+        The number of the group of every row and the tuple of entries of
+        every group.
+    """
+    ids = np.array(
+        [
+            np.fromiter(map(id, c), dtype=np.uint64, count=len(c))
+            for c in columns
+        ]
+    ).T
+    _, first, codes = np.unique(
+        ids, axis=0, return_index=True, return_inverse=True
+    )
+    keys = [tuple(c[f] for c in columns) for f in first]
+    return codes.ravel(), keys
+
+
+def _results_from_arrays(om):
+    """
+    Create the result dictionary of :func:`results` from the arrays of
+    :func:`_variable_arrays`.
+
+    Raises
+    ------
+    _UnsupportedStructure
+        If the timesteps of an oemof tuple do not match the time index, so
+        that the result cannot be created.
+    """
+    arrays = _variable_arrays(om)
+    timeindex = om.es.timeindex
+    try:
+        keys = sorted(arrays)
+    except TypeError:
+        keys = list(arrays)
+
+    return {
+        k if len(k) > 1 else (k[0], None): _result_entry(arrays[k], timeindex)
+        for k in keys
+    }
+
+
+def _result_entry(variables, timeindex):
+    """
+    Create the scalars and sequences of one oemof tuple.
+
+    Parameters
+    ----------
+    variables : dict
+        `{variable_name: (timesteps, values)}` of the oemof tuple.
+    timeindex : pandas.Index
+        Time index of the energy system.
+
+    Returns
+    -------
+    dict : `{"scalars": pandas.Series, "sequences": pandas.DataFrame}`
+
+    Raises
+    ------
+    _UnsupportedStructure
+        If the timesteps do not match the time index.
+    """
+    names = sorted(variables)
+    steps = np.unique(np.concatenate([variables[n][0] for n in names]))
+    if len(steps) != len(timeindex):
+        raise _UnsupportedStructure(names)
+    table = np.full((len(steps), len(names)), np.nan)
+    for column, name in enumerate(names):
+        timesteps, values = variables[name]
+        table[np.searchsorted(steps, timesteps), column] = values
+    df = pd.DataFrame(
+        table,
+        index=timeindex,
+        columns=pd.Index(names, name="variable_name"),
+    )
+    condition = df.isnull().any()
+    scalars = df.loc[:, condition].dropna()
+    if len(scalars) == 0:
+        raise _UnsupportedStructure(names)
+    return {"scalars": scalars.iloc[0], "sequences": df.loc[:, ~condition]}
+
+
+def _results_from_typical_periods(om):
+    """
+    Create the result dictionary of :func:`results` for the original time
+    index of a model built for typical periods.
+
+    The sequences of the typical periods are repeated for every period they
+    represent. Blocks with a `_disaggregated_arrays` method replace the
+    arrays of variables which depend on the sequence of the periods, e.g.
+    the storage content.
+
+    Raises
+    ------
+    ValueError
+        If the variables cannot be extracted as arrays.
+    """
+    periods = om.typical_periods
+    try:
+        arrays = _variable_arrays(om)
+    except _UnsupportedStructure as e:
+        raise ValueError(
+            "The variable {0} cannot be disaggregated to the original "
+            "time index.".format(e)
+        )
+
+    disaggregated = {}
+    for block in om.component_data_objects():
+        if hasattr(block, "_disaggregated_arrays"):
+            disaggregated.update(block._disaggregated_arrays(arrays, periods))
+
+    length = periods.n_typical_periods * periods.period_length
+    steps = periods.timestep_map
+    for key, variables in arrays.items():
+        for name, (timesteps, values) in variables.items():
+            if len(timesteps) > 1:
+                sequence = np.full(length, np.nan)
+                sequence[timesteps] = values
+                variables[name] = (np.arange(len(steps)), sequence[steps])
+        variables.update(disaggregated.pop(key, {}))
+    arrays.update(disaggregated)
+
+    try:
+        return {
+            k
+            if len(k) > 1
+            else (k[0], None): _result_entry(arrays[k], om.es.timeindex)
+            for k in arrays
+            if arrays[k]
+        }
+    except _UnsupportedStructure as e:
+        raise ValueError(
+            "The variables {0} cannot be disaggregated to the original "
+            "time index.".format(e)
+        )
+
+
+def _results_from_dataframe(om):
+    """
+    Create the result dictionary of :func:`results` from the DataFrame of
+    :func:`create_dataframe`.
     """
     df = create_dataframe(om)
 
@@ -161,11 +481,56 @@ def results(om):
             )
             raise IndexError(error_message)
 
+    return result
+
+
+def results(om):
+    """
+    Create a result dictionary from the optimization data.
+
+    Results from Pyomo are written into a dictionary of pandas objects where
+    a Series holds all scalar values and a dataframe all sequences for nodes
+    and flows.
+    The dictionary is keyed by the nodes e.g. `results[idx]['scalars']`
+    and flows e.g. `results[n, n]['sequences']`.
+
+    The values of the variables are read per variable component into arrays.
+    If the structure of a variable does not allow that, the result is created
+    element wise from :func:`create_dataframe`.
+
+    The results of a model built for typical periods (see
+    :mod:`oemof.solph.aggregation`) are returned for the original time index.
+    The duals of the bus balances are divided by the number of periods a
+    typical period represents.
+
+    If the model is profiled, the time and memory used are recorded in the
+    "results" phase of its profile.
+    """
+    profile = getattr(om, "profile", None)
+    with nullcontext() if profile is None else profile.measure("results"):
+        return _results(om)
+
+
+def _results(om):
+    periods = getattr(om, "typical_periods", None)
+    if periods is not None:
+        result = _results_from_typical_periods(om)
+    else:
+        try:
+            result = _results_from_arrays(om)
+        except _UnsupportedStructure:
+            result = _results_from_dataframe(om)
+
     # add dual variables for bus constraints
     if om.dual is not None:
         grouped = groupby(sorted(om.Bus.balance.iterkeys()), lambda p: p[0])
         for bus, timesteps in grouped:
             duals = [om.dual[om.Bus.balance[bus, t]] for _, t in timesteps]
+            if periods is not None:
+                steps = periods.timestep_map
+                duals = (
+                    np.array(duals)[steps] / periods.timestep_weights[steps]
+                )
             df = pd.DataFrame({"duals": duals}, index=om.es.timeindex)
             if (bus, None) not in result.keys():
                 result[(bus, None)] = {
@@ -220,23 +585,29 @@ def meta_results(om, undefined=False):
     -------
     dict
     """
-    meta_res = {"objective": om.objective()}
+    return _meta_results(om.es.results, om.objective(), undefined)
+
+
+def _meta_results(solver_results, objective, undefined=False):
+    """The meta results of :func:`meta_results` from the pyomo solver
+    results and the objective value."""
+    meta_res = {"objective": objective}
 
     for k1 in ["Problem", "Solver"]:
         k1 = k1.lower()
         meta_res[k1] = {}
-        for k2, v2 in om.es.results[k1][0].items():
+        for k2, v2 in solver_results[k1][0].items():
             try:
-                if str(om.es.results[k1][0][k2]) == "<undefined>":
+                if str(solver_results[k1][0][k2]) == "<undefined>":
                     if undefined:
-                        meta_res[k1][k2] = str(om.es.results[k1][0][k2])
+                        meta_res[k1][k2] = str(solver_results[k1][0][k2])
                 else:
-                    meta_res[k1][k2] = om.es.results[k1][0][k2]
+                    meta_res[k1][k2] = solver_results[k1][0][k2]
             except TypeError:
                 if undefined:
                     msg = "Cannot fetch meta results of type {0}"
                     meta_res[k1][k2] = msg.format(
-                        type(om.es.results[k1][0][k2])
+                        type(solver_results[k1][0][k2])
                     )
 
     return meta_res
@@ -342,12 +713,11 @@ def __separate_attrs(system, get_flows=False, exclude_none=True):
                 com["scalars"][ckey] = value
                 del com["sequences"][ckey]
             else:
-                try:
-                    if not value.default_changed:
-                        com["scalars"][ckey] = value.default
-                        del com["sequences"][ckey]
-                except AttributeError:
-                    pass
+                if isinstance(value, _ScalarSequence) or (
+                    isinstance(value, _Sequence) and not value.default_changed
+                ):
+                    com["scalars"][ckey] = value.default
+                    del com["sequences"][ckey]
 
     def remove_nones(com):
         for ckey, value in list(com["scalars"].items()):
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""Profiling of building, solving and processing a model.
+
+A :class:`Profile` records the wall time, the number of variables and
+constraints and the peak memory used to build every block of a model and
+every named set, variable and constraint of these blocks. Writing the problem
+file, the solver run, reading the solution and the creation of the results
+dictionary are recorded separately.
+
+The memory is traced with :mod:`tracemalloc`, which slows down building the
+model considerably. It is only measured with Python 3.9 or newer.
+
+SPDX-License-Identifier: MIT
+
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+from pyomo.core.base.block import Block
+from pyomo.core.base.block import _BlockData
+from pyomo.core.base.constraint import Constraint
+from pyomo.core.base.var import Var
+
+COLUMNS = (
+    "phase",
+    "block",
+    "component",
+    "time",
+    "variables",
+    "constraints",
+    "memory",
+)
+
+SOLVER_STEPS = (
+    ("_presolve", "write"),
+    ("_apply_solver", "solve"),
+    ("_postsolve", "postsolve"),
+)
+
+
+class Profile:
+    """
+    Time and memory used to build, solve and process a model.
+
+    Every measurement is one record with the `phase` ("build", "write",
+    "solve", "postsolve" or "results"), the name of the `block` and the
+    `component` it belongs to, the wall `time` in seconds, the number of
+    `variables` and `constraints` and the peak `memory` in bytes allocated
+    during the measurement. The records of the components of a block are
+    part of the record of the block (`component` is None).
+
+    Parameters
+    ----------
+    memory : boolean
+        Trace the memory with :mod:`tracemalloc`.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=3, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Sink(label="sink", inputs={bel: solph.Flow()}))
+    >>> om = solph.Model(es, profile=True)
+    >>> report = om.profile.to_dataframe()
+    >>> report.loc[report["component"] == "flow", "variables"].item()
+    3
+    >>> blocks = report.loc[report["component"].isnull()]
+    >>> print(blocks[["block", "variables", "constraints"]].to_string(
+    ...     index=False))
+             block  variables  constraints
+               Bus          0            3
+       Transformer          0            0
+    InvestmentFlow          0            0
+              Flow          0            0
+     NonConvexFlow          0            0
+    """
+
+    def __init__(self, memory=True):
+        self.records = []
+        self.memory = memory and hasattr(tracemalloc, "reset_peak")
+        self._stack = []
+        self._started_tracing = False
+
+    @contextmanager
+    def measure(self, phase, block=None, component=None):
+        """Measure the time and memory used inside the context.
+
+        Yields the record, so the number of variables and constraints can
+        be set within the context.
+        """
+        record = dict.fromkeys(COLUMNS)
+        record.update(phase=phase, block=block, component=component)
+        self.records.append(record)
+        self._start_memory()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["time"] = time.perf_counter() - start
+            record["memory"] = self._stop_memory()
+
+    @contextmanager
+    def components(self, block, phase="build"):
+        """Measure every component added to `block` inside the context.
+
+        The number of variables and constraints of each component is
+        counted when the context is left, because constraints are often
+        added to an existing component, e.g. by a `BuildAction`.
+        """
+        profile = self
+        records = []
+        add_component = _BlockData.add_component
+
+        def measured_add_component(blk, name, val):
+            if blk is not block:
+                return add_component(blk, name, val)
+            with profile.measure(phase, str(block), name) as record:
+                records.append(record)
+                return add_component(blk, name, val)
+
+        _BlockData.add_component = measured_add_component
+        try:
+            yield
+        finally:
+            _BlockData.add_component = add_component
+            for record in records:
+                component = block.component(record["component"])
+                if component is not None:
+                    record.update(_count(component))
+
+    @contextmanager
+    def block(self, block, phase="build"):
+        """Measure building `block` and every component added to it inside
+        the context.
+        """
+        with self.measure(phase, str(block)) as record:
+            with self.components(block, phase):
+                yield
+        record.update(_count(block))
+
+    @contextmanager
+    def solver(self, opt):
+        """Measure writing the problem, the solver run and reading the
+        solution, while `opt` solves a model inside the context.
+        """
+        for method, phase in SOLVER_STEPS:
+            setattr(opt, method, self._measured(getattr(opt, method), phase))
+        try:
+            yield
+        finally:
+            for method, _ in SOLVER_STEPS:
+                delattr(opt, method)
+
+    def _measured(self, method, phase):
+        def measured(*args, **kwargs):
+            with self.measure(phase):
+                return method(*args, **kwargs)
+
+        return measured
+
+    def _start_memory(self):
+        if not self.memory:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack:
+            # keep the peak of the enclosing measurement before resetting it
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        tracemalloc.reset_peak()
+        self._stack.append([current, current])
+
+    def _stop_memory(self):
+        if not self.memory:
+            return None
+        start, peak = self._stack.pop()
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        elif self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return peak - start
+
+    def to_dict(self):
+        """Return the records and the total time of every phase.
+
+        The total time of the "build" phase is the time of the records
+        without a component, so nested records are not counted twice.
+        """
+        total = {}
+        for record in self.records:
+            if record["phase"] == "build" and record["component"]:
+                continue
+            total[record["phase"]] = (
+                total.get(record["phase"], 0) + record["time"]
+            )
+        return {
+            "records": [dict(record) for record in self.records],
+            "total": total,
+        }
+
+    def to_dataframe(self):
+        """Return the records as a DataFrame with one row per record."""
+        df = pd.DataFrame(self.records, columns=list(COLUMNS))
+        return df.astype(
+            {"variables": "Int64", "constraints": "Int64", "memory": "Int64"}
+        )
+
+    def to_json(self, path=None):
+        """Return the report of :meth:`to_dict` as JSON string or write it
+        to the file `path`.
+        """
+        if path is None:
+            return json.dumps(self.to_dict(), indent=2)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def _count(component):
+    """Number of variables and constraints of a component or a block."""
+    if component.ctype is Block:
+        return {
+            "variables": sum(1 for _ in component.component_data_objects(Var)),
+            "constraints": sum(
+                1 for _ in component.component_data_objects(Constraint)
+            ),
+        }
+    if component.ctype is Var:
+        return {"variables": len(component), "constraints": 0}
+    if component.ctype is Constraint:
+        return {"variables": 0, "constraints": len(component)}
+    return {"variables": 0, "constraints": 0}
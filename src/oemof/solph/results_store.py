@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+"""Export of results to Parquet or HDF5 files and lazy reading of them.
+
+The values of the variables are written with one partition per node or flow
+and per variable. The variable components are read in chunks, so only the
+values of one chunk and one partition are held in memory in addition to the
+model, not the results of a whole component (e.g. of all flows). The
+reader creates the
+`scalars` and `sequences` of a node or flow only when they are accessed and
+can be used with the functions of :mod:`oemof.solph.views`.
+
+Writing Parquet files requires `pyarrow` (or `fastparquet`), writing HDF5
+files requires `tables`.
+
+SPDX-License-Identifier: MIT
+
+"""
+import json
+import os
+import warnings
+from collections.abc import Mapping
+from itertools import groupby
+
+import numpy as np
+import pandas as pd
+from pyomo.core.base.var import Var
+
+from oemof.solph.processing import _component_arrays
+from oemof.solph.processing import _result_entry
+from oemof.solph.processing import _UnsupportedStructure
+
+FILE_FORMATS = ("parquet", "hdf5")
+
+# number of values of a variable component read at once
+_CHUNK_SIZE = 65536
+
+
+def write_results(om, path, file_format="parquet"):
+    """
+    Write the results of a solved model to Parquet or HDF5 files.
+
+    Parameters
+    ----------
+    om : oemof.solph.Model
+        A solved model.
+    path : str
+        Directory for the Parquet files or name of the HDF5 file.
+    file_format : str
+        "parquet" or "hdf5"
+
+    Examples
+    --------
+    The results can be read with :class:`ResultsStore`:
+
+    >>> write_results(om, "results")  # doctest: +SKIP
+    >>> results = ResultsStore("results", om.es)  # doctest: +SKIP
+    >>> views.node(results, "electricity")  # doctest: +SKIP
+    """
+    store = _store(path, file_format, mode="w")
+    numbers = {}
+    written = set()
+    catalog = []
+
+    def add(key, name, timesteps, values, dual=False):
+        number = numbers.setdefault(key, len(numbers))
+        partition = "{0}/{1}".format(number, name)
+        if partition in written:
+            raise ValueError(
+                "Variables with the same name {0} share the oemof tuple "
+                "{1}.".format(name, key)
+            )
+        written.add(partition)
+        store.write(
+            partition, pd.DataFrame({"timestep": timesteps, "value": values})
+        )
+        catalog.append(
+            {
+                "source": str(key[0]),
+                "target": None if len(key) == 1 else str(key[1]),
+                "variable": name,
+                "partition": partition,
+                "dual": dual,
+            }
+        )
+
+    try:
+        for bv in om.component_objects(Var, descend_into=True):
+            try:
+                for key, name, timesteps, values in _component_arrays(
+                    bv, chunk_size=_CHUNK_SIZE
+                ):
+                    add(key, name, timesteps, values)
+            except _UnsupportedStructure:
+                raise ValueError(
+                    "The index of the variable {0} cannot be "
+                    "exported.".format(bv.name)
+                )
+
+        # add dual variables for bus constraints
+        if om.dual is not None:
+            grouped = groupby(
+                sorted(om.Bus.balance.iterkeys()), lambda p: p[0]
+            )
+            for bus, timesteps in grouped:
+                timesteps = np.array([t for _, t in timesteps])
+                duals = [om.dual[om.Bus.balance[bus, t]] for t in timesteps]
+                add((bus,), "duals", timesteps, duals, dual=True)
+
+        timeindex = pd.Index(om.es.timeindex)
+        store.write("timeindex", pd.DataFrame({"timeindex": timeindex}))
+        store.write("catalog", pd.DataFrame(catalog))
+        store.write_meta(
+            {
+                "freq": getattr(timeindex, "freqstr", None),
+                "name": timeindex.name,
+            }
+        )
+    finally:
+        store.close()
+
+
+class ResultsStore(Mapping):
+    """
+    Results written by :func:`write_results`, read lazily.
+
+    The store behaves like the dictionary of
+    :func:`oemof.solph.processing.results`, but the `scalars` and
+    `sequences` of a node or flow are read from the files when they are
+    accessed.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the Parquet files or name of the HDF5 file.
+    energysystem : EnergySystem object (optional)
+        If given, the keys are the nodes of the energy system, otherwise
+        the labels of the nodes as in
+        :func:`oemof.solph.processing.convert_keys_to_strings`.
+    file_format : str (optional)
+        "parquet" or "hdf5". Detected from the path by default.
+    """
+
+    def __init__(self, path, energysystem=None, file_format=None):
+        if file_format is None:
+            file_format = "parquet" if os.path.isdir(path) else "hdf5"
+        self._store = _store(path, file_format, mode="r")
+
+        meta = self._store.read_meta()
+        timeindex = pd.Index(self._store.read("timeindex")["timeindex"])
+        if meta["freq"] is not None:
+            timeindex = pd.DatetimeIndex(timeindex, freq=meta["freq"])
+        timeindex.name = meta["name"]
+        self.timeindex = timeindex
+
+        nodes = {}
+        if energysystem is not None:
+            nodes = {str(n.label): n for n in energysystem.nodes}
+
+        catalog = self._store.read("catalog")
+        self._entries = {}
+        for row in catalog.itertuples(index=False):
+            source = nodes.get(row.source, row.source)
+            if row.target is None or pd.isnull(row.target):
+                key = (source, None)
+            else:
+                key = (source, nodes.get(row.target, row.target))
+            self._entries.setdefault(key, []).append(
+                (row.variable, row.partition, row.dual)
+            )
+
+    def __getitem__(self, key):
+        if key not in self._entries:
+            raise KeyError(key)
+        return _LazyEntry(self, self._entries[key])
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _read(self, partitions):
+        """Create the scalars and sequences from the given partitions."""
+        variables = {}
+        duals = None
+        for name, partition, dual in partitions:
+            df = self._store.read(partition)
+            if dual:
+                duals = df["value"].values
+            else:
+                variables[name] = (df["timestep"].values, df["value"].values)
+
+        if variables:
+            try:
+                entry = _result_entry(variables, self.timeindex)
+            except _UnsupportedStructure:
+                raise ValueError(
+                    "The variables {0} do not match the time index.".format(
+                        sorted(variables)
+                    )
+                )
+            if duals is not None:
+                entry["sequences"]["duals"] = duals
+        else:
+            entry = {
+                "sequences": pd.DataFrame(
+                    {"duals": duals}, index=self.timeindex
+                ),
+                "scalars": pd.Series(dtype=float),
+            }
+        return entry
+
+
+class _LazyEntry(Mapping):
+    """The `scalars` and `sequences` of a node or flow, read on access."""
+
+    def __init__(self, store, partitions):
+        self._store = store
+        self._partitions = partitions
+        self._data = None
+
+    def __getitem__(self, key):
+        if self._data is None:
+            self._data = self._store._read(self._partitions)
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(("scalars", "sequences"))
+
+    def __len__(self):
+        return 2
+
+
+def _store(path, file_format, mode):
+    if file_format == "parquet":
+        return _ParquetFiles(path, mode)
+    elif file_format == "hdf5":
+        return _HDFFile(path, mode)
+    raise ValueError(
+        "Unknown file format {0}. Use one of {1}.".format(
+            file_format, FILE_FORMATS
+        )
+    )
+
+
+class _ParquetFiles:
+    """One Parquet file per partition in a directory."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        if mode == "w":
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, partition):
+        return os.path.join(self.path, partition + ".parquet")
+
+    def write(self, partition, df):
+        filename = self._file(partition)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        df.to_parquet(filename, index=False)
+
+    def read(self, partition):
+        return pd.read_parquet(self._file(partition))
+
+    def write_meta(self, meta):
+        with open(os.path.join(self.path, "meta.json"), "w") as f:
+            json.dump(meta, f)
+
+    def read_meta(self):
+        with open(os.path.join(self.path, "meta.json")) as f:
+            return json.load(f)
+
+    def close(self):
+        pass
+
+
+class _HDFFile:
+    """One node of a HDF5 file per partition."""
+
+    def __init__(self, path, mode):
+        self.path = path
+        self.store = pd.HDFStore(path, mode="w") if mode == "w" else None
+
+    @staticmethod
+    def _key(partition):
+        # the names of HDF5 nodes must not start with a digit
+        return "/p" + partition if partition[0].isdigit() else partition
+
+    def write(self, partition, df):
+        with warnings.catch_warnings():
+            # the catalog contains None, which is pickled
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            self.store.put(self._key(partition), df)
+
+    def read(self, partition):
+        return pd.read_hdf(self.path, key=self._key(partition))
+
+    def write_meta(self, meta):
+        self.store.get_storer("catalog").attrs.meta = json.dumps(meta)
+
+    def read_meta(self):
+        with pd.HDFStore(self.path, mode="r") as store:
+            return json.loads(store.get_storer("catalog").attrs.meta)
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
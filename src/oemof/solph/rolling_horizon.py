@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+
+"""Rolling horizon optimization of energy systems.
+
+The time horizon of an energy system is split into windows which are
+optimised one after another. The state of storages and nonconvex flows at the
+end of a window is passed to the next window as its initial state.
+
+SPDX-License-Identifier: MIT
+
+"""
+import logging
+from contextlib import contextmanager
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+
+from oemof.solph.components.generic_storage import GenericStorage
+from oemof.solph.models import Model
+from oemof.solph.plumbing import _ArraySequence
+from oemof.solph.plumbing import _ScalarSequence
+from oemof.solph.plumbing import _Sequence
+from oemof.solph.processing import convert_keys_to_strings
+
+
+class RollingHorizon:
+    r"""Optimise an energy system in consecutive, overlapping time windows.
+
+    Every window is built as a separate model for `window + overlap`
+    timesteps, but only the results of the first `window` timesteps are kept.
+    The storage content and the status of nonconvex flows at the end of the
+    kept timesteps are the initial state of the next window.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+        The energy system to optimise. All time dependent attributes have to
+        cover the whole time index of the energy system.
+    window : int
+        Number of timesteps kept per window.
+    overlap : int
+        Number of additional timesteps to look ahead in every window. Their
+        results are discarded.
+    model : class
+        Model class used for the windows. Defaults to :class:`Model`.
+    \**kwargs : keyword arguments
+        Passed to the model class. A sequence of `timeincrement` is sliced to
+        the windows.
+
+    Notes
+    -----
+    Time dependent attributes are the sequences (see
+    :func:`~oemof.solph.plumbing.sequence`) of the nodes, their flows and
+    nonconvex options (also inside of dictionaries like the
+    `conversion_factors`) which are at least as long as the time index. They
+    are sliced to the window while it is built. Other lists, e.g. the
+    breakpoints of a `PiecewiseLinearTransformer` or attributes which are not
+    converted to sequences, are not sliced.
+
+    In every window, the storages are not balanced. For storages which are
+    balanced in the energy system, the storage content at the end of the
+    last window is fixed to the initial storage content of the first window.
+
+    The status of nonconvex flows is fixed to their initial status for the
+    first and last timesteps of a model if minimum up or downtimes are
+    defined. The overlap should therefore be at least as long as these times.
+    With `NonConvex(up_down_formulation="startup")` the status is not fixed.
+    The up and downtime at the end of a window are passed to the next window
+    as `initial_uptime` and `initial_downtime`, so the units keep their
+    status until their minimum up or downtime is reached.
+
+    Investment optimisation is not possible with a rolling horizon.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=6, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Source(label="source", outputs={
+    ...     bel: solph.Flow(variable_costs=[1, 2, 4, 4, 1, 1])}))
+    >>> es.add(solph.Sink(label="sink", inputs={
+    ...     bel: solph.Flow(nominal_value=1, fix=1)}))
+    >>> es.add(solph.GenericStorage(
+    ...     label="storage", nominal_storage_capacity=2,
+    ...     initial_storage_level=0, inputs={bel: solph.Flow()},
+    ...     outputs={bel: solph.Flow(variable_costs=0.1)}))
+    >>> rolling = solph.RollingHorizon(es, window=2, overlap=2)
+    >>> rolling.windows()
+    [(0, 2, 4), (2, 4, 6), (4, 6, 6)]
+    >>> results = rolling.solve(solver="cbc")
+    >>> storage = es.groups["storage"]
+    >>> list(results[storage, None]["sequences"]["storage_content"])
+    [2.0, 2.0, 1.0, 0.0, 0.0, 0.0]
+    >>> [round(objective, 1) for objective in rolling.objectives]
+    [5.2, 2.2, 2.0]
+    """
+
+    def __init__(self, energysystem, window, overlap=0, model=Model, **kwargs):
+        if window < 1 or overlap < 0:
+            raise ValueError(
+                "The window has to have at least one timestep and the "
+                "overlap must not be negative."
+            )
+        self.es = energysystem
+        self.window = window
+        self.overlap = overlap
+        self.model = model
+        self.kwargs = kwargs
+        self.objectives = []
+
+    def windows(self):
+        """Positions of the windows in the time index.
+
+        Returns
+        -------
+        list : [(start, stop, end)]
+            The results of the timesteps `start` to `stop` are kept, the
+            model of the window covers the timesteps `start` to `end`.
+        """
+        horizon = len(self.es.timeindex)
+        return [
+            (
+                start,
+                min(start + self.window, horizon),
+                min(start + self.window + self.overlap, horizon),
+            )
+            for start in range(0, horizon, self.window)
+        ]
+
+    def solve(self, solver="cbc", solver_io="lp", **kwargs):
+        r"""Solve all windows one after another.
+
+        Parameters
+        ----------
+        solver : string
+            solver to be used e.g. "glpk","gurobi","cplex"
+        solver_io : string
+            pyomo solver interface file format: "lp","python","nl", etc.
+        \**kwargs : keyword arguments
+            Passed to :meth:`Model.solve` of every window.
+
+        Returns
+        -------
+        dict : The results of all windows in the format of
+            :func:`oemof.solph.processing.results`.
+        """
+        storages = [n for n in self.es.nodes if isinstance(n, GenericStorage)]
+        nonconvex = [
+            f.nonconvex for f in self.es.flows().values() if f.nonconvex
+        ]
+        self._check_investment(storages)
+
+        initial = {
+            **{s: (s.initial_storage_level, s.balanced) for s in storages},
+            **{
+                n: (n.initial_status, n.initial_uptime, n.initial_downtime)
+                for n in nonconvex
+            },
+        }
+        self.objectives = []
+        window_results = []
+        try:
+            for s in storages:
+                s.balanced = False
+            windows = self.windows()
+            for number, (start, stop, end) in enumerate(windows):
+                logging.info(
+                    "Rolling horizon: window {0} of {1}.".format(
+                        number + 1, len(windows)
+                    )
+                )
+                pinned = {}
+                if end == len(self.es.timeindex):
+                    pinned = self._terminal_storage_levels(
+                        storages, initial, window_results
+                    )
+                with time_slice(self.es, start, end, pinned):
+                    om = self.model(self.es, **self._window_kwargs(start, end))
+                    om.solve(solver=solver, solver_io=solver_io, **kwargs)
+                    result = om.results()
+                self.objectives.append(om.objective())
+                window_results.append(_truncate(result, stop - start))
+
+                last = stop - start - 1
+                for s in storages:
+                    content = result[s, None]["sequences"]["storage_content"]
+                    s.initial_storage_level = (
+                        content.iloc[last] / s.nominal_storage_capacity
+                    )
+                for (o, i), f in self.es.flows().items():
+                    if f.nonconvex:
+                        status = result[o, i]["sequences"]["status"]
+                        _carry_status(
+                            f.nonconvex,
+                            [int(round(s)) for s in status.iloc[: last + 1]],
+                        )
+        finally:
+            for s in storages:
+                s.initial_storage_level, s.balanced = initial[s]
+            for n in nonconvex:
+                (
+                    n.initial_status,
+                    n.initial_uptime,
+                    n.initial_downtime,
+                ) = initial[n]
+
+        return _stitch(window_results, self.es.timeindex)
+
+    def _window_kwargs(self, start, end):
+        """Model arguments with the `timeincrement` sliced to the window."""
+        kwargs = dict(self.kwargs)
+        if _is_time_series(
+            kwargs.get("timeincrement"), len(self.es.timeindex)
+        ):
+            kwargs["timeincrement"] = _slice(
+                kwargs["timeincrement"], start, end
+            )
+        return kwargs
+
+    def _check_investment(self, storages):
+        if any(f.investment for f in self.es.flows().values()) or any(
+            s.investment for s in storages
+        ):
+            raise ValueError(
+                "Investment optimisation is not possible with a rolling "
+                "horizon."
+            )
+
+    @staticmethod
+    def _terminal_storage_levels(storages, initial, window_results):
+        """Storage levels at the end of the last window of balanced
+        storages: the initial storage level of the first window."""
+        pinned = {}
+        for s in storages:
+            level, balanced = initial[s]
+            if not balanced:
+                continue
+            if level is None:
+                if window_results:
+                    first = window_results[0][s, None]["scalars"]
+                    level = first["init_content"] / s.nominal_storage_capacity
+                else:
+                    # the only window is balanced itself
+                    s.balanced = True
+                    continue
+            pinned[s] = level
+        return pinned
+
+
+def _carry_status(nonconvex, status):
+    """Set the initial status, uptime and downtime of a nonconvex option to
+    the state at the end of the status of the kept timesteps of a window."""
+    nonconvex.initial_uptime = _duration(
+        status, nonconvex.initial_status, nonconvex.initial_uptime, 1
+    )
+    nonconvex.initial_downtime = _duration(
+        status, nonconvex.initial_status, nonconvex.initial_downtime, -1
+    )
+    nonconvex.initial_status = status[-1]
+
+
+def _duration(status, initial_status, initial_duration, sign):
+    """Number of timesteps since the last startup (`sign` 1) or shutdown
+    (`sign` -1) at the end of the status. Without a startup (shutdown) the
+    timesteps are added to the duration before the status, which stays None
+    if it was long enough."""
+    previous = [initial_status] + status[:-1]
+    for k in reversed(range(len(status))):
+        if (status[k] - previous[k]) * sign > 0:
+            return len(status) - k
+    if initial_duration is None:
+        return None
+    return initial_duration + len(status)
+
+
+@contextmanager
+def time_slice(energysystem, start, end, storage_levels=None):
+    """Temporarily restrict an energy system to the timesteps `start` to
+    `end`.
+
+    The time index, the time increment and all sequences of the nodes, flows
+    and nonconvex options are replaced by their slices and restored
+    afterwards.
+
+    Parameters
+    ----------
+    energysystem : EnergySystem object
+    start : int
+        Position of the first timestep in the time index.
+    end : int
+        Position after the last timestep in the time index.
+    storage_levels : dict
+        Relative storage levels `{storage: level}` to which the storage
+        content of the last timestep of the slice is fixed.
+    """
+    horizon = len(energysystem.timeindex)
+    replaced = []
+
+    def replace(obj, name, value):
+        replaced.append((obj, name, getattr(obj, name)))
+        setattr(obj, name, value)
+
+    sliced = _time_series_replacements(
+        energysystem, lambda v: _slice(v, start, end)
+    )
+
+    try:
+        for obj, name, value in sliced:
+            replace(obj, name, value)
+        for storage, level in (storage_levels or {}).items():
+            for name in ("min_storage_level", "max_storage_level"):
+                levels = np.array(
+                    [getattr(storage, name)[t] for t in range(end - start)],
+                    dtype=float,
+                )
+                levels[-1] = level
+                replace(storage, name, levels)
+        replace(energysystem, "timeindex", energysystem.timeindex[start:end])
+        if _is_time_series(energysystem.timeincrement, horizon):
+            replace(
+                energysystem,
+                "timeincrement",
+                _slice(energysystem.timeincrement, start, end),
+            )
+        yield energysystem
+    finally:
+        for obj, name, value in reversed(replaced):
+            setattr(obj, name, value)
+
+
+def time_series(energysystem):
+    """Iterate over all time dependent sequences of the nodes, flows and
+    nonconvex options of an energy system.
+
+    Sequences in dictionaries, e.g. the conversion factors of a
+    transformer, are yielded with their key.
+
+    Examples
+    --------
+    >>> import pandas as pd
+    >>> from oemof import solph
+    >>> es = solph.EnergySystem(
+    ...     timeindex=pd.date_range("1/1/2020", periods=2, freq="H"))
+    >>> bel = solph.Bus(label="electricity")
+    >>> es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow(
+    ...     nominal_value=1, fix=[1, 2], variable_costs=3)}))
+    >>> [(name, key, list(values)) for _, name, key, values in
+    ...     time_series(es)]
+    [('fix', None, [1, 2])]
+
+    Yields
+    ------
+    tuple : `(object, attribute name, key, sequence)`
+        The key is None if the attribute itself is the sequence.
+    """
+    horizon = len(energysystem.timeindex)
+    objects = list(energysystem.nodes)
+    for flow in energysystem.flows().values():
+        objects.append(flow)
+        if flow.nonconvex:
+            objects.append(flow.nonconvex)
+
+    for obj in objects:
+        for name, value in vars(obj).items():
+            if _is_sequence(value, horizon):
+                yield obj, name, None, value
+            elif isinstance(value, dict):
+                for key, v in value.items():
+                    if _is_sequence(v, horizon):
+                        yield obj, name, key, v
+
+
+def _time_series_replacements(energysystem, function):
+    """Apply `function` to all time dependent sequences of the nodes,
+    flows and nonconvex options of an energy system (see
+    :func:`time_series`).
+
+    Returns
+    -------
+    list : `(object, attribute name, new value)` of every time dependent
+        attribute. Dictionaries are replaced by a copy with the new values.
+    """
+    replacements = {}
+    for obj, name, key, value in time_series(energysystem):
+        if key is None:
+            replacements[id(obj), name] = (obj, name, function(value))
+            continue
+        if (id(obj), name) not in replacements:
+            copy = type(getattr(obj, name))(getattr(obj, name))
+            replacements[id(obj), name] = (obj, name, copy)
+        replacements[id(obj), name][2][key] = function(value)
+    return list(replacements.values())
+
+
+def solve_scenarios(
+    scenarios, window, overlap=0, processes=None, solver="cbc", **kwargs
+):
+    r"""Optimise independent scenarios with a rolling horizon in parallel.
+
+    The windows of a scenario depend on each other and are solved one after
+    another. The scenarios are distributed over a pool of processes.
+
+    Energy systems cannot be sent to other processes, so every scenario is
+    given as a function which creates its energy system. It has to be
+    defined at the top level of a module (or be a `functools.partial` of
+    such a function) to be passed to the processes.
+
+    Parameters
+    ----------
+    scenarios : dict
+        Functions without arguments which return the energy system of a
+        scenario, keyed by the name of the scenario.
+    window : int
+        Number of timesteps kept per window.
+    overlap : int
+        Number of additional timesteps to look ahead in every window.
+    processes : int or None
+        Number of processes. If None, the number of CPUs is used. With one
+        process the scenarios are solved in the current process.
+    solver : string
+        solver to be used e.g. "glpk","gurobi","cplex"
+    \**kwargs : keyword arguments
+        Passed to :meth:`RollingHorizon.solve`.
+
+    Returns
+    -------
+    dict : The results of every scenario keyed by its name. The keys of the
+        results are converted to strings, because the nodes are copies
+        if they were solved in another process.
+    """
+    tasks = [
+        (name, create, window, overlap, solver, kwargs)
+        for name, create in scenarios.items()
+    ]
+    if processes == 1:
+        return dict(map(_solve_scenario, tasks))
+    with Pool(processes) as pool:
+        return dict(pool.map(_solve_scenario, tasks))
+
+
+def _solve_scenario(task):
+    name, create, window, overlap, solver, kwargs = task
+    results = RollingHorizon(create(), window, overlap).solve(
+        solver=solver, **kwargs
+    )
+    return name, convert_keys_to_strings(results)
+
+
+def _is_sequence(value, horizon):
+    """Check if an attribute is a sequence with a value per timestep of the
+    given horizon.
+
+    Scalars wrapped by :func:`oemof.solph.plumbing.sequence` are the same for
+    every timestep. Lists and arrays which are not wrapped are no sequences.
+    """
+    return isinstance(value, _ArraySequence) and len(value) >= horizon
+
+
+def _is_time_series(value, horizon):
+    """Check if a value, e.g. the `timeincrement`, has a value per timestep
+    of the given horizon."""
+    if isinstance(value, (str, bytes, tuple, _ScalarSequence, _Sequence)):
+        return False
+    return (
+        isinstance(value, (list, np.ndarray, pd.Series, _ArraySequence))
+        and len(value) >= horizon
+    )
+
+
+def _slice(value, start, end):
+    if isinstance(value, pd.Series):
+        return value.iloc[start:end]
+    return value[start:end]
+
+
+def _truncate(result, length):
+    """Keep the first `length` timesteps of the sequences of the results."""
+    return {
+        k: {"scalars": v["scalars"], "sequences": v["sequences"].iloc[:length]}
+        for k, v in result.items()
+    }
+
+
+def _stitch(window_results, timeindex):
+    """Join the results of consecutive windows.
+
+    The sequences are concatenated, the scalars are taken from the first
+    window.
+    """
+    keys = window_results[0].keys()
+    stitched = {}
+    for k in keys:
+        sequences = pd.concat(
+            [r[k]["sequences"] for r in window_results if k in r]
+        )
+        sequences.index = timeindex[: len(sequences)]
+        stitched[k] = {
+            "scalars": window_results[0][k]["scalars"],
+            "sequences": sequences,
+        }
+    return stitched
@@ -21,10 +21,83 @@ from nose.tools import eq_
 from oemof.network.network import Node
 
 from oemof import solph
+from oemof.solph.matrix import LinearProgram
 
 logging.disable(logging.INFO)
 
 
+def read_lp_file(filename):
+    """Read an LP file into a canonical form, that allows to compare the
+    content of LP files written in a different order.
+
+    Rows without variables and the auxiliary variable `ONE_VAR_CONSTANT` are
+    dropped. Equations are scaled so that their first coefficient is
+    positive.
+    """
+
+    def number(text):
+        return float("{0:.10g}".format(float(text)))
+
+    def term(line):
+        coef, var = line.split()
+        return var, number(coef)
+
+    with open(filename) as f:
+        lines = [ln.strip() for ln in f.readlines()]
+
+    objective = {}
+    rows = {}
+    bounds = {}
+    types = {"binary": set(), "general": set()}
+
+    n = lines.index("objective:") + 1
+    while lines[n]:
+        var, coef = term(lines[n])
+        if var != "ONE_VAR_CONSTANT":
+            objective[var] = coef
+        n += 1
+
+    n = lines.index("s.t.") + 1
+    while lines[n] != "bounds":
+        if not lines[n].endswith(":"):
+            n += 1
+            continue
+        name = lines[n][:-1]
+        n += 1
+        terms = {}
+        while lines[n].startswith(("+", "-")):
+            var, coef = term(lines[n])
+            if var != "ONE_VAR_CONSTANT":
+                terms[var] = coef
+            n += 1
+        if lines[n].startswith("ONE_VAR_CONSTANT"):
+            n += 1
+            continue
+        sense, rhs = lines[n].split()
+        rhs = number(rhs)
+        if terms and sense == "=" and terms[min(terms)] < 0:
+            terms = {v: -c for v, c in terms.items()}
+            rhs = -rhs
+        if terms:
+            rows[name] = (terms, sense, rhs + 0)
+        n += 1
+
+    n += 1
+    section = None
+    for line in lines[n:]:
+        if line in ("binary", "general"):
+            section = line
+        elif line == "end":
+            break
+        elif section is None and line:
+            lower, _, var, _, upper = line.split()
+            bounds[var] = (number(lower), number(upper))
+        elif line:
+            types[section].add(line)
+
+    return objective, rows, bounds, types
+
+
 class TestsConstraint:
     @classmethod
     def setup_class(cls):
@@ -48,7 +121,9 @@ class TestsConstraint:
             self.energysystem, timeindex=self.energysystem.timeindex
         )
 
-    def compare_lp_files(self, filename, ignored=None, my_om=None):
+    def compare_lp_files(
+        self, filename, ignored=None, my_om=None, matrix=True
+    ):
         r"""Compare lp-files to check constraints generated within solph.
 
         An lp-file is being generated automatically when the tests are
@@ -56,6 +131,12 @@ class TestsConstraint:
         transfer the content from the one that has been created automatically
         into this one afterwards. Please ensure that the content is being
         checked carefully. Otherwise, errors are included within the code base.
+
+        The lp-file written from the
+        :class:`~oemof.solph.matrix.LinearProgram` of the model is compared
+        with the same approved file unless `matrix` is False (models with
+        quadratic terms). Without `my_om` the program assembled directly
+        from the energy system is compared as well.
         """
         if my_om is None:
             om = self.get_om()
@@ -140,6 +221,31 @@ class TestsConstraint:
                     ),
                 )
 
+        if matrix:
+            matrix_filename = ospath.join(
+                self.tmppath, filename.replace(".lp", "") + "_matrix_tmp.lp"
+            )
+            programs = [LinearProgram.from_model(om)]
+            if my_om is None:
+                programs.append(
+                    LinearProgram.from_energysystem(
+                        self.energysystem,
+                        timeindex=self.energysystem.timeindex,
+                    )
+                )
+            expected = read_lp_file(expected_file.name)
+            for lp in programs:
+                lp.write_lp(matrix_filename)
+                generated = read_lp_file(matrix_filename)
+                for part, exp, gen in zip(
+                    ["objective", "rows", "bounds", "types"],
+                    expected,
+                    generated,
+                ):
+                    assert gen == exp, "Failed matching {0} of {1}".format(
+                        part, filename
+                    )
+
     def test_linear_transformer(self):
         """Constraint test of a Transformer without Investment."""
         bgas = solph.Bus(label="gas")
@@ -488,6 +594,45 @@ class TestsConstraint:
 
         self.compare_lp_files("storage_invest_1_fixed_losses.lp")
 
+    def test_storage_time_dependent_parameters(self):
+        """The balances are built from arrays of the time dependent
+        parameters of a storage with and without investment."""
+        bel = solph.Bus(label="electricityBus")
+
+        parameters = dict(
+            loss_rate=[0.13, 0.02, 0],
+            fixed_losses_relative=[0.01, 0, 0.03],
+            fixed_losses_absolute=[3, 0.5, 0],
+            max_storage_level=[0.9, 0, 1],
+            min_storage_level=[0.1, 0, 0.2],
+            inflow_conversion_factor=[0.97, 0.9, 1],
+            outflow_conversion_factor=[0.86, 1, 0.93],
+        )
+        solph.components.GenericStorage(
+            label="storage_no_invest",
+            inputs={bel: solph.Flow(nominal_value=16667)},
+            outputs={bel: solph.Flow(nominal_value=16667)},
+            nominal_storage_capacity=1e5,
+            initial_storage_level=0.4,
+            **parameters,
+        )
+        solph.components.GenericStorage(
+            label="storage_invest",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            invest_relation_input_capacity=1 / 6,
+            invest_relation_output_capacity=1 / 6,
+            investment=solph.Investment(ep_costs=145, existing=100),
+            **parameters,
+        )
+        om = solph.Model(
+            self.energysystem,
+            timeindex=self.energysystem.timeindex,
+            timeincrement=[1, 0.5, 2],
+        )
+
+        self.compare_lp_files("storage_time_dependent.lp", my_om=om)
+
     def test_transformer(self):
         """Constraint test of a LinearN1Transformer without Investment."""
         bgas = solph.Bus(label="gasBus")
@@ -507,6 +652,60 @@ class TestsConstraint:
 
         self.compare_lp_files("transformer.lp")
 
+    def test_transformer_compact(self):
+        """Constraint test of a Transformer with the compact relation."""
+        bgas = solph.Bus(label="gasBus")
+        bbms = solph.Bus(label="biomassBus")
+        bel = solph.Bus(label="electricityBus")
+        bth = solph.Bus(label="thermalBus")
+
+        solph.Transformer(
+            label="powerplantGasCoal",
+            inputs={bbms: solph.Flow(), bgas: solph.Flow()},
+            outputs={
+                bel: solph.Flow(variable_costs=50),
+                bth: solph.Flow(nominal_value=5e10, variable_costs=20),
+            },
+            conversion_factors={bgas: 0.4, bbms: 0.1, bel: 0.3, bth: 0.5},
+        )
+
+        om = solph.Model(
+            self.energysystem,
+            timeindex=self.energysystem.timeindex,
+            compact_transformer_relation=True,
+        )
+        self.compare_lp_files("transformer_compact.lp", my_om=om)
+
+    def test_transformer_compact_zero_factors(self):
+        """Constraint test of a Transformer with the compact relation and
+        inputs with conversion factors of zero."""
+        bgas = solph.Bus(label="gasBus")
+        bbms = solph.Bus(label="biomassBus")
+        bel = solph.Bus(label="electricityBus")
+        bth = solph.Bus(label="thermalBus")
+
+        solph.Transformer(
+            label="powerplantGasCoal",
+            inputs={bbms: solph.Flow(), bgas: solph.Flow()},
+            outputs={
+                bel: solph.Flow(variable_costs=50),
+                bth: solph.Flow(nominal_value=5e10, variable_costs=20),
+            },
+            conversion_factors={
+                bgas: [0.4, 0.4, 0],
+                bbms: [0.1, 0, 0],
+                bel: 0.3,
+                bth: 0.5,
+            },
+        )
+
+        om = solph.Model(
+            self.energysystem,
+            timeindex=self.energysystem.timeindex,
+            compact_transformer_relation=True,
+        )
+        self.compare_lp_files("transformer_compact_zero_factors.lp", my_om=om)
+
     def test_transformer_invest(self):
         """Constraint test of a LinearN1Transformer with Investment."""
 
@@ -872,7 +1071,9 @@ class TestsConstraint:
             },
         )
 
-        self.compare_lp_files("source_with_nonconvex_gradient.lp")
+        self.compare_lp_files(
+            "source_with_nonconvex_gradient.lp", matrix=False
+        )
 
     def test_nonconvex_positive_gradient_error(self):
         """Testing nonconvex positive gradient error."""
@@ -951,6 +1152,52 @@ class TestsConstraint:
         )
         self.compare_lp_files("min_max_runtime.lp")
 
+    def test_min_max_runtime_startup(self):
+        """Testing min and max runtimes with startups and shutdowns."""
+        bus_t = solph.Bus(label="Bus_T")
+        solph.Source(
+            label="cheap_plant_min_down_constraints",
+            outputs={
+                bus_t: solph.Flow(
+                    nominal_value=10,
+                    min=0.5,
+                    max=1.0,
+                    variable_costs=10,
+                    nonconvex=solph.NonConvex(
+                        minimum_downtime=4,
+                        minimum_uptime=2,
+                        initial_status=1,
+                        startup_costs=5,
+                        up_down_formulation="startup",
+                    ),
+                )
+            },
+        )
+        self.compare_lp_files("min_max_runtime_startup.lp")
+
+    def test_nonconvex_units(self):
+        """Testing nonconvex flows representing several identical units."""
+        bus_t = solph.Bus(label="Bus_T")
+        solph.Source(
+            label="engines",
+            outputs={
+                bus_t: solph.Flow(
+                    nominal_value=30,
+                    min=0.4,
+                    max=1.0,
+                    variable_costs=10,
+                    nonconvex=solph.NonConvex(
+                        number_of_units=3,
+                        minimum_uptime=2,
+                        minimum_downtime=2,
+                        initial_status=1,
+                        startup_costs=5,
+                    ),
+                )
+            },
+        )
+        self.compare_lp_files("nonconvex_units.lp")
+
     def test_activity_costs(self):
         """Testing activity_costs attribute for nonconvex flows."""
         bus_t = solph.Bus(label="Bus_C")
@@ -996,6 +1243,39 @@ class TestsConstraint:
         )
         self.compare_lp_files("piecewise_linear_transformer_dcc.lp")
 
+    def test_piecewise_linear_transformer_native(self):
+        """Testing PiecewiseLinearTransformer using the native formulation
+        with a convex conversion function."""
+        bgas = solph.Bus(label="gasBus")
+        bel = solph.Bus(label="electricityBus")
+        solph.custom.PiecewiseLinearTransformer(
+            label="pwltf",
+            inputs={bgas: solph.Flow(nominal_value=100, variable_costs=1)},
+            outputs={bel: solph.Flow()},
+            in_breakpoints=[0, 25, 50, 75, 100],
+            conversion_function=lambda x: x ** 2,
+            pw_repn="native",
+        )
+        self.compare_lp_files("piecewise_linear_transformer_native.lp")
+
+    def test_piecewise_linear_transformer_native_concave(self):
+        """Testing PiecewiseLinearTransformer using the native formulation
+        with a concave conversion function and without binary variables."""
+        bgas = solph.Bus(label="gasBus")
+        bel = solph.Bus(label="electricityBus")
+        solph.custom.PiecewiseLinearTransformer(
+            label="pwltf",
+            inputs={bgas: solph.Flow(nominal_value=100, variable_costs=1)},
+            outputs={bel: solph.Flow()},
+            in_breakpoints=[0, 25, 50, 75, 100],
+            conversion_function=lambda x: 0.5 * x - x ** 2 / 1000,
+            pw_repn="native",
+            force_binary=False,
+        )
+        self.compare_lp_files(
+            "piecewise_linear_transformer_native_concave.lp"
+        )
+
     def test_maximum_startups(self):
         """Testing maximum_startups attribute for nonconvex flows."""
         bus_t = solph.Bus(label="Bus_C")
@@ -1133,6 +1413,54 @@ class TestsConstraint:
         )
         self.compare_lp_files("dsm_module_DIW_invest.lp")
 
+    def test_dsm_module_DIW_compact(self):
+        """Constraint test of SinkDSM with approach=DIW and compact=True"""
+
+        b_elec = solph.Bus(label="bus_elec")
+        solph.custom.SinkDSM(
+            label="demand_dsm",
+            inputs={b_elec: solph.Flow()},
+            demand=[1] * 3,
+            capacity_up=[0.5] * 3,
+            capacity_down=[0.5] * 3,
+            approach="DIW",
+            max_demand=1,
+            max_capacity_up=1,
+            max_capacity_down=1,
+            delay_time=1,
+            cost_dsm_down_shift=2,
+            efficiency=0.9,
+            recovery_time_shift=2,
+            recovery_time_shed=2,
+            shed_time=1,
+            compact=True,
+        )
+        self.compare_lp_files("dsm_module_DIW_compact.lp")
+
+    def test_dsm_module_DIW_compact_invest(self):
+        """Constraint test of SinkDSM with approach=DIW, compact=True and
+        investments"""
+
+        b_elec = solph.Bus(label="bus_elec")
+        solph.custom.SinkDSM(
+            label="demand_dsm",
+            inputs={b_elec: solph.Flow()},
+            demand=[1] * 3,
+            capacity_up=[0.5] * 3,
+            capacity_down=[0.5] * 3,
+            approach="DIW",
+            flex_share_up=1,
+            flex_share_down=1,
+            delay_time=1,
+            cost_dsm_down_shift=2,
+            shed_eligibility=False,
+            compact=True,
+            investment=solph.Investment(
+                ep_costs=100, existing=50, minimum=33, maximum=100
+            ),
+        )
+        self.compare_lp_files("dsm_module_DIW_compact_invest.lp")
+
     def test_dsm_module_DLR_invest(self):
         """Constraint test of SinkDSM with approach=DLR and investments"""
 
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -
+
+"""Tests of the time series aggregation to typical periods.
+
+SPDX-License-Identifier: MIT
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph import aggregation
+from oemof.solph import processing
+
+DEMAND = [1, 0.8, 0.6, 0.9, 1, 0.8, 0.6, 0.9, 0.3, 0.2, 0.3, 0.4]
+PV = [0, 0.5, 1, 0.2, 0, 0.5, 1, 0.2, 0, 0.1, 0.2, 0]
+
+
+def create_energy_system(loss_rate=0.0, investment=False):
+    timeindex = pd.date_range("1/1/2020", periods=len(DEMAND), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    es.add(
+        solph.Source(
+            label="pv", outputs={bel: solph.Flow(nominal_value=10, fix=PV)}
+        )
+    )
+    es.add(
+        solph.Source(
+            label="plant",
+            outputs={bel: solph.Flow(nominal_value=10, variable_costs=10)},
+        )
+    )
+    es.add(
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=6, fix=DEMAND)},
+        )
+    )
+    es.add(solph.Sink(label="excess", inputs={bel: solph.Flow()}))
+    if investment:
+        parameters = {
+            "investment": solph.Investment(ep_costs=1, maximum=20),
+            "invest_relation_input_capacity": 1 / 2,
+            "invest_relation_output_capacity": 1 / 2,
+        }
+        inputs = {bel: solph.Flow(investment=solph.Investment())}
+        outputs = {bel: solph.Flow(investment=solph.Investment())}
+    else:
+        parameters = {"nominal_storage_capacity": 8}
+        inputs = {bel: solph.Flow(nominal_value=4)}
+        outputs = {bel: solph.Flow(nominal_value=4)}
+    es.add(
+        solph.GenericStorage(
+            label="storage",
+            initial_storage_level=0.5,
+            max_storage_level=0.9,
+            loss_rate=loss_rate,
+            inputs=inputs,
+            outputs=outputs,
+            **parameters,
+        )
+    )
+    return es
+
+
+def assert_storage_balance(results, es, capacity, loss_rate):
+    bus = es.groups["electricity"]
+    storage = es.groups["storage"]
+    content = results[storage, None]["sequences"]["storage_content"]
+    storage_in = results[bus, storage]["sequences"]["flow"]
+    storage_out = results[storage, bus]["sequences"]["flow"]
+    assert (content.index == es.timeindex).all()
+    assert (content >= -1e-9).all()
+    assert (content <= capacity * 0.9 + 1e-9).all()
+    previous = capacity / 2
+    for t in range(len(content)):
+        assert content.iloc[t] == pytest.approx(
+            previous * (1 - loss_rate)
+            + storage_in.iloc[t]
+            - storage_out.iloc[t]
+        )
+        previous = content.iloc[t]
+    assert content.iloc[-1] == pytest.approx(capacity / 2)
+
+
+def test_typical_periods():
+    periods = aggregation.TypicalPeriods([0, 1, 1, 0], period_length=2)
+    assert list(periods.weights) == [2, 2]
+    assert list(periods.timestep_weights) == [2, 2, 2, 2]
+    assert list(periods.timestep_map) == [0, 1, 2, 3, 2, 3, 0, 1]
+    assert list(periods.aggregate([1, 2, 3, 4, 5, 6, 7, 8])) == [4, 5, 4, 5]
+    with pytest.raises(ValueError, match="needs an original period"):
+        aggregation.TypicalPeriods([0, 2], period_length=2)
+
+    medoids = aggregation.TypicalPeriods([0, 1, 1, 0], 2, medoids=[3, 1])
+    assert list(medoids.aggregate([1, 2, 3, 4, 5, 6, 7, 8])) == [7, 8, 3, 4]
+
+
+@pytest.mark.parametrize("method", aggregation.METHODS)
+def test_cluster(method):
+    es = create_energy_system()
+    periods = aggregation.cluster(
+        es, period_length=4, n_typical_periods=2, method=method, seed=1
+    )
+    # the first two days are equal
+    assert list(periods.order) == [0, 0, 1]
+    if method == "kmedoids":
+        assert list(periods.medoids) == [0, 2]
+
+
+def test_cluster_checks_arguments():
+    es = create_energy_system()
+    with pytest.raises(ValueError, match="multiple of the period length"):
+        aggregation.cluster(es, period_length=5, n_typical_periods=2)
+    with pytest.raises(ValueError, match="between 1 and"):
+        aggregation.cluster(es, period_length=4, n_typical_periods=4)
+    with pytest.raises(ValueError, match="Unknown method"):
+        aggregation.cluster(es, 4, 2, method="spectral")
+
+
+def test_applied_restores_energy_system():
+    es = create_energy_system()
+    flow = es.groups["demand"].inputs[es.groups["electricity"]]
+    fix = flow.fix
+    periods = aggregation.TypicalPeriods([0, 0, 1], period_length=4)
+    with periods.applied(es):
+        assert len(es.timeindex) == 8
+        assert list(flow.fix) == DEMAND[:4] + DEMAND[8:]
+    assert flow.fix is fix
+    assert len(es.timeindex) == 12
+
+
+@pytest.mark.parametrize("investment", [False, True])
+def test_one_typical_period_per_period_equals_full_model(investment):
+    es = create_energy_system(investment=investment)
+    om = solph.Model(es)
+    om.solve(solver="cbc")
+    objective = om.objective()
+
+    es = create_energy_system(investment=investment)
+    periods = aggregation.TypicalPeriods([0, 1, 2], period_length=4)
+    om = solph.Model(es, typical_periods=periods)
+    om.solve(solver="cbc")
+    results = om.results()
+
+    assert len(om.TIMESTEPS) == 12
+    assert om.objective() == pytest.approx(objective)
+    if investment:
+        capacity = results[es.groups["storage"], None]["scalars"]["invest"]
+    else:
+        capacity = 8
+    assert_storage_balance(results, es, capacity=capacity, loss_rate=0)
+
+
+def test_aggregated_model():
+    es = create_energy_system(loss_rate=0.01)
+    periods = aggregation.TypicalPeriods([0, 0, 1], period_length=4)
+    om = solph.Model(es, typical_periods=periods)
+    om.receive_duals()
+    om.solve(solver="cbc")
+    results = processing.results(om)
+
+    assert len(om.TIMESTEPS) == 8
+    bus = es.groups["electricity"]
+    plant = results[es.groups["plant"], bus]["sequences"]["flow"]
+    assert (plant.index == es.timeindex).all()
+    assert om.objective() == pytest.approx(plant.sum() * 10)
+    # the first two periods are represented by the same typical period
+    assert list(plant.iloc[:4]) == list(plant.iloc[4:8])
+
+    assert_storage_balance(results, es, capacity=8, loss_rate=0.01)
+
+    duals = results[bus, None]["sequences"]["duals"]
+    assert len(duals) == 12
+    assert np.isfinite(duals).all()
+
+
+def test_updates_rebuild_the_aggregated_model():
+    es = create_energy_system()
+    periods = aggregation.TypicalPeriods([0, 0, 1], period_length=4)
+    om = solph.Model(es, typical_periods=periods)
+    om.solve(solver="cbc")
+    flow = (es.groups["plant"], es.groups["electricity"])
+    om.update_and_resolve({flow: {"variable_costs": 20}}, solver="cbc")
+    plant = om.results()[es.groups["plant"], es.groups["electricity"]]
+    assert om.objective() == pytest.approx(
+        plant["sequences"]["flow"].sum() * 20
+    )
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -
+
+"""Tests of the scenario batches.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph import batch
+
+SCENARIOS = {
+    "base": {},
+    "storage": {
+        "storage": {
+            "nominal_storage_capacity": 10,
+            "investment.ep_costs": 0.5,
+        }
+    },
+    "demand": {("electricity", "demand"): {"fix": [0.5, 1, 0.1, 0.9]}},
+    "costs": {
+        ("gas_source", "gas"): {"variable_costs": 10},
+        ("electricity", "demand"): {"fix": [0.2, 0.2, 1, 1]},
+    },
+    "again": {},
+}
+
+
+def create_energy_system():
+    timeindex = pd.date_range("1/1/2020", periods=4, freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bgas = solph.Bus(label="gas")
+    bel = solph.Bus(label="electricity")
+    es.add(bgas, bel)
+    es.add(
+        solph.Source(
+            label="gas_source",
+            outputs={bgas: solph.Flow(variable_costs=[30, 40, 30, 20])},
+        ),
+        solph.Transformer(
+            label="plant",
+            inputs={bgas: solph.Flow()},
+            outputs={bel: solph.Flow(nominal_value=10)},
+            conversion_factors={bel: 0.5},
+        ),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=8, fix=[1, 0.5, 0.2, 1])},
+        ),
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            loss_rate=0.01,
+            investment=solph.Investment(ep_costs=2),
+            invest_relation_input_capacity=1,
+            invest_relation_output_capacity=1,
+        ),
+    )
+    return es
+
+
+def create_storage_system():
+    es = create_energy_system()
+    bel = es.groups["electricity"]
+    es.add(
+        solph.GenericStorage(
+            label="battery",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            nominal_storage_capacity=5,
+            initial_storage_level=0.5,
+            fixed_losses_relative=0.02,
+            min_storage_level=0.1,
+        ),
+        solph.Source(
+            label="pv",
+            outputs={
+                bel: solph.Flow(
+                    fix=[0, 0.5, 1, 0],
+                    investment=solph.Investment(ep_costs=20),
+                )
+            },
+        ),
+    )
+    return es
+
+
+def solve_scenario(override, create=create_energy_system):
+    es = create()
+    for target, attributes in override.items():
+        if isinstance(target, tuple):
+            source, target = target
+            obj = es.flows()[es.groups[source], es.groups[target]]
+        else:
+            obj = es.groups[target]
+        for attribute, value in attributes.items():
+            owner, attribute = batch._owner(obj, attribute)
+            if attribute in batch.SEQUENCES:
+                value = solph.sequence(value)
+            setattr(owner, attribute, value)
+    om = solph.Model(es)
+    om.solve(solver="cbc")
+    return om
+
+
+def test_batch_equals_single_models():
+    results, meta = batch.solve_batch(
+        create_energy_system, SCENARIOS, processes=1
+    )
+    assert list(meta.index) == list(SCENARIOS)
+    assert list(results.columns) == list(batch.RESULT_COLUMNS)
+    assert (meta["solver termination condition"] == "optimal").all()
+    for name, override in SCENARIOS.items():
+        om = solve_scenario(override)
+        assert meta.loc[name, "objective"] == pytest.approx(om.objective())
+
+        plant = results.loc[
+            (results["scenario"] == name)
+            & (results["source"] == "plant")
+            & (results["variable"] == "flow")
+        ]
+        expected = om.results()[
+            om.es.groups["plant"], om.es.groups["electricity"]
+        ]
+        assert list(plant["value"]) == pytest.approx(
+            list(expected["sequences"]["flow"])
+        )
+
+    invest = results.loc[
+        (results["source"] == "storage")
+        & results["target"].isnull()
+        & (results["variable"] == "invest")
+    ]
+    assert invest["timestep"].isnull().all()
+    assert len(invest) == len(SCENARIOS)
+
+
+def test_batch_in_processes():
+    scenarios = list(SCENARIOS.values())
+    results, meta = batch.solve_batch(
+        create_energy_system, scenarios, processes=2
+    )
+    expected_results, expected_meta = batch.solve_batch(
+        create_energy_system, scenarios, processes=1
+    )
+    assert list(meta.index) == list(range(len(scenarios)))
+    assert list(meta["objective"]) == pytest.approx(
+        list(expected_meta["objective"])
+    )
+    pd.testing.assert_frame_equal(results, expected_results)
+
+
+def test_batch_updates_capacities_and_investment_costs(monkeypatch):
+    scenarios = {
+        "base": {},
+        "small": {"battery": {"nominal_storage_capacity": 1}},
+        "cheap": {
+            ("pv", "electricity"): {"investment.ep_costs": 1},
+            "battery": {"nominal_storage_capacity": 20},
+        },
+        "again": {},
+    }
+    rebuilds = []
+    rebuild = solph.Model._rebuild
+    monkeypatch.setattr(
+        solph.Model,
+        "_rebuild",
+        lambda self: rebuilds.append(True) or rebuild(self),
+    )
+    results, meta = batch.solve_batch(
+        create_storage_system, scenarios, processes=1
+    )
+    assert rebuilds == []
+    assert (meta["status"] == "ok").all()
+    for name, override in scenarios.items():
+        om = solve_scenario(override, create_storage_system)
+        assert meta.loc[name, "objective"] == pytest.approx(om.objective())
+    assert len(set(meta["objective"].round(6))) == 3
+
+
+def test_batch_records_failed_scenarios():
+    scenarios = {
+        "base": {},
+        "unknown": {"nowhere": {"nominal_storage_capacity": 1}},
+        "costs": SCENARIOS["costs"],
+    }
+    results, meta = batch.solve_batch(
+        create_energy_system, scenarios, processes=1
+    )
+    assert list(meta["status"]) == ["ok", "error", "ok"]
+    assert "nowhere" in meta.loc["unknown", "error"]
+    assert meta.loc[["base", "costs"], "error"].isnull().all()
+    assert set(results["scenario"]) == {"base", "costs"}
+    om = solve_scenario(SCENARIOS["costs"])
+    assert meta.loc["costs", "objective"] == pytest.approx(om.objective())
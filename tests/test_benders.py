@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -
+
+"""Tests of the Benders decomposition of investment models.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+import pytest
+from pyomo import environ as po
+
+from oemof import solph
+from oemof.solph.benders import Benders
+from oemof.solph.benders import _investment_variables
+
+DEMAND = [0.6, 1, 0.9, 0.2, 0.4, 0.8, 1, 0.3]
+PV = [0, 0.6, 1, 0.4, 0, 0.5, 0.9, 0.1]
+
+
+def create_energy_system():
+    timeindex = pd.date_range("1/1/2020", periods=len(DEMAND), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    es.add(
+        solph.Source(
+            label="pv",
+            outputs={
+                bel: solph.Flow(
+                    fix=PV, investment=solph.Investment(ep_costs=3)
+                )
+            },
+        ),
+        solph.Source(
+            label="plant",
+            outputs={
+                bel: solph.Flow(
+                    variable_costs=4,
+                    investment=solph.Investment(ep_costs=2, maximum=8),
+                )
+            },
+        ),
+        solph.Source(
+            label="shortage", outputs={bel: solph.Flow(variable_costs=50)}
+        ),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=10, fix=DEMAND)},
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            loss_rate=0.01,
+            investment=solph.Investment(ep_costs=1),
+            invest_relation_input_capacity=1 / 2,
+            invest_relation_output_capacity=1 / 2,
+        ),
+    )
+    return es
+
+
+def test_one_block_equals_full_model():
+    om = solph.Model(create_energy_system())
+    om.solve(solver="cbc")
+    results = om.results()
+
+    es = create_energy_system()
+    benders = Benders(es, block_length=len(DEMAND))
+    investments = benders.solve(solver="cbc")
+
+    assert benders.upper_bounds[-1] == pytest.approx(om.objective())
+    assert benders.lower_bounds[-1] == pytest.approx(om.objective())
+    for (o, i), value in investments.items():
+        full = {(str(k[0]), str(k[1])): v for k, v in results.items()}
+        expected = full[str(o), str(i)]["scalars"]["invest"]
+        assert value == pytest.approx(expected, abs=1e-6)
+    assert len(investments) == 5
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_blocks(processes):
+    es = create_energy_system()
+    benders = Benders(es, block_length=3, processes=processes)
+    assert benders.blocks == [(0, 3), (3, 6), (6, 8)]
+    investments = benders.solve(solver="cbc")
+
+    # bounds of the decomposed problem, the lower bounds never decrease
+    assert benders.lower_bounds == sorted(benders.lower_bounds)
+    assert benders.upper_bounds[-1] == pytest.approx(
+        benders.lower_bounds[-1], rel=1e-5
+    )
+    storage = es.groups["storage"]
+    assert investments[storage, None] >= 0
+    assert investments[es.groups["plant"], es.groups["electricity"]] <= 8
+    if processes == 2:
+        single = Benders(create_energy_system(), block_length=3)
+        single.solve(solver="cbc")
+        assert benders.upper_bounds[-1] == pytest.approx(
+            single.upper_bounds[-1]
+        )
+
+
+def balanced_per_block(om, blocks):
+    """Balance the storage of the full model within every block: the content
+    at the start of a block is free and equal to the content at its end."""
+    es = om.es
+    storage = es.groups["storage"]
+    bel = es.groups["electricity"]
+    block = om.GenericInvestmentStorageBlock
+    content = block.storage_content
+    block.balanced_cstr.deactivate()
+    om.STARTS = po.Set(initialize=[start for start, _ in blocks])
+    om.start_content = po.Var(om.STARTS, within=po.NonNegativeReals)
+    for start, _ in blocks:
+        if start == 0:
+            block.balance_first[storage].deactivate()
+        else:
+            block.balance[storage, start].deactivate()
+    om.block_balance = po.Constraint(
+        om.STARTS,
+        rule=lambda m, s: content[storage, s]
+        == m.start_content[s] * (1 - 0.01)
+        + m.flow[bel, storage, s]
+        - m.flow[storage, bel, s],
+    )
+    om.block_end = po.Constraint(
+        om.STARTS,
+        rule=lambda m, s: content[storage, dict(blocks)[s] - 1]
+        == m.start_content[s],
+    )
+
+
+def test_blocks_equal_full_model_balanced_per_block():
+    es = create_energy_system()
+    benders = Benders(es, block_length=3)
+    investments = benders.solve(solver="cbc")
+
+    om = solph.Model(create_energy_system())
+    balanced_per_block(om, benders.blocks)
+    om.solve(solver="cbc")
+    assert benders.upper_bounds[-1] == pytest.approx(om.objective())
+    assert benders.lower_bounds[-1] == pytest.approx(
+        om.objective(), rel=1e-5
+    )
+    variables, _ = _investment_variables(om)
+    for (o, i), value in investments.items():
+        key = (str(o), None if i is None else str(i))
+        assert value == pytest.approx(variables[key].value, abs=1e-6)
+
+
+def test_needs_investments():
+    es = solph.EnergySystem(timeindex=[1, 2])
+    bel = solph.Bus(label="electricity")
+    es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow()}))
+    with pytest.raises(ValueError, match="no investments"):
+        Benders(es, block_length=1, timeincrement=1)
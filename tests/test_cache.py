@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -
+
+"""Tests of the disk cache of linear programs.
+
+The programs taken from the cache are compared with the programs of freshly
+built models and solved with CBC.
+
+SPDX-License-Identifier: MIT
+"""
+
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph import aggregation
+from oemof.solph import cache
+
+
+def create_energy_system(demand, gas_costs=30, storage_costs=1):
+    timeindex = pd.date_range("1/1/2020", periods=len(demand), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bgas = solph.Bus(label="gas")
+    bel = solph.Bus(label="electricity")
+    es.add(bgas, bel)
+    es.add(
+        solph.Source(
+            label="gas_source",
+            outputs={bgas: solph.Flow(variable_costs=gas_costs)},
+        ),
+        solph.Transformer(
+            label="plant",
+            inputs={bgas: solph.Flow()},
+            outputs={bel: solph.Flow(nominal_value=10, variable_costs=1)},
+            conversion_factors={bel: 0.5},
+        ),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=8, fix=demand)},
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            investment=solph.Investment(ep_costs=storage_costs),
+            invest_relation_input_capacity=1,
+            invest_relation_output_capacity=1,
+        ),
+    )
+    return es
+
+
+def by_name(lp):
+    """Columns and rows of a program by name, independent of their order."""
+    names = np.array(lp.col_names)
+    columns = {
+        name: (lower, upper, objective)
+        for name, lower, upper, objective in zip(
+            names, lp.col_lower, lp.col_upper, lp.objective
+        )
+    }
+    rows = {
+        name: (lower, upper, {})
+        for name, lower, upper in zip(lp.row_names, lp.row_lower, lp.row_upper)
+    }
+    for r, c, d in zip(lp.row, lp.col, lp.data):
+        rows[lp.row_names[r]][2][names[c]] = d
+    return columns, rows
+
+
+def test_cached_program_equals_new_program(tmpdir):
+    model_cache = cache.ModelCache(str(tmpdir))
+    model_cache.linear_program(create_energy_system([0.2, 0.5, 1]))
+    lp = model_cache.linear_program(
+        create_energy_system([1, 0.1, 0.4], gas_costs=20)
+    )
+    assert (model_cache.hits, model_cache.misses) == (1, 1)
+    assert lp.variables is None
+
+    expected = cache.ModelCache(str(tmpdir.mkdir("new"))).linear_program(
+        create_energy_system([1, 0.1, 0.4], gas_costs=20)
+    )
+    assert by_name(lp) == by_name(expected)
+
+
+def test_fingerprint():
+    fingerprint = cache.fingerprint(create_energy_system([0.2, 0.5, 1]))
+    # data of flows without investment and nonconvex option
+    assert fingerprint == cache.fingerprint(
+        create_energy_system([1, 0.5, 0.2], gas_costs=5)
+    )
+    # the structure
+    assert fingerprint != cache.fingerprint(
+        create_energy_system([0.2, 0.5, 1], storage_costs=2)
+    )
+    assert fingerprint != cache.fingerprint(
+        create_energy_system([0.2, 0.5, 1, 1])
+    )
+    assert fingerprint != cache.fingerprint(
+        create_energy_system([0.2, 0.5, 1]), timeincrement=2
+    )
+
+
+def create_piecewise_system(conversion_function):
+    es = solph.EnergySystem(
+        timeindex=pd.date_range("1/1/2020", periods=2, freq="H")
+    )
+    bgas = solph.Bus(label="gas", balanced=False)
+    bel = solph.Bus(label="electricity", balanced=False)
+    es.add(
+        bgas,
+        bel,
+        solph.custom.PiecewiseLinearTransformer(
+            label="pwltf",
+            inputs={bgas: solph.Flow(nominal_value=100)},
+            outputs={bel: solph.Flow()},
+            in_breakpoints=[0, 50, 100],
+            conversion_function=conversion_function,
+            pw_repn="CC",
+        ),
+    )
+    return es
+
+
+def scaled(factor):
+    return lambda x: factor * x
+
+
+def test_fingerprint_of_functions():
+    fingerprint = cache.fingerprint(create_piecewise_system(lambda x: x ** 2))
+    assert fingerprint == cache.fingerprint(
+        create_piecewise_system(lambda x: x ** 2)
+    )
+    assert fingerprint != cache.fingerprint(
+        create_piecewise_system(lambda x: 0.5 * x)
+    )
+    # closures and defaults
+    assert cache.fingerprint(
+        create_piecewise_system(scaled(2))
+    ) != cache.fingerprint(create_piecewise_system(scaled(3)))
+    assert cache.fingerprint(
+        create_piecewise_system(lambda x, a=2: a * x)
+    ) != cache.fingerprint(create_piecewise_system(lambda x, a=3: a * x))
+
+
+def test_fingerprint_is_stable_between_runs():
+    """The fingerprint does not depend on the hash seed of the
+    interpreter, i.e. the order of sets."""
+    script = (
+        "import test_cache; from oemof.solph import cache; "
+        "print(cache.fingerprint(test_cache.create_energy_system([1, 2])))"
+    )
+    fingerprints = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            cwd=os.path.dirname(__file__),
+            env=dict(os.environ, PYTHONHASHSEED=seed),
+            check=True,
+        ).stdout
+        for seed in ("1", "2")
+    }
+    assert len(fingerprints) == 1
+
+
+def test_least_recently_used_entries_are_removed(tmpdir):
+    model_cache = cache.ModelCache(str(tmpdir), max_entries=2)
+    first = create_energy_system([0.2, 0.5, 1])
+    model_cache.linear_program(first)
+    model_cache.linear_program(create_energy_system([0.2, 0.5, 1, 1]))
+    model_cache.linear_program(first)
+    model_cache.linear_program(create_energy_system([0.2, 0.5, 1, 1, 1]))
+    assert len(os.listdir(str(tmpdir))) == 2
+    assert (model_cache.hits, model_cache.misses) == (1, 3)
+
+    model_cache.linear_program(first)
+    assert model_cache.hits == 2
+    model_cache.linear_program(create_energy_system([0.2, 0.5, 1, 1]))
+    assert model_cache.misses == 4
+
+    model_cache.max_size = 1
+    model_cache.linear_program(create_energy_system([0.2]))
+    assert len(os.listdir(str(tmpdir))) == 1
+
+    model_cache.clear()
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_typical_periods_are_not_cached(tmpdir):
+    periods = aggregation.TypicalPeriods([0, 0], period_length=2)
+    with pytest.raises(ValueError, match="typical periods"):
+        cache.ModelCache(str(tmpdir)).linear_program(
+            create_energy_system([1, 1, 1, 1]), typical_periods=periods
+        )
+
+
+@pytest.mark.skipif(shutil.which("cbc") is None, reason="cbc not found")
+def test_solve_cached_program(tmpdir):
+    model_cache = cache.ModelCache(str(tmpdir))
+    model_cache.linear_program(create_energy_system([0.2, 0.5, 1]))
+    lp = model_cache.linear_program(
+        create_energy_system([1, 0.1, 0.4], gas_costs=20)
+    )
+    filename = os.path.join(str(tmpdir), "model.lp")
+    lp.write_lp(filename)
+
+    om = solph.Model(create_energy_system([1, 0.1, 0.4], gas_costs=20))
+    om.solve(solver="cbc")
+    output = subprocess.run(
+        ["cbc", filename, "solve", "quit"],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    objective = float(re.search(r"objective value\s*(\S+)", output).group(1))
+    assert objective == pytest.approx(om.objective())
+
+
+def test_solve_maps_the_solution_to_results(tmpdir):
+    pytest.importorskip("highspy")
+    model_cache = cache.ModelCache(str(tmpdir))
+    model_cache.solve(create_energy_system([0.2, 0.5, 1]))
+    es = create_energy_system([1, 0.1, 0.4], gas_costs=20)
+    results, meta = model_cache.solve(es)
+    assert (model_cache.hits, model_cache.misses) == (1, 1)
+
+    om = solph.Model(create_energy_system([1, 0.1, 0.4], gas_costs=20))
+    om.solve(solver="highs")
+    expected = solph.processing.convert_keys_to_strings(
+        solph.processing.results(om)
+    )
+    results = solph.processing.convert_keys_to_strings(results)
+    assert meta["objective"] == pytest.approx(om.objective())
+    assert meta["solver"]["Termination condition"] == "optimal"
+    assert sorted(results) == sorted(expected)
+    for key, entry in expected.items():
+        pd.testing.assert_frame_equal(
+            results[key]["sequences"], entry["sequences"]
+        )
+        pd.testing.assert_series_equal(
+            results[key]["scalars"], entry["scalars"]
+        )
+    flow = results["electricity", "demand"]["sequences"]["flow"]
+    assert flow.tolist() == pytest.approx([8, 0.8, 3.2])
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -
+
+"""Tests of the in-process solving with HiGHS.
+
+The results are compared with the results of CBC.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph import processing
+
+pytest.importorskip("highspy")
+
+
+def create_energy_system(
+    demand=(1, 0.5, 0.2, 1), nonconvex=False, shortage=True
+):
+    timeindex = pd.date_range("1/1/2020", periods=len(demand), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bgas = solph.Bus(label="gas")
+    bel = solph.Bus(label="electricity")
+    es.add(bgas, bel)
+    es.add(
+        solph.Source(
+            label="gas_source",
+            outputs={bgas: solph.Flow(variable_costs=[30, 40, 30, 20])},
+        ),
+        solph.Transformer(
+            label="plant",
+            inputs={bgas: solph.Flow()},
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=10,
+                    min=0.4 if nonconvex else 0,
+                    nonconvex=solph.NonConvex(startup_costs=50)
+                    if nonconvex
+                    else None,
+                )
+            },
+            conversion_factors={bel: 0.5},
+        ),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=8, fix=list(demand))},
+        ),
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow()},
+            outputs={bel: solph.Flow()},
+            loss_rate=0.01,
+            investment=solph.Investment(ep_costs=2),
+            invest_relation_input_capacity=1,
+            invest_relation_output_capacity=1,
+        ),
+    )
+    if shortage:
+        es.add(
+            solph.Source(
+                label="shortage",
+                outputs={bel: solph.Flow(variable_costs=200)},
+            )
+        )
+    return es
+
+
+def by_label(results):
+    return {
+        (str(source), str(target)): result
+        for (source, target), result in results.items()
+    }
+
+
+def solved(solver, **kwargs):
+    es = create_energy_system(**kwargs)
+    om = solph.Model(es)
+    om.receive_duals()
+    om.solve(solver=solver)
+    return om
+
+
+def test_results_equal_cbc():
+    expected = solved("cbc", shortage=False)
+    om = solved("highs", shortage=False)
+    assert om.objective() == pytest.approx(expected.objective())
+    meta = processing.meta_results(om)
+    assert meta["solver"]["Termination condition"] == "optimal"
+    assert meta["problem"]["Lower bound"] == pytest.approx(om.objective())
+
+    # the duals of the gas bus are not unique
+    results = by_label(processing.results(om))
+    for key, values in by_label(processing.results(expected)).items():
+        if key != ("gas", "None"):
+            pd.testing.assert_frame_equal(
+                results[key]["sequences"], values["sequences"], atol=1e-6
+            )
+    assert len(om.rc) == len(expected.rc)
+
+
+def test_mixed_integer_program():
+    expected = solved("cbc", nonconvex=True)
+    om = solved("highs", nonconvex=True)
+    assert om.objective() == pytest.approx(expected.objective())
+    results = by_label(processing.results(om))
+    expected = by_label(processing.results(expected))
+    for key in [("plant", "electricity"), ("electricity", "None")]:
+        pd.testing.assert_frame_equal(
+            results[key]["sequences"], expected[key]["sequences"], atol=1e-6
+        )
+
+
+def test_infeasible_model():
+    om = solph.Model(create_energy_system(demand=(1, 3, 1, 1), shortage=False))
+    with pytest.warns(UserWarning, match="infeasible"):
+        om.solve(solver="highs")
+
+
+def test_update_and_resolve():
+    om = solph.Model(create_energy_system())
+    om.solve(solver="highs")
+    demand = om.es.groups["demand"]
+    om.update_and_resolve(
+        {(om.es.groups["electricity"], demand): {"fix": [0.4, 1, 0, 0]}},
+        solver="highs",
+    )
+    expected = solph.Model(create_energy_system(demand=(0.4, 1, 0, 0)))
+    expected.solve(solver="cbc")
+    assert om.objective() == pytest.approx(expected.objective())
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -
+
+"""Tests of the Lagrangian relaxation of unit commitment models.
+
+SPDX-License-Identifier: MIT
+"""
+
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph.lagrangian import LagrangianRelaxation
+
+DEMAND = [4, 9, 14, 12, 6, 3]
+
+
+def create_energy_system():
+    timeindex = pd.date_range("1/1/2020", periods=len(DEMAND), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bgas = solph.Bus(label="gas")
+    bel = solph.Bus(label="electricity")
+    es.add(bgas, bel)
+    es.add(
+        solph.Source(
+            label="gas_source", outputs={bgas: solph.Flow(variable_costs=2)}
+        ),
+        solph.Transformer(
+            label="chp",
+            inputs={bgas: solph.Flow()},
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=8,
+                    min=0.5,
+                    nonconvex=solph.NonConvex(
+                        startup_costs=10, minimum_uptime=2
+                    ),
+                )
+            },
+            conversion_factors={bel: 0.5},
+        ),
+        solph.Source(
+            label="peaker",
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=6,
+                    min=0.2,
+                    variable_costs=7,
+                    nonconvex=solph.NonConvex(startup_costs=2),
+                )
+            },
+        ),
+        solph.Source(
+            label="shortage", outputs={bel: solph.Flow(variable_costs=100)}
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=1, fix=DEMAND)},
+        ),
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow(nominal_value=2)},
+            outputs={bel: solph.Flow(nominal_value=2)},
+            nominal_storage_capacity=4,
+            loss_rate=0.01,
+        ),
+    )
+    return es
+
+
+def test_bounds_of_the_optimum():
+    om = solph.Model(create_energy_system())
+    om.solve(solver="cbc")
+
+    es = create_energy_system()
+    relaxation = LagrangianRelaxation(es)
+    # the units with nonconvex flows, the other columns with rows and
+    # the columns without rows
+    assert len(relaxation._subproblems) == 4
+    results = relaxation.solve(solver="cbc")
+
+    assert relaxation.lower_bounds == sorted(relaxation.lower_bounds)
+    assert relaxation.lower_bounds[-1] <= om.objective() + 1e-6
+    assert relaxation.upper_bounds[-1] >= om.objective() - 1e-6
+    assert relaxation.upper_bounds[-1] == pytest.approx(om.objective())
+    assert relaxation.model.objective() == pytest.approx(
+        relaxation.upper_bounds[-1]
+    )
+    flow = results[es.groups["chp"], es.groups["electricity"]]["sequences"]
+    assert set(flow["status"]) <= {0, 1}
+
+
+def test_processes():
+    single = LagrangianRelaxation(create_energy_system())
+    single.solve(solver="cbc", max_iterations=5)
+    parallel = LagrangianRelaxation(create_energy_system(), processes=2)
+    parallel.solve(solver="cbc", max_iterations=5)
+    assert parallel.lower_bounds == pytest.approx(single.lower_bounds)
+    assert parallel.upper_bounds == pytest.approx(single.upper_bounds)
+
+
+def test_needs_balances():
+    es = solph.EnergySystem(timeindex=[1, 2])
+    bel = solph.Bus(label="electricity", balanced=False)
+    es.add(bel, solph.Sink(label="demand", inputs={bel: solph.Flow()}))
+    with pytest.raises(ValueError, match="no balanced buses"):
+        LagrangianRelaxation(es, timeincrement=1)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -
+
+"""Tests of the sparse matrix representation of models.
+
+The LP files written from the matrix are compared with the approved LP files
+in `constraint_tests.py`.
+
+SPDX-License-Identifier: MIT
+"""
+
+import multiprocessing
+import os
+import re
+import shutil
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+from pyomo import environ as po
+
+from oemof import solph
+from oemof.solph.matrix import LinearProgram
+
+
+def create_energy_system():
+    timeindex = pd.date_range("1/1/2020", periods=3, freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bgas = solph.Bus(label="gas")
+    bel = solph.Bus(label="electricity")
+    es.add(bgas, bel)
+    es.add(
+        solph.Source(
+            label="gas_source", outputs={bgas: solph.Flow(variable_costs=30)}
+        )
+    )
+    es.add(
+        solph.Transformer(
+            label="plant",
+            inputs={bgas: solph.Flow()},
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=10,
+                    min=0.4,
+                    nonconvex=solph.NonConvex(startup_costs=5),
+                )
+            },
+            conversion_factors={bel: 0.5},
+        )
+    )
+    es.add(
+        solph.Source(
+            label="backup",
+            outputs={bel: solph.Flow(nominal_value=20, variable_costs=100)},
+        )
+    )
+    es.add(
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=10, fix=[0.3, 0.8, 0.2])},
+        )
+    )
+    return es
+
+
+def create_model():
+    return solph.Model(create_energy_system())
+
+
+def canonical(lp):
+    """Rows, bounds and objective of a program by the names of the rows
+    and columns."""
+    names = lp.col_names
+    rows = {
+        lp.row_names[r]: (
+            dict(
+                zip(
+                    [names[c] for c in lp.col[lp.row == r]],
+                    lp.data[lp.row == r],
+                )
+            ),
+            lp.row_lower[r],
+            lp.row_upper[r],
+        )
+        for r in range(lp.num_rows)
+    }
+    columns = {
+        names[c]: (lp.col_lower[c], lp.col_upper[c], lp.integer[c])
+        for c in range(lp.num_cols)
+    }
+    objective = {
+        names[c]: lp.objective[c] for c in np.flatnonzero(lp.objective)
+    }
+    return rows, columns, objective, lp.objective_constant, lp.sense
+
+
+def test_dimensions():
+    om = create_model()
+    lp = LinearProgram.from_model(om)
+
+    # fixed flows are constants and not part of the matrix
+    assert lp.num_cols == len(om.flow) - 3 + len(
+        om.NonConvexFlow.status
+    ) + len(om.NonConvexFlow.startup)
+    assert len(lp.row_names) == lp.num_rows
+    assert len(lp.col_names) == lp.num_cols
+    assert lp.integer.sum() == 6
+    assert set(lp.row_blocks) == {"Bus", "Transformer", "NonConvexFlow"}
+
+    indptr, indices, data = lp.csr()
+    assert indptr[-1] == lp.num_nonzeros
+    dense = np.zeros((lp.num_rows, lp.num_cols))
+    dense[lp.row, lp.col] = lp.data
+    for r in range(lp.num_rows):
+        row = np.zeros(lp.num_cols)
+        row[indices[indptr[r] : indptr[r + 1]]] = data[
+            indptr[r] : indptr[r + 1]
+        ]
+        assert (row == dense[r]).all()
+
+
+def test_bus_balance_rows():
+    om = create_model()
+    lp = LinearProgram.from_model(om)
+    row = lp.row_names.index("Bus_balance(electricity_1)")
+    # the fixed demand of 8 is moved to the right hand side
+    assert lp.row_lower[row] == lp.row_upper[row] == 8
+    cols = lp.col[lp.row == row]
+    assert sorted(lp.col_names[c] for c in cols) == [
+        "flow(backup_electricity_1)",
+        "flow(plant_electricity_1)",
+    ]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"presolve": True}, {"compact_transformer_relation": True}],
+)
+def test_from_energysystem(kwargs):
+    expected = LinearProgram.from_model(
+        solph.Model(create_energy_system(), **kwargs)
+    )
+    lp = LinearProgram.from_energysystem(create_energy_system(), **kwargs)
+    assert canonical(lp) == canonical(expected)
+    assert sorted(lp.row_blocks) == sorted(expected.row_blocks)
+
+
+def test_from_energysystem_without_pyomo_rows(monkeypatch):
+    def fail(self, group=None):
+        raise AssertionError("{0} built with pyomo".format(self))
+
+    es = create_energy_system()
+    es.add(
+        solph.Sink(
+            label="limited",
+            inputs={
+                es.groups["electricity"]: solph.Flow(
+                    nominal_value=5, summed_max=1, variable_costs=-1
+                )
+            },
+        )
+    )
+    for block in (
+        solph.blocks.Bus,
+        solph.blocks.Transformer,
+        solph.blocks.Flow,
+    ):
+        monkeypatch.setattr(block, "_create", fail)
+    lp = LinearProgram.from_energysystem(es)
+    balance = lp.row_names.index("Bus_balance(electricity_1)")
+    assert lp.constraints[balance] is None
+    assert lp.row_blocks[balance] == "Bus"
+    assert "Flow_summed_max(electricity_limited)" in lp.row_names
+    assert lp.num_rows == len(lp.constraints)
+
+
+def test_numeric_labels():
+    om = create_model()
+    lp = LinearProgram.from_model(om, symbolic_solver_labels=False)
+    assert lp.col_names[0] == "x1"
+    assert lp.row_names[0] == "c1"
+    lp = LinearProgram.from_energysystem(
+        create_energy_system(), symbolic_solver_labels=False
+    )
+    assert lp.row_names == ["c{0}".format(r + 1) for r in range(lp.num_rows)]
+
+
+def create_storage_system():
+    es = create_energy_system()
+    bel = es.groups["electricity"]
+    es.add(
+        solph.GenericStorage(
+            label="storage",
+            inputs={bel: solph.Flow(variable_costs=1)},
+            outputs={bel: solph.Flow(investment=solph.Investment())},
+            invest_relation_output_capacity=0.5,
+            investment=solph.Investment(ep_costs=10),
+            loss_rate=0.01,
+        )
+    )
+    return es
+
+
+@pytest.mark.skipif(
+    "fork" not in multiprocessing.get_all_start_methods(),
+    reason="fork not available",
+)
+@pytest.mark.parametrize("symbolic_solver_labels", [True, False])
+def test_parallel_blocks(symbolic_solver_labels):
+    expected = LinearProgram.from_energysystem(
+        create_storage_system(), symbolic_solver_labels
+    )
+    lp = LinearProgram.from_energysystem(
+        create_storage_system(), symbolic_solver_labels, processes=2
+    )
+    assert lp.row_names == expected.row_names
+    assert lp.col_names == expected.col_names
+    assert lp.row_blocks == expected.row_blocks
+    for attribute in (
+        "row",
+        "col",
+        "data",
+        "row_lower",
+        "row_upper",
+        "col_lower",
+        "col_upper",
+        "integer",
+        "objective",
+    ):
+        np.testing.assert_array_equal(
+            getattr(lp, attribute), getattr(expected, attribute)
+        )
+    assert lp.objective_constant == expected.objective_constant
+
+    # the storage block is built in another process
+    storage = [
+        c
+        for c, name in enumerate(lp.row_blocks)
+        if name == "GenericInvestmentStorageBlock"
+    ]
+    assert storage
+    assert all(lp.constraints[c] is None for c in storage)
+    assert any(v is None for v in lp.variables)
+    if symbolic_solver_labels:
+        assert canonical(lp) == canonical(
+            LinearProgram.from_model(solph.Model(create_storage_system()))
+        )
+
+
+def test_objective_sense():
+    om = create_model()
+    om.objective.sense = po.maximize
+    lp = LinearProgram.from_model(om)
+    assert lp.sense == -1
+    om.objective.deactivate()
+    with pytest.raises(ValueError, match="exactly one active objective"):
+        LinearProgram.from_model(om)
+
+
+@pytest.mark.skipif(shutil.which("cbc") is None, reason="cbc not found")
+@pytest.mark.parametrize("file_format", ["lp", "mps"])
+def test_solve_written_file(file_format, tmpdir):
+    om = create_model()
+    lp = LinearProgram.from_model(om)
+    filename = os.path.join(str(tmpdir), "model." + file_format)
+    getattr(lp, "write_" + file_format)(filename)
+
+    om.solve(solver="cbc")
+    output = subprocess.run(
+        ["cbc", filename, "solve", "quit"],
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    ).stdout
+    objective = float(re.search(r"Objective value:\s*(\S+)", output).group(1))
+    assert objective == pytest.approx(po.value(om.objective))
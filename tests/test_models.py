@@ -9,10 +9,18 @@ available from its original location oemof/tests/basic_tests.py
 SPDX-License-Identifier: MIT
 """
 
+import json
 import warnings
 
 import pandas as pd
 import pytest
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.environ import Constraint
+from pyomo.environ import Objective
+from pyomo.environ import SolverFactory
+from pyomo.environ import Var
+from pyomo.repn import generate_standard_repn
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
 
 from oemof import solph
 from oemof.solph.helpers import calculate_timeincrement
@@ -122,3 +130,492 @@ def test_infeasible_model():
             m.solve(solver="cbc")
             assert "Optimization ended with status" in str(w[0].message)
             solph.processing.meta_results(m)
+
+
+def test_flow_variable_bounds():
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    bel = solph.Bus(label="bus")
+    es.add(bel)
+    source = solph.Source(
+        label="source",
+        outputs={
+            bel: solph.Flow(nominal_value=10, min=[0, 0.2, 0.1], max=0.8)
+        },
+    )
+    sink = solph.Sink(
+        label="sink", inputs={bel: solph.Flow(nominal_value=5, fix=[1, 2, 3])}
+    )
+    excess = solph.Sink(label="excess", inputs={bel: solph.Flow()})
+    es.add(source, sink, excess)
+    m = solph.models.Model(es, timeincrement=1)
+
+    assert [m.flow[source, bel, t].lb for t in m.TIMESTEPS] == [0, 2, 1]
+    assert [m.flow[source, bel, t].ub for t in m.TIMESTEPS] == [8, 8, 8]
+    assert all(m.flow[bel, sink, t].fixed for t in m.TIMESTEPS)
+    assert [m.flow[bel, sink, t].value for t in m.TIMESTEPS] == [5, 10, 15]
+    assert [m.flow[bel, excess, t].lb for t in m.TIMESTEPS] == [0, 0, 0]
+    assert m.flow[bel, excess, 0].ub is None
+
+
+def _update_test_system():
+    es = solph.EnergySystem(timeindex=[1, 2, 3])
+    bel = solph.Bus(label="bus")
+    source = solph.Source(
+        label="source",
+        outputs={bel: solph.Flow(nominal_value=10, variable_costs=2)},
+    )
+    backup = solph.Source(
+        label="backup", outputs={bel: solph.Flow(variable_costs=10)}
+    )
+    sink = solph.Sink(
+        label="sink", inputs={bel: solph.Flow(nominal_value=5, fix=[1, 1, 1])}
+    )
+    es.add(bel, source, backup, sink)
+    return es, bel, source, backup, sink
+
+
+def test_update_and_resolve_in_place():
+    es, bel, source, backup, sink = _update_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    m.solve("cbc")
+    assert m.objective() == 30
+    model_flow = m.flow
+
+    m.update_and_resolve(
+        {
+            (bel, sink): {"fix": [1, 2, 3]},
+            (source, bel): {"max": [1, 1, 0.5], "variable_costs": 3},
+        },
+        solver="cbc",
+    )
+    # the variables have been updated, not replaced
+    assert m.flow is model_flow
+    assert [m.flow[bel, sink, t].value for t in m.TIMESTEPS] == [5, 10, 15]
+    assert m.flow[source, bel, 2].ub == 5
+    assert m.objective() == 5 * 3 + 10 * 3 + 5 * 3 + 10 * 10
+
+    # releasing the fix restores the default bounds of the flow
+    m.update_and_resolve({(bel, sink): {"fix": None}}, solver="cbc")
+    assert not m.flow[bel, sink, 0].fixed
+    assert m.flow[bel, sink, 0].lb == 0
+    assert m.flow[bel, sink, 0].ub == 5
+    assert m.objective() == 0
+
+
+def test_update_and_resolve_rebuild():
+    es, bel, source, backup, sink = _update_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    m.receive_duals()
+    m.solve("cbc")
+    model_flow = m.flow
+
+    # the nominal value is part of the structure of the model
+    m.update_and_resolve({(source, bel): {"nominal_value": 2}}, solver="cbc")
+    assert m.flow is not model_flow
+    assert m.objective() == 3 * (2 * 2 + 3 * 10)
+    assert m.dual is not None
+
+    # so are new nodes
+    cheap = solph.Source(
+        label="cheap", outputs={bel: solph.Flow(variable_costs=1)}
+    )
+    es.add(cheap)
+    m.update_and_resolve(solver="cbc")
+    assert m.objective() == 15
+    assert (cheap, bel) in m.FLOWS
+
+
+def test_update_and_resolve_persistent():
+    pytest.importorskip("gurobipy")
+    es, bel, source, backup, sink = _update_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    m.update_and_resolve(solver="gurobi_persistent")
+    assert m.objective() == 30
+    opt = m._persistent_solver[1]
+
+    m.update_and_resolve(
+        {(bel, sink): {"fix": [1, 2, 3]}}, solver="gurobi_persistent"
+    )
+    assert m._persistent_solver[1] is opt
+    assert m.objective() == 5 * 2 + 10 * 2 + 10 * 2 + 5 * 10
+
+
+class RecordingPersistentSolver(PersistentSolver):
+    """Persistent solver interface, which compiles the rows with the values
+    of fixed variables like the persistent interfaces of pyomo and solves
+    the model with cbc. It checks that no compiled row is outdated."""
+
+    def __init__(self):
+        self.options = {}
+        self.rows = {}
+        self.added = []
+
+    @staticmethod
+    def _compile(con):
+        repn = generate_standard_repn(con.body, compute_values=True)
+        return repn.constant, tuple(map(id, repn.linear_vars))
+
+    def set_instance(self, model):
+        for con in model.component_data_objects(Constraint, active=True):
+            self.rows[id(con)] = (con, self._compile(con))
+
+    def update_var(self, var):
+        pass
+
+    def set_objective(self, objective):
+        pass
+
+    def remove_constraint(self, con):
+        del self.rows[id(con)]
+
+    def add_constraint(self, con):
+        self.rows[id(con)] = (con, self._compile(con))
+        self.added.append(con)
+
+    def solve(self, model, **kwargs):
+        for con, compiled in self.rows.values():
+            assert self._compile(con) == compiled, con.name
+        return SolverFactory("cbc").solve(model, **kwargs)
+
+
+def test_update_and_resolve_persistent_rows(monkeypatch):
+    """The rows with changed fixed variables are added to a persistent
+    solver again."""
+    opt = RecordingPersistentSolver()
+    factory = solph.models.SolverFactory
+    monkeypatch.setattr(
+        solph.models,
+        "SolverFactory",
+        lambda name, **kwargs: opt
+        if name == "recording"
+        else factory(name, **kwargs),
+    )
+    es, bel, source, backup, sink = _update_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    m.update_and_resolve(solver="recording")
+    assert m.objective() == 30
+
+    m.update_and_resolve({(source, bel): {"max": [1, 1, 0.5]}}, "recording")
+    assert opt.added == []
+    assert m.objective() == 30
+
+    m.update_and_resolve({(bel, sink): {"fix": [1, 2, 3]}}, "recording")
+    assert m._persistent_solver[1] is opt
+    assert opt.added == [m.Bus.balance[bel, t] for t in m.TIMESTEPS]
+    assert m.objective() == 5 * 2 + 10 * 2 + 5 * 2 + 10 * 10
+
+
+def test_profile(tmpdir):
+    es, bel, source, backup, sink = _update_test_system()
+    assert solph.models.Model(es, timeincrement=1).profile is None
+
+    m = solph.models.Model(es, timeincrement=1, profile=True)
+    m.solve("cbc")
+    m.results()
+    report = m.profile.to_dataframe()
+
+    blocks = report.loc[report["component"].isnull(), "block"]
+    assert {"Bus", "Flow"} <= set(blocks)
+    flow = report.loc[report["component"] == "flow"].iloc[0]
+    assert flow["block"] == "Model"
+    assert flow["variables"] == 9
+    balance = report.loc[
+        (report["block"] == "Bus") & (report["component"] == "balance")
+    ]
+    assert balance["constraints"].item() == 3
+    assert (report["time"] >= 0).all()
+    assert set(m.profile.to_dict()["total"]) == {
+        "build",
+        "write",
+        "solve",
+        "postsolve",
+        "results",
+    }
+
+    # every solver run is recorded
+    m.update_and_resolve({(bel, sink): {"fix": [1, 2, 3]}}, solver="cbc")
+    assert (m.profile.to_dataframe()["phase"] == "solve").sum() == 2
+
+    filename = str(tmpdir.join("profile.json"))
+    m.profile.to_json(filename)
+    with open(filename) as f:
+        assert json.load(f) == json.loads(m.profile.to_json())
+
+
+@pytest.mark.parametrize(
+    "gas, oil, compact_rows, pairwise_rows",
+    [
+        (0.7, 0.3, 4 * 3, 0),
+        # oil is the reference input while the factor of gas is zero
+        ([0.7, 0, 0.7], [0.3, 0.3, 0], 4 * 3, 0),
+        # without a nonzero input the flows are related pairwise
+        ([0.7, 0, 0.7], [0.3, 0, 0], 4 * 2, 6),
+    ],
+)
+def test_compact_transformer_relation(gas, oil, compact_rows, pairwise_rows):
+    def solve(compact):
+        es = solph.EnergySystem(timeindex=[1, 2, 3])
+        buses = {
+            label: solph.Bus(label=label)
+            for label in ("gas", "oil", "el", "heat", "steam")
+        }
+        es.add(*buses.values())
+        es.add(
+            solph.Source(
+                label="gas_source",
+                outputs={buses["gas"]: solph.Flow(variable_costs=3)},
+            ),
+            solph.Source(
+                label="oil_source",
+                outputs={buses["oil"]: solph.Flow(variable_costs=5)},
+            ),
+            solph.Transformer(
+                label="plant",
+                inputs={
+                    buses["gas"]: solph.Flow(),
+                    buses["oil"]: solph.Flow(),
+                },
+                outputs={
+                    buses["el"]: solph.Flow(),
+                    buses["heat"]: solph.Flow(),
+                    buses["steam"]: solph.Flow(),
+                },
+                conversion_factors={
+                    buses["gas"]: gas,
+                    buses["oil"]: oil,
+                    buses["el"]: 0.3,
+                    buses["heat"]: [0.4, 0.5, 0.3],
+                    buses["steam"]: 0.2,
+                },
+            ),
+        )
+        es.add(
+            solph.Sink(
+                label="demand",
+                inputs={
+                    buses["el"]: solph.Flow(nominal_value=5, fix=[0.2, 1, 0.5])
+                },
+            ),
+            solph.Sink(
+                label="heat_excess", inputs={buses["heat"]: solph.Flow()}
+            ),
+            solph.Sink(
+                label="steam_excess", inputs={buses["steam"]: solph.Flow()}
+            ),
+        )
+        m = solph.models.Model(
+            es, timeincrement=1, compact_transformer_relation=compact
+        )
+        m.solve("cbc")
+        return m
+
+    pairwise = solve(False)
+    compact = solve(True)
+    # 2 inputs * 3 outputs relations instead of 2 + 3 - 1
+    assert len(pairwise.Transformer.relation) == 6 * 3
+    assert len(compact.Transformer.relation) == compact_rows
+    assert len(compact.Transformer.relation_pairwise) == pairwise_rows
+    assert compact.objective() == pytest.approx(pairwise.objective())
+    assert compact.objective() > 0
+
+
+def test_presolve():
+    def solve(presolve):
+        es = solph.EnergySystem(timeindex=[1, 2, 3])
+        bel = solph.Bus(label="el")
+        bgas = solph.Bus(label="gas")
+        es.add(bel, bgas)
+        es.add(
+            solph.Source(
+                label="gas_source",
+                outputs={bgas: solph.Flow(variable_costs=3)},
+            ),
+            solph.Transformer(
+                label="plant",
+                inputs={bgas: solph.Flow()},
+                outputs={bel: solph.Flow(nominal_value=10)},
+                conversion_factors={bel: 0.5},
+            ),
+            solph.Source(
+                label="placeholder",
+                outputs={bel: solph.Flow(nominal_value=0, variable_costs=1)},
+            ),
+            solph.Sink(
+                label="demand",
+                inputs={bel: solph.Flow(nominal_value=5, fix=[0.2, 1, 0.5])},
+            ),
+        )
+        m = solph.models.Model(es, timeincrement=1, presolve=presolve)
+        m.solve("cbc")
+        return m
+
+    m = solve(False)
+    presolved = solve(True)
+    assert sum(v.fixed for v in m.flow.values()) == 3
+    # the placeholder and the plant output are fixed besides the demand, the
+    # gas flows are only determined by the conversion and stay free
+    assert sum(v.fixed for v in presolved.flow.values()) == 9
+    assert presolved.objective() == pytest.approx(m.objective())
+
+    results = presolved.results()
+    plant = presolved.es.groups["plant"]
+    bel = presolved.es.groups["el"]
+    assert list(results[plant, bel]["sequences"]["flow"]) == [1, 5, 2.5]
+    assert len(results) == len(m.results())
+
+
+def _editing_test_system(plant=True):
+    es = solph.EnergySystem(timeindex=[1, 2, 3, 4])
+    bel = solph.Bus(label="el")
+    bgas = solph.Bus(label="gas")
+    es.add(bel, bgas)
+    es.add(
+        solph.Source(
+            label="gas_source", outputs={bgas: solph.Flow(variable_costs=3)}
+        ),
+        solph.Source(
+            label="pv",
+            outputs={bel: solph.Flow(nominal_value=5, fix=[0, 1, 1, 0])},
+        ),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=4, fix=[1, 1, 1, 1])},
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.Source(
+            label="shortage", outputs={bel: solph.Flow(variable_costs=100)}
+        ),
+    )
+    if plant:
+        es.add(
+            solph.Transformer(
+                label="plant",
+                inputs={bgas: solph.Flow()},
+                outputs={bel: solph.Flow(nominal_value=10)},
+                conversion_factors={bel: 0.5},
+            )
+        )
+    return es
+
+
+def _editing_test_storage(bel):
+    return solph.GenericStorage(
+        label="storage",
+        inputs={bel: solph.Flow(investment=solph.Investment(ep_costs=0.1))},
+        outputs={bel: solph.Flow(investment=solph.Investment())},
+        investment=solph.Investment(ep_costs=1),
+        invest_relation_input_capacity=1,
+        invest_relation_output_capacity=1,
+    )
+
+
+def test_add_and_remove_nodes():
+    es = _editing_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    m.solve("cbc")
+    assert m.objective() == pytest.approx(48)
+
+    bel = es.groups["el"]
+    m.add_nodes(_editing_test_storage(bel))
+    m.remove_nodes(es.groups["plant"])
+    _assert_no_removed_variables(m)
+    m.solve("cbc")
+
+    es_new = _editing_test_system(plant=False)
+    bel_new = [n for n in es_new.nodes if n.label == "el"][0]
+    es_new.add(_editing_test_storage(bel_new))
+    m_new = solph.models.Model(es_new, timeincrement=1)
+    m_new.solve("cbc")
+
+    assert m.objective() == pytest.approx(m_new.objective())
+    assert len(m.flow) == len(m_new.flow)
+    assert len(m.Bus.balance) == len(m_new.Bus.balance)
+    assert "plant" not in [str(n) for n in m.NODES]
+    results = m.results()
+    storage = es.groups["storage"]
+    assert results[storage, None]["scalars"]["invest"] > 0
+
+
+def test_add_replace_and_remove_flows():
+    es = _editing_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    bel = es.groups["el"]
+    gas_source = es.groups["gas_source"]
+
+    m.add_flow(gas_source, bel, solph.Flow(variable_costs=1))
+    m.solve("cbc")
+    assert m.objective() == pytest.approx(8)
+    # the flows of the replaced node are removed
+    m.replace_node(
+        gas_source,
+        solph.Source(
+            label="gas_source",
+            outputs={es.groups["gas"]: solph.Flow(variable_costs=2)},
+        ),
+    )
+    m.solve("cbc")
+    assert m.objective() == pytest.approx(32)
+
+    m.remove_flow(es.groups["pv"], bel)
+    _assert_no_removed_variables(m)
+    m.solve("cbc")
+    assert m.objective() == pytest.approx(64)
+
+
+def _editing_test_plant(es):
+    return solph.Transformer(
+        label="plant_2",
+        inputs={es.groups["gas"]: solph.Flow()},
+        outputs={es.groups["el"]: solph.Flow(nominal_value=4)},
+        conversion_factors={es.groups["el"]: 0.6},
+    )
+
+
+def _assert_no_removed_variables(m):
+    """All variables of the rows and of the objective are part of the
+    model."""
+    variables = {id(v) for v in m.component_data_objects(Var)}
+    for component in (Constraint, Objective):
+        for data in m.component_data_objects(component, active=True):
+            for var in identify_variables(data.expr):
+                assert id(var) in variables, (data.name, var.name)
+
+
+def test_editing_builds_only_the_changed_members(monkeypatch):
+    es = _editing_test_system()
+    m = solph.models.Model(es, timeincrement=1)
+    objective = m.objective
+    created = []
+
+    def recorded(create):
+        def _create(block, group=None):
+            created.append((type(block).__name__, len(group or [])))
+            return create(block, group=group)
+
+        return _create
+
+    for group in m._constraint_groups:
+        monkeypatch.setattr(group, "_create", recorded(group._create))
+
+    m.add_nodes(_editing_test_plant(es))
+    # the two buses of the new plant, the plant and its two flows
+    assert sorted(created) == [("Bus", 2), ("Flow", 2), ("Transformer", 1)]
+    assert m.objective is objective
+    _assert_no_removed_variables(m)
+    m.solve("cbc")
+
+    es_new = _editing_test_system()
+    es_new.add(_editing_test_plant(es_new))
+    m_new = solph.models.Model(es_new, timeincrement=1)
+    m_new.solve("cbc")
+    assert m.objective() == pytest.approx(m_new.objective())
+    assert len(m.Transformer.relation) == len(m_new.Transformer.relation)
+
+    del created[:]
+    m.remove_nodes(es.groups["plant_2"])
+    assert created == [("Bus", 2)]
+    # the objective is summed up again without the removed variables
+    assert m.objective is not objective
+    _assert_no_removed_variables(m)
+    m.solve("cbc")
+    assert m.objective() == pytest.approx(48)
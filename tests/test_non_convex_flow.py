@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -
+
+"""Tests of the minimum up and downtimes of nonconvex flows.
+
+SPDX-License-Identifier: MIT
+"""
+
+import itertools
+
+import pandas as pd
+import pytest
+from pyomo.environ import TransformationFactory
+
+from oemof import solph
+
+DEMAND = [3, 9, 2, 0, 8, 7, 1, 6]
+PLANT_COSTS = 1
+BACKUP_COSTS = 10
+STARTUP_COSTS = 4
+
+
+def create_model(
+    formulation, uptime, downtime, initial_status, demand=None, **kwargs
+):
+    demand = DEMAND if demand is None else demand
+    timeindex = pd.date_range("1/1/2020", periods=len(demand), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    es.add(
+        solph.Source(
+            label="plant",
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=8,
+                    min=0.5,
+                    variable_costs=PLANT_COSTS,
+                    nonconvex=solph.NonConvex(
+                        minimum_uptime=uptime,
+                        minimum_downtime=downtime,
+                        initial_status=initial_status,
+                        startup_costs=STARTUP_COSTS,
+                        up_down_formulation=formulation,
+                        **kwargs,
+                    ),
+                )
+            },
+        ),
+        solph.Source(
+            label="backup",
+            outputs={bel: solph.Flow(variable_costs=BACKUP_COSTS)},
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=1, fix=demand)},
+        ),
+    )
+    return solph.Model(es)
+
+
+def feasible(status, uptime, downtime, initial_status):
+    """Whether a schedule keeps the minimum up and downtimes, if the plant
+    was in its initial status for long enough before the first step."""
+    previous = initial_status
+    for t, s in enumerate(status):
+        if s != previous:
+            duration = uptime if s else downtime
+            if any(other != s for other in status[t : t + duration]):
+                return False
+        previous = s
+    return True
+
+
+def costs(status, initial_status):
+    """The costs of the cheapest dispatch of a schedule."""
+    total = 0
+    previous = initial_status
+    for s, demand in zip(status, DEMAND):
+        plant = min(max(demand, 4), 8) if s else 0
+        total += plant * PLANT_COSTS
+        total += max(demand - plant, 0) * BACKUP_COSTS
+        total += STARTUP_COSTS * (s > previous)
+        previous = s
+    return total
+
+
+@pytest.mark.parametrize(
+    "uptime, downtime, initial_status",
+    [(3, 2, 0), (2, 3, 1), (4, 1, 0), (1, 4, 1), (3, None, 1), (None, 2, 0)],
+)
+def test_startup_formulation_is_optimal(uptime, downtime, initial_status):
+    om = create_model("startup", uptime, downtime, initial_status)
+    om.solve(solver="cbc")
+
+    expected = min(
+        costs(status, initial_status)
+        for status in itertools.product((0, 1), repeat=len(DEMAND))
+        if feasible(status, uptime or 1, downtime or 1, initial_status)
+    )
+    assert om.objective() == pytest.approx(expected)
+
+    status = [
+        round(om.NonConvexFlow.status[om.es.groups["plant"], b, t].value)
+        for b in [om.es.groups["electricity"]]
+        for t in om.TIMESTEPS
+    ]
+    assert feasible(status, uptime or 1, downtime or 1, initial_status)
+
+
+@pytest.mark.parametrize("formulation", ["status", "startup"])
+@pytest.mark.parametrize(
+    "initial_status, initial_time, pinned",
+    [(1, {"initial_uptime": 1}, 2), (0, {"initial_downtime": 0}, 2)],
+)
+def test_initial_up_and_downtime(
+    formulation, initial_status, initial_time, pinned
+):
+    """The status is kept for the rest of the minimum up or downtime."""
+    demand = [0, 0, 0, 0, 9, 9, 9, 9] if initial_status else DEMAND
+    om = create_model(
+        formulation, 3, 2, initial_status, demand=demand, **initial_time
+    )
+    om.solve(solver="cbc")
+    status = [
+        round(om.NonConvexFlow.status[om.es.groups["plant"], b, t].value)
+        for b in [om.es.groups["electricity"]]
+        for t in om.TIMESTEPS
+    ]
+    assert status[:pinned] == [initial_status] * pinned
+    if formulation == "startup":
+        free = create_model(formulation, 3, 2, initial_status, demand=demand)
+        free.solve(solver="cbc")
+        assert om.objective() > free.objective()
+
+
+def test_initial_up_and_downtime_are_checked():
+    with pytest.raises(ValueError, match="initial_uptime"):
+        solph.NonConvex(minimum_uptime=2, initial_uptime=-1)
+    nonconvex = solph.NonConvex(
+        minimum_uptime=4, minimum_downtime=2, initial_uptime=1
+    )
+    assert nonconvex.remaining_uptime == 3
+    assert nonconvex.remaining_downtime == 0
+
+
+def pin_edges(om):
+    """Fix the status in the edge regions like the status formulation."""
+    block = om.NonConvexFlow
+    for i, o in block.NONCONVEX_FLOWS:
+        nonconvex = om.flows[i, o].nonconvex
+        last = om.TIMESTEPS[-1] - nonconvex.max_up_down
+        for t in om.TIMESTEPS:
+            if not nonconvex.max_up_down <= t <= last:
+                block.status[i, o, t].fix(nonconvex.initial_status)
+
+
+def test_startup_formulation_is_tighter():
+    """Same optimum with the edge regions fixed, but a higher bound of the
+    linear relaxation."""
+    objectives = {}
+    for formulation in ("status", "startup"):
+        for relax in (False, True):
+            om = create_model(formulation, 3, 3, 0, demand=DEMAND * 3)
+            pin_edges(om)
+            if relax:
+                TransformationFactory("core.relax_integer_vars").apply_to(om)
+            om.solve(solver="cbc")
+            objectives[formulation, relax] = om.objective()
+    assert objectives["startup", False] == pytest.approx(
+        objectives["status", False]
+    )
+    assert objectives["startup", True] > objectives["status", True] + 1e-6
+
+
+def create_fleet(units, clustered, demand):
+    """Identical units as one clustered flow or as single flows."""
+    timeindex = pd.date_range("1/1/2020", periods=len(demand), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    fleet = (
+        [(units, 2)] if clustered else [(1, int(k < 2)) for k in range(units)]
+    )
+    for k, (number, initial_status) in enumerate(fleet):
+        es.add(
+            solph.Source(
+                label="engine_{0}".format(k),
+                outputs={
+                    bel: solph.Flow(
+                        nominal_value=5 * number,
+                        min=0.4,
+                        variable_costs=2,
+                        nonconvex=solph.NonConvex(
+                            number_of_units=number,
+                            minimum_uptime=3,
+                            minimum_downtime=2,
+                            initial_status=initial_status,
+                            startup_costs=6,
+                            shutdown_costs=1,
+                            activity_costs=0.5,
+                            up_down_formulation="startup",
+                        ),
+                    )
+                },
+            )
+        )
+    es.add(
+        solph.Source(
+            label="backup",
+            outputs={bel: solph.Flow(variable_costs=BACKUP_COSTS)},
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+        solph.Sink(
+            label="demand",
+            inputs={bel: solph.Flow(nominal_value=1, fix=demand)},
+        ),
+    )
+    return solph.Model(es)
+
+
+def test_clustered_units_equal_single_units():
+    demand = [6, 14, 3, 0, 19, 17, 2, 11, 8, 1, 16, 12]
+    single = create_fleet(4, False, demand)
+    single.solve(solver="cbc")
+    clustered = create_fleet(4, True, demand)
+    clustered.solve(solver="cbc")
+    assert clustered.objective() == pytest.approx(single.objective())
+
+    block = clustered.NonConvexFlow
+    bel = clustered.es.groups["electricity"]
+    engines = clustered.es.groups["engine_0"]
+    for t in clustered.TIMESTEPS:
+        status = block.status[engines, bel, t].value
+        flow = clustered.flow[engines, bel, t].value
+        assert 0 <= round(status) <= 4
+        assert 2 * status - 1e-6 <= flow <= 5 * status + 1e-6
@@ -21,8 +21,11 @@ from oemof.solph import EnergySystem
 from oemof.solph import Flow
 from oemof.solph import Investment
 from oemof.solph import Model
+from oemof.solph import NonConvex
 from oemof.solph import Sink
+from oemof.solph import Source
 from oemof.solph import Transformer
+from oemof.solph import constraints
 from oemof.solph import processing
 from oemof.solph import views
 from oemof.solph.components import GenericStorage
@@ -267,6 +270,12 @@ class TestParameterResult:
         with assert_raises(ValueError):
             processing.results(self.mod)
 
+    def test_results_from_arrays(self):
+        compare_result_dicts(
+            processing._results_from_arrays(self.om),
+            processing._results_from_dataframe(self.om),
+        )
+
     def test_duals(self):
         results = processing.results(self.om)
         bel = views.node(results, "b_el1", multiindex=True)
@@ -336,3 +345,44 @@ class TestParameterResult:
         results = processing.results(self.om)
         view = views.node_weight_by_type(results, node_type=Flow)
         ok_(view is None)
+
+
+def compare_result_dicts(result, expected):
+    eq_(list(result), list(expected))
+    for k in expected:
+        assert_frame_equal(result[k]["sequences"], expected[k]["sequences"])
+        assert_series_equal(result[k]["scalars"], expected[k]["scalars"])
+
+
+def test_results_from_arrays_with_model_variables():
+    es = EnergySystem(
+        timeindex=pandas.date_range("2016-01-01", periods=4, freq="H")
+    )
+    bel = Bus(label="bel")
+    demand = Sink(
+        label="demand", inputs={bel: Flow(nominal_value=8, fix=[1, 0, 1, 0.5])}
+    )
+    plants = [
+        Source(
+            label="plant_{0}".format(n),
+            outputs={
+                bel: Flow(
+                    nominal_value=5,
+                    min=0.2,
+                    variable_costs=n + 1,
+                    nonconvex=NonConvex(startup_costs=2),
+                )
+            },
+        )
+        for n in range(3)
+    ]
+    es.add(bel, demand, *plants)
+    om = Model(es)
+    constraints.limit_active_flow_count(
+        om, "flow_count", [(p, bel) for p in plants], upper_limit=2
+    )
+    om.solve()
+
+    result = processing._results_from_arrays(om)
+    eq_(list(result["flow_count", "flow_count"]["sequences"]), ["flow_count"])
+    compare_result_dicts(result, processing._results_from_dataframe(om))
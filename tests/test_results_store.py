@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -
+
+"""Tests of the export of results to files and the lazy reader.
+
+SPDX-License-Identifier: MIT
+"""
+
+import os
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from pandas.testing import assert_series_equal
+
+from oemof import solph
+from oemof.solph import processing
+from oemof.solph import results_store
+from oemof.solph import views
+from oemof.solph.results_store import ResultsStore
+from oemof.solph.results_store import write_results
+
+
+@pytest.fixture(scope="module")
+def model():
+    es = solph.EnergySystem(
+        timeindex=pd.date_range("2016-01-01", periods=12, freq="H")
+    )
+    b_el1 = solph.Bus(label="b_el1")
+    b_el2 = solph.Bus(label="b_el2")
+    b_diesel = solph.Bus(label="b_diesel", balanced=False)
+    es.add(b_el1, b_el2, b_diesel)
+    es.add(
+        solph.Transformer(
+            label="diesel",
+            inputs={b_diesel: solph.Flow(variable_costs=2)},
+            outputs={
+                b_el1: solph.Flow(
+                    variable_costs=1,
+                    investment=solph.Investment(ep_costs=0.5),
+                )
+            },
+            conversion_factors={b_el1: 2},
+        ),
+        solph.GenericStorage(
+            label="storage",
+            inputs={b_el1: solph.Flow(variable_costs=3)},
+            outputs={b_el2: solph.Flow(variable_costs=2.5)},
+            initial_storage_level=0,
+            invest_relation_input_capacity=1 / 6,
+            invest_relation_output_capacity=1 / 6,
+            outflow_conversion_factor=0.8,
+            investment=solph.Investment(ep_costs=0.4),
+        ),
+        solph.Sink(
+            label="demand_el",
+            inputs={b_el2: solph.Flow(nominal_value=1, fix=[0] + [100] * 11)},
+        ),
+    )
+    om = solph.Model(es)
+    om.receive_duals()
+    om.solve()
+    return om
+
+
+@pytest.fixture(params=["parquet", "hdf5"])
+def path(request, model, tmpdir):
+    pytest.importorskip(
+        {"parquet": "pyarrow", "hdf5": "tables"}[request.param]
+    )
+    path = os.path.join(str(tmpdir), "results")
+    write_results(model, path, file_format=request.param)
+    return path
+
+
+def test_same_results(model, path):
+    expected = processing.results(model)
+    results = ResultsStore(path, energysystem=model.es)
+
+    assert set(results) == set(expected)
+    for k in expected:
+        assert_frame_equal(results[k]["sequences"], expected[k]["sequences"])
+        assert_series_equal(results[k]["scalars"], expected[k]["scalars"])
+    bus = model.es.groups["b_el1"]
+    assert list(results[bus, None]["sequences"]) == ["duals"]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5])
+def test_written_in_chunks(model, tmpdir, monkeypatch, chunk_size):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(results_store, "_CHUNK_SIZE", chunk_size)
+    path = os.path.join(str(tmpdir), "results")
+    write_results(model, path)
+    expected = processing.results(model)
+    results = ResultsStore(path, energysystem=model.es)
+
+    assert set(results) == set(expected)
+    for k in expected:
+        assert_frame_equal(results[k]["sequences"], expected[k]["sequences"])
+        assert_series_equal(results[k]["scalars"], expected[k]["scalars"])
+
+
+def test_keys_without_energy_system(model, path):
+    results = ResultsStore(path)
+    expected = processing.convert_keys_to_strings(processing.results(model))
+    assert set(processing.convert_keys_to_strings(results)) == set(expected)
+    assert ("storage", None) in results
+
+
+def test_views(model, path):
+    expected = processing.results(model)
+    results = ResultsStore(path, energysystem=model.es)
+
+    for label in ("storage", model.es.groups["b_el1"]):
+        assert_frame_equal(
+            views.node(results, label)["sequences"],
+            views.node(expected, label)["sequences"],
+        )
+        assert_series_equal(
+            views.node(results, label)["scalars"],
+            views.node(expected, label)["scalars"],
+        )
+    assert_frame_equal(
+        views.node_output_by_type(results, solph.Transformer),
+        views.node_output_by_type(expected, solph.Transformer),
+    )
+
+
+def test_entries_are_read_on_access(model, path):
+    results = ResultsStore(path, energysystem=model.es)
+    storage = model.es.groups["storage"]
+    entry = results[storage, None]
+    assert entry._data is None
+    assert "storage_content" in entry["sequences"]
+    assert entry._data is not None
+
+
+def test_unknown_file_format(model, tmpdir):
+    with pytest.raises(ValueError, match="Unknown file format"):
+        write_results(model, str(tmpdir), file_format="csv")
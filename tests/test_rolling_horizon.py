@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -
+
+"""Tests of the rolling horizon optimization.
+
+SPDX-License-Identifier: MIT
+"""
+
+from functools import partial
+
+import pandas as pd
+import pytest
+
+from oemof import solph
+from oemof.solph import rolling_horizon
+
+
+def create_energy_system(periods=8):
+    timeindex = pd.date_range("1/1/2020", periods=periods, freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    es.add(
+        solph.Source(
+            label="pv",
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=10,
+                    fix=[0, 0.5, 1, 0.2, 0, 0.8, 0.1, 0][:periods],
+                )
+            },
+        )
+    )
+    es.add(
+        solph.Source(
+            label="plant",
+            outputs={
+                bel: solph.Flow(
+                    nominal_value=10,
+                    min=0.5,
+                    variable_costs=10,
+                    nonconvex=solph.NonConvex(startup_costs=20),
+                )
+            },
+        )
+    )
+    es.add(
+        solph.Source(
+            label="shortage",
+            outputs={bel: solph.Flow(variable_costs=1000)},
+        )
+    )
+    es.add(
+        solph.Sink(
+            label="demand",
+            inputs={
+                bel: solph.Flow(
+                    nominal_value=6,
+                    fix=[1, 0.8, 0.6, 0.9, 1, 0.5, 0.7, 1][:periods],
+                )
+            },
+        )
+    )
+    es.add(solph.Sink(label="excess", inputs={bel: solph.Flow()}))
+    es.add(
+        solph.GenericStorage(
+            label="storage",
+            nominal_storage_capacity=8,
+            initial_storage_level=0.5,
+            loss_rate=0.01,
+            inputs={bel: solph.Flow(nominal_value=4)},
+            outputs={bel: solph.Flow(nominal_value=4, variable_costs=0.1)},
+        )
+    )
+    return es
+
+
+def sequences(results, es, source, target=None):
+    source = es.groups[source]
+    if target is not None:
+        target = es.groups[target]
+    return results[source, target]["sequences"]
+
+
+def test_windows():
+    es = create_energy_system(periods=7)
+    rolling = solph.RollingHorizon(es, window=3, overlap=2)
+    assert rolling.windows() == [(0, 3, 5), (3, 6, 7), (6, 7, 7)]
+    with pytest.raises(ValueError, match="at least one timestep"):
+        solph.RollingHorizon(es, window=0)
+
+
+def test_single_window_equals_monolithic_model():
+    es = create_energy_system()
+    om = solph.Model(es)
+    om.solve(solver="cbc")
+    expected = om.results()
+
+    results = solph.RollingHorizon(es, window=8).solve(solver="cbc")
+    assert results.keys() == expected.keys()
+    for k in expected:
+        pd.testing.assert_frame_equal(
+            results[k]["sequences"], expected[k]["sequences"]
+        )
+
+
+def test_state_is_carried_between_windows():
+    es = create_energy_system()
+    storage = es.groups["storage"]
+    nonconvex = es.groups["plant"].outputs[es.groups["electricity"]].nonconvex
+    rolling = solph.RollingHorizon(es, window=2, overlap=2)
+    results = rolling.solve(solver="cbc")
+    assert len(rolling.objectives) == 4
+
+    content = sequences(results, es, "storage")["storage_content"]
+    assert len(content) == 8
+    assert (content.index == es.timeindex).all()
+    storage_in = sequences(results, es, "electricity", "storage")["flow"]
+    storage_out = sequences(results, es, "storage", "electricity")["flow"]
+    previous = 4
+    for t in range(8):
+        assert content.iloc[t] == pytest.approx(
+            previous * 0.99 + storage_in.iloc[t] - storage_out.iloc[t]
+        )
+        previous = content.iloc[t]
+
+    plant = sequences(results, es, "plant", "electricity")
+    for t in range(8):
+        on = plant["status"].iloc[t]
+        before = plant["status"].iloc[t - 1] if t > 0 else 0
+        assert plant["startup"].iloc[t] == pytest.approx(max(on - before, 0))
+
+    # the balanced storage ends at its initial storage level
+    assert content.iloc[-1] == pytest.approx(4)
+
+    # the energy system is restored
+    assert storage.initial_storage_level == 0.5
+    assert storage.balanced is True
+    assert nonconvex.initial_status == 0
+    assert len(es.timeindex) == 8
+
+
+def test_minimum_uptime_is_kept_between_windows():
+    es = create_energy_system()
+    bel = es.groups["electricity"]
+    nonconvex = solph.NonConvex(
+        startup_costs=20,
+        minimum_uptime=3,
+        minimum_downtime=2,
+        up_down_formulation="startup",
+    )
+    es.groups["plant"].outputs[bel].nonconvex = nonconvex
+    results = solph.RollingHorizon(es, window=1).solve(solver="cbc")
+
+    status = [
+        round(s) for s in sequences(results, es, "plant", bel.label)["status"]
+    ]
+    assert 1 in status
+    previous = 0
+    for t, on in enumerate(status):
+        if on != previous:
+            duration = 3 if on else 2
+            assert status[t : t + duration] == [on] * len(
+                status[t : t + duration]
+            )
+        previous = on
+    assert nonconvex.initial_status == 0
+    assert nonconvex.initial_uptime is None
+    assert nonconvex.initial_downtime is None
+
+
+def test_time_slice():
+    es = create_energy_system()
+    flow = es.groups["demand"].inputs[es.groups["electricity"]]
+    fix = flow.fix
+    with rolling_horizon.time_slice(es, 2, 5):
+        assert list(flow.fix) == [0.6, 0.9, 1]
+        assert len(es.timeindex) == 3
+        assert es.timeindex[0] == pd.Timestamp("1/1/2020 02:00")
+        # scalars are kept
+        assert flow.variable_costs[100] == 0
+    assert flow.fix is fix
+    assert len(es.timeindex) == 8
+
+
+def test_time_series():
+    es = create_energy_system()
+    bel = es.groups["electricity"]
+    bheat = solph.Bus(label="heat")
+    chp = solph.Transformer(
+        label="chp",
+        inputs={bel: solph.Flow()},
+        outputs={bheat: solph.Flow()},
+        conversion_factors={bheat: [0.9, 0.8] * 4},
+    )
+    es.add(bheat, chp)
+    series = {
+        (obj, name, key): list(values)
+        for obj, name, key, values in rolling_horizon.time_series(es)
+    }
+    assert series[chp, "conversion_factors", bheat] == [0.9, 0.8] * 4
+    demand = es.groups["demand"].inputs[bel]
+    assert series[demand, "fix", None] == list(demand.fix)
+    # scalar sequences, e.g. the variable costs, are constant
+    assert not any(name == "variable_costs" for _, name, _ in series)
+    with rolling_horizon.time_slice(es, 2, 5):
+        assert list(chp.conversion_factors[bheat]) == [0.9, 0.8, 0.9]
+
+
+def test_time_slice_keeps_lists_which_are_no_sequences():
+    es = create_energy_system()
+    bel = es.groups["electricity"]
+    pwltf = solph.custom.PiecewiseLinearTransformer(
+        label="pwltf",
+        inputs={bel: solph.Flow(nominal_value=8)},
+        outputs={solph.Bus(label="heat"): solph.Flow()},
+        in_breakpoints=list(range(9)),
+        conversion_function=lambda x: x ** 2,
+        pw_repn="CC",
+    )
+    es.add(pwltf)
+    with rolling_horizon.time_slice(es, 2, 5):
+        assert pwltf.in_breakpoints == list(range(9))
+
+
+def test_investment_is_not_possible():
+    es = create_energy_system()
+    es.add(
+        solph.Source(
+            outputs={
+                es.groups["electricity"]: solph.Flow(
+                    investment=solph.Investment(ep_costs=1)
+                )
+            }
+        )
+    )
+    with pytest.raises(ValueError, match="Investment"):
+        solph.RollingHorizon(es, window=4).solve(solver="cbc")
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_solve_scenarios(processes):
+    scenarios = {
+        "base": create_energy_system,
+        "short": partial(create_energy_system, periods=4),
+    }
+    results = rolling_horizon.solve_scenarios(
+        scenarios, window=2, overlap=1, processes=processes
+    )
+    es = create_energy_system()
+    expected = solph.RollingHorizon(es, window=2, overlap=1).solve(
+        solver="cbc"
+    )
+
+    assert set(results) == {"base", "short"}
+    assert len(results["short"]["storage", "None"]["sequences"]) == 4
+    pd.testing.assert_frame_equal(
+        results["base"]["storage", "None"]["sequences"],
+        sequences(expected, es, "storage"),
+    )
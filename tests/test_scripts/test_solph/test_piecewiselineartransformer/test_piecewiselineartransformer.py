@@ -13,6 +13,7 @@ SPDX-License-Identifier: GPL-3.0-or-later
 
 import numpy as np
 import pandas as pd
+import pytest
 
 import oemof.solph as solph
 from oemof.solph import Bus
@@ -23,7 +24,19 @@ from oemof.solph import Sink
 from oemof.solph import processing
 
 
-def test_pwltf():
+def convex(x):
+    return 0.01 * x ** 2
+
+
+def concave(x):
+    return 2 * x - 0.01 * x ** 2
+
+
+@pytest.mark.parametrize(
+    "conv_func, pw_repn",
+    [(convex, "CC"), (convex, "native"), (concave, "native")],
+)
+def test_pwltf(conv_func, pw_repn):
     # Set timeindex and create data
     periods = 20
     datetimeindex = pd.date_range("1/1/2019", periods=periods, freq="H")
@@ -41,10 +54,7 @@ def test_pwltf():
 
     energysystem.add(b_gas, b_el, demand_el)
 
-    # Define conversion function and breakpoints
-    def conv_func(x):
-        return 0.01 * x ** 2
-
+    # Define breakpoints
     in_breakpoints = np.arange(0, 110, 25)
     out_breakpoints = conv_func(in_breakpoints)
 
@@ -56,7 +66,7 @@ def test_pwltf():
         in_breakpoints=in_breakpoints,
         out_breakpoints=out_breakpoints,
         conversion_function=conv_func,
-        pw_repn="CC",
+        pw_repn=pw_repn,
     )
 
     energysystem.add(pwltf)
@@ -67,6 +77,9 @@ def test_pwltf():
 
     # Get results
     results = processing.results(optimization_model)
+    # the auxiliary variables are not part of the results
+    arrays = processing._variable_arrays(optimization_model)
+    assert not any("segment" in v for v in arrays.values())
     string_results = processing.convert_keys_to_strings(results)
     sequences = {k: v["sequences"] for k, v in string_results.items()}
     df = pd.concat(sequences, axis=1)
@@ -97,3 +110,58 @@ def test_pwltf():
     )
     production_modeled = df[("pwltf", "electricity")]["flow"].values
     assert np.allclose(production_modeled, production_expected)
+
+
+def create_costly_output(**kwargs):
+    """A transformer with an input that has to be used and an output with
+    costs, which makes a lower outflow cheaper."""
+    energysystem = EnergySystem(
+        timeindex=pd.date_range("1/1/2019", periods=1, freq="H")
+    )
+    b_gas = Bus(label="biogas", balanced=False)
+    b_el = Bus(label="electricity")
+    energysystem.add(b_gas, b_el, Sink(label="excess", inputs={b_el: Flow()}))
+    energysystem.add(
+        solph.custom.PiecewiseLinearTransformer(
+            label="pwltf",
+            inputs={b_gas: Flow(nominal_value=100, fix=0.5)},
+            outputs={b_el: Flow(variable_costs=1)},
+            in_breakpoints=[0, 50, 100],
+            conversion_function=lambda x: x * (150 - x) / 100,
+            pw_repn="native",
+            **kwargs,
+        )
+    )
+    model = Model(energysystem)
+    model.solve(solver="cbc")
+    return model.results()[energysystem.groups["pwltf"], b_el]
+
+
+def test_concave_native_is_a_relaxation():
+    flow = create_costly_output(force_binary=False)["sequences"]["flow"]
+    assert flow.iloc[0] == pytest.approx(0)
+
+    flow = create_costly_output()["sequences"]["flow"]
+    assert flow.iloc[0] == pytest.approx(50)
+
+
+def test_different_pyomo_representations():
+    energysystem = EnergySystem(
+        timeindex=pd.date_range("1/1/2019", periods=1, freq="H")
+    )
+    b_gas = Bus(label="biogas", balanced=False)
+    b_el = Bus(label="electricity", balanced=False)
+    energysystem.add(b_gas, b_el)
+    for number, pw_repn in enumerate(["CC", "DCC", "native"]):
+        energysystem.add(
+            solph.custom.PiecewiseLinearTransformer(
+                label="pwltf_{0}".format(number),
+                inputs={b_gas: Flow(nominal_value=100)},
+                outputs={b_el: Flow()},
+                in_breakpoints=[0, 50, 100],
+                conversion_function=concave,
+                pw_repn=pw_repn,
+            )
+        )
+    with pytest.raises(ValueError, match=r"\['CC', 'DCC'\]"):
+        Model(energysystem)
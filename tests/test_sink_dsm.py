@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -
+
+"""Tests of the compact formulation of SinkDSM with approach "DIW" and of
+the coefficients of the prebuilt SinkDSM rows.
+
+SPDX-License-Identifier: MIT
+"""
+
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from pyomo.environ import ConcreteModel
+from pyomo.environ import Var
+from pyomo.repn import generate_standard_repn
+
+from oemof import solph
+from oemof.solph.custom.sink_dsm import _dsm_capacity
+
+PRICES = [30, 10, 45, 50, 5, 20, 60, 15, 25, 40, 8, 35]
+PV = [0, 0.2, 0.9, 0.1, 0.6, 0, 0.8, 0.3, 0, 1, 0.4, 0]
+
+
+def create_energy_system(compact, invest, delay_time, efficiency=1):
+    timeindex = pd.date_range("1/1/2020", periods=len(PRICES), freq="H")
+    es = solph.EnergySystem(timeindex=timeindex)
+    bel = solph.Bus(label="electricity")
+    es.add(bel)
+    es.add(
+        solph.Source(
+            label="grid",
+            outputs={
+                bel: solph.Flow(variable_costs=PRICES, nominal_value=1.5)
+            },
+        ),
+        solph.Source(
+            label="pv", outputs={bel: solph.Flow(fix=PV, nominal_value=1)}
+        ),
+        solph.Sink(label="excess", inputs={bel: solph.Flow()}),
+    )
+    kwargs = {}
+    if invest:
+        kwargs.update(
+            flex_share_up=0.8,
+            flex_share_down=0.6,
+            investment=solph.Investment(ep_costs=20, existing=0.5, maximum=2),
+        )
+    else:
+        kwargs.update(max_demand=1, max_capacity_up=0.8, max_capacity_down=0.6)
+    es.add(
+        solph.custom.SinkDSM(
+            label="dsm",
+            inputs={bel: solph.Flow()},
+            demand=[0.8, 0.6, 1, 0.9, 0.5, 0.7, 1, 0.4, 0.6, 0.9, 0.3, 0.8],
+            capacity_up=[0.5, 0.8, 1, 0.6, 0.9, 0.4, 1, 0.7, 0.5, 1, 0.9, 0.6],
+            capacity_down=[1, 0.6, 0.8, 1, 0.5, 0.9, 1, 0.7, 0.8, 0.6, 1, 1],
+            approach="DIW",
+            delay_time=delay_time,
+            efficiency=efficiency,
+            cost_dsm_up=1,
+            cost_dsm_down_shift=[2, 1] * 6,
+            cost_dsm_down_shed=70,
+            recovery_time_shift=4,
+            recovery_time_shed=3,
+            shed_time=1,
+            compact=compact,
+            **kwargs,
+        )
+    )
+    return es
+
+
+@pytest.mark.parametrize("invest", [False, True])
+@pytest.mark.parametrize(
+    "delay_time, efficiency", [(1, 1), (2, 0.9), (3, 0.8), (5, 1)]
+)
+def test_compact_equals_pairwise_formulation(invest, delay_time, efficiency):
+    objectives = []
+    for compact in (False, True):
+        om = solph.Model(
+            create_energy_system(compact, invest, delay_time, efficiency)
+        )
+        om.solve(solver="cbc")
+        objectives.append(om.objective())
+    assert objectives[1] == pytest.approx(objectives[0])
+
+
+def test_compact_model_size():
+    es = create_energy_system(True, False, delay_time=3)
+    om = solph.Model(es)
+    block = om.SinkDSMDIWCompactBlock
+    assert len(block.dsm_do_shift) == len(PRICES)
+    # the compensation within the delay time is implied by the balance of
+    # the cumulated shifts for the last time steps
+    assert len(block.dsm_up_compensation) == len(PRICES) - 4
+    assert len(block.dsm_updo_constraint) == 1
+
+    om.solve(solver="cbc")
+    dsm = solph.views.node(om.results(), "dsm")["sequences"]
+    up = dsm[(("dsm", "None"), "dsm_up")]
+    down = dsm[(("dsm", "None"), "dsm_do_shift")]
+    assert up.sum() == pytest.approx(down.sum())
+    assert up.cumsum().values == pytest.approx(
+        dsm[(("dsm", "None"), "dsm_up_cumulated")].values
+    )
+
+
+@pytest.mark.parametrize("existing", [0, 0.7, 1.3])
+@pytest.mark.parametrize(
+    "kind, share", [("up", 0.1), ("down", 0.9), ("demand", 1)]
+)
+def test_dsm_capacity_of_investment_in_pyomo_order(kind, share, existing):
+    """The prebuilt rows have exactly the coefficients of the expressions
+    `prefix * (invest + existing) * share * factors` (and `prefix *
+    (invest + existing)` for the demand) which pyomo would generate."""
+    g = SimpleNamespace(
+        flex_share_up=0.1,
+        flex_share_down=0.9,
+        investment=SimpleNamespace(existing=existing),
+    )
+    m = ConcreteModel()
+    m.invest = Var()
+    prefix, delay, increment = 0.1, 0.3, 0.1
+    if kind == "demand":
+        expr = prefix * (m.invest + existing) * delay * increment
+    else:
+        expr = prefix * (m.invest + existing) * share * delay * increment
+    repn = generate_standard_repn(expr)
+
+    constant, coef = _dsm_capacity(
+        g, prefix, kind, delay, increment, invest=True
+    )
+
+    assert coef == repn.linear_coefs[0]
+    assert constant == repn.constant
+    # the factors are not simply multiplied from the left
+    if kind == "up" and existing:
+        assert coef != prefix * share * delay * increment
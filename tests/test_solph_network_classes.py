@@ -11,6 +11,8 @@ SPDX-License-Identifier: MIT
 
 import warnings
 
+import numpy
+import pandas
 import pytest
 from oemof.tools.debugging import SuspiciousUsageWarning
 
@@ -113,3 +115,53 @@ def test_warning_fixed_still_used():
         solph.Flow(fixed=True)
         assert len(w) != 0
         assert msg == str(w[-1].message)
+
+
+def test_flow_sequences_are_read_only_views():
+    values = numpy.array([0.2, 0.5, 0.8])
+    flow = solph.Flow(fix=pandas.Series(values), variable_costs=5)
+    other = solph.Flow(max=values)
+    assert numpy.shares_memory(flow.fix.values, values)
+    assert numpy.shares_memory(other.max.values, values)
+    assert flow.fix[1] == 0.5
+    assert isinstance(flow.fix[1], float)
+    assert flow.variable_costs[8759] == 5
+    with pytest.raises(TypeError):
+        flow.fix[1] = 0
+    with pytest.raises(ValueError):
+        other.max.values[1] = 0
+    assert list(flow.fix[1:]) == [0.5, 0.8]
+
+
+def test_storage_sequences_broadcast_scalars():
+    bus = solph.Bus()
+    storage = solph.GenericStorage(
+        inputs={bus: solph.Flow()},
+        outputs={bus: solph.Flow()},
+        loss_rate=0.01,
+        max_storage_level=[0.9, 0.8],
+    )
+    assert storage.loss_rate[100] == 0.01
+    assert list(storage.max_storage_level) == [0.9, 0.8]
+    assert solph.sequence(storage.loss_rate) is storage.loss_rate
+
+
+def test_wrong_up_down_formulation():
+    with pytest.raises(ValueError, match="'status' or 'startup'"):
+        solph.NonConvex(minimum_uptime=2, up_down_formulation="window")
+
+
+def test_wrong_number_of_units():
+    with pytest.raises(ValueError, match="positive integer"):
+        solph.NonConvex(number_of_units=2.5)
+    with pytest.raises(ValueError, match="positive integer"):
+        solph.NonConvex(number_of_units=0)
+
+
+def test_status_formulation_of_several_units():
+    nonconvex = solph.NonConvex(number_of_units=3, minimum_uptime=2)
+    assert nonconvex.up_down_formulation == "startup"
+    with pytest.raises(ValueError, match="'startup'"):
+        solph.NonConvex(
+            number_of_units=3, minimum_uptime=2, up_down_formulation="status"
+        )